@@ -7,9 +7,15 @@ import { ActionItemsTab, ActionItemsTabRef } from './components/tabs/ActionItems
 import { ConfigModal } from './components/ConfigModal';
 import { DateRangePicker } from './components/DateRangePicker';
 import { LayerConfigModal } from './components/LayerConfigModal';
+import { DebugPanel } from './components/DebugPanel';
 import { RawAdRecord, AdConfiguration, TodoItem, LayerConfiguration, DEFAULT_LAYER_CONFIG } from './types';
 import { calculateDefaultThresholds, QuadrantThresholds } from './utils/quadrantUtils';
-import { matchesConfig } from './utils/dataUtils';
+import { getMembershipIndex } from './utils/ruleEngine';
+import { filterByDateRange, getDatePartition } from './utils/dataUtils';
+import { getRollupCube } from './utils/rollupCube';
+import { recordsFromColumnar } from './utils/columnarStore';
+import { clearLastSession, getLastSession, loadDataset, setDatasetKey } from './utils/persistentCache';
+import { debugLog, isDebugPanelEnabled } from './utils/instrumentation';
 import { BarChart3, Upload, Settings, Zap, Download, RefreshCw } from 'lucide-react';
 import { useConfig } from './contexts/ConfigContext';
 
@@ -128,72 +134,20 @@ function App() {
     }, [data, startDate, sheetConfig]);
 
     // 过滤数据（仅日期筛选，不应用配置筛选）
-    const { filteredData, comparisonData } = useMemo(() => {
-        console.log('🔍 Step 5: Filtering data...');
-        console.log('🔍 Total data:', data.length);
-        console.log('🔍 Date range:', { startDate, endDate });
-
-        if (!startDate || !endDate) {
-            console.log('🔍 No date range set, returning all data');
-            return { filteredData: data, comparisonData: [] };
-        }
-
-        const getLocalMidnight = (dateStr: string) => {
-            return new Date(dateStr + 'T00:00:00').getTime();
-        };
-
-        const startMs = getLocalMidnight(startDate);
-        const endMs = getLocalMidnight(endDate);
-
-        console.log('🔍 Date range (ms):', { startMs, endMs });
-        console.log('🔍 Date range (readable):', {
-            start: new Date(startMs).toISOString(),
-            end: new Date(endMs).toISOString()
-        });
-
-        const main = data.filter(r => {
-            const datePart = r.date.includes(' ') ? r.date.split(' ')[0] : r.date;
-            const d = getLocalMidnight(datePart);
-            const isInRange = d >= startMs && d <= endMs;
-
-            if (!isInRange && data.indexOf(r) < 3) {
-                console.log(`🔍 Sample filtered out: date=${r.date}, datePart=${datePart}, ms=${d}, inRange=${isInRange}`);
-            }
-
-            return isInRange;
-        });
-
-        console.log('🔍 Step 6: Filtered result:', main.length, 'records');
-        if (main.length > 0) {
-            console.log('🔍 First filtered record:', main[0]);
-        }
-
-        if (compareMode) {
-            const oneDay = 24 * 60 * 60 * 1000;
-            const durationMs = endMs - startMs;
-            const compEndMs = startMs - oneDay;
-            const compStartMs = compEndMs - durationMs;
-
-            const comp = data.filter(r => {
-                const datePart = r.date.includes(' ') ? r.date.split(' ')[0] : r.date;
-                const d = getLocalMidnight(datePart);
-                return d >= compStartMs && d <= compEndMs;
-            });
-
-            return { filteredData: main, comparisonData: comp };
-        }
-
-        return { filteredData: main, comparisonData: [] };
-    }, [data, startDate, endDate, compareMode]);
+    const { filteredData, comparisonData } = useMemo(
+        () => filterByDateRange(data, startDate, endDate, compareMode),
+        [data, startDate, endDate, compareMode]
+    );
 
     // Calculate business line thresholds for Action Items
     // Merge default thresholds with user-adjusted thresholds
     const businessLineThresholds = useMemo(() => {
         const thresholdsMap = new Map<string, QuadrantThresholds>();
+        // 业务线成员索引（与 ActionItemsTab 共享同一份缓存）
+        const membership = getMembershipIndex(filteredData, configs);
 
-        configs.forEach(config => {
-            const businessLineData = filteredData.filter(r => matchesConfig(r, config));
-            if (businessLineData.length > 0) {
+        configs.forEach((config, configIndex) => {
+            if (membership.rowIds[configIndex].length > 0) {
                 // Check if user has adjusted thresholds for this business line
                 const userThresholds = userAdjustedThresholds.get(config.id);
                 if (userThresholds) {
@@ -201,7 +155,7 @@ function App() {
                     thresholdsMap.set(config.id, userThresholds);
                 } else {
                     // Use default calculated thresholds
-                    const thresholds = calculateDefaultThresholds(businessLineData, config);
+                    const thresholds = calculateDefaultThresholds(filteredData, config);
                     thresholdsMap.set(config.id, thresholds);
                 }
             }
@@ -220,13 +174,33 @@ function App() {
     };
 
     const handleDataLoaded = (newData: RawAdRecord[]) => {
-        console.log('🔍 Step 4: handleDataLoaded called with:', newData.length, 'records');
-        console.log('🔍 Sample data:', newData.slice(0, 2));
+        debugLog('handleDataLoaded', newData.length, 'records', 'Sample data:', () => newData.slice(0, 2));
+        // 加载时按天分区、构建汇总立方体各一次，之后调整日期范围只做切片 / 查询
+        getDatePartition(newData);
+        getRollupCube(newData);
         setData(newData);
     };
 
+    // 恢复上次打开的数据（IndexedDB 中缓存的解析结果）
+    const [isRestoring, setIsRestoring] = useState(() => getLastSession() !== null);
+    useEffect(() => {
+        const session = getLastSession();
+        if (!session) return;
+        loadDataset(session.contentHash).then(dataset => {
+            if (dataset) {
+                const records = recordsFromColumnar(dataset);
+                setDatasetKey(records, session.contentHash);
+                handleDataLoaded(records);
+                debugLog('restoreSession', `✅ Restored ${records.length} records from ${session.fileName}`);
+            } else {
+                clearLastSession();
+            }
+        }).finally(() => setIsRestoring(false));
+    }, []);
+
     const handleReupload = () => {
         if (confirm('确定要清除当前分析数据并重新上传新表格吗？')) {
+            clearLastSession();
             setData([]);
             setStartDate('');
             setEndDate('');
@@ -258,6 +232,17 @@ function App() {
         setEndDate(formatDate(end));
     };
 
+    if (isRestoring) {
+        return (
+            <div className="min-h-screen bg-slate-50 flex items-center justify-center">
+                <div className="flex items-center gap-3 text-slate-600">
+                    <RefreshCw className="w-5 h-5 animate-spin" />
+                    <span className="text-sm font-semibold">正在恢复上次的数据...</span>
+                </div>
+            </div>
+        );
+    }
+
     if (data.length === 0) {
         return <FileUpload onDataLoaded={handleDataLoaded} configs={configs} onConfigsChange={setConfigs} layerConfig={layerConfig} onLayerConfigChange={setLayerConfig} />;
     }
@@ -475,6 +460,9 @@ function App() {
                     </div>
                 </div>
             </footer>
+
+            {/* 流水线运行统计（?debug=1） */}
+            {isDebugPanelEnabled() && <DebugPanel />}
         </div>
     );
 }
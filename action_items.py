@@ -0,0 +1,825 @@
+#!/usr/bin/env python3
+"""
+Action Items 生成（generateActionItems 的向量化 Python 版）
+
+与 utils/actionItemsUtils.ts / components/tabs/ActionItemsTab.tsx 的逻辑保持一致：
+- 业务线匹配：阈值使用 dataUtils.matchesConfig 的语义（不区分大小写、逗号分隔），
+  Action Items 使用区分大小写的 'exact' 语义；规则按名称字典逐个取值计算一次
+- 层级分类只看 campaign_name（与 benchmarkService.getCampaignLayer 一致）
+- 各业务线的 Layer Benchmark、象限、优先级、低于平均的 AdSet / Ad 筛选与排序与 TS 端一致
+- 中间指标沿用 calculateMetrics 的单位：ctr / cvr / atc_rate 为百分比，其余转化率为小数
+- ROI 类型 Campaign 输出命中的诊断场景（diagnoseScenarioBatch 的七个场景，每行「场景 - 诊断: 建议」），
+  AdSet / Ad 及非 ROI Campaign 使用 OPTIMIZATION_RULES 的调优指导
+
+用法:
+    python action_items.py <导出文件路径> <业务线配置.json> [--layer-config 层级配置.json]
+    python action_items.py --check-guidance guidance-parity.json   # 与 scripts/guidanceParity.ts 的输出比对
+"""
+
+import json
+import sys
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pandas as pd
+
+from hierarchy_kernel import (
+    COUNTER_FIELDS, LEVELS, aggregate_hierarchy, counter_values, derive_metrics, factorize_hierarchy, segment_sums,
+)
+from optimization_rules import guidance_batch
+
+RULE_FIELDS = ('campaign_name', 'adset_name', 'ad_name')
+
+# 与 types.ts 的 DEFAULT_LAYER_CONFIG 一致
+DEFAULT_LAYER_CONFIG = {
+    'awareness': {'rules': [{'field': 'campaign_name', 'operator': 'contains', 'value': '-AW-'}], 'logic': 'OR'},
+    'traffic': {'rules': [{'field': 'campaign_name', 'operator': 'contains', 'value': '-TR-'}], 'logic': 'OR'},
+    'conversion': {'rules': [{'field': 'campaign_name', 'operator': 'contains', 'value': '-CV-'}], 'logic': 'OR'},
+}
+
+# 分类顺序与 LAYER_ORDER 一致，都不命中时归为 Conversion
+LAYERS = ('awareness', 'traffic', 'conversion')
+DEFAULT_LAYER = LAYERS.index('conversion')
+
+# 与 campaignDiagnostics.ts 的 SCENARIO_NAMES 一致（位顺序）
+SCENARIO_NAMES = ('CPA异常高', 'AOV异常低', 'CVR异常低', 'CPC异常高', 'CPATC异常高', '预算分散', '花费困难')
+# 与 ActionItemsTab 的格式化一致：priority === 1 为 🔴、=== 2 为 🟡，其余为 🟢
+SEVERITY_EMOJI = {1: '🔴', 2: '🟡'}
+NO_SCENARIO_GUIDANCE = '⚠️ 暂无匹配的 action'
+
+# calcBenchmarks 返回的字段 -> derive_metrics 的指标
+BENCHMARK_FIELDS = {
+    'avgCpa': 'cpa', 'avgCpatc': 'cpatc', 'avgCpc': 'cpc', 'avgCvr': 'cvr', 'avgCtr': 'ctr',
+    'avgCpm': 'cpm', 'avgAtcRate': 'atc_rate', 'avgCheckoutRate': 'checkout_rate',
+    'avgPurchaseRate': 'purchase_rate', 'avgClickToPvRate': 'click_to_pv_rate',
+    'avgRoi': 'roi', 'avgAov': 'aov', 'avgFrequency': 'frequency',
+}
+
+# calculateMetrics 中以百分比表示的指标
+PERCENT_METRICS = ('ctr', 'cvr', 'atc_rate')
+
+# CampaignMetrics 中参与调优规则的中间指标
+GUIDANCE_METRICS = ('cvr', 'aov', 'cpa', 'cpatc', 'atc_rate', 'ctr', 'clicks', 'impressions', 'reach', 'frequency')
+
+
+# ========== 规则匹配 ==========
+
+def _rule_hits(values, rule, semantics):
+    """
+    单条规则对一组名称取值的命中结果
+
+    semantics 与 utils/ruleEngine.ts 的 RuleSemantics 一致：
+    'config' / 'layer' 不区分大小写且按逗号拆分关键词，'exact' / 'campaignOnly' 区分大小写
+    """
+    field = rule.get('field')
+    n = len(values)
+    if field not in RULE_FIELDS or (semantics == 'campaignOnly' and field != 'campaign_name'):
+        return np.zeros(n, dtype=bool)
+
+    fallback = semantics == 'config'  # config 语义下未知操作符视为命中
+    value = str(rule.get('value', ''))
+    if semantics in ('config', 'layer'):
+        values = [v.lower() for v in values]
+        targets = [t.strip() for t in value.lower().split(',') if t.strip()]
+    else:
+        targets = [value]
+    if not targets:
+        return np.full(n, semantics == 'config')
+
+    op = rule.get('operator')
+    if op == 'contains':
+        return np.array([any(t in v for t in targets) for v in values], dtype=bool)
+    if op == 'not_contains':
+        if semantics == 'exact':
+            return np.zeros(n, dtype=bool)
+        return np.array([not any(t in v for t in targets) for v in values], dtype=bool)
+    if op == 'equals':
+        return np.array([v in targets for v in values], dtype=bool)
+    if op == 'startsWith' and semantics == 'exact':
+        return np.array([any(v.startswith(t) for t in targets) for v in values], dtype=bool)
+    return np.full(n, fallback)
+
+
+def _name_column(df, field):
+    col = df[field]
+    if not isinstance(col.dtype, pd.CategoricalDtype):
+        col = col.astype(str).astype('category')
+    return col.cat.codes.to_numpy(), [str(v) for v in col.cat.categories]
+
+
+def match_rule_group(df, rules, logic, semantics, empty_result):
+    """规则组对每行的命中掩码；每条规则只对名称字典计算一次"""
+    if not rules:
+        return np.full(len(df), empty_result)
+
+    columns = {}
+    result = None
+    for rule in rules:
+        field = rule.get('field')
+        if field in RULE_FIELDS and field not in columns:
+            columns[field] = _name_column(df, field)
+        if field in columns:
+            codes, categories = columns[field]
+            hits = _rule_hits(categories, rule, semantics)[codes]
+        else:
+            hits = np.zeros(len(df), dtype=bool)
+
+        if result is None:
+            result = hits
+        elif logic == 'AND':
+            result = result & hits
+        else:
+            result = result | hits
+    return result
+
+
+def match_config(df, config, semantics='exact'):
+    """业务线配置的命中掩码（无规则时 config 语义全部命中，exact 语义全部不命中）"""
+    return match_rule_group(
+        df, config.get('rules') or [], config.get('rulesLogic') or 'AND',
+        semantics, semantics == 'config',
+    )
+
+
+def classify_layers(campaign_names, layer_config=None):
+    """按 campaign_name 分类层级，返回 LAYERS 下标数组（与 getCampaignLayer 一致）"""
+    layer_config = layer_config or DEFAULT_LAYER_CONFIG
+    names = pd.DataFrame({'campaign_name': pd.Categorical(np.asarray(campaign_names, dtype=str))})
+    layers = np.full(len(names), DEFAULT_LAYER, dtype=np.int8)
+    pending = np.ones(len(names), dtype=bool)
+    for i, layer in enumerate(LAYERS):
+        group = layer_config.get(layer) or {}
+        hit = match_rule_group(names, group.get('rules') or [], group.get('logic'), 'campaignOnly', False)
+        layers[pending & hit] = i
+        pending &= ~hit
+    return layers
+
+
+# ========== 聚合与 Benchmark ==========
+
+def _benchmarks_from_sums(sums, index=0):
+    metrics = derive_metrics(sums)
+    return {key: float(metrics[metric][index]) for key, metric in BENCHMARK_FIELDS.items()}
+
+
+def calculate_layer_benchmarks(df, layer_config=None):
+    """
+    各层级的加权 Benchmark（对应 calculateLayerBenchmarks）
+
+    返回 {'awareness': {..., 'hasData'}, 'traffic': {...}, 'conversion': {...}, 'global': {...}}
+    """
+    codes, categories = _name_column(df, 'campaign_name')
+    row_layers = classify_layers(categories, layer_config)[codes] if len(df) else np.zeros(0, dtype=np.int8)
+
+    values = counter_values(df)
+    sums = segment_sums(row_layers, len(LAYERS), values)
+    counts = np.bincount(row_layers, minlength=len(LAYERS))
+
+    result = {}
+    for i, layer in enumerate(LAYERS):
+        result[layer] = {**_benchmarks_from_sums(sums, i), 'hasData': bool(counts[i] > 0)}
+    total = {field: np.array([column.sum()]) for field, column in values.items()}
+    result['global'] = _benchmarks_from_sums(total)
+    return result
+
+
+def benchmark_for_kpi(kpi_type, benchmarks):
+    """对应 getBenchmarkForKPI：优先使用对应层级，无数据时回退到全局"""
+    layer, key = {
+        'ROI': ('conversion', 'avgRoi'),
+        'CPC': ('traffic', 'avgCpc'),
+        'CPM': ('awareness', 'avgCpm'),
+    }.get(kpi_type, (None, None))
+    if layer is None:
+        return 0.0
+    return benchmarks[layer][key] if benchmarks[layer]['hasData'] else benchmarks['global'][key]
+
+
+def kpi_values(sums, kpi_type):
+    """对应 calculateKPI"""
+    metrics = derive_metrics(sums)
+    return metrics[{'ROI': 'roi', 'CPC': 'cpc'}.get(kpi_type, 'cpm')]
+
+
+def intermediate_metrics(sums):
+    """对应 actionItemsUtils.calculateMetrics：ctr / cvr / atc_rate 为百分比"""
+    metrics = derive_metrics(sums)
+    result = {name: metrics[name] * 100.0 if name in PERCENT_METRICS else metrics[name]
+              for name in ('ctr', 'cpc', 'cpm', 'cvr', 'cpa', 'atc_rate', 'cpatc', 'aov', 'frequency',
+                           'click_to_pv_rate', 'checkout_rate', 'purchase_rate')}
+    result.update({
+        'reach': sums['reach'],
+        'impressions': sums['impressions'],
+        'clicks': sums['link_clicks'],
+        'purchases': sums['purchases'],
+        'adds_to_cart': sums['adds_to_cart'],
+        'checkouts_initiated': sums['checkouts_initiated'],
+        'landing_page_views': sums['landing_page_views'],
+        'purchase_value': sums['purchase_value'],
+    })
+    return result
+
+
+def gap_percentage(actual, target):
+    """对应 calculateGapPercentage：目标为 0 时返回 0"""
+    actual = np.asarray(actual, dtype=np.float64)
+    if target == 0:
+        return np.zeros_like(actual)
+    return (actual - target) / target * 100.0
+
+
+def calculate_priority(actual_roi, benchmark_roi):
+    """对应 calculatePriority（仅 ROI 类型）：P0 低于基准 20% 以上，P1 低于基准 0-20%"""
+    actual_roi = np.asarray(actual_roi, dtype=np.float64)
+    if not benchmark_roi or benchmark_roi <= 0:
+        return np.full(len(actual_roi), None, dtype=object)
+    return np.where(actual_roi < benchmark_roi * 0.8, 'P0',
+                    np.where(actual_roi < benchmark_roi, 'P1', None)).astype(object)
+
+
+# ========== 业务线阈值 ==========
+
+def default_thresholds(df, configs):
+    """
+    对应 App.tsx 的 businessLineThresholds（calculateDefaultThresholds）
+
+    返回 {业务线 ID: {'spendThreshold', 'kpiThreshold'}}，没有数据的业务线不出现
+    """
+    thresholds = {}
+    for config in configs:
+        mask = match_config(df, config, 'config')
+        if not mask.any():
+            continue
+        codes, _ = pd.factorize(df['campaign_name'].to_numpy()[mask])
+        campaign_spend = np.bincount(codes, weights=df['spend'].to_numpy(dtype=np.float64)[mask])
+        thresholds[config['id']] = {
+            'spendThreshold': float(campaign_spend.mean()) if len(campaign_spend) else 0.0,
+            'kpiThreshold': config['targetValue'],
+        }
+    return thresholds
+
+
+# ========== Action Items ==========
+
+def _sort_by_gap(frame):
+    """
+    ROI 按差距升序，其余按差距降序（问题最严重的排在前面）
+
+    TS 端的比较函数只看 a 的 KPI 类型，多种 KPI 混合时不是全序，结果依赖排序算法；
+    这里改用 ROI 取差距、其余取负差距作为统一排序键（稳定排序），单一 KPI 时与 App 顺序一致
+    """
+    if len(frame) == 0:
+        return frame.reset_index(drop=True)
+    gap = frame['gapPercentage'].to_numpy(dtype=np.float64)
+    key = np.where(frame['kpiType'].to_numpy() == 'ROI', gap, -gap)
+    return frame.iloc[np.argsort(key, kind='stable')].reset_index(drop=True)
+
+
+def _level_rows(kind, names, sums, base, kpi_type, avg_kpi, target_value, select):
+    metrics = intermediate_metrics(sums)
+    actual = kpi_values(sums, kpi_type)
+    columns = {**names}
+    columns.update(base)
+    columns.update({
+        'spend': sums['spend'],
+        'actualValue': actual,
+        'gapPercentage': gap_percentage(actual, target_value),
+        'avgValue': avg_kpi,
+    })
+    if kind != 'campaign':
+        columns['vsAvgPercentage'] = gap_percentage(actual, avg_kpi)
+    columns.update({f'metrics.{k}': v for k, v in metrics.items()})
+    frame = pd.DataFrame({k: (np.broadcast_to(v, len(actual)) if np.ndim(v) == 0 else v)
+                          for k, v in columns.items()})
+    return frame.loc[select]
+
+
+def _business_line_items(df, config, thresholds, layer_config):
+    kpi_type = config['targetType']
+    target_value = thresholds['kpiThreshold']
+    avg_spend = thresholds['spendThreshold']
+
+    hierarchy = aggregate_hierarchy(df)
+    entities = hierarchy['entities']
+    campaign_sums, adset_sums, ad_sums = (
+        {field: hierarchy[level][field].to_numpy() for field in COUNTER_FIELDS}
+        for level in LEVELS
+    )
+    n_campaigns = len(hierarchy['campaign'])
+    total_sums = {field: np.array([column.sum()]) for field, column in counter_values(df).items()}
+
+    # Layer Benchmark 作为平均 KPI
+    avg_kpi = benchmark_for_kpi(kpi_type, calculate_layer_benchmarks(df, layer_config))
+    avg_metrics = {k: float(v[0]) for k, v in intermediate_metrics(total_sums).items()}
+    avg_business_line_spend = float(campaign_sums['spend'].mean()) if n_campaigns else 0.0
+
+    base = {
+        'businessLine': config['name'],
+        'businessLineId': config['id'],
+        'kpiType': kpi_type,
+        'targetValue': target_value,
+        'avgSpend': avg_business_line_spend,
+    }
+
+    def entity_names(level):
+        frame = hierarchy[level]
+        return {
+            {'campaign_name': 'campaignName', 'adset_name': 'adSetName', 'ad_name': 'adName'}[field]:
+                np.asarray(frame[field], dtype=object)
+            for field in RULE_FIELDS if field in frame.columns
+        }
+
+    # Campaign：象限为「观察区」或「问题区」
+    campaign_kpi = kpi_values(campaign_sums, kpi_type)
+    is_high_spend = campaign_sums['spend'] >= avg_spend
+    is_good_kpi = campaign_kpi >= target_value if kpi_type == 'ROI' else campaign_kpi <= target_value
+    quadrant = np.where(is_good_kpi,
+                        np.where(is_high_spend, 'potential', 'excellent'),
+                        np.where(is_high_spend, 'problem', 'watch'))
+    listed = ~is_good_kpi
+
+    campaigns = _level_rows('campaign', entity_names('campaign'), campaign_sums, base,
+                            kpi_type, avg_kpi, target_value, listed)
+    campaigns['quadrant'] = quadrant[listed]
+    campaigns['priority'] = (calculate_priority(campaigns['actualValue'], avg_kpi) if kpi_type == 'ROI'
+                             else np.full(len(campaigns), None, dtype=object))
+
+    # AdSet：只看已列出的 Campaign，低于平均 KPI；按 Campaign 分组后的顺序排列
+    adset_kpi = kpi_values(adset_sums, kpi_type)
+    below = adset_kpi < avg_kpi if kpi_type == 'ROI' else adset_kpi > avg_kpi
+    adset_select = below & listed[entities['adset']['parent']]
+    adsets = _level_rows('adset', entity_names('adset'), adset_sums, base,
+                         kpi_type, avg_kpi, target_value, adset_select)
+    adset_parent = entities['adset']['parent'][adset_select]
+    adsets = adsets.iloc[np.argsort(adset_parent, kind='stable')]
+
+    # Ad：直接从业务线数据筛选，不依赖 Campaign 象限
+    ad_kpi = kpi_values(ad_sums, kpi_type)
+    ad_below = ad_kpi < avg_kpi if kpi_type == 'ROI' else ad_kpi > avg_kpi
+    ads = _level_rows('ad', entity_names('ad'), ad_sums, base,
+                      kpi_type, avg_kpi, target_value, ad_below)
+
+    for frame in (campaigns, adsets, ads):
+        for name, value in avg_metrics.items():
+            frame[f'avgMetrics.{name}'] = value
+    return campaigns, adsets, ads
+
+
+def generate_action_items(df, configs, layer_config=None, thresholds=None):
+    """
+    生成 Action Items（对应 generateActionItems）
+
+    df 为 ad_data_loader.load_ad_data 的结果（已按日期筛选）。
+    thresholds 为 {业务线 ID: {'spendThreshold', 'kpiThreshold'}}，不提供时使用 default_thresholds。
+
+    返回 {'campaigns': DataFrame, 'adsets': DataFrame, 'ads': DataFrame}，
+    中间指标列名为 metrics.<指标> / avgMetrics.<指标>
+    """
+    if thresholds is None:
+        thresholds = default_thresholds(df, configs)
+
+    parts = {'campaigns': [], 'adsets': [], 'ads': []}
+    for config in configs:
+        bl_thresholds = thresholds.get(config['id'])
+        if not bl_thresholds:
+            continue
+        mask = match_config(df, config, 'exact')
+        if not mask.any():
+            continue
+        subset = df.loc[mask].reset_index(drop=True)
+        for key, frame in zip(parts, _business_line_items(subset, config, bl_thresholds, layer_config)):
+            parts[key].append(frame)
+
+    return {
+        key: _sort_by_gap(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
+        for key, frames in parts.items()
+    }
+
+
+# ========== 诊断与调优指导 ==========
+
+def _column(frame, name):
+    if name in frame.columns:
+        return frame[name].to_numpy(dtype=np.float64)
+    return np.full(len(frame), np.nan)
+
+
+def campaign_benchmarks(campaigns):
+    """
+    对应 ActionItemsTab 的 campaignBenchmarks（calculateBenchmarks：已列出 Campaign 的算术平均）
+
+    与 App 一致，指标取自 calculateMetrics（ctr / cvr / atc_rate 为百分比），ROI 不在中间指标中，记为 0
+    """
+    def mean(name):
+        values = np.nan_to_num(_column(campaigns, f'metrics.{name}'))
+        return float(values.mean()) if len(values) else 0.0
+
+    return {
+        'avgCpa': mean('cpa'), 'avgCpatc': mean('cpatc'), 'avgCpc': mean('cpc'), 'avgCvr': mean('cvr'),
+        'avgCtr': mean('ctr'), 'avgCpm': mean('cpm'), 'avgAtcRate': mean('atc_rate'),
+        'avgCheckoutRate': mean('checkout_rate'), 'avgPurchaseRate': mean('purchase_rate'),
+        'avgClickToPvRate': mean('click_to_pv_rate'), 'avgRoi': 0.0, 'avgAov': mean('aov'),
+        'avgFrequency': mean('frequency'),
+    }
+
+
+def scenario_mask(metrics, b, context=None):
+    """
+    与 diagnoseScenarioBatch 一致的场景位掩码（列式）
+
+    metrics 为 {指标: ndarray}，缺失值为 NaN；前提条件写成「不满足 x < y」以保留 NaN 语义
+    context 为 {'adsetCount', 'activeDays', 'dailyBudget', 'campaignBudget'}（ndarray）
+    """
+    spend = metrics['spend']
+    mask = np.zeros(len(spend), dtype=np.int64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pre = ~(spend < b['avgCpa'])
+        mask |= np.where(pre & ((metrics['cpc'] > b['avgCpc'] * 1.1) | (metrics['cvr'] < b['avgCvr'] * 0.9)), 1 << 0, 0)
+        mask |= np.where(pre & (np.nan_to_num(metrics['aov']) < (b['avgAov'] or 0) * 0.6), 1 << 1, 0)
+        low_cvr = ((metrics['click_to_pv_rate'] < b['avgClickToPvRate'] * 0.9)
+                   | (metrics['atc_rate'] < b['avgAtcRate'] * 0.9)
+                   | (metrics['checkout_rate'] < b['avgCheckoutRate'] * 0.9)
+                   | (metrics['purchase_rate'] < b['avgPurchaseRate'] * 0.9))
+        mask |= np.where(pre & low_cvr, 1 << 2, 0)
+
+        ctr = metrics['ctr']
+        high_cpc = (ctr < b['avgCtr'] * 0.9) | ((metrics['cpm'] > b['avgCpm'] * 1.1) & (ctr >= b['avgCtr'] * 1.1))
+        mask |= np.where(~(metrics['impressions'] < 1000) & high_cpc, 1 << 3, 0)
+
+        high_cpatc = (~(spend < b['avgCpatc']) & ~(metrics['cpatc'] <= b['avgCpatc'] * 1.1)
+                      & (metrics['atc_rate'] < b['avgAtcRate'] * 0.9))
+        mask |= np.where(high_cpatc, 1 << 4, 0)
+
+        if context is not None:
+            adset_count = context['adsetCount']
+            budget = context['campaignBudget']
+            dilution = (_truthy(adset_count) & _truthy(budget) & (spend != 0)
+                        & ~(adset_count < 3) & (budget / adset_count < b['avgCpa']))
+            mask |= np.where(dilution, 1 << 5, 0)
+
+            active_days = context['activeDays']
+            daily_budget = context['dailyBudget']
+            delivery = (_truthy(active_days) & _truthy(daily_budget) & ~(active_days <= 1)
+                        & (spend / daily_budget < 0.8))
+            mask |= np.where(delivery, 1 << 6, 0)
+    return mask
+
+
+def _truthy(values):
+    """JS 真值：非 0 且非 NaN"""
+    return (values != 0) & ~np.isnan(values)
+
+
+def _severity(roi, avg_roi):
+    """与 roiSeverity 一致：0=最高紧急, 1=重要, 2=一般"""
+    ratio = roi / avg_roi if avg_roi > 0 else np.ones_like(roi)
+    return np.where(ratio < 0.5, 0, np.where(ratio < 0.8, 1, 2))
+
+
+def _guidance_inputs(frame, kpi_type):
+    """构造 CampaignMetrics / avgMetrics 列（未提供的指标为 NaN，对应 undefined）"""
+    kpi_metric = {'ROI': 'roi', 'CPC': 'cpc', 'CPM': 'cpm'}[kpi_type]
+    metrics = {name: _column(frame, f'metrics.{name}') for name in GUIDANCE_METRICS}
+    metrics['spend'] = _column(frame, 'spend')
+    metrics[kpi_metric] = _column(frame, 'actualValue')
+
+    benchmarks = {name: _column(frame, f'avgMetrics.{name}') for name in GUIDANCE_METRICS}
+    benchmarks['spend'] = _column(frame, 'avgSpend')
+    benchmarks[kpi_metric] = _column(frame, 'avgValue')
+    return metrics, benchmarks
+
+
+def _rule_guidance(frame, level):
+    guidance = np.empty(len(frame), dtype=object)
+    for kpi_type in ('ROI', 'CPC', 'CPM'):
+        rows = np.flatnonzero(frame['kpiType'].to_numpy() == kpi_type)
+        if len(rows) == 0:
+            continue
+        metrics, benchmarks = _guidance_inputs(frame.iloc[rows], kpi_type)
+        guidance[rows] = guidance_batch(level, kpi_type, metrics, benchmarks)
+    return guidance
+
+
+def campaign_context(campaigns, df, configs, active_days):
+    """
+    场景5和6的上下文（与 ActionItemsTab 一致）
+
+    adsetCount 取自全部数据中该 Campaign 的 AdSet 数量；
+    dailyBudget = 业务线预算 / 运行天数 / 已列出 Campaign 总数
+    """
+    row_codes, entities, names = factorize_hierarchy(df)
+    adset_campaign = np.asarray(names['campaign_name'])[entities['campaign']['campaign_name'][entities['adset']['parent']]]
+    adset_counts = pd.Series(adset_campaign).value_counts()
+
+    budgets = {config['id']: config.get('budget') or 0 for config in configs}
+    total_budget = campaigns['businessLineId'].map(budgets).to_numpy(dtype=np.float64)
+    daily_budget = total_budget / active_days / max(len(campaigns), 1)
+    return {
+        'adsetCount': campaigns['campaignName'].map(adset_counts).fillna(0).to_numpy(dtype=np.float64),
+        'activeDays': np.full(len(campaigns), float(active_days)),
+        'dailyBudget': daily_budget,
+        'campaignBudget': daily_budget * active_days,
+    }
+
+
+# ========== 诊断场景文本（与 campaignDiagnostics.ts 的 check* 函数一致） ==========
+
+# (名称, 方向, 诊断, 建议)；CPA / CPC 场景的状态写作「名称 方向 异常 / 名称 ✓ 正常」，CVR 场景写作「名称 ↓ / 名称 ✓」
+_CPA_INDICATORS = (
+    ('CPC', '↑', '流量成本过高', '请排查CPC是否异常排查素材或竞价贵'),
+    ('CVR', '↓', '转化能力不足', '请排查CVR是否异常，排查漏斗流失点'),
+)
+_CVR_INDICATORS = (
+    ('Click-to-PV Rate', '↓', '加载速度/误触',
+     '1. 落地页加载过慢，请优先优化移动端 LCP；压缩图片大小 (TinyPNG)，检查是否安装过多无用插件，或检查服务器地区\n'
+     '2. 投放版位问题，排查广告版位，重点关注是否过多投放到AN版位'),
+    ('ATC Rate', '↓', '吸引力不足/不匹配',
+     '【页面吸引力不足】：排查素材与落地页是否货不对板；检查首屏信息传递；检查价格竞争力；将Reviews挪到首屏；增加Trust Badge；'
+     '检查移动端"加购按钮"是否悬浮（Sticky ATC）\n'
+     '【流量不准】：查Breakdown（Age），若某年龄段花费>10%预算且0转化则排除；检查Audience Network是否消耗过大；排除点击高但加购低的国家/州\n'
+     '【缩小受众】：IG加must also match；LAL改用Purchase（Value-based）做种子；排除"Flash Sale Seekers"'),
+    ('Checkout Rate', '↓', '运费/信任感',
+     '购物车流失严重，检查运费是否过高；检查是否强制注册（建议开启Guest Checkout）；检查隐形费用；排查背书/价格问题'),
+    ('Purchase Rate', '↓', '技术故障/支付通道', '测试下单检查支付路径（PayPal/信用卡等）'),
+)
+_CPC_INDICATORS = (
+    ('CTR', '↓', '素材/受众问题',
+     '素材缺乏吸引力（前3秒完播率低）、素材疲劳或受众疲劳（frequency过高）\n\n'
+     '1. 素材疲劳\n'
+     '   a. 静态图改轮播 (Carousel): 把单图变成产品多角度展示或"使用前 vs 使用后"\n'
+     '   b. 视频改静态图拼贴: 截取视频里最炸的 4 个瞬间，拼成一张图\n'
+     '   c. 视频改GIF: 截取 3 秒微动图，循环播放\n\n'
+     '2. 素材缺乏吸引力\n'
+     '   a. 视频：视觉重置，保留后半段，仅剪掉前 3 秒，换成倒放画面、强烈对比图、或满屏大字幕提问；调整视频首帧\n'
+     '   b. 单图：加Text Overlay（如 "50% OFF"、"Best Seller"）；裁剪构图放大细节；换高饱和度背景色\n'
+     '   c. 轮播：换首图，把"效果最炸裂的图"挪到第一张；在第一张图右侧加箭头引导滑动\n\n'
+     '3. 优化受众，更换新人群'),
+    ('CPM', '↑', '市场竞价/人群贵',
+     '素材表现正常，但市场竞争过热（竞品上新/大促等）\n\n'
+     '1. 放宽定向：\n'
+     '   a. 通投：直接移除所有 Interest 标签，仅保留 Age/Gender/Geo，让算法自动寻人 (Broad Targeting)\n'
+     '   b. 智能扩量：勾选 "Advantage+ Audience" 选项\n'
+     '   c. LAL 进阶：如果在跑 LAL 1%，尝试新建组跑 LAL 5% 或 10%\n'
+     '   d. 国家合并：如果分开跑 UK/DE/FR，尝试合并为一个 "Tier 1 Europe" 大组\n'
+     '2. 避开竞价高峰'),
+)
+_CPA_DOUBLE_KILL = ('流量贵且转化差', '请排查AOV是否异常，若AOV正常则转人工判断是否关停')
+_AOV_TEXT = (
+    '人群消费力低 / 素材误导',
+    '引流品导致客单低。\n'
+    '1. 【素材问题】：检查是否在用低价配件（如线材）做素材，建议改推高客单价的主机/Bundle；在落地页加Bundle的Variant，引导用户提高单价\n'
+    '2. 【受众问题】：当前人群消费力弱，建议调整为Max conv. value的Performance Goal或排除低收入人群/配件人群\n'
+    '3. 【落地页问题】：在落地页/购物车页增加"Frequently Bought Together"组合购插件，或设置阶梯折扣（买2件9折）；'
+    '检查免邮门槛，将免邮门槛设定在AOV的1.2倍（如AOV=$40则免邮线设$49），并在购物车顶部加进度条提示"再买$9免邮"',
+)
+_CPATC_TEXT = ('素材与页面不符', '素材与LP信息有偏差、不一致，用户被素材吸引点击，但发现落地页不是想要的\n1. 优化素材&LP一致性')
+
+
+def _js_fixed(value, digits):
+    """与 JS Number.prototype.toFixed 一致（按二进制精确值四舍五入，.5 远离 0）"""
+    value = float(value)
+    if np.isnan(value):
+        return 'NaN'
+    if np.isinf(value):
+        return 'Infinity' if value > 0 else '-Infinity'
+    text = str(Decimal(abs(value)).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+    return '-' + text if value < 0 else text
+
+
+def _combined(indicators, abnormal, status_format):
+    """合并异常指标的诊断与建议，并附上所有指标的检查状态"""
+    hit = [ind for ind, flag in zip(indicators, abnormal) if flag]
+    status = ', '.join(status_format(ind, flag) for ind, flag in zip(indicators, abnormal))
+    diagnosis = ' + '.join(ind[2] for ind in hit)
+    action = '\n\n'.join(ind[3] for ind in hit)
+    return diagnosis, action, status
+
+
+def _flagged(ind, flag):
+    return f'{ind[0]} {ind[1]} 异常' if flag else f'{ind[0]} ✓ 正常'
+
+
+def _funnel_flagged(ind, flag):
+    return f'{ind[0]} {ind[1]}' if flag else f'{ind[0]} ✓'
+
+
+def _scenario_text(bit, m, b, ctx):
+    """
+    单个命中场景的 (诊断, 建议)，m / ctx 为该 Campaign 的标量指标与上下文
+
+    比较沿用 TS 的写法，NaN 与 undefined 一样使比较为假
+    """
+    if bit == 0:
+        cpc_abnormal = m['cpc'] > b['avgCpc'] * 1.1
+        cvr_abnormal = m['cvr'] < b['avgCvr'] * 0.9
+        diagnosis, action, status = _combined(_CPA_INDICATORS, (cpc_abnormal, cvr_abnormal), _flagged)
+        if cpc_abnormal and cvr_abnormal:
+            diagnosis, action = _CPA_DOUBLE_KILL
+        return f'{diagnosis} ({status})', action
+    if bit == 1:
+        return _AOV_TEXT
+    if bit == 2:
+        abnormal = (m['click_to_pv_rate'] < b['avgClickToPvRate'] * 0.9,
+                    m['atc_rate'] < b['avgAtcRate'] * 0.9,
+                    m['checkout_rate'] < b['avgCheckoutRate'] * 0.9,
+                    m['purchase_rate'] < b['avgPurchaseRate'] * 0.9)
+        diagnosis, action, status = _combined(_CVR_INDICATORS, abnormal, _funnel_flagged)
+        return f'{diagnosis} ({status})', action
+    if bit == 3:
+        ctr = m['ctr']
+        abnormal = (ctr < b['avgCtr'] * 0.9, m['cpm'] > b['avgCpm'] * 1.1 and ctr >= b['avgCtr'] * 1.1)
+        diagnosis, action, status = _combined(_CPC_INDICATORS, abnormal, _flagged)
+        return f'{diagnosis} ({status})', action
+    if bit == 4:
+        return _CPATC_TEXT
+    if bit == 5:
+        budget, adset_count = ctx['campaignBudget'], ctx['adsetCount']
+        return '预算过度分散', (
+            f'预算被严重稀释：Campaign预算只有 ${_js_fixed(budget, 0)} 但开了 {_js_number(adset_count)} 个组，'
+            f'平均每组 ${_js_fixed(budget / adset_count, 0)} 无法支撑转化\n'
+            '1. 关停表现差的组，集中预算\n2. 增加总预算\n3. 缩小受众'
+        )
+    pacing = m['spend'] / ctx['dailyBudget']
+    frequency = m['frequency']
+    frequency_note = ''
+    if frequency and not np.isnan(frequency):
+        frequency_note = f"\n当前Frequency: {_js_fixed(frequency, 1)}{'（过高，受众疲劳）' if frequency > 3 else ''}"
+    return '竞价/受众过窄', (
+        f'Delivery Issue (Spend Pacing: {_js_fixed(pacing * 100, 0)}%){frequency_note}\n'
+        '1. 出价过低：Cost Cap建议提价，或改用Highest Volume（Lowest Cost）并取消Cost Cap限制\n'
+        '2. 受众过窄/耗尽：检查Frequency是否过高，建议放宽定向\n'
+        '3. 质量太差：检查质量分是否被系统降权'
+    )
+
+
+def scenario_guidance(mask, severity, metrics, b, context, i):
+    """
+    第 i 个 Campaign 的诊断场景指导，与 ActionItemsTab 的格式一致：
+    每个命中场景一行「{优先级 emoji} {场景} - {诊断}: {建议}」，无命中为 NO_SCENARIO_GUIDANCE
+    """
+    if not mask:
+        return NO_SCENARIO_GUIDANCE
+    m = {name: float(values[i]) for name, values in metrics.items()}
+    ctx = {name: float(values[i]) for name, values in context.items()}
+    emoji = SEVERITY_EMOJI.get(int(severity), '🟢')
+    lines = []
+    for bit, name in enumerate(SCENARIO_NAMES):
+        if mask >> bit & 1:
+            diagnosis, action = _scenario_text(bit, m, b, ctx)
+            lines.append(f'{emoji} {name} - {diagnosis}: {action}')
+    return '\n'.join(lines)
+
+
+def check_guidance_parity(path):
+    """
+    与 scripts/guidanceParity.ts 生成的 TS 结果逐条比对 ROI Campaign 的调优指导
+
+    文件中缺失的指标按 NaN 处理（对应 undefined），返回不一致的条数
+    """
+    data = load_json(path)
+    b, cases = data['benchmarks'], data['cases']
+    names = ('spend', 'roi', 'cpc', 'cpm', 'cvr', 'aov', 'ctr', 'cpatc', 'atc_rate', 'impressions',
+             'click_to_pv_rate', 'checkout_rate', 'purchase_rate', 'frequency')
+    metrics = {name: np.array([c['metrics'].get(name, np.nan) for c in cases], dtype=np.float64) for name in names}
+    context = {name: np.array([c['context'][name] for c in cases], dtype=np.float64)
+               for name in ('adsetCount', 'activeDays', 'dailyBudget', 'campaignBudget')}
+    masks = scenario_mask(metrics, b, context)
+    severity = _severity(metrics['roi'], b['avgRoi'])
+
+    mismatches = 0
+    for i, case in enumerate(cases):
+        actual = scenario_guidance(int(masks[i]), severity[i], metrics, b, context, i)
+        if actual != case['guidance']:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"❌ case {i}:\n  TS: {case['guidance']!r}\n  PY: {actual!r}")
+    return mismatches
+
+
+def add_guidance(result, df, configs, active_days):
+    """
+    为 Action Items 添加调优指导列 'guidance'
+
+    ROI 类型 Campaign 列出命中的诊断场景（每个场景一行，见 scenario_guidance），其余使用 OPTIMIZATION_RULES
+    """
+    campaigns = result['campaigns']
+    if len(campaigns):
+        guidance = _rule_guidance(campaigns, 'Campaign')
+        roi_rows = np.flatnonzero(campaigns['kpiType'].to_numpy() == 'ROI')
+        if len(roi_rows):
+            roi_campaigns = campaigns.iloc[roi_rows]
+            b = campaign_benchmarks(campaigns)
+            metrics = {name: np.nan_to_num(_column(roi_campaigns, f'metrics.{name}'))
+                       for name in ('cvr', 'aov', 'ctr', 'cpatc', 'atc_rate', 'impressions',
+                                    'click_to_pv_rate', 'checkout_rate', 'purchase_rate', 'frequency')}
+            metrics['spend'] = _column(roi_campaigns, 'spend')
+            # ROI 类型的 CampaignMetrics 不含 cpc / cpm
+            metrics['cpc'] = np.full(len(roi_rows), np.nan)
+            metrics['cpm'] = np.full(len(roi_rows), np.nan)
+            # impressions 在 CampaignMetrics 中可能为 undefined
+            metrics['impressions'] = _column(roi_campaigns, 'metrics.impressions')
+
+            context = campaign_context(campaigns, df, configs, active_days)
+            context = {k: v[roi_rows] for k, v in context.items()}
+            masks = scenario_mask(metrics, b, context)
+            severity = _severity(_column(roi_campaigns, 'actualValue'), b['avgRoi'])
+            for i, row in enumerate(roi_rows):
+                guidance[row] = scenario_guidance(int(masks[i]), severity[i], metrics, b, context, i)
+        campaigns['guidance'] = guidance
+
+    if len(result['adsets']):
+        result['adsets']['guidance'] = _rule_guidance(result['adsets'], 'AdSet')
+    if len(result['ads']):
+        result['ads']['guidance'] = _rule_guidance(result['ads'], 'Ad')
+    return result
+
+
+# ========== 导出 ==========
+
+def _js_number(value):
+    """与 JS 模板字符串中数字的默认格式一致（整数不带小数点）"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def export_action_items_csv(result, guidance=False):
+    """
+    与 exportActionItemsToCSV 相同的格式
+
+    guidance=True 时在每个区块末尾追加「调优指导」列
+    """
+    def extra(row):
+        if not guidance:
+            return ''
+        text = str(row.get('guidance') or '').replace('"', '""')
+        return f',"{text}"'
+
+    extra_header = ',调优指导' if guidance else ''
+    lines = ['=== 需要调整的 Campaign ===', 'Campaign Name,业务线,Spend,KPI,Target,Actual,Gap%,Priority' + extra_header]
+    for _, c in result['campaigns'].iterrows():
+        lines.append(
+            f'"{c.campaignName}","{c.businessLine}",{c.spend:.2f},{c.kpiType},{_js_number(c.targetValue)},'
+            f'{c.actualValue:.2f},{c.gapPercentage:.1f}%,{c.priority or "-"}' + extra(c)
+        )
+
+    lines += ['', '=== 需要调整的人群 ===', 'AdSet Name,Campaign,业务线,KPI,Target,Actual,Gap%,Avg,vs Avg%' + extra_header]
+    for _, a in result['adsets'].iterrows():
+        lines.append(
+            f'"{a.adSetName}","{a.campaignName}","{a.businessLine}",{a.kpiType},{_js_number(a.targetValue)},'
+            f'{a.actualValue:.2f},{a.gapPercentage:.1f}%,{a.avgValue:.2f},{a.vsAvgPercentage:.1f}%' + extra(a)
+        )
+
+    lines += ['', '=== 需要调整的素材 ===', 'Ad Name,AdSet,Campaign,业务线,KPI,Target,Actual,Gap%,Avg,vs Avg%' + extra_header]
+    for _, a in result['ads'].iterrows():
+        lines.append(
+            f'"{a.adName}","{a.adSetName}","{a.campaignName}","{a.businessLine}",{a.kpiType},{_js_number(a.targetValue)},'
+            f'{a.actualValue:.2f},{a.gapPercentage:.1f}%,{a.avgValue:.2f},{a.vsAvgPercentage:.1f}%' + extra(a)
+        )
+    return '\n'.join(lines)
+
+
+def load_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def date_span_days(df):
+    """数据日期范围的天数（包含起始日），对应 ActionItemsTab 中的 activeDays"""
+    dates = df['date'].values.astype('datetime64[D]')
+    dates = dates[~np.isnat(dates)]
+    if len(dates) == 0:
+        return 1
+    return int((dates.max() - dates.min()).astype(np.int64)) + 1
+
+
+if __name__ == '__main__':
+    import time
+
+    from ad_data_loader import load_ad_data
+
+    if len(sys.argv) == 3 and sys.argv[1] == '--check-guidance':
+        mismatches = check_guidance_parity(sys.argv[2])
+        print(f'✅ guidance matches TS' if mismatches == 0 else f'❌ {mismatches} mismatches')
+        sys.exit(1 if mismatches else 0)
+
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    args = sys.argv[3:]
+    try:
+        data = load_ad_data(sys.argv[1])
+        configs = load_json(sys.argv[2])
+        layer_config = load_json(args[args.index('--layer-config') + 1]) if '--layer-config' in args else None
+
+        start = time.perf_counter()
+        items = generate_action_items(data, configs, layer_config)
+        add_guidance(items, data, configs, date_span_days(data))
+        elapsed = time.perf_counter() - start
+
+        print(f"✅ {len(items['campaigns'])} campaigns, {len(items['adsets'])} adsets, "
+              f"{len(items['ads'])} ads in {elapsed * 1000:.1f} ms")
+        print(export_action_items_csv(items, guidance=True)[:2000])
+    except Exception as e:
+        print(f'Error: {e}')
+        sys.exit(1)
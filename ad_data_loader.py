@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Meta 广告导出数据加载器（列式 + 本地缓存）
+
+- 支持 CSV / XLSX（包括 super metric 抓取模版 CSV）
+- 表头别名与 components/FileUpload.tsx 的 processRawData 保持一致
+- 输出与 types.ts 中 RawAdRecord 对应的列式 DataFrame：
+    date           -> datetime64[s]（已取整到天；pandas 不支持 [D] 精度的列）
+    名称字段        -> category（字典编码）
+    计数字段        -> int64
+    金额/比率字段    -> float64
+- 每个文件按内容哈希缓存为 .npz，再次加载时无需重新解析
+
+用法:
+    python ad_data_loader.py <导出文件路径> [--no-cache]
+"""
+
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# 缓存格式版本号：字段或解析规则变化时递增，旧缓存自动失效
+SCHEMA_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.ad_cache')
+
+# 表头别名（顺序即优先级，与 FileUpload.tsx 中 row['A'] || row['B'] 的顺序一致）
+COLUMN_ALIASES = {
+    'date': ['Day', 'day', 'date'],
+    'campaign_name': ['Campaign name', 'campaign_name'],
+    'adset_name': ['Ad set name', 'adset_name'],
+    'ad_name': ['Ad name', 'ad_name'],
+    'spend': ['Amount spent (USD)', 'Cost', 'spend'],
+    'impressions': ['Impressions', 'impressions'],
+    'link_clicks': ['Link clicks', 'link_clicks'],
+    'purchases': ['Purchases', 'Website purchases', 'purchases'],
+    'purchase_value': ['Purchases conversion value', 'Purchase conversion value', 'purchase_value'],
+    'adds_to_cart': ['Adds to cart', 'Website adds to cart', 'adds_to_cart'],
+    'checkouts_initiated': ['Checkouts initiated', 'Website checkouts initiated', 'checkouts_initiated'],
+    'landing_page_views': ['Website landing page views', 'Landing page views', 'landing_page_views'],
+    'frequency': ['Frequency', 'frequency'],
+    'reach': ['Reach', 'reach'],
+}
+
+# 判断有效行的列（与 FileUpload.tsx 的 filter 条件一致）
+ROW_KEY_ALIASES = ['Day', 'day', 'Campaign name', 'campaign_name']
+
+NAME_FIELDS = ('campaign_name', 'adset_name', 'ad_name')
+FLOAT_FIELDS = ('spend', 'purchase_value', 'frequency')
+INT_FIELDS = (
+    'impressions', 'link_clicks', 'purchases', 'adds_to_cart',
+    'checkouts_initiated', 'landing_page_views', 'reach',
+)
+NUMERIC_FIELDS = FLOAT_FIELDS + INT_FIELDS
+RECORD_FIELDS = ('date',) + NAME_FIELDS + NUMERIC_FIELDS
+
+# 表格公式错误值，一律按缺失处理
+SPREADSHEET_ERRORS = ['#DIV/0!', '#N/A', '#VALUE!', '#REF!', '#NUM!', '#NAME?', '#NULL!']
+
+ALL_ALIASES = {alias for aliases in COLUMN_ALIASES.values() for alias in aliases}
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """按块计算文件内容的 sha256，作为缓存键"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_raw_table(path, sheet_name=0):
+    """读取原始表格，只保留别名表中出现的列"""
+    ext = os.path.splitext(path)[1].lower()
+    name_dtypes = {alias: str for field in NAME_FIELDS for alias in COLUMN_ALIASES[field]}
+
+    if ext == '.csv':
+        return pd.read_csv(
+            path,
+            usecols=lambda c: c in ALL_ALIASES,
+            dtype=name_dtypes,
+            na_values=SPREADSHEET_ERRORS,
+            low_memory=False,
+        )
+    if ext in ('.xlsx', '.xls'):
+        # 与前端一致：默认只读取第一个工作表
+        raw = pd.read_excel(path, sheet_name=sheet_name, na_values=SPREADSHEET_ERRORS)
+        return raw[[c for c in raw.columns if c in ALL_ALIASES]]
+
+    raise ValueError(f'不支持的文件格式: {ext}，请使用 CSV 或 XLSX')
+
+
+def _truthy(series):
+    """对应 JS 中的真值判断：缺失、空字符串、0、false 均视为假（纯空白字符串为真）"""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return series.notna() & (series != 0)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.notna()
+    values = series.astype(object)
+    return values.notna() & (values != '') & (values != 0)
+
+
+def _coalesce(raw, aliases):
+    """
+    按别名顺序取第一个真值（对应 row['A'] || row['B']）
+
+    所有别名都为假值时结果为缺失，由调用方按 JS 的 `|| 默认值` 补齐
+    """
+    present = [a for a in aliases if a in raw.columns]
+    if not present:
+        return None
+    result = raw[present[0]]
+    for alias in present[1:]:
+        result = result.where(_truthy(result), raw[alias])
+    return result.where(_truthy(result))
+
+
+def _parse_date_value(value):
+    """单个日期值标准化为 Timestamp（对应 FileUpload.tsx 的 normalizeDate）"""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return pd.NaT
+    # Excel 日期序列号：从 1899-12-30 起算
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return pd.Timestamp('1899-12-30') + pd.Timedelta(days=int(value))
+    if isinstance(value, (pd.Timestamp, np.datetime64)) or hasattr(value, 'year'):
+        return pd.Timestamp(value).normalize()
+
+    text = str(value).strip()
+    if ' ' in text:
+        text = text.split(' ')[0]
+    return pd.to_datetime(text, errors='coerce')
+
+
+def normalize_dates(series):
+    """日期列标准化为按天取整的 datetime64 数组，只解析去重后的取值"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.dt.normalize().values.astype('datetime64[D]')
+
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    parsed = np.array([_parse_date_value(v) for v in uniques], dtype='datetime64[D]')
+    # 追加一个 NaT 作为缺失值的落点（factorize 对缺失值返回 -1）
+    parsed = np.append(parsed, np.datetime64('NaT', 'D'))
+    return parsed[codes]
+
+
+def normalize_records(raw, allow_empty=False):
+    """
+    把原始表格映射为 RawAdRecord 列式结构
+
+    allow_empty=True 时没有有效行返回空表而不是报错（分块读取时使用）
+    """
+    key_cols = [c for c in ROW_KEY_ALIASES if c in raw.columns]
+    if not key_cols:
+        raise ValueError('未找到有效数据，请检查文件格式')
+
+    valid = np.zeros(len(raw), dtype=bool)
+    for col in key_cols:
+        valid |= _truthy(raw[col]).to_numpy()
+    raw = raw.loc[valid]
+    if len(raw) == 0 and not allow_empty:
+        raise ValueError('未找到有效数据，请检查文件格式')
+
+    columns = {}
+
+    date_col = _coalesce(raw, COLUMN_ALIASES['date'])
+    columns['date'] = (
+        normalize_dates(date_col) if date_col is not None
+        else np.full(len(raw), np.datetime64('NaT', 'D'))
+    )
+
+    for field in NAME_FIELDS:
+        col = _coalesce(raw, COLUMN_ALIASES[field])
+        if col is None:
+            columns[field] = pd.Categorical(np.full(len(raw), 'Unknown', dtype=object))
+            continue
+        col = col.where(_truthy(col), 'Unknown').astype(str)
+        columns[field] = pd.Categorical(col)
+
+    for field in NUMERIC_FIELDS:
+        col = _coalesce(raw, COLUMN_ALIASES[field])
+        if col is None:
+            values = np.zeros(len(raw), dtype=np.float64)
+        else:
+            values = pd.to_numeric(col, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        # parseInt 语义：计数字段截断为整数
+        columns[field] = np.trunc(values).astype(np.int64) if field in INT_FIELDS else values
+
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(raw)))
+
+
+def _cache_path(cache_dir, digest):
+    return os.path.join(cache_dir, f'{digest}.v{SCHEMA_VERSION}.npz')
+
+
+def save_cache(df, path):
+    """列式写入 .npz：名称字段拆分为 codes + categories，不依赖 pickle"""
+    arrays = {'date': df['date'].values.astype('datetime64[D]')}
+    for field in NAME_FIELDS:
+        cat = df[field].cat
+        arrays[f'{field}__codes'] = cat.codes.to_numpy(dtype=np.int32)
+        arrays[f'{field}__categories'] = np.asarray(cat.categories, dtype=str)
+    for field in NUMERIC_FIELDS:
+        arrays[field] = df[field].to_numpy()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_cache(path):
+    """从 .npz 恢复列式 DataFrame"""
+    with np.load(path, allow_pickle=False) as npz:
+        columns = {'date': npz['date']}
+        for field in NAME_FIELDS:
+            columns[field] = pd.Categorical.from_codes(
+                npz[f'{field}__codes'], categories=npz[f'{field}__categories']
+            )
+        for field in NUMERIC_FIELDS:
+            columns[field] = npz[field]
+    return pd.DataFrame(columns)
+
+
+def load_ad_data(path, cache_dir=DEFAULT_CACHE_DIR, use_cache=True, sheet_name=0):
+    """
+    加载 Meta 导出文件为列式 DataFrame
+
+    命中缓存时直接读取 .npz；否则解析原始文件并写入缓存。
+    """
+    cache_file = None
+    if use_cache:
+        digest = file_digest(path)
+        if sheet_name != 0:
+            digest = f'{digest}-{sheet_name}'
+        cache_file = _cache_path(cache_dir, digest)
+        if os.path.exists(cache_file):
+            try:
+                return load_cache(cache_file)
+            except (OSError, KeyError, ValueError) as e:
+                print(f'⚠️ 缓存损坏，重新解析: {e}')
+
+    df = normalize_records(read_raw_table(path, sheet_name=sheet_name))
+
+    if cache_file is not None:
+        save_cache(df, cache_file)
+    return df
+
+
+if __name__ == '__main__':
+    import time
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    file_path = sys.argv[1]
+    use_cache = '--no-cache' not in sys.argv[2:]
+
+    try:
+        start = time.perf_counter()
+        data = load_ad_data(file_path, use_cache=use_cache)
+        elapsed = time.perf_counter() - start
+
+        print(f'✅ Loaded {len(data)} rows in {elapsed * 1000:.1f} ms')
+        print(data.dtypes)
+        print(data.head())
+    except Exception as e:
+        print(f'Error: {e}')
+        sys.exit(1)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+批量 Action Items 报表（无界面）
+
+对一个目录下的全部导出文件（每个文件对应一个广告账户）执行与 App 相同的流水线：
+加载 -> 日期筛选 -> 层级分类 / Layer Benchmark -> 象限与优先级 -> 诊断与调优指导 -> 导出 CSV / XLSX。
+账户之间相互独立，在进程池中并行处理，并输出每个账户各阶段的耗时。
+
+用法:
+    python batch_report.py <导出目录> <业务线配置.json> [--layer-config 层级配置.json]
+                           [--out 输出目录] [--format csv|xlsx] [--workers N]
+                           [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+
+业务线配置为 AdConfiguration 数组（id / name / targetType / targetValue / budget / rules / rulesLogic），
+层级配置为 LayerConfiguration，不提供时使用 DEFAULT_LAYER_CONFIG。
+输出目录中每个账户生成一个报表文件，另有 summary.json 记录各账户的结果数量与耗时。
+"""
+
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from action_items import (
+    add_guidance, date_span_days, export_action_items_csv, generate_action_items, load_json,
+)
+from ad_data_loader import load_ad_data
+
+EXPORT_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+# XLSX 各工作表的列（与 exportActionItemsToCSV 的三个区块一致，末尾追加调优指导）
+SHEETS = (
+    ('需要调整的 Campaign', 'campaigns', (
+        ('Campaign Name', 'campaignName'), ('业务线', 'businessLine'), ('Spend', 'spend'),
+        ('KPI', 'kpiType'), ('Target', 'targetValue'), ('Actual', 'actualValue'),
+        ('Gap%', 'gapPercentage'), ('Priority', 'priority'), ('调优指导', 'guidance'),
+    )),
+    ('需要调整的人群', 'adsets', (
+        ('AdSet Name', 'adSetName'), ('Campaign', 'campaignName'), ('业务线', 'businessLine'),
+        ('KPI', 'kpiType'), ('Target', 'targetValue'), ('Actual', 'actualValue'),
+        ('Gap%', 'gapPercentage'), ('Avg', 'avgValue'), ('vs Avg%', 'vsAvgPercentage'),
+        ('调优指导', 'guidance'),
+    )),
+    ('需要调整的素材', 'ads', (
+        ('Ad Name', 'adName'), ('AdSet', 'adSetName'), ('Campaign', 'campaignName'),
+        ('业务线', 'businessLine'), ('KPI', 'kpiType'), ('Target', 'targetValue'),
+        ('Actual', 'actualValue'), ('Gap%', 'gapPercentage'), ('Avg', 'avgValue'),
+        ('vs Avg%', 'vsAvgPercentage'), ('调优指导', 'guidance'),
+    )),
+)
+
+
+def list_exports(directory):
+    """目录下的导出文件（按文件名排序，跳过 Office 临时文件）"""
+    return [
+        os.path.join(directory, name) for name in sorted(os.listdir(directory))
+        if name.lower().endswith(EXPORT_EXTENSIONS) and not name.startswith('~$')
+    ]
+
+
+def filter_dates(df, start=None, end=None):
+    """按日期范围筛选（包含两端），返回 (数据, 运行天数)"""
+    if start is None and end is None:
+        return df, date_span_days(df)
+
+    dates = df['date'].values.astype('datetime64[D]')
+    mask = ~np.isnat(dates)
+    if start is not None:
+        mask &= dates >= np.datetime64(start, 'D')
+    if end is not None:
+        mask &= dates <= np.datetime64(end, 'D')
+    df = df.loc[mask].reset_index(drop=True)
+
+    # 与 ActionItemsTab 一致：运行天数取所选日期范围，而不是数据实际覆盖的天数
+    if start is not None and end is not None:
+        active_days = abs(int((np.datetime64(end, 'D') - np.datetime64(start, 'D')).astype(np.int64))) + 1
+    else:
+        active_days = date_span_days(df)
+    return df, active_days
+
+
+def write_xlsx(result, path):
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        for sheet_name, key, columns in SHEETS:
+            frame = result[key]
+            sheet = pd.DataFrame({
+                header: (frame[field] if field in frame.columns else pd.Series(dtype=object))
+                for header, field in columns
+            })
+            sheet.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def run_account(path, configs, layer_config=None, out_dir='.', fmt='csv', start=None, end=None):
+    """
+    进程池任务：处理单个账户的导出文件
+
+    返回 {'account', 'rows', 'campaigns', 'adsets', 'ads', 'output', 'timings', 'seconds'}，
+    出错时返回 {'account', 'error', 'seconds'}
+    """
+    account = os.path.splitext(os.path.basename(path))[0]
+    timings = {}
+    started = time.perf_counter()
+    try:
+        t = time.perf_counter()
+        data = load_ad_data(path)
+        data, active_days = filter_dates(data, start, end)
+        timings['load'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        result = generate_action_items(data, configs, layer_config)
+        timings['action_items'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        add_guidance(result, data, configs, active_days)
+        timings['guidance'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        output = os.path.join(out_dir, f'{account}_action_items.{fmt}')
+        if fmt == 'xlsx':
+            write_xlsx(result, output)
+        else:
+            # 带 BOM，便于 Excel 直接打开中文
+            with open(output, 'w', encoding='utf-8-sig', newline='') as f:
+                f.write(export_action_items_csv(result, guidance=True))
+        timings['write'] = time.perf_counter() - t
+    except Exception as e:
+        return {'account': account, 'error': str(e), 'seconds': time.perf_counter() - started}
+
+    return {
+        'account': account,
+        'rows': len(data),
+        'campaigns': len(result['campaigns']),
+        'adsets': len(result['adsets']),
+        'ads': len(result['ads']),
+        'output': output,
+        'timings': timings,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def run_batch(paths, configs, layer_config=None, out_dir='.', fmt='csv', workers=None, start=None, end=None):
+    """并行处理多个账户，结果按输入顺序返回；单个文件或 workers=1 时不启动进程池"""
+    os.makedirs(out_dir, exist_ok=True)
+    args = (configs, layer_config, out_dir, fmt, start, end)
+    if len(paths) <= 1 or workers == 1:
+        return [run_account(path, *args) for path in paths]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_account, path, *args) for path in paths]
+        return [f.result() for f in futures]
+
+
+def _option(args, name, default=None):
+    return args[args.index(name) + 1] if name in args else default
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    directory = sys.argv[1]
+    args = sys.argv[3:]
+    workers = int(_option(args, '--workers')) if '--workers' in args else None
+    fmt = _option(args, '--format', 'csv')
+    out_dir = _option(args, '--out', os.path.join(directory, 'action_items'))
+
+    try:
+        if fmt not in ('csv', 'xlsx'):
+            raise ValueError(f'不支持的输出格式: {fmt}')
+        configs = load_json(sys.argv[2])
+        layer_config = load_json(_option(args, '--layer-config')) if '--layer-config' in args else None
+        paths = list_exports(directory)
+        if not paths:
+            raise ValueError(f'目录中没有导出文件: {directory}')
+
+        start = time.perf_counter()
+        reports = run_batch(paths, configs, layer_config, out_dir, fmt, workers,
+                            _option(args, '--start'), _option(args, '--end'))
+        elapsed = time.perf_counter() - start
+
+        for report in reports:
+            if 'error' in report:
+                print(f"  ❌ {report['account']}: {report['error']}")
+                continue
+            stages = ', '.join(f'{k} {v * 1000:.0f}ms' for k, v in report['timings'].items())
+            print(f"  ✅ {report['account']}: {report['rows']} rows -> {report['campaigns']} campaigns, "
+                  f"{report['adsets']} adsets, {report['ads']} ads ⏱️ {report['seconds']:.2f}s ({stages})")
+
+        with open(os.path.join(out_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+            json.dump({'seconds': elapsed, 'accounts': reports}, f, ensure_ascii=False, indent=2)
+
+        failed = sum(1 for r in reports if 'error' in r)
+        print(f'\n⏱️ {len(reports)} account(s) in {elapsed:.2f}s, {failed} failed -> {out_dir}')
+        if failed:
+            sys.exit(2)
+    except Exception as e:
+        print(f'Error: {e}')
+        sys.exit(1)
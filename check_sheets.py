@@ -1,21 +1,31 @@
-import pandas as pd
-
-try:
-    # 读取所有sheets
-    xls = pd.ExcelFile('/Users/mac/AI code/Meta ad action调优系统/广告正式数据.xlsx')
-    print("Sheet names:", xls.sheet_names)
-    
-    for sheet_name in xls.sheet_names:
-        print(f"\nAnalyzing sheet: {sheet_name}")
-        df = pd.read_excel(xls, sheet_name=sheet_name)
-        print("Columns:", df.columns.tolist())
-        
-        # 模糊匹配
-        lpv_cols = [c for c in df.columns if 'landing' in str(c).lower() and 'view' in str(c).lower()]
-        if lpv_cols:
-            print(f"  👉 Found LPV related columns: {lpv_cols}")
-        else:
-            print("  ❌ No LPV columns found")
-
-except Exception as e:
-    print(f"Error: {e}")
+import sys
+
+from workbook_reader import list_sheet_schemas
+
+
+def main():
+    file_path = sys.argv[1] if len(sys.argv) > 1 else '/Users/mac/AI code/Meta ad action调优系统/广告正式数据.xlsx'
+
+    try:
+        # 只读取各 sheet 的表头（并行），不加载全部单元格
+        schemas = list_sheet_schemas(file_path)
+        print("Sheet names:", list(schemas))
+
+        for sheet_name, schema in schemas.items():
+            print(f"\nAnalyzing sheet: {sheet_name}")
+            print("Columns:", schema['columns'])
+
+            # 模糊匹配
+            lpv_cols = [c for c in schema['columns'] if 'landing' in str(c).lower() and 'view' in str(c).lower()]
+            if lpv_cols:
+                print(f"  👉 Found LPV related columns: {lpv_cols}")
+            else:
+                print("  ❌ No LPV columns found")
+
+    except Exception as e:
+        print(f"Error: {e}")
+
+
+# 进程池在 spawn 模式下会重新导入本模块，入口必须放在 __main__ 保护内
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import React, { useEffect, useState } from 'react';
+import { Activity, Download, RotateCcw, X } from 'lucide-react';
+import {
+    InstrumentationReport,
+    exportInstrumentationReport,
+    getInstrumentationReport,
+    isDebugLogging,
+    resetInstrumentation,
+    setDebugLogging,
+    subscribeInstrumentation
+} from '../utils/instrumentation';
+
+// 流水线运行统计面板（URL 参数 ?debug=1 时由 App 渲染）
+export const DebugPanel: React.FC = () => {
+    const [isOpen, setIsOpen] = useState(false);
+    const [report, setReport] = useState<InstrumentationReport>(() => getInstrumentationReport());
+    const [verbose, setVerbose] = useState(isDebugLogging());
+
+    // 面板打开时才订阅，收起时不在热路径上复制报表
+    useEffect(() => {
+        if (!isOpen) return;
+        setReport(getInstrumentationReport());
+        return subscribeInstrumentation(() => setReport(getInstrumentationReport()));
+    }, [isOpen]);
+
+    const handleExport = () => {
+        const blob = new Blob([exportInstrumentationReport()], { type: 'application/json' });
+        const url = URL.createObjectURL(blob);
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = `Pipeline_Report_${new Date().toISOString().replace(/[:.]/g, '-')}.json`;
+        link.click();
+        URL.revokeObjectURL(url);
+    };
+
+    const toggleVerbose = () => {
+        setDebugLogging(!verbose);
+        setVerbose(!verbose);
+    };
+
+    if (!isOpen) {
+        return (
+            <button
+                onClick={() => setIsOpen(true)}
+                className="fixed bottom-4 right-4 z-50 p-3 bg-slate-900 text-white rounded-full shadow-lg hover:bg-slate-700"
+                title="流水线运行统计"
+            >
+                <Activity className="w-5 h-5" />
+            </button>
+        );
+    }
+
+    const stages = Object.entries(report.stages);
+
+    return (
+        <div className="fixed bottom-4 right-4 z-50 w-[560px] max-h-[70vh] overflow-auto bg-white border border-slate-200 rounded-xl shadow-2xl text-xs">
+            <div className="sticky top-0 flex items-center justify-between px-4 py-3 bg-slate-50 border-b border-slate-200">
+                <div className="font-bold text-slate-900">流水线运行统计</div>
+                <div className="flex items-center gap-2">
+                    <label className="flex items-center gap-1 cursor-pointer text-slate-600">
+                        <input type="checkbox" checked={verbose} onChange={toggleVerbose} />
+                        逐条日志
+                    </label>
+                    <button onClick={resetInstrumentation} className="p-1 text-slate-500 hover:text-slate-900" title="清空">
+                        <RotateCcw className="w-4 h-4" />
+                    </button>
+                    <button onClick={handleExport} className="p-1 text-slate-500 hover:text-slate-900" title="导出 JSON">
+                        <Download className="w-4 h-4" />
+                    </button>
+                    <button onClick={() => setIsOpen(false)} className="p-1 text-slate-500 hover:text-slate-900">
+                        <X className="w-4 h-4" />
+                    </button>
+                </div>
+            </div>
+
+            {stages.length === 0 ? (
+                <div className="px-4 py-6 text-center text-slate-500">暂无数据，上传文件后开始统计</div>
+            ) : (
+                <table className="w-full">
+                    <thead>
+                        <tr className="text-left text-slate-500 border-b border-slate-100">
+                            <th className="px-4 py-2">阶段</th>
+                            <th className="px-2 py-2 text-right">次数</th>
+                            <th className="px-2 py-2 text-right">总耗时</th>
+                            <th className="px-2 py-2 text-right">最近</th>
+                            <th className="px-4 py-2">计数 / 异常</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {stages.map(([name, stats]) => (
+                            <tr key={name} className="border-b border-slate-50 align-top">
+                                <td className="px-4 py-2 font-mono text-slate-900">{name}</td>
+                                <td className="px-2 py-2 text-right">{stats.calls}</td>
+                                <td className="px-2 py-2 text-right">{stats.totalMs.toFixed(1)}ms</td>
+                                <td className="px-2 py-2 text-right">{stats.lastMs.toFixed(1)}ms</td>
+                                <td className="px-4 py-2">
+                                    {Object.entries(stats.counters).map(([key, value]) => (
+                                        <div key={key} className="text-slate-600">
+                                            {key}: {value.toLocaleString()}
+                                        </div>
+                                    ))}
+                                    {Object.entries(stats.anomalies).map(([key, anomaly]) => (
+                                        <div key={key} className="text-amber-700" title={anomaly.sample}>
+                                            ⚠️ {key} × {anomaly.count.toLocaleString()}
+                                        </div>
+                                    ))}
+                                </td>
+                            </tr>
+                        ))}
+                    </tbody>
+                </table>
+            )}
+        </div>
+    );
+};
@@ -1,9 +1,11 @@
-import React, { useState, useEffect } from 'react';
-import * as XLSX from 'xlsx';
-import Papa from 'papaparse';
+import React, { useState, useEffect, useRef } from 'react';
 import { Upload, FileSpreadsheet, AlertCircle, Loader2, ArrowRight, ArrowLeft, Plus, Trash2, Settings, CheckCircle, RotateCcw } from 'lucide-react';
 import { RawAdRecord, AdConfiguration, FilterRule, LayerConfiguration, DEFAULT_LAYER_CONFIG, LayerFilterRule } from '../types';
 import { LayerConfigModal } from './LayerConfigModal';
+import { ingestFile, isSupportedFile, IngestProgress } from '../utils/fileIngest';
+import { recordsFromColumnar } from '../utils/columnarStore';
+import { hashFile, loadDataset, saveDataset, setDatasetKey, setLastSession } from '../utils/persistentCache';
+import { debugLog, resetInstrumentation, startStage } from '../utils/instrumentation';
 
 interface FileUploadProps {
     onDataLoaded: (data: RawAdRecord[]) => void;
@@ -19,203 +21,69 @@ export const FileUpload: React.FC<FileUploadProps> = ({ onDataLoaded, configs, o
     const [error, setError] = useState<string>('');
     const [localConfigs, setLocalConfigs] = useState<AdConfiguration[]>(configs);
     const [showLayerModal, setShowLayerModal] = useState(false);
+    const [ingestProgress, setIngestProgress] = useState<IngestProgress | null>(null);
+    const ingestControllerRef = useRef<AbortController | null>(null);
+
+    // 卸载时停止解析
+    useEffect(() => () => ingestControllerRef.current?.abort(), []);
 
     // 同步 props 的变化到 local state
     useEffect(() => {
-        console.log('📋 FileUpload received configs:', configs);
+        debugLog('FileUpload', 'received configs:', configs);
         setLocalConfigs(configs);
     }, [configs]);
 
-    const normalizeDate = (dateValue: any): string => {
-        if (!dateValue) return '';
-
-        try {
-            // 如果是数字,可能是 Excel 日期序列号
-            if (typeof dateValue === 'number') {
-                // Excel 日期序列号: 从 1900-01-01 开始的天数
-                // 但 Excel 有个 bug: 1900 年被错误地当作闰年,所以需要调整
-                const excelEpoch = new Date(1899, 11, 30); // 1899-12-30
-                const date = new Date(excelEpoch.getTime() + dateValue * 24 * 60 * 60 * 1000);
-
-                const year = date.getFullYear();
-                const month = String(date.getMonth() + 1).padStart(2, '0');
-                const day = String(date.getDate()).padStart(2, '0');
-                return `${year}-${month}-${day}`;
-            }
-
-            // 如果是 Date 对象 (Excel datetime)
-            if (dateValue instanceof Date) {
-                const year = dateValue.getFullYear();
-                const month = String(dateValue.getMonth() + 1).padStart(2, '0');
-                const day = String(dateValue.getDate()).padStart(2, '0');
-                return `${year}-${month}-${day}`;
-            }
-
-            // 转为字符串处理
-            const str = String(dateValue).trim();
-
-            // 如果包含时间部分 (例如: "2026-01-14 00:00:00")
-            if (str.includes(' ')) {
-                const datePart = str.split(' ')[0];
-                // 尝试解析并标准化
-                const date = new Date(datePart);
-                if (!isNaN(date.getTime())) {
-                    const year = date.getFullYear();
-                    const month = String(date.getMonth() + 1).padStart(2, '0');
-                    const day = String(date.getDate()).padStart(2, '0');
-                    return `${year}-${month}-${day}`;
-                }
-                return datePart;
-            }
-
-            // 如果是斜杠格式 (例如: "2026/1/14")
-            if (str.includes('/')) {
-                const date = new Date(str);
-                if (!isNaN(date.getTime())) {
-                    const year = date.getFullYear();
-                    const month = String(date.getMonth() + 1).padStart(2, '0');
-                    const day = String(date.getDate()).padStart(2, '0');
-                    return `${year}-${month}-${day}`;
-                }
-            }
-
-            // 如果已经是标准格式或需要补零 (例如: "2026-1-14")
-            if (str.includes('-')) {
-                const date = new Date(str);
-                if (!isNaN(date.getTime())) {
-                    const year = date.getFullYear();
-                    const month = String(date.getMonth() + 1).padStart(2, '0');
-                    const day = String(date.getDate()).padStart(2, '0');
-                    return `${year}-${month}-${day}`;
-                }
-            }
-
-            return str;
-        } catch (err) {
-            console.warn(`⚠️ Error normalizing date: ${dateValue}`, err);
-            return String(dateValue);
-        }
-    };
-
-    const processRawData = (results: any[]): RawAdRecord[] => {
-        try {
-            console.log('🔍 Step 1: Raw data received:', results.length, 'rows');
-            console.log('🔍 First row columns:', Object.keys(results[0] || {}));
-            console.log('🔍 First row sample:', results[0]);
-
-            // 支持多种列名格式: Day, day, Campaign name, campaign_name 等
-            const filtered = results.filter(row =>
-                row['Day'] || row['day'] || row['Campaign name'] || row['campaign_name']
-            );
-            console.log('🔍 Step 2: After filter (Day/day or Campaign name/campaign_name):', filtered.length, 'rows');
-
-            const mappedData: RawAdRecord[] = filtered.map(row => ({
-                // 日期: Day, day, date
-                date: normalizeDate(row['Day'] || row['day'] || row['date'] || ''),
-                // 广告系列名: Campaign name, campaign_name
-                campaign_name: String(row['Campaign name'] || row['campaign_name'] || 'Unknown'),
-                // 广告组名: Ad set name, adset_name
-                adset_name: String(row['Ad set name'] || row['adset_name'] || 'Unknown'),
-                // 广告名: Ad name, ad_name
-                ad_name: String(row['Ad name'] || row['ad_name'] || 'Unknown'),
-                // 花费: Amount spent (USD), Cost, spend
-                spend: parseFloat(row['Amount spent (USD)'] || row['Cost'] || row['spend'] || 0),
-                // 展示次数: Impressions, impressions
-                impressions: parseInt(row['Impressions'] || row['impressions'] || 0),
-                // 链接点击: Link clicks, link_clicks
-                link_clicks: parseInt(row['Link clicks'] || row['link_clicks'] || 0),
-                // 购买次数: Purchases, Website purchases, purchases
-                purchases: parseInt(row['Purchases'] || row['Website purchases'] || row['purchases'] || 0),
-                // 购买金额: Purchases conversion value, Purchase conversion value, purchase_value
-                purchase_value: parseFloat(row['Purchases conversion value'] || row['Purchase conversion value'] || row['purchase_value'] || 0),
-                // 加购次数: Adds to cart, Website adds to cart, adds_to_cart
-                adds_to_cart: parseInt(row['Adds to cart'] || row['Website adds to cart'] || row['adds_to_cart'] || 0),
-                // 开始结账: Checkouts initiated, Website checkouts initiated, checkouts_initiated
-                checkouts_initiated: parseInt(row['Checkouts initiated'] || row['Website checkouts initiated'] || row['checkouts_initiated'] || 0),
-                // 落地页浏览: Website landing page views, Landing page views, landing_page_views
-                landing_page_views: parseInt(row['Website landing page views'] || row['Landing page views'] || row['landing_page_views'] || 0),
-                // 频次: Frequency, frequency
-                frequency: parseFloat(row['Frequency'] || row['frequency'] || 0),
-                // 覆盖人数: Reach, reach
-                reach: parseInt(row['Reach'] || row['reach'] || 0),
-            }));
-
-            console.log('🔍 Step 3: Mapped data:', mappedData.length, 'rows');
-            console.log('🔍 First mapped record:', mappedData[0]);
-            console.log('🔍 Sample dates:', mappedData.slice(0, 3).map(r => r.date));
-
-            if (mappedData.length === 0) {
-                throw new Error('未找到有效数据，请检查文件格式');
-            }
-
-            return mappedData;
-        } catch (err) {
-            console.error('❌ processRawData error:', err);
-            throw new Error(`数据处理失败: ${err instanceof Error ? err.message : '未知错误'}`);
-        }
-    };
-
     const handleFileUpload = async (event: React.ChangeEvent<HTMLInputElement>) => {
         const file = event.target.files?.[0];
         if (!file) return;
 
         setIsLoading(true);
         setError('');
+        // 新文件重新开始统计，整个读取 + 解析过程计入 fileUpload 阶段
+        resetInstrumentation();
+        const endUpload = startStage('fileUpload');
+
+        const fileName = file.name;
+        event.target.value = '';
+
+        if (!isSupportedFile(fileName)) {
+            setError('不支持的文件格式，请上传 CSV 或 XLSX 文件');
+            setIsLoading(false);
+            return;
+        }
+
+        // 在 Worker 中流式解析，记录直接写入列式数据集
+        const controller = new AbortController();
+        ingestControllerRef.current = controller;
+        setIngestProgress(null);
 
         try {
-            const fileExtension = file.name.split('.').pop()?.toLowerCase();
-
-            if (fileExtension === 'csv') {
-                Papa.parse(file, {
-                    header: true,
-                    skipEmptyLines: true,
-                    complete: (results) => {
-                        try {
-                            const data = processRawData(results.data);
-                            onDataLoaded(data);
-                            setIsLoading(false);
-                        } catch (err) {
-                            setError(err instanceof Error ? err.message : '解析失败');
-                            setIsLoading(false);
-                        }
-                    },
-                    error: (err) => {
-                        setError(`CSV解析错误: ${err.message}`);
-                        setIsLoading(false);
-                    }
+            // 同一文件（内容哈希相同）直接使用本地缓存的解析结果
+            const contentHash = await hashFile(file);
+            let dataset = await loadDataset(contentHash);
+            if (!dataset) {
+                dataset = await ingestFile(file, {
+                    signal: controller.signal,
+                    onProgress: setIngestProgress
                 });
-            } else if (fileExtension === 'xlsx' || fileExtension === 'xls') {
-                const reader = new FileReader();
-                reader.onload = (e) => {
-                    try {
-                        const data = new Uint8Array(e.target?.result as ArrayBuffer);
-                        const workbook = XLSX.read(data, { type: 'array' });
-                        const firstSheet = workbook.Sheets[workbook.SheetNames[0]];
-                        const jsonData = XLSX.utils.sheet_to_json(firstSheet);
-
-                        const processedData = processRawData(jsonData);
-                        onDataLoaded(processedData);
-                        setIsLoading(false);
-                    } catch (err) {
-                        setError(err instanceof Error ? err.message : 'Excel解析失败');
-                        setIsLoading(false);
-                    }
-                };
-                reader.onerror = () => {
-                    setError('文件读取失败');
-                    setIsLoading(false);
-                };
-                reader.readAsArrayBuffer(file);
-            } else {
-                setError('不支持的文件格式，请上传 CSV 或 XLSX 文件');
-                setIsLoading(false);
+                saveDataset(contentHash, dataset);
             }
+            if (controller.signal.aborted) return;
+            setLastSession({ contentHash, fileName });
+            const data = recordsFromColumnar(dataset);
+            setDatasetKey(data, contentHash);
+            endUpload();
+            onDataLoaded(data);
         } catch (err) {
+            if (err instanceof Error && err.name === 'AbortError') return;
             setError(err instanceof Error ? err.message : '上传失败');
-            setIsLoading(false);
+        } finally {
+            if (ingestControllerRef.current === controller) {
+                ingestControllerRef.current = null;
+                setIsLoading(false);
+                setIngestProgress(null);
+            }
         }
-
-        event.target.value = '';
     };
 
     // Config management functions
@@ -1057,8 +925,20 @@ export const FileUpload: React.FC<FileUploadProps> = ({ onDataLoaded, configs, o
                                                 Syncing ad data...
                                             </p>
                                             <p className="text-sm text-slate-600">
-                                                Please wait, parsing file
+                                                {ingestProgress
+                                                    ? ingestProgress.phase === 'reading'
+                                                        ? 'Reading file...'
+                                                        : `${ingestProgress.rows.toLocaleString()} rows parsed · ${Math.round((ingestProgress.bytes / Math.max(ingestProgress.totalBytes, 1)) * 100)}%`
+                                                    : 'Please wait, parsing file'}
                                             </p>
+                                            {ingestProgress && ingestProgress.phase === 'parsing' && (
+                                                <div className="w-64 h-1.5 bg-slate-200 rounded-full overflow-hidden">
+                                                    <div
+                                                        className="h-full bg-indigo-600 transition-all"
+                                                        style={{ width: `${Math.round((ingestProgress.bytes / Math.max(ingestProgress.totalBytes, 1)) * 100)}%` }}
+                                                    />
+                                                </div>
+                                            )}
                                         </div>
                                     ) : (
                                         <div className="flex flex-col items-center gap-3">
@@ -0,0 +1,16 @@
+import React from 'react';
+
+interface VirtualSpacerRowProps {
+    height: number;
+    colSpan: number;
+}
+
+// 窗口化表格中代替未渲染行的占位行
+export const VirtualSpacerRow: React.FC<VirtualSpacerRowProps> = ({ height, colSpan }) => {
+    if (height <= 0) return null;
+    return (
+        <tr aria-hidden="true">
+            <td colSpan={colSpan} style={{ height, padding: 0, border: 0 }} />
+        </tr>
+    );
+};
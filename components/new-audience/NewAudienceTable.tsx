@@ -4,7 +4,10 @@ import { NewAudienceAdSet, NewAudienceAd } from '../../utils/newAudienceUtils';
 import { KPIType, ColumnConfig, getNewAudienceColumns } from '../../utils/newAudienceColumnConfig';
 import { RawAdRecord } from '../../types';
 import { calculateBenchmark, calculateVsAvg } from '../../utils/benchmarkUtils';
-import { getDelta } from '../../utils/dataUtils';
+import { getDelta, groupRecordsByName } from '../../utils/dataUtils';
+import { debugLog } from '../../utils/instrumentation';
+import { useVirtualRows } from '../../hooks/useVirtualRows';
+import { VirtualSpacerRow } from '../VirtualSpacerRow';
 
 interface NewAudienceTableProps {
     adSets: NewAudienceAdSet[];
@@ -18,6 +21,16 @@ interface NewAudienceTableProps {
     searchText?: string;
 }
 
+// 展开后的表格行（窗口化渲染时逐行挂载）
+type AudienceRow =
+    | { kind: 'adSet'; key: string; adSet: NewAudienceAdSet }
+    | { kind: 'ad'; key: string; adSet: NewAudienceAdSet; ad: NewAudienceAd; nested: boolean };
+
+const getRowKey = (row: AudienceRow) => row.key;
+const estimateRowHeight = () => 84;
+
+const NO_RECORDS: RawAdRecord[] = [];
+
 export const NewAudienceTable: React.FC<NewAudienceTableProps> = ({
     adSets,
     comparisonData,
@@ -32,7 +45,7 @@ export const NewAudienceTable: React.FC<NewAudienceTableProps> = ({
     const [expandedAdSets, setExpandedAdSets] = useState<Set<string>>(new Set());
     const columns = useMemo(() => {
         const cols = getNewAudienceColumns(kpiType);
-        console.log('NewAudienceTable - KPI:', kpiType, 'Columns count:', cols.length);
+        debugLog('NewAudienceTable', 'KPI:', kpiType, 'Columns count:', cols.length);
         return cols;
     }, [kpiType]);
 
@@ -115,6 +128,295 @@ export const NewAudienceTable: React.FC<NewAudienceTableProps> = ({
         return filtered;
     }, [adSets, durationRange, filterLevel, searchText]);
 
+    // 展开为逐行列表：AdSet 视图为 AdSet 行 + 展开的 Ad 行，Ad 视图为所有 Ad 行
+    const rows = useMemo(() => {
+        const list: AudienceRow[] = [];
+        filteredData.forEach(adSet => {
+            if (filterLevel === 'AdSet') {
+                list.push({ kind: 'adSet', key: `s:${adSet.id}`, adSet });
+                if (!expandedAdSets.has(adSet.id)) return;
+                adSet.ads.forEach(ad => list.push({ kind: 'ad', key: `s:${adSet.id}/a:${ad.id}`, adSet, ad, nested: true }));
+            } else {
+                adSet.ads.forEach(ad => list.push({ kind: 'ad', key: `a:${ad.id}`, adSet, ad, nested: false }));
+            }
+        });
+        return list;
+    }, [filteredData, filterLevel, expandedAdSets]);
+
+    const virtual = useVirtualRows({ items: rows, getKey: getRowKey, estimateHeight: estimateRowHeight });
+
+    // 对比期数据按名称分组，每行只查一次
+    const prevByAdSet = useMemo(() => groupRecordsByName(comparisonData, 'adset_name'), [comparisonData]);
+    const prevByAd = useMemo(() => groupRecordsByName(comparisonData, 'ad_name'), [comparisonData]);
+
+    const renderAdSetRow = (adSet: NewAudienceAdSet, key: string) => {
+        const isExpanded = expandedAdSets.has(adSet.id);
+        const metrics = calculateMetrics(adSet.records);
+        const prevMetrics = calculateMetrics(prevByAdSet.get(adSet.name) || NO_RECORDS);
+
+        return (
+            <tr key={key} ref={virtual.measureRef} data-virtual-key={key} className="border-b hover:bg-slate-50 transition-all">
+                <td className="px-4 py-3">
+                    <div className="flex items-center gap-2">
+                        <button
+                            onClick={() => toggleAdSet(adSet.id)}
+                            className="p-1 hover:bg-slate-200 rounded"
+                        >
+                            {isExpanded ? (
+                                <ChevronDown className="w-4 h-4" />
+                            ) : (
+                                <ChevronRight className="w-4 h-4" />
+                            )}
+                        </button>
+                        <span className="font-bold truncate max-w-[250px]" title={adSet.name}>
+                            {adSet.name}
+                        </span>
+                        <span className="text-[10px] bg-slate-100 text-slate-500 px-1.5 py-0.5 rounded font-black uppercase">
+                            AdSet
+                        </span>
+                    </div>
+                </td>
+                {columns.map(col => {
+                    const actualValue = metrics[col.key as keyof typeof metrics];
+                    const vsAvg = calculateVsAvg(actualValue, benchmark[col.key as keyof typeof benchmark] || 0);
+                    const delta = getDelta(actualValue, prevMetrics[col.key as keyof typeof prevMetrics] || 0);
+                    const isVsAvgPositive = col.higherIsBetter ? vsAvg > 0 : vsAvg < 0;
+                    const isSpendColumn = col.key === 'spend';
+
+                    return (
+                        <td key={col.key} className="px-4 py-2 whitespace-nowrap">
+                            <div className="flex flex-col items-start gap-0.5">
+                                <div className="text-base font-bold text-slate-900">
+                                    {col.format(actualValue)}
+                                </div>
+
+                                {isSpendColumn ? (
+                                    <>
+                                        <div className="flex items-center gap-1">
+                                            <span className="text-[9px] text-slate-500 font-medium">vs Avg:</span>
+                                            <span className="text-[11px] font-black text-blue-600">
+                                                {vsAvg > 0 ? '↑' : '↓'} {Math.abs(vsAvg).toFixed(1)}%
+                                            </span>
+                                        </div>
+                                        <div className="flex items-center gap-1">
+                                            <span className="text-[9px] text-slate-500 font-medium">vs Last:</span>
+                                            <span className={`text-[11px] font-normal ${delta > 0 ? 'text-green-600' : 'text-red-600'}`}>
+                                                {delta > 0 ? '↑' : '↓'} {Math.abs(delta * 100).toFixed(1)}%
+                                            </span>
+                                        </div>
+                                    </>
+                                ) : (
+                                    <>
+                                        <div className={`text-[11px] font-black ${isVsAvgPositive ? 'text-green-600' : 'text-red-600'}`}>
+                                            {vsAvg > 0 ? '+' : ''}{vsAvg.toFixed(1)}%
+                                        </div>
+                                        <div className={`text-[11px] font-normal ${delta > 0 ? 'text-emerald-500' : 'text-rose-500'}`}>
+                                            {delta > 0 ? '+' : ''}{(delta * 100).toFixed(1)}%
+                                        </div>
+                                    </>
+                                )}
+                            </div>
+                        </td>
+                    );
+                })}
+                <td className="px-4 py-3">
+                    <span className={`font-bold ${getDaysColor(adSet.durationDays)}`}>
+                        {adSet.durationDays}d
+                    </span>
+                </td>
+                <td className="px-4 py-3">
+                    <button
+                        onClick={() => onCampaignClick(adSet.campaignName)}
+                        className="text-indigo-600 hover:text-indigo-800 hover:underline font-medium text-sm"
+                    >
+                        {adSet.campaignName}
+                    </button>
+                </td>
+                <td className="px-4 py-3">
+                    <button
+                        onClick={() => onTodoToggle({ id: `adset-${adSet.id}`, name: adSet.name, level: 'adset' })}
+                        className={`p-2 rounded-lg transition-colors ${markedTodos.has(`adset-${adSet.id}`)
+                            ? 'bg-indigo-100 text-indigo-600'
+                            : 'hover:bg-slate-100 text-slate-400'
+                            }`}
+                    >
+                        {markedTodos.has(`adset-${adSet.id}`) ? '☑' : '☐'}
+                    </button>
+                </td>
+            </tr>
+        );
+    };
+
+    // nested: AdSet 视图中展开的 Ad 行；否则为 Ad 视图中的行
+    const renderAdRow = (ad: NewAudienceAd, adSet: NewAudienceAdSet, key: string, nested: boolean) => {
+        const adMetrics = calculateMetrics(ad.records);
+        const adPrevMetrics = calculateMetrics(prevByAd.get(ad.name) || NO_RECORDS);
+
+        if (nested) {
+            return (
+                <tr key={key} ref={virtual.measureRef} data-virtual-key={key} className="border-b bg-slate-50/20 hover:bg-slate-50">
+                    <td className="px-4 py-3">
+                        <div className="flex items-center gap-2" style={{ paddingLeft: '3rem' }}>
+                            <span className="text-slate-400">└─</span>
+                            <span className="font-medium truncate max-w-[200px]" title={ad.name}>
+                                {ad.name}
+                            </span>
+                            <span className="text-[10px] bg-slate-100 text-slate-500 px-1.5 py-0.5 rounded font-black uppercase">
+                                Ad
+                            </span>
+                        </div>
+                    </td>
+                    {columns.map(col => {
+                        const actualValue = adMetrics[col.key as keyof typeof adMetrics];
+                        const vsAvg = calculateVsAvg(actualValue, benchmark[col.key as keyof typeof benchmark] || 0);
+                        const delta = getDelta(actualValue, adPrevMetrics[col.key as keyof typeof adPrevMetrics] || 0);
+                        const isVsAvgPositive = col.higherIsBetter ? vsAvg > 0 : vsAvg < 0;
+                        const isSpendColumn = col.key === 'spend';
+
+                        return (
+                            <td key={col.key} className="px-4 py-2 whitespace-nowrap">
+                                <div className="flex flex-col items-start gap-0.5">
+                                    <div className="text-base font-bold text-slate-900">
+                                        {col.format(actualValue)}
+                                    </div>
+
+                                    {isSpendColumn ? (
+                                        <>
+                                            <div className="flex items-center gap-1">
+                                                <span className="text-[9px] text-slate-500 font-medium">vs Avg:</span>
+                                                <span className="text-[11px] font-black text-blue-600">
+                                                    {vsAvg > 0 ? '↑' : '↓'} {Math.abs(vsAvg).toFixed(1)}%
+                                                </span>
+                                            </div>
+                                            <div className="flex items-center gap-1">
+                                                <span className="text-[9px] text-slate-500 font-medium">vs Last:</span>
+                                                <span className={`text-[11px] font-normal ${delta > 0 ? 'text-green-600' : 'text-red-600'}`}>
+                                                    {delta > 0 ? '↑' : '↓'} {Math.abs(delta * 100).toFixed(1)}%
+                                                </span>
+                                            </div>
+                                        </>
+                                    ) : (
+                                        <>
+                                            <div className={`text-[11px] font-black ${isVsAvgPositive ? 'text-green-600' : 'text-red-600'}`}>
+                                                {vsAvg > 0 ? '+' : ''}{vsAvg.toFixed(1)}%
+                                            </div>
+                                            <div className={`text-[11px] font-normal ${delta > 0 ? 'text-emerald-500' : 'text-rose-500'}`}>
+                                                {delta > 0 ? '+' : ''}{(delta * 100).toFixed(1)}%
+                                            </div>
+                                        </>
+                                    )}
+                                </div>
+                            </td>
+                        );
+                    })}
+                    <td className="px-4 py-3">
+                        <span className={`font-bold ${getDaysColor(ad.durationDays)}`}>
+                            {ad.durationDays}d
+                        </span>
+                    </td>
+                    <td className="px-4 py-3">
+                        <span className="text-slate-400 text-sm">
+                            {adSet.campaignName}
+                        </span>
+                    </td>
+                    <td className="px-4 py-3">
+                        <button
+                            onClick={() => onTodoToggle({ id: `ad-${ad.id}`, name: ad.name, level: 'ad' })}
+                            className={`p-2 rounded-lg transition-colors ${markedTodos.has(`ad-${ad.id}`)
+                                ? 'bg-indigo-100 text-indigo-600'
+                                : 'hover:bg-slate-100 text-slate-400'
+                                }`}
+                        >
+                            {markedTodos.has(`ad-${ad.id}`) ? '☑' : '☐'}
+                        </button>
+                    </td>
+                </tr>
+            );
+        }
+
+        return (
+            <tr key={key} ref={virtual.measureRef} data-virtual-key={key} className="border-b hover:bg-slate-50">
+                <td className="px-4 py-3">
+                    <div className="flex items-center gap-2">
+                        <span className="font-medium truncate max-w-[250px]" title={ad.name}>
+                            {ad.name}
+                        </span>
+                        <span className="text-[10px] bg-slate-100 text-slate-500 px-1.5 py-0.5 rounded font-black uppercase">
+                            Ad
+                        </span>
+                    </div>
+                </td>
+                {columns.map(col => {
+                    const actualValue = adMetrics[col.key as keyof typeof adMetrics];
+                    const vsAvg = calculateVsAvg(actualValue, benchmark[col.key as keyof typeof benchmark] || 0);
+                    const delta = getDelta(actualValue, adPrevMetrics[col.key as keyof typeof adPrevMetrics] || 0);
+                    const isVsAvgPositive = col.higherIsBetter ? vsAvg > 0 : vsAvg < 0;
+                    const isSpendColumn = col.key === 'spend';
+
+                    return (
+                        <td key={col.key} className="px-4 py-2 whitespace-nowrap">
+                            <div className="flex flex-col items-start gap-0.5">
+                                <div className="text-base font-bold text-slate-900">
+                                    {col.format(actualValue)}
+                                </div>
+
+                                {isSpendColumn ? (
+                                    <>
+                                        <div className="flex items-center gap-1">
+                                            <span className="text-[9px] text-slate-500 font-medium">vs Avg:</span>
+                                            <span className="text-[11px] font-black text-blue-600">
+                                                {vsAvg > 0 ? '↑' : '↓'} {Math.abs(vsAvg).toFixed(1)}%
+                                            </span>
+                                        </div>
+                                        <div className="flex items-center gap-1">
+                                            <span className="text-[9px] text-slate-500 font-medium">vs Last:</span>
+                                            <span className={`text-[11px] font-normal ${delta > 0 ? 'text-green-600' : 'text-red-600'}`}>
+                                                {delta > 0 ? '↑' : '↓'} {Math.abs(delta * 100).toFixed(1)}%
+                                            </span>
+                                        </div>
+                                    </>
+                                ) : (
+                                    <>
+                                        <div className={`text-[11px] font-black ${isVsAvgPositive ? 'text-green-600' : 'text-red-600'}`}>
+                                            {vsAvg > 0 ? '+' : ''}{vsAvg.toFixed(1)}%
+                                        </div>
+                                        <div className={`text-[11px] font-normal ${delta > 0 ? 'text-emerald-500' : 'text-rose-500'}`}>
+                                            {delta > 0 ? '+' : ''}{(delta * 100).toFixed(1)}%
+                                        </div>
+                                    </>
+                                )}
+                            </div>
+                        </td>
+                    );
+                })}
+                <td className="px-4 py-3">
+                    <span className={`font-bold ${getDaysColor(ad.durationDays)}`}>
+                        {ad.durationDays}d
+                    </span>
+                </td>
+                <td className="px-4 py-3">
+                    <button
+                        onClick={() => onCampaignClick(adSet.campaignName)}
+                        className="text-indigo-600 hover:text-indigo-800 hover:underline font-medium text-sm"
+                    >
+                        {adSet.campaignName}
+                    </button>
+                </td>
+                <td className="px-4 py-3">
+                    <button
+                        onClick={() => onTodoToggle({ id: `ad-${ad.id}`, name: ad.name, level: 'ad' })}
+                        className={`p-2 rounded-lg transition-colors ${markedTodos.has(`ad-${ad.id}`)
+                            ? 'bg-indigo-100 text-indigo-600'
+                            : 'hover:bg-slate-100 text-slate-400'
+                            }`}
+                    >
+                        {markedTodos.has(`ad-${ad.id}`) ? '☑' : '☐'}
+                    </button>
+                </td>
+            </tr>
+        );
+    };
+
     return (
         <div className="bg-white rounded-2xl border border-slate-200 shadow-sm overflow-hidden">
             <div className="overflow-x-auto">
@@ -140,292 +442,13 @@ export const NewAudienceTable: React.FC<NewAudienceTableProps> = ({
                             </th>
                         </tr>
                     </thead>
-                    <tbody>
-                        {filterLevel === 'AdSet' ? (
-                            // AdSet Level View
-                            filteredData.map(adSet => {
-                                const isExpanded = expandedAdSets.has(adSet.id);
-                                const metrics = calculateMetrics(adSet.records);
-                                const prevMetrics = calculateMetrics(
-                                    comparisonData.filter(r => r.adset_name === adSet.name)
-                                );
-
-                                return (
-                                    <React.Fragment key={adSet.id}>
-                                        {/* Ad Set Row */}
-                                        <tr className="border-b hover:bg-slate-50 transition-all">
-                                            <td className="px-4 py-3">
-                                                <div className="flex items-center gap-2">
-                                                    <button
-                                                        onClick={() => toggleAdSet(adSet.id)}
-                                                        className="p-1 hover:bg-slate-200 rounded"
-                                                    >
-                                                        {isExpanded ? (
-                                                            <ChevronDown className="w-4 h-4" />
-                                                        ) : (
-                                                            <ChevronRight className="w-4 h-4" />
-                                                        )}
-                                                    </button>
-                                                    <span className="font-bold truncate max-w-[250px]" title={adSet.name}>
-                                                        {adSet.name}
-                                                    </span>
-                                                    <span className="text-[10px] bg-slate-100 text-slate-500 px-1.5 py-0.5 rounded font-black uppercase">
-                                                        AdSet
-                                                    </span>
-                                                </div>
-                                            </td>
-                                            {columns.map(col => {
-                                                const actualValue = metrics[col.key as keyof typeof metrics];
-                                                const vsAvg = calculateVsAvg(actualValue, benchmark[col.key as keyof typeof benchmark] || 0);
-                                                const delta = getDelta(actualValue, prevMetrics[col.key as keyof typeof prevMetrics] || 0);
-                                                const isVsAvgPositive = col.higherIsBetter ? vsAvg > 0 : vsAvg < 0;
-                                                const isSpendColumn = col.key === 'spend';
-
-                                                return (
-                                                    <td key={col.key} className="px-4 py-2 whitespace-nowrap">
-                                                        <div className="flex flex-col items-start gap-0.5">
-                                                            <div className="text-base font-bold text-slate-900">
-                                                                {col.format(actualValue)}
-                                                            </div>
-
-                                                            {isSpendColumn ? (
-                                                                <>
-                                                                    <div className="flex items-center gap-1">
-                                                                        <span className="text-[9px] text-slate-500 font-medium">vs Avg:</span>
-                                                                        <span className="text-[11px] font-black text-blue-600">
-                                                                            {vsAvg > 0 ? '↑' : '↓'} {Math.abs(vsAvg).toFixed(1)}%
-                                                                        </span>
-                                                                    </div>
-                                                                    <div className="flex items-center gap-1">
-                                                                        <span className="text-[9px] text-slate-500 font-medium">vs Last:</span>
-                                                                        <span className={`text-[11px] font-normal ${delta > 0 ? 'text-green-600' : 'text-red-600'}`}>
-                                                                            {delta > 0 ? '↑' : '↓'} {Math.abs(delta * 100).toFixed(1)}%
-                                                                        </span>
-                                                                    </div>
-                                                                </>
-                                                            ) : (
-                                                                <>
-                                                                    <div className={`text-[11px] font-black ${isVsAvgPositive ? 'text-green-600' : 'text-red-600'}`}>
-                                                                        {vsAvg > 0 ? '+' : ''}{vsAvg.toFixed(1)}%
-                                                                    </div>
-                                                                    <div className={`text-[11px] font-normal ${delta > 0 ? 'text-emerald-500' : 'text-rose-500'}`}>
-                                                                        {delta > 0 ? '+' : ''}{(delta * 100).toFixed(1)}%
-                                                                    </div>
-                                                                </>
-                                                            )}
-                                                        </div>
-                                                    </td>
-                                                );
-                                            })}
-                                            <td className="px-4 py-3">
-                                                <span className={`font-bold ${getDaysColor(adSet.durationDays)}`}>
-                                                    {adSet.durationDays}d
-                                                </span>
-                                            </td>
-                                            <td className="px-4 py-3">
-                                                <button
-                                                    onClick={() => onCampaignClick(adSet.campaignName)}
-                                                    className="text-indigo-600 hover:text-indigo-800 hover:underline font-medium text-sm"
-                                                >
-                                                    {adSet.campaignName}
-                                                </button>
-                                            </td>
-                                            <td className="px-4 py-3">
-                                                <button
-                                                    onClick={() => onTodoToggle({ id: `adset-${adSet.id}`, name: adSet.name, level: 'adset' })}
-                                                    className={`p-2 rounded-lg transition-colors ${markedTodos.has(`adset-${adSet.id}`)
-                                                        ? 'bg-indigo-100 text-indigo-600'
-                                                        : 'hover:bg-slate-100 text-slate-400'
-                                                        }`}
-                                                >
-                                                    {markedTodos.has(`adset-${adSet.id}`) ? '☑' : '☐'}
-                                                </button>
-                                            </td>
-                                        </tr>
-
-                                        {/* Expanded Ads */}
-                                        {isExpanded && adSet.ads.map(ad => {
-                                            const adMetrics = calculateMetrics(ad.records);
-                                            const adPrevMetrics = calculateMetrics(
-                                                comparisonData.filter(r => r.ad_name === ad.name)
-                                            );
-
-                                            return (
-                                                <tr key={ad.id} className="border-b bg-slate-50/20 hover:bg-slate-50">
-                                                    <td className="px-4 py-3">
-                                                        <div className="flex items-center gap-2" style={{ paddingLeft: '3rem' }}>
-                                                            <span className="text-slate-400">└─</span>
-                                                            <span className="font-medium truncate max-w-[200px]" title={ad.name}>
-                                                                {ad.name}
-                                                            </span>
-                                                            <span className="text-[10px] bg-slate-100 text-slate-500 px-1.5 py-0.5 rounded font-black uppercase">
-                                                                Ad
-                                                            </span>
-                                                        </div>
-                                                    </td>
-                                                    {columns.map(col => {
-                                                        const actualValue = adMetrics[col.key as keyof typeof adMetrics];
-                                                        const vsAvg = calculateVsAvg(actualValue, benchmark[col.key as keyof typeof benchmark] || 0);
-                                                        const delta = getDelta(actualValue, adPrevMetrics[col.key as keyof typeof adPrevMetrics] || 0);
-                                                        const isVsAvgPositive = col.higherIsBetter ? vsAvg > 0 : vsAvg < 0;
-                                                        const isSpendColumn = col.key === 'spend';
-
-                                                        return (
-                                                            <td key={col.key} className="px-4 py-2 whitespace-nowrap">
-                                                                <div className="flex flex-col items-start gap-0.5">
-                                                                    <div className="text-base font-bold text-slate-900">
-                                                                        {col.format(actualValue)}
-                                                                    </div>
-
-                                                                    {isSpendColumn ? (
-                                                                        <>
-                                                                            <div className="flex items-center gap-1">
-                                                                                <span className="text-[9px] text-slate-500 font-medium">vs Avg:</span>
-                                                                                <span className="text-[11px] font-black text-blue-600">
-                                                                                    {vsAvg > 0 ? '↑' : '↓'} {Math.abs(vsAvg).toFixed(1)}%
-                                                                                </span>
-                                                                            </div>
-                                                                            <div className="flex items-center gap-1">
-                                                                                <span className="text-[9px] text-slate-500 font-medium">vs Last:</span>
-                                                                                <span className={`text-[11px] font-normal ${delta > 0 ? 'text-green-600' : 'text-red-600'}`}>
-                                                                                    {delta > 0 ? '↑' : '↓'} {Math.abs(delta * 100).toFixed(1)}%
-                                                                                </span>
-                                                                            </div>
-                                                                        </>
-                                                                    ) : (
-                                                                        <>
-                                                                            <div className={`text-[11px] font-black ${isVsAvgPositive ? 'text-green-600' : 'text-red-600'}`}>
-                                                                                {vsAvg > 0 ? '+' : ''}{vsAvg.toFixed(1)}%
-                                                                            </div>
-                                                                            <div className={`text-[11px] font-normal ${delta > 0 ? 'text-emerald-500' : 'text-rose-500'}`}>
-                                                                                {delta > 0 ? '+' : ''}{(delta * 100).toFixed(1)}%
-                                                                            </div>
-                                                                        </>
-                                                                    )}
-                                                                </div>
-                                                            </td>
-                                                        );
-                                                    })}
-                                                    <td className="px-4 py-3">
-                                                        <span className={`font-bold ${getDaysColor(ad.durationDays)}`}>
-                                                            {ad.durationDays}d
-                                                        </span>
-                                                    </td>
-                                                    <td className="px-4 py-3">
-                                                        <span className="text-slate-400 text-sm">
-                                                            {adSet.campaignName}
-                                                        </span>
-                                                    </td>
-                                                    <td className="px-4 py-3">
-                                                        <button
-                                                            onClick={() => onTodoToggle({ id: `ad-${ad.id}`, name: ad.name, level: 'ad' })}
-                                                            className={`p-2 rounded-lg transition-colors ${markedTodos.has(`ad-${ad.id}`)
-                                                                ? 'bg-indigo-100 text-indigo-600'
-                                                                : 'hover:bg-slate-100 text-slate-400'
-                                                                }`}
-                                                        >
-                                                            {markedTodos.has(`ad-${ad.id}`) ? '☑' : '☐'}
-                                                        </button>
-                                                    </td>
-                                                </tr>
-                                            );
-                                        })}
-                                    </React.Fragment>
-                                );
-                            })
-                        ) : (
-                            // Ad Level View - Flat list of all Ads
-                            filteredData.flatMap(adSet =>
-                                adSet.ads.map(ad => {
-                                    const adMetrics = calculateMetrics(ad.records);
-                                    const adPrevMetrics = calculateMetrics(
-                                        comparisonData.filter(r => r.ad_name === ad.name)
-                                    );
-
-                                    return (
-                                        <tr key={ad.id} className="border-b hover:bg-slate-50">
-                                            <td className="px-4 py-3">
-                                                <div className="flex items-center gap-2">
-                                                    <span className="font-medium truncate max-w-[250px]" title={ad.name}>
-                                                        {ad.name}
-                                                    </span>
-                                                    <span className="text-[10px] bg-slate-100 text-slate-500 px-1.5 py-0.5 rounded font-black uppercase">
-                                                        Ad
-                                                    </span>
-                                                </div>
-                                            </td>
-                                            {columns.map(col => {
-                                                const actualValue = adMetrics[col.key as keyof typeof adMetrics];
-                                                const vsAvg = calculateVsAvg(actualValue, benchmark[col.key as keyof typeof benchmark] || 0);
-                                                const delta = getDelta(actualValue, adPrevMetrics[col.key as keyof typeof adPrevMetrics] || 0);
-                                                const isVsAvgPositive = col.higherIsBetter ? vsAvg > 0 : vsAvg < 0;
-                                                const isSpendColumn = col.key === 'spend';
-
-                                                return (
-                                                    <td key={col.key} className="px-4 py-2 whitespace-nowrap">
-                                                        <div className="flex flex-col items-start gap-0.5">
-                                                            <div className="text-base font-bold text-slate-900">
-                                                                {col.format(actualValue)}
-                                                            </div>
-
-                                                            {isSpendColumn ? (
-                                                                <>
-                                                                    <div className="flex items-center gap-1">
-                                                                        <span className="text-[9px] text-slate-500 font-medium">vs Avg:</span>
-                                                                        <span className="text-[11px] font-black text-blue-600">
-                                                                            {vsAvg > 0 ? '↑' : '↓'} {Math.abs(vsAvg).toFixed(1)}%
-                                                                        </span>
-                                                                    </div>
-                                                                    <div className="flex items-center gap-1">
-                                                                        <span className="text-[9px] text-slate-500 font-medium">vs Last:</span>
-                                                                        <span className={`text-[11px] font-normal ${delta > 0 ? 'text-green-600' : 'text-red-600'}`}>
-                                                                            {delta > 0 ? '↑' : '↓'} {Math.abs(delta * 100).toFixed(1)}%
-                                                                        </span>
-                                                                    </div>
-                                                                </>
-                                                            ) : (
-                                                                <>
-                                                                    <div className={`text-[11px] font-black ${isVsAvgPositive ? 'text-green-600' : 'text-red-600'}`}>
-                                                                        {vsAvg > 0 ? '+' : ''}{vsAvg.toFixed(1)}%
-                                                                    </div>
-                                                                    <div className={`text-[11px] font-normal ${delta > 0 ? 'text-emerald-500' : 'text-rose-500'}`}>
-                                                                        {delta > 0 ? '+' : ''}{(delta * 100).toFixed(1)}%
-                                                                    </div>
-                                                                </>
-                                                            )}
-                                                        </div>
-                                                    </td>
-                                                );
-                                            })}
-                                            <td className="px-4 py-3">
-                                                <span className={`font-bold ${getDaysColor(ad.durationDays)}`}>
-                                                    {ad.durationDays}d
-                                                </span>
-                                            </td>
-                                            <td className="px-4 py-3">
-                                                <button
-                                                    onClick={() => onCampaignClick(adSet.campaignName)}
-                                                    className="text-indigo-600 hover:text-indigo-800 hover:underline font-medium text-sm"
-                                                >
-                                                    {adSet.campaignName}
-                                                </button>
-                                            </td>
-                                            <td className="px-4 py-3">
-                                                <button
-                                                    onClick={() => onTodoToggle({ id: `ad-${ad.id}`, name: ad.name, level: 'ad' })}
-                                                    className={`p-2 rounded-lg transition-colors ${markedTodos.has(`ad-${ad.id}`)
-                                                        ? 'bg-indigo-100 text-indigo-600'
-                                                        : 'hover:bg-slate-100 text-slate-400'
-                                                        }`}
-                                                >
-                                                    {markedTodos.has(`ad-${ad.id}`) ? '☑' : '☐'}
-                                                </button>
-                                            </td>
-                                        </tr>
-                                    );
-                                })
-                            )
+                    <tbody ref={virtual.containerRef}>
+                        <VirtualSpacerRow height={virtual.paddingTop} colSpan={columns.length + 4} />
+                        {virtual.rows.map(({ item: row, key }) => row.kind === 'adSet'
+                            ? renderAdSetRow(row.adSet, key)
+                            : renderAdRow(row.ad, row.adSet, key, row.nested)
                         )}
+                        <VirtualSpacerRow height={virtual.paddingBottom} colSpan={columns.length + 4} />
                     </tbody>
                 </table>
             </div>
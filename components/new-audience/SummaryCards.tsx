@@ -2,6 +2,7 @@ import React from 'react';
 import { NewAudienceAdSet } from '../../utils/newAudienceUtils';
 import { KPIType } from '../../utils/newAudienceColumnConfig';
 import { formatCurrency, formatNumber } from '../../utils/dataUtils';
+import { debugLog } from '../../utils/instrumentation';
 
 interface SummaryCardsProps {
     adSets: NewAudienceAdSet[];
@@ -9,7 +10,7 @@ interface SummaryCardsProps {
 }
 
 export const SummaryCards: React.FC<SummaryCardsProps> = ({ adSets, kpiType }) => {
-    console.log('SummaryCards render - kpiType:', kpiType, 'adSets count:', adSets?.length);
+    debugLog('SummaryCards', 'render - kpiType:', kpiType, 'adSets count:', adSets?.length);
 
     // Safety check
     if (!adSets || adSets.length === 0) {
@@ -4,9 +4,12 @@
 import React, { useState, forwardRef, useImperativeHandle, useMemo } from 'react';
 import { RefreshCw, AlertCircle, ChevronDown, ChevronRight } from 'lucide-react';
 import { createGeminiService, AISummaryResult } from '../../services/geminiService';
-import { generateDataSummary, DiagnosticDetail, DataSummary, aggregateAndDiagnoseAds, AggregatedAdResult } from '../../utils/aiSummaryUtils';
+import { generateDataSummary, DiagnosticDetail, DataSummary, AggregatedAdResult } from '../../utils/aiSummaryUtils';
 import { ActionItemsResult } from '../../utils/actionItemsUtils';
 import { useConfig } from '../../contexts/ConfigContext';
+import { useAnalyticsTask } from '../../hooks/useAnalyticsTask';
+
+const EMPTY_AGGREGATED_ADS: AggregatedAdResult[] = [];
 
 interface AIDiagnosticPanelProps {
     result: ActionItemsResult;
@@ -27,6 +30,7 @@ export const AIDiagnosticPanel = forwardRef<AIDiagnosticPanelRef, AIDiagnosticPa
     const { config } = useConfig();
 
     const [aiSummary, setAiSummary] = useState<AISummaryResult | null>(null);
+    const [partialSummary, setPartialSummary] = useState<AISummaryResult | null>(null);  // 流式生成中的部分结果
     const [isGenerating, setIsGenerating] = useState(false);
     const [error, setError] = useState<string | null>(null);
 
@@ -45,8 +49,8 @@ export const AIDiagnosticPanel = forwardRef<AIDiagnosticPanelRef, AIDiagnosticPa
     console.log('🔍 [AIDiagnosticPanel] Config loaded at:', config?.loadedAt);
     console.log('🔍 [AIDiagnosticPanel] =====================================');
 
-    // 生成 AI 诊断
-    const generateDiagnosis = async () => {
+    // 生成 AI 诊断（force: 跳过缓存重新生成）
+    const generateDiagnosis = async (force = false) => {
         // 检查 API Key 是否配置
         if (!apiKey) {
             setError('⚠️ 未配置 Gemini API Key\n\n请按以下步骤配置：\n1. 访问 https://aistudio.google.com/app/apikey 创建新的 API Key\n2. 打开 Google Sheet 配置表\n3. 在 config 工作表中找到 gemini_api_key 行\n4. 将新的 API Key 粘贴到 config_value 列\n5. 刷新页面重试');
@@ -55,14 +59,18 @@ export const AIDiagnosticPanel = forwardRef<AIDiagnosticPanelRef, AIDiagnosticPa
 
         setIsGenerating(true);
         setError(null);
+        setPartialSummary(null);
 
         try {
             // 生成数据摘要（传入 Ad 诊断数据）
             const dataSummary = generateDataSummary(result, diagnosticsMap, adDiagnosticsMap);
 
-            // 调用 Gemini API
+            // 调用 Gemini API（相同数据命中缓存；流式生成时逐步显示）
             const geminiService = createGeminiService(apiKey);
-            const summary = await geminiService.generateOptimizationSummary(dataSummary);
+            const summary = await geminiService.generateOptimizationSummary(dataSummary, {
+                force,
+                onPartial: setPartialSummary
+            });
 
             setAiSummary(summary);
         } catch (err: any) {
@@ -90,14 +98,19 @@ export const AIDiagnosticPanel = forwardRef<AIDiagnosticPanelRef, AIDiagnosticPa
             }
         } finally {
             setIsGenerating(false);
+            setPartialSummary(null);
         }
     };
 
     // 暴露给父组件的方法
     useImperativeHandle(ref, () => ({
-        generate: generateDiagnosis
+        generate: () => generateDiagnosis()
     }));
 
+    // 流式生成中显示部分结果，否则显示上一次的完整结果
+    const isStreaming = isGenerating && partialSummary !== null;
+    const displayedSummary = isStreaming ? partialSummary : aiSummary;
+
     // 计算基础统计（用于快速展示）
     const totalCampaigns = result.campaigns.length;
     const totalSpend = result.campaigns.reduce((sum, c) => sum + c.spend, 0);
@@ -110,7 +123,7 @@ export const AIDiagnosticPanel = forwardRef<AIDiagnosticPanelRef, AIDiagnosticPa
             {aiSummary && (
                 <div className="flex justify-end mb-4">
                     <button
-                        onClick={generateDiagnosis}
+                        onClick={() => generateDiagnosis(true)}
                         disabled={isGenerating}
                         className={`flex items-center gap-2 px-4 py-2 rounded-lg font-bold text-sm transition-all ${isGenerating
                             ? 'bg-indigo-300 text-indigo-800 cursor-not-allowed'
@@ -142,12 +155,15 @@ export const AIDiagnosticPanel = forwardRef<AIDiagnosticPanelRef, AIDiagnosticPa
             )}
 
             {/* AI 诊断结果 */}
-            {aiSummary ? (
+            {displayedSummary ? (
                 <div className="space-y-4 max-h-[600px] overflow-y-auto pr-2">
                     {/* 1. 今日诊断结论 */}
                     <div>
                         <h4 className="font-bold text-slate-900 mb-2 text-base">今日诊断结论：</h4>
-                        <p className="text-slate-700 pl-4 leading-relaxed">{aiSummary.conclusion}</p>
+                        <p className="text-slate-700 pl-4 leading-relaxed">
+                            {displayedSummary.conclusion}
+                            {isStreaming && <span className="inline-block w-1.5 h-4 ml-0.5 align-middle bg-indigo-400 animate-pulse" />}
+                        </p>
                     </div>
 
                     {/* 2. Campaign 问题 */}
@@ -158,11 +174,11 @@ export const AIDiagnosticPanel = forwardRef<AIDiagnosticPanelRef, AIDiagnosticPa
                             <div>
                                 <p className="text-slate-700 leading-relaxed mb-1">
                                     <span className="font-semibold">2.1-直接关停的Campaign：</span>
-                                    {aiSummary.campaignProblems.p0.description}
+                                    {displayedSummary.campaignProblems.p0.description}
                                 </p>
-                                {aiSummary.campaignProblems.p0.campaigns.length > 0 && (
+                                {displayedSummary.campaignProblems.p0.campaigns.length > 0 && (
                                     <div className="pl-4 space-y-0.5">
-                                        {aiSummary.campaignProblems.p0.campaigns.map((campaign, idx) => (
+                                        {displayedSummary.campaignProblems.p0.campaigns.map((campaign, idx) => (
                                             <p key={idx} className="text-slate-600 text-sm">{campaign}</p>
                                         ))}
                                     </div>
@@ -173,11 +189,11 @@ export const AIDiagnosticPanel = forwardRef<AIDiagnosticPanelRef, AIDiagnosticPa
                             <div>
                                 <p className="text-slate-700 leading-relaxed mb-1">
                                     <span className="font-semibold">2.2-立刻优化/降预算的Campaign：</span>
-                                    {aiSummary.campaignProblems.p1.description}
+                                    {displayedSummary.campaignProblems.p1.description}
                                 </p>
-                                {aiSummary.campaignProblems.p1.campaigns.length > 0 && (
+                                {displayedSummary.campaignProblems.p1.campaigns.length > 0 && (
                                     <div className="pl-4 space-y-0.5">
-                                        {aiSummary.campaignProblems.p1.campaigns.map((campaign, idx) => (
+                                        {displayedSummary.campaignProblems.p1.campaigns.map((campaign, idx) => (
                                             <p key={idx} className="text-slate-600 text-sm">{campaign}</p>
                                         ))}
                                     </div>
@@ -188,11 +204,11 @@ export const AIDiagnosticPanel = forwardRef<AIDiagnosticPanelRef, AIDiagnosticPa
                             <div>
                                 <p className="text-slate-700 leading-relaxed mb-1">
                                     <span className="font-semibold">2.3-优化/观察的Campaign：</span>
-                                    {aiSummary.campaignProblems.p2.description}
+                                    {displayedSummary.campaignProblems.p2.description}
                                 </p>
-                                {aiSummary.campaignProblems.p2.campaigns.length > 0 && (
+                                {displayedSummary.campaignProblems.p2.campaigns.length > 0 && (
                                     <div className="pl-4 space-y-0.5">
-                                        {aiSummary.campaignProblems.p2.campaigns.map((campaign, idx) => (
+                                        {displayedSummary.campaignProblems.p2.campaigns.map((campaign, idx) => (
                                             <p key={idx} className="text-slate-600 text-sm">{campaign}</p>
                                         ))}
                                     </div>
@@ -271,11 +287,13 @@ export const AIAdSummaryCard: React.FC<{
     type AdFilterType = 'ALL' | 'SCALING' | 'STOP' | 'KEEP' | 'WATCH';
     const [adFilter, setAdFilter] = useState<AdFilterType>('ALL');
 
-    // 计算聚合后的 Ad 数据
-    const aggregatedAds = useMemo(() => {
-        if (!result.ads || result.ads.length === 0) return [];
-        return aggregateAndDiagnoseAds(result.ads);
+    // 计算聚合后的 Ad 数据（Worker 中计算）
+    const aggregateInput = useMemo(() => {
+        if (!result.ads || result.ads.length === 0) return null;
+        return { ads: result.ads };
     }, [result.ads]);
+    const aggregateTask = useAnalyticsTask('aggregateAds', aggregateInput);
+    const aggregatedAds = aggregateTask.result || EMPTY_AGGREGATED_ADS;
 
     // 筛选 Ad
     const filteredAds = useMemo(() => {
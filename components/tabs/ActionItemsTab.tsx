@@ -3,28 +3,30 @@ import { Download, Trash2, Info, ChevronDown, ChevronRight, Lightbulb, AlertCirc
 import { RawAdRecord, AdConfiguration, LayerConfiguration } from '../../types';
 import { QuadrantThresholds } from '../../utils/quadrantUtils';
 import {
-    generateActionItems,
     exportActionItemsToCSV,
     ActionItemsResult,
-    generateNewAudienceActionItems,
     exportNewAudienceActionItemsToCSV,
     NewAudienceActionItemsResult
 } from '../../utils/actionItemsUtils';
-import { formatCurrency, matchesConfig } from '../../utils/dataUtils';
+import { formatCurrency } from '../../utils/dataUtils';
 import { LevelToggle } from '../filters/LevelToggle';
 import { SearchInput } from '../filters/SearchInput';
 import { MultiSelect } from '../filters/MultiSelect';
-import { getOptimizationGuidance, getTriggeredConditions, getPriorityLevel, CampaignMetrics } from '../../utils/optimizationRules';
+import { getTriggeredConditions, getPriorityLevel } from '../../utils/optimizationRules';
+import { buildGuidanceStore, getAdGuidanceKey, GuidanceEntry } from '../../utils/guidanceStore';
 import { toggleGuidance, getPriorityBadge, GuidanceDetailPanel } from './GuidanceHelpers';
 // 新增：导入诊断引擎和Benchmark计算器
-import { diagnoseCampaign, diagnoseCampaignWithContext, DiagnosticResult, CampaignContext, convertToDetailedDiagnostic, diagnoseAllScenarios, calculateTrend, TrendInfo } from '../../utils/campaignDiagnostics';
-import { calculateBenchmarks, CampaignBenchmarks } from '../../utils/benchmarkCalculator';
-import { calculateL3DL7DROI } from '../../utils/trendCalculator';
+import { diagnoseCampaign, convertToDetailedDiagnostic } from '../../utils/campaignDiagnostics';
+import { calculateBenchmarks } from '../../utils/benchmarkCalculator';
+import { rollupL3DL7DROI } from '../../utils/rollupCube';
 import { AIDiagnosticPanel, AIDiagnosticPanelRef, AIAdSummaryCard } from './AIDiagnosticPanel';
 import { DiagnosticDetail } from '../../utils/aiSummaryUtils';
 import { useConfig } from '../../contexts/ConfigContext';
-import { diagnoseAd, AdDiagnosticContext } from '../../utils/adDiagnostics';
-import { calculateLayerBenchmarks, getCampaignLayer } from '../../utils/benchmarkService';
+import { runAnalyticsTask, isAbortError } from '../../utils/analyticsPool';
+import { deriveContentKey, fingerprint } from '../../utils/persistentCache';
+import { useAnalyticsTask } from '../../hooks/useAnalyticsTask';
+import { useVirtualRows } from '../../hooks/useVirtualRows';
+import { VirtualSpacerRow } from '../VirtualSpacerRow';
 
 interface ActionItemsTabProps {
     data: RawAdRecord[];
@@ -42,6 +44,45 @@ export interface ActionItemsTabRef {
     isLoading: boolean;
 }
 
+// 诊断数据尚未计算完成时的占位（保持引用稳定）
+const EMPTY_DIAGNOSTICS = new Map<string, DiagnosticDetail[]>();
+
+// 窗口化渲染的行：展开的诊断面板单独作为一行（高度差异大，分开测量）
+interface GuidanceRow<T> {
+    key: string;
+    item: T;
+    detail: boolean;
+}
+
+const getGuidanceRowKey = <T,>(row: GuidanceRow<T>) => row.key;
+const estimateGuidanceRowHeight = <T,>(row: GuidanceRow<T>) => (row.detail ? 480 : 96);
+const getIdKey = (item: { id: string }) => item.id;
+const estimateNaRowHeight = () => 88;
+const NO_ITEMS: never[] = [];
+
+// 表格排序字段（priority 按调优指导预计算的排序值，降序时最紧急的在前）
+type SortField = 'spend' | 'kpi' | 'priority';
+
+const sortValue = (field: SortField, item: { spend: number; actualValue: number }, entry: GuidanceEntry | undefined): number => {
+    if (field === 'spend') return item.spend;
+    if (field === 'kpi') return item.actualValue;
+    return entry ? -entry.sortRank : 0;
+};
+
+const toGuidanceRows = <T extends { id: string }>(
+    items: T[],
+    expanded: Set<string>,
+    keyOf: (item: T) => string = getIdKey
+): GuidanceRow<T>[] => {
+    const rows: GuidanceRow<T>[] = [];
+    items.forEach(item => {
+        const key = keyOf(item);
+        rows.push({ key, item, detail: false });
+        if (expanded.has(item.id)) rows.push({ key: `${key}:detail`, item, detail: true });
+    });
+    return rows;
+};
+
 // KPI 格式化
 const formatKPI = (value: number, kpiType: 'ROI' | 'CPC' | 'CPM'): string => {
     if (kpiType === 'ROI') return `${value.toFixed(2)}x`;
@@ -309,6 +350,8 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
     const [blResult, setBlResult] = useState<ActionItemsResult | null>(null);
     const [naResult, setNaResult] = useState<NewAudienceActionItemsResult | null>(null);
     const [isLoading, setIsLoading] = useState(false);
+    const [generateProgress, setGenerateProgress] = useState<{ done: number; total: number } | null>(null);
+    const generateControllerRef = useRef<AbortController | null>(null);
     const [blRemovedIds, setBlRemovedIds] = useState<Set<string>>(new Set());
     const [naRemovedIds, setNaRemovedIds] = useState<Set<string>>(new Set());
 
@@ -357,16 +400,19 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
     // AI诊断面板 ref
     const aiDiagnosticRef = useRef<AIDiagnosticPanelRef>(null);
 
+    // 最新的 Campaign 诊断数据（异步生成 AI 总结时读取）
+    const campaignDiagnosticsRef = useRef<Map<string, DiagnosticDetail[]>>(EMPTY_DIAGNOSTICS);
+
     // 排序状态 - Business Line
-    const [campaignSort, setCampaignSort] = useState<{ field: 'spend' | 'kpi'; direction: 'asc' | 'desc' }>({
+    const [campaignSort, setCampaignSort] = useState<{ field: SortField; direction: 'asc' | 'desc' }>({
         field: 'spend',
         direction: 'desc'
     });
-    const [adSetSort, setAdSetSort] = useState<{ field: 'spend' | 'kpi'; direction: 'asc' | 'desc' }>({
+    const [adSetSort, setAdSetSort] = useState<{ field: SortField; direction: 'asc' | 'desc' }>({
         field: 'spend',
         direction: 'desc'
     });
-    const [adSort, setAdSort] = useState<{ field: 'spend' | 'kpi'; direction: 'asc' | 'desc' }>({
+    const [adSort, setAdSort] = useState<{ field: SortField; direction: 'asc' | 'desc' }>({
         field: 'spend',
         direction: 'desc'
     });
@@ -433,16 +479,27 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
         // It will be applied locally in the Campaign AI Summary render section.
 
         // Apply level filter only when a specific level is selected
+        let filtered: ActionItemsResult;
         if (blFilterLevel === 'Campaign') {
-            return { campaigns, adSets: [], ads: [] };
+            filtered = { campaigns, adSets: [], ads: [] };
         } else if (blFilterLevel === 'AdSet') {
-            return { campaigns: [], adSets, ads: [] };
+            filtered = { campaigns: [], adSets, ads: [] };
         } else if (blFilterLevel === 'Ad') {
-            return { campaigns: [], adSets: [], ads };
+            filtered = { campaigns: [], adSets: [], ads };
         } else {
             // Default: show all levels
-            return { campaigns, adSets, ads };
+            filtered = { campaigns, adSets, ads };
         }
+
+        // 诊断任务以筛选结果为参数：按 结果键/筛选条件 计算缓存指纹，不序列化整个结果
+        deriveContentKey(blResult, filtered, fingerprint({
+            removed: Array.from(blRemovedIds).sort(),
+            level: blFilterLevel,
+            search: blSearchText,
+            businessLine: blBusinessLineFilter,
+            priority: blPriorityFilter
+        }));
+        return filtered;
     }, [blResult, blRemovedIds, blFilterLevel, blSearchText, blBusinessLineFilter, blPriorityFilter, budgetAdviceFilter]);
 
     // 素材专用筛选逻辑 (独立于 Campaign/AdSet 筛选)
@@ -543,22 +600,41 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
         return calculateBenchmarks(campaignsWithMetrics);
     }, [filteredBlResult]);
 
+    // L3D / L7D 趋势：查询汇总立方体的 Campaign × 天 单元格（见 utils/rollupCube.ts），所有 Campaign 一次查询
+    const campaignTrendROI = useMemo(
+        () => rollupL3DL7DROI(data, dateRange.end),
+        [data, dateRange.end]
+    );
+
+    // 调优指导、优先级、触发条件：数据 / 阈值 / 配置变化时一次算出（见 utils/guidanceStore.ts），渲染与排序只查表
+    const guidanceStore = useMemo(
+        () => buildGuidanceStore({
+            result: filteredBlResult,
+            data,
+            configs,
+            dateRange: { start: dateRange.start, end: dateRange.end },
+            campaignBenchmarks,
+            campaignTrendROI
+        }),
+        [filteredBlResult, data, configs, dateRange.start, dateRange.end, campaignBenchmarks, campaignTrendROI]
+    );
+
     // 排序处理函数
-    const handleCampaignSort = (field: 'spend' | 'kpi') => {
+    const handleCampaignSort = (field: SortField) => {
         setCampaignSort(prev => ({
             field,
             direction: prev.field === field && prev.direction === 'desc' ? 'asc' : 'desc'
         }));
     };
 
-    const handleAdSetSort = (field: 'spend' | 'kpi') => {
+    const handleAdSetSort = (field: SortField) => {
         setAdSetSort(prev => ({
             field,
             direction: prev.field === field && prev.direction === 'desc' ? 'asc' : 'desc'
         }));
     };
 
-    const handleAdSort = (field: 'spend' | 'kpi') => {
+    const handleAdSort = (field: SortField) => {
         setAdSort(prev => ({
             field,
             direction: prev.field === field && prev.direction === 'desc' ? 'asc' : 'desc'
@@ -570,215 +646,95 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
         if (!filteredBlResult) return [];
         const items = [...filteredBlResult.campaigns];
         return items.sort((a, b) => {
-            const aValue = campaignSort.field === 'spend' ? a.spend : a.actualValue;
-            const bValue = campaignSort.field === 'spend' ? b.spend : b.actualValue;
+            const aValue = sortValue(campaignSort.field, a, guidanceStore.campaigns.get(a.id));
+            const bValue = sortValue(campaignSort.field, b, guidanceStore.campaigns.get(b.id));
             return campaignSort.direction === 'asc' ? aValue - bValue : bValue - aValue;
         });
-    }, [filteredBlResult, campaignSort]);
+    }, [filteredBlResult, campaignSort, guidanceStore]);
 
     const sortedAdSets = useMemo(() => {
         if (!filteredBlResult) return [];
         const items = [...filteredBlResult.adSets];
         return items.sort((a, b) => {
-            const aValue = adSetSort.field === 'spend' ? a.spend : a.actualValue;
-            const bValue = adSetSort.field === 'spend' ? b.spend : b.actualValue;
+            const aValue = sortValue(adSetSort.field, a, guidanceStore.adSets.get(a.id));
+            const bValue = sortValue(adSetSort.field, b, guidanceStore.adSets.get(b.id));
             return adSetSort.direction === 'asc' ? aValue - bValue : bValue - aValue;
         });
-    }, [filteredBlResult, adSetSort]);
+    }, [filteredBlResult, adSetSort, guidanceStore]);
 
     const sortedAds = useMemo(() => {
         const items = [...filteredAds];
         return items.sort((a, b) => {
-            const aValue = adSort.field === 'spend' ? a.spend : a.actualValue;
-            const bValue = adSort.field === 'spend' ? b.spend : b.actualValue;
+            const aValue = sortValue(adSort.field, a, guidanceStore.ads.get(getAdGuidanceKey(a)));
+            const bValue = sortValue(adSort.field, b, guidanceStore.ads.get(getAdGuidanceKey(b)));
             return adSort.direction === 'asc' ? aValue - bValue : bValue - aValue;
         });
-    }, [filteredAds, adSort]);
-
-    // 预计算所有Campaign的诊断数据（用于AI诊断面板）
-    const campaignDiagnosticsData = useMemo(() => {
-        if (!filteredBlResult) return new Map<string, DiagnosticDetail[]>();
-
-        const diagMap = new Map<string, DiagnosticDetail[]>();
-
-        // 1. 按业务线预计算 Benchmarks
-        const benchmarksMap = new Map<string, ReturnType<typeof calculateLayerBenchmarks>>();
-        configs.forEach(config => {
-            // 筛选属于该业务线的数据
-            // 注意：这里使用传入的原始 data，虽然它只经过了日期筛选，但我们需要为每个业务线计算其 Benchmark
-            const blData = data.filter(r => matchesConfig(r, config));
-            if (blData.length > 0) {
-                benchmarksMap.set(config.id, calculateLayerBenchmarks(blData, layerConfig));
-            }
-        });
-
-        filteredBlResult.campaigns.forEach(campaign => {
-            // 获取该业务线的 Benchmarks
-            const layerBenchmarks = benchmarksMap.get(campaign.businessLineId);
-
-            if (campaign.kpiType !== 'ROI' || !layerBenchmarks) {
-                return;
-            }
-
-            // 获取 Campaign 所属层级
-            const layer = getCampaignLayer(campaign.campaignName, layerConfig);
-
-            // 获取对应的 CampaignBenchmarks
-            // 优先使用对应层级的数据，如果该层级无数据 (hasData=false)，则回退到 global
-            const layerKey = layer.toLowerCase() as keyof typeof layerBenchmarks;
-            const targetBenchmarks = layerBenchmarks[layerKey] && (layerBenchmarks[layerKey] as any).hasData
-                ? layerBenchmarks[layerKey]
-                : layerBenchmarks.global;
-
-            const metrics = {
-                spend: campaign.spend,
-                roi: campaign.actualValue,
-                cvr: campaign.metrics?.cvr,
-                cpc: campaign.metrics?.cpc,
-                cpm: campaign.metrics?.cpm,
-                cpa: campaign.metrics?.cpa,
-                ctr: campaign.metrics?.ctr,
-                aov: campaign.metrics?.aov,
-                frequency: campaign.metrics?.frequency || 0,
-                click_to_pv_rate: campaign.metrics?.click_to_pv_rate || 0,
-                checkout_rate: campaign.metrics?.checkout_rate || 0,
-                purchase_rate: campaign.metrics?.purchase_rate || 0,
-            };
-
-            // 计算上下文
-            const adsetCount = filteredBlResult.adSets.filter(a => a.campaignName === campaign.campaignName).length || 1;
-            const start = new Date(dateRange.start);
-            const end = new Date(dateRange.end);
-            const activeDays = Math.ceil(Math.abs(end.getTime() - start.getTime()) / (1000 * 60 * 60 * 24)) + 1;
-            const config = configs.find(c => c.id === campaign.businessLineId);
-            const totalBudget = config?.budget || 0;
-            const dailyBudget = totalBudget / activeDays / Math.max(filteredBlResult.campaigns.length, 1);
-
-            const context: CampaignContext = {
-                adsetCount,
-                activeDays,
-                dailyBudget,
-                campaignBudget: dailyBudget * activeDays
-            };
-
-            // 获取诊断场景 (使用新的 targetBenchmarks)
-            const diagResults = diagnoseAllScenarios(metrics as any, targetBenchmarks, context);
-
-            if (diagResults.length > 0) {
-                const details: DiagnosticDetail[] = diagResults.map(result => ({
-                    campaignName: campaign.campaignName,
-                    priority: campaign.priority || null,
-                    scenario: result.scenario,
-                    diagnosis: result.diagnosis,
-                    action: result.action
-                }));
-
-                diagMap.set(campaign.id, details);
-            }
-        });
-
-        return diagMap;
-    }, [filteredBlResult, dateRange, configs, data, layerConfig]);
+    }, [filteredAds, adSort, guidanceStore]);
+
+    // 长列表只渲染视口附近的行
+    const campaignRows = useMemo(() => toGuidanceRows(sortedCampaigns, blExpandedGuidance), [sortedCampaigns, blExpandedGuidance]);
+    const campaignVirtual = useVirtualRows({ items: campaignRows, getKey: getGuidanceRowKey, estimateHeight: estimateGuidanceRowHeight });
+    const adRows = useMemo(() => toGuidanceRows(sortedAds, blExpandedGuidance, getAdGuidanceKey), [sortedAds, blExpandedGuidance]);
+    const adVirtual = useVirtualRows({ items: adRows, getKey: getGuidanceRowKey, estimateHeight: estimateGuidanceRowHeight });
+    const naAdSetVirtual = useVirtualRows({ items: filteredNaResult?.adSets ?? NO_ITEMS, getKey: getIdKey, estimateHeight: estimateNaRowHeight });
+    const naAdVirtual = useVirtualRows({ items: filteredNaResult?.ads ?? NO_ITEMS, getKey: getIdKey, estimateHeight: estimateNaRowHeight });
+
+    // 预计算所有Campaign的诊断数据（用于AI诊断面板），在分析 Worker 中计算（见 utils/diagnosticsData.ts）
+    const campaignDiagnosticsInput = useMemo(
+        () => filteredBlResult
+            ? { result: filteredBlResult, configs, layerConfig, dateRange: { start: dateRange.start, end: dateRange.end } }
+            : null,
+        [filteredBlResult, dateRange.start, dateRange.end, configs, layerConfig]
+    );
+    const campaignDiagnosticsTask = useAnalyticsTask('campaignDiagnostics', campaignDiagnosticsInput, [data]);
+    const campaignDiagnosticsData = campaignDiagnosticsTask.result || EMPTY_DIAGNOSTICS;
 
     // 当诊断数据变化时更新state
     React.useEffect(() => {
+        campaignDiagnosticsRef.current = campaignDiagnosticsData;
         setDiagnosticsMap(campaignDiagnosticsData);
     }, [campaignDiagnosticsData]);
 
-    // 🆕 预计算所有Ad的诊断数据（用于AI诊断面板的素材问题分析）
-    const adDiagnosticsData = useMemo(() => {
-        if (!filteredBlResult || filteredBlResult.ads.length === 0) return new Map<string, DiagnosticDetail[]>();
-
-        const diagMap = new Map<string, DiagnosticDetail[]>();
-
-        // 计算Ad层级的Benchmark
-        const adsWithMetrics = filteredBlResult.ads.map(ad => ({
-            metrics: {
-                roi: ad.metrics?.roi || 0,
-                ctr: ad.metrics?.ctr || 0,
-                cvr: ad.metrics?.cvr || 0,
-                frequency: ad.metrics?.frequency || 0,
-            }
-        }));
-
-        const adBenchmarks = calculateBenchmarks(adsWithMetrics);
-        if (!adBenchmarks) return diagMap;
-
-        filteredBlResult.ads.forEach(ad => {
-            // 计算上线天数
-            const start = new Date(dateRange.start);
-            const end = new Date(dateRange.end);
-            const activeDays = Math.ceil(Math.abs(end.getTime() - start.getTime()) / (1000 * 60 * 60 * 24)) + 1;
-
-            // 计算AdSet预算（简化：使用Campaign预算除以AdSet数量）
-            const adsetCount = filteredBlResult.adSets.filter(a => a.campaignName === ad.campaignName).length || 1;
-            const config = configs.find(c => c.id === ad.businessLineId);
-            const totalBudget = config?.budget || 0;
-            const campaignBudget = totalBudget / Math.max(filteredBlResult.campaigns.length, 1);
-            const adsetBudget = campaignBudget / adsetCount;
-
-            // 计算活跃Ad数量（同一AdSet下spend > 0的Ad数量）
-            const activeAds = filteredBlResult.ads.filter(a =>
-                a.adSetName === ad.adSetName && a.spend > 0
-            ).length || 1;
-
-            // 判断是否为视频素材
-            const isVideo = ad.adName.toLowerCase().includes('video');
-
-            // 构建Ad诊断上下文
-            const context: AdDiagnosticContext = {
-                spend: ad.spend,
-                activeDays,
-                adsetBudget,
-                activeAds,
-                roi: ad.metrics?.roi || 0,
-                ctr: ad.metrics?.ctr || 0,
-                cvr: ad.metrics?.cvr || 0,
-                frequency: ad.metrics?.frequency || 0,
-                roiBenchmark: adBenchmarks.avgRoi,
-                ctrBenchmark: adBenchmarks.avgCtr,
-                cvrBenchmark: adBenchmarks.avgCvr,
-                frequencyBenchmark: adBenchmarks.avgFrequency || 2.0,
-                isVideo,
-                videoPlayRate3s: ad.metrics?.video_plays_3s ?
-                    (ad.metrics.video_plays_3s / (ad.metrics.impressions || 1)) : undefined,
-                videoPlayRate3sBenchmark: 0.2  // 默认20%作为基准
-            };
-
-            // 执行Ad诊断
-            const diagResult = diagnoseAd(context);
-            if (diagResult) {
-                const detail: DiagnosticDetail = {
-                    campaignName: ad.adName,  // 使用Ad名称
-                    priority: diagResult.priority,
-                    scenario: diagResult.scenario + (diagResult.subScenario ? ` (${diagResult.subScenario})` : ''),
-                    diagnosis: diagResult.diagnosis,
-                    action: diagResult.action
-                };
-
-                diagMap.set(ad.id, [detail]);
-            }
-        });
-
-        return diagMap;
-    }, [filteredBlResult, dateRange, configs]);
+    // 🆕 预计算所有Ad的诊断数据（用于AI诊断面板的素材问题分析），在分析 Worker 中计算
+    const adDiagnosticsInput = useMemo(
+        () => filteredBlResult
+            ? { result: filteredBlResult, configs, dateRange: { start: dateRange.start, end: dateRange.end } }
+            : null,
+        [filteredBlResult, dateRange.start, dateRange.end, configs]
+    );
+    const adDiagnosticsTask = useAnalyticsTask('adDiagnostics', adDiagnosticsInput);
+    const adDiagnosticsData = adDiagnosticsTask.result || EMPTY_DIAGNOSTICS;
 
     // 🆕 当Ad诊断数据变化时更新state
     React.useEffect(() => {
         setAdDiagnosticsMap(adDiagnosticsData);
     }, [adDiagnosticsData]);
 
-    // 生成 Action Items
+    // 生成 Action Items（在分析 Worker 中计算，进度驱动加载状态；重新生成时取消上一次）
     const handleGenerate = () => {
+        generateControllerRef.current?.abort();
+        const controller = new AbortController();
+        generateControllerRef.current = controller;
         setIsLoading(true);
-        setTimeout(() => {
-            const blActionResult = generateActionItems(data, configs, businessLineThresholds, layerConfig, comparisonData);
-            const naActionResult = generateNewAudienceActionItems(data, configs, businessLineThresholds, dateRange.end, comparisonData);
+        setGenerateProgress(null);
+
+        runAnalyticsTask('actionItems', {
+            configs,
+            thresholds: businessLineThresholds,
+            layerConfig,
+            endDate: dateRange.end
+        }, {
+            datasets: [data, comparisonData || []],
+            signal: controller.signal,
+            onProgress: (done, total) => setGenerateProgress({ done, total })
+        }).then(({ businessLine: blActionResult, newAudience: naActionResult }) => {
+            generateControllerRef.current = null;
             setBlResult(blActionResult);
             setNaResult(naActionResult);
             setBlRemovedIds(new Set());
             setNaRemovedIds(new Set());
             setIsLoading(false);
+            setGenerateProgress(null);
 
             // 自动触发 AI 诊断
             setTimeout(() => {
@@ -805,7 +761,7 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
                         const campaignsData = blActionResult.campaigns.map(c => ({
                             id: c.id,
                             campaignName: c.campaignName,
-                            diagnostics: campaignDiagnosticsData.get(c.id) || []
+                            diagnostics: campaignDiagnosticsRef.current.get(c.id) || []
                         })).filter(c => c.diagnostics.length > 0);
 
                         if (campaignsData.length > 0) {
@@ -827,9 +783,29 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
                     console.log('❌ 不满足AI总结生成条件，跳过');
                 }
             }, 1000);
-        }, 500);
+        }).catch(err => {
+            if (isAbortError(err)) return;
+            generateControllerRef.current = null;
+            console.error('❌ 生成 Action Items 失败:', err);
+            setIsLoading(false);
+            setGenerateProgress(null);
+        });
     };
 
+    // 生成过程中输入变化（日期范围、业务线配置、阈值等）：取消进行中的计算并按新输入重新生成
+    const generateInputsRef = useRef({ data, configs, businessLineThresholds, layerConfig, comparisonData, end: dateRange.end });
+    React.useEffect(() => {
+        const previous = generateInputsRef.current;
+        generateInputsRef.current = { data, configs, businessLineThresholds, layerConfig, comparisonData, end: dateRange.end };
+        const changed = previous.data !== data || previous.configs !== configs
+            || previous.businessLineThresholds !== businessLineThresholds || previous.layerConfig !== layerConfig
+            || previous.comparisonData !== comparisonData || previous.end !== dateRange.end;
+        if (changed && generateControllerRef.current) handleGenerate();
+    }, [data, configs, businessLineThresholds, layerConfig, comparisonData, dateRange.end]);
+
+    // 卸载时取消
+    React.useEffect(() => () => generateControllerRef.current?.abort(), []);
+
     // 导出 CSV
     const handleExport = () => {
         if (activeSubTab === 'businessLine' && filteredBlResult) {
@@ -894,6 +870,19 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
                     <h3 className="text-xl font-bold text-slate-900 mb-2">
                         正在分析数据...
                     </h3>
+                    {generateProgress && generateProgress.total > 0 && (
+                        <div className="max-w-sm mx-auto mt-4">
+                            <div className="h-2 bg-slate-100 rounded-full overflow-hidden">
+                                <div
+                                    className="h-full bg-indigo-600 transition-all"
+                                    style={{ width: `${Math.round((generateProgress.done / generateProgress.total) * 100)}%` }}
+                                />
+                            </div>
+                            <p className="text-xs text-slate-500 mt-2">
+                                {generateProgress.done} / {generateProgress.total}
+                            </p>
+                        </div>
+                    )}
                 </div>
             )}
 
@@ -1355,267 +1344,129 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
                                                                     />
                                                                 </div>
                                                             </th>
-                                                            <th className="px-4 py-3 text-center text-xs font-black text-slate-700 uppercase w-20">优先级</th>
+                                                            <th
+                                                                className="px-4 py-3 text-center text-xs font-black text-slate-700 uppercase w-20 cursor-pointer hover:bg-slate-100 transition-colors select-none"
+                                                                onClick={() => handleCampaignSort('priority')}
+                                                            >
+                                                                <div className="flex items-center justify-center gap-1">
+                                                                    优先级
+                                                                    <SortIcon
+                                                                        active={campaignSort.field === 'priority'}
+                                                                        direction={campaignSort.direction}
+                                                                    />
+                                                                </div>
+                                                            </th>
                                                             <th className="px-4 py-3 text-left text-xs font-black text-slate-700 uppercase w-24">调优指导</th>
                                                             <th className="px-4 py-3 text-left text-xs font-black text-slate-700 uppercase">操作</th>
                                                         </tr>
                                                     </thead>
-                                                    <tbody>
-                                                        {sortedCampaigns.map(campaign => {
+                                                    <tbody ref={campaignVirtual.containerRef}>
+                                                        <VirtualSpacerRow height={campaignVirtual.paddingTop} colSpan={8} />
+                                                        {campaignVirtual.rows.map(({ item: { item: campaign, detail }, key }) => {
                                                             const isExpanded = blExpandedGuidance.has(campaign.id);
+                                                            const { guidance, metrics, avgMetrics, context, diagnosticMetrics, diagnosticResults, trendInfo, triggeredConditions } =
+                                                                guidanceStore.campaigns.get(campaign.id)!;
 
-                                                            const metrics: CampaignMetrics = {
-                                                                spend: campaign.spend,
-                                                                roi: campaign.kpiType === 'ROI' ? campaign.actualValue : undefined,
-                                                                cpc: campaign.kpiType === 'CPC' ? campaign.actualValue : undefined,
-                                                                cpm: campaign.kpiType === 'CPM' ? campaign.actualValue : undefined,
-                                                                cvr: campaign.metrics?.cvr,
-                                                                aov: campaign.metrics?.aov,
-                                                                cpa: campaign.metrics?.cpa,
-                                                                cpatc: campaign.metrics?.cpatc,
-                                                                atc_rate: campaign.metrics?.atc_rate,
-                                                                ctr: campaign.metrics?.ctr,
-                                                                clicks: campaign.metrics?.clicks,
-                                                                impressions: campaign.metrics?.impressions,
-                                                                reach: campaign.metrics?.reach,
-                                                                frequency: campaign.metrics?.frequency,
-                                                                // 添加原始数据字段用于公式计算
-                                                                link_clicks: campaign.metrics?.clicks || 0,
-                                                                landing_page_views: campaign.metrics?.landing_page_views || 0,
-                                                                purchases: campaign.metrics?.purchases || 0,
-                                                                adds_to_cart: campaign.metrics?.adds_to_cart || 0,
-                                                                checkouts_initiated: campaign.metrics?.checkouts_initiated || 0,
-                                                                purchase_value: campaign.metrics?.purchase_value || 0,
-                                                            };
-
-                                                            const avgMetrics: CampaignMetrics = {
-                                                                spend: campaign.avgSpend,
-                                                                roi: campaign.kpiType === 'ROI' ? campaign.avgValue : undefined,
-                                                                cpc: campaign.kpiType === 'CPC' ? campaign.avgValue : undefined,
-                                                                cpm: campaign.kpiType === 'CPM' ? campaign.avgValue : undefined,
-                                                                cvr: campaign.avgMetrics?.cvr,
-                                                                aov: campaign.avgMetrics?.aov,
-                                                                cpa: campaign.avgMetrics?.cpa,
-                                                                cpatc: campaign.avgMetrics?.cpatc,
-                                                                atc_rate: campaign.avgMetrics?.atc_rate,
-                                                                ctr: campaign.avgMetrics?.ctr,
-                                                                clicks: campaign.avgMetrics?.clicks,
-                                                                impressions: campaign.avgMetrics?.impressions,
-                                                                reach: campaign.avgMetrics?.reach,
-                                                                frequency: campaign.avgMetrics?.frequency,
-                                                            };
-
-
-                                                            // 使用新的诊断引擎（仅针对ROI类型的Campaign）
-                                                            let guidance: string;
-                                                            let diagnosticResult: DiagnosticResult | null = null;
-                                                            let context: CampaignContext | undefined;
-
-                                                            if (campaign.kpiType === 'ROI' && campaignBenchmarks) {
-                                                                // 计算上下文数据（用于场景5和6）
-
-                                                                // 1. 计算AdSet数量
-                                                                const adsetCount = new Set(
-                                                                    data
-                                                                        .filter(r => r.campaign_name === campaign.campaignName)
-                                                                        .map(r => r.adset_name)
-                                                                ).size;
-
-                                                                // 2. 计算运行天数
-                                                                const start = new Date(dateRange.start);
-                                                                const end = new Date(dateRange.end);
-                                                                const diffTime = Math.abs(end.getTime() - start.getTime());
-                                                                const activeDays = Math.ceil(diffTime / (1000 * 60 * 60 * 24)) + 1; // 包含起始日
-
-                                                                // 3. 计算日预算和Campaign总预算
-                                                                const config = configs.find(c => c.id === campaign.businessLineId);
-                                                                const totalBudget = config?.budget || 0;
-                                                                const dailyBudget = totalBudget / activeDays / filteredBlResult.campaigns.length;
-                                                                const campaignBudget = dailyBudget * activeDays;
-
-                                                                // 4. 构建上下文对象
-                                                                context = {
-                                                                    adsetCount,
-                                                                    activeDays,
-                                                                    dailyBudget,
-                                                                    campaignBudget
-                                                                };
-
-                                                                // 5. 使用扩展的诊断函数（包含场景5和6）
-                                                                diagnosticResult = diagnoseCampaignWithContext(
-                                                                    {
-                                                                        ...metrics,
-                                                                        // 确保包含所有新增的中间指标
-                                                                        click_to_pv_rate: campaign.metrics?.click_to_pv_rate || 0,
-                                                                        checkout_rate: campaign.metrics?.checkout_rate || 0,
-                                                                        purchase_rate: campaign.metrics?.purchase_rate || 0,
-                                                                        frequency: campaign.metrics?.frequency || 0,
-                                                                    } as any,
-                                                                    campaignBenchmarks,
-                                                                    context  // 传入上下文数据
-                                                                );
-
-                                                                // 获取所有匹配的诊断场景（支持多场景显示）
-                                                                const allDiagnosticResults = campaign.kpiType === 'ROI' && campaignBenchmarks && context
-                                                                    ? diagnoseAllScenarios(
-                                                                        {
-                                                                            ...metrics,
-                                                                            click_to_pv_rate: campaign.metrics?.click_to_pv_rate || 0,
-                                                                            checkout_rate: campaign.metrics?.checkout_rate || 0,
-                                                                            purchase_rate: campaign.metrics?.purchase_rate || 0,
-                                                                            frequency: campaign.metrics?.frequency || 0,
-                                                                        } as any,
-                                                                        campaignBenchmarks,
-                                                                        context
-                                                                    )
-                                                                    : [];
-
-                                                                if (allDiagnosticResults.length > 0) {
-                                                                    // 格式化所有诊断结果为guidance字符串，每个场景一行
-                                                                    guidance = allDiagnosticResults.map(result => {
-                                                                        const priorityEmoji = result.priority === 1 ? '🔴' : result.priority === 2 ? '🟡' : '🟢';
-                                                                        return `${priorityEmoji} ${result.scenario} - ${result.diagnosis}: ${result.action}`;
-                                                                    }).join('\n');
-                                                                } else if (diagnosticResult) {
-                                                                    // 兼容旧逻辑：如果没有多场景结果但有单场景结果
-                                                                    const priorityEmoji = diagnosticResult.priority === 1 ? '🔴' : diagnosticResult.priority === 2 ? '🟡' : '🟢';
-                                                                    guidance = `${priorityEmoji} ${diagnosticResult.scenario} - ${diagnosticResult.diagnosis}\n${diagnosticResult.action}`;
-                                                                } else {
-                                                                    // 完全没有匹配到任何诊断规则
-                                                                    guidance = '⚠️ 暂无匹配的 action';
-                                                                }
-                                                            } else {
-                                                                // 对于非ROI类型或没有benchmarks的情况，使用旧的规则引擎
-                                                                guidance = getOptimizationGuidance('Campaign', campaign.kpiType, metrics, avgMetrics);
-                                                            }
-
-                                                            // 获取所有匹配的诊断场景详情（用于详细面板显示）
-                                                            // V2 新增：计算趋势信息（使用真实L3D/L7D数据）
-                                                            let trendInfo: TrendInfo | undefined = undefined;
-                                                            if (campaign.kpiType === 'ROI' && campaignBenchmarks) {
-                                                                // 使用真实日期过滤计算 L3D 和 L7D ROI
-                                                                const { l3dROI, l7dROI } = calculateL3DL7DROI(
-                                                                    data,
-                                                                    dateRange.end,
-                                                                    campaign.campaignName
-                                                                );
-                                                                const benchmarkROI = campaignBenchmarks.avgRoi || 0;
-                                                                trendInfo = calculateTrend(l3dROI, l7dROI, benchmarkROI);
-                                                            }
-
-                                                            const diagnosticDetails = campaign.kpiType === 'ROI' && campaignBenchmarks && context
-                                                                ? diagnoseAllScenarios(
-                                                                    {
-                                                                        ...metrics,
-                                                                        click_to_pv_rate: campaign.metrics?.click_to_pv_rate || 0,
-                                                                        checkout_rate: campaign.metrics?.checkout_rate || 0,
-                                                                        purchase_rate: campaign.metrics?.purchase_rate || 0,
-                                                                        frequency: campaign.metrics?.frequency || 0,
-                                                                    } as any,
-                                                                    campaignBenchmarks,
-                                                                    context
-                                                                ).map(result => convertToDetailedDiagnostic(
+                                                            // 详细步骤只在展开时生成
+                                                            const diagnosticDetails = detail && diagnosticResults && campaignBenchmarks && context
+                                                                ? diagnosticResults.map(result => convertToDetailedDiagnostic(
                                                                     result,
-                                                                    {
-                                                                        ...metrics,
-                                                                        click_to_pv_rate: campaign.metrics?.click_to_pv_rate || 0,
-                                                                        checkout_rate: campaign.metrics?.checkout_rate || 0,
-                                                                        purchase_rate: campaign.metrics?.purchase_rate || 0,
-                                                                        frequency: campaign.metrics?.frequency || 0,
-                                                                    } as any,
+                                                                    diagnosticMetrics,
                                                                     campaignBenchmarks,
                                                                     context,
                                                                     trendInfo  // V2: 传递趋势信息
                                                                 ))
                                                                 : undefined;
 
-                                                            return (
-                                                                <React.Fragment key={campaign.id}>
-                                                                    <tr className="border-b hover:bg-slate-50 transition-all">
-                                                                        <td className="px-4 py-3 font-medium text-slate-900 whitespace-normal break-all max-w-[300px]">
-                                                                            {campaign.campaignName}
-                                                                        </td>
-                                                                        <td className="px-4 py-3 text-slate-600">{campaign.businessLine}</td>
-                                                                        <td className="px-4 py-3">
-                                                                            <SpendDetailCell
-                                                                                spend={campaign.spend}
-                                                                                avgSpend={campaign.avgSpend}
-                                                                                lastSpend={campaign.lastSpend}
-                                                                            />
-                                                                        </td>
-                                                                        <td className="px-4 py-3">
-                                                                            <KPIBadgeWithTarget
-                                                                                kpiType={campaign.kpiType}
-                                                                                targetValue={campaign.targetValue}
-                                                                            />
-                                                                        </td>
-                                                                        <td className="px-4 py-3">
-                                                                            <KPIValueCell
-                                                                                actualValue={campaign.actualValue}
-                                                                                avgValue={campaign.avgValue}
-                                                                                lastValue={campaign.lastValue}
-                                                                                kpiType={campaign.kpiType}
-                                                                            />
+                                                            if (detail) {
+                                                                return (
+                                                                    <tr key={key} ref={campaignVirtual.measureRef} data-virtual-key={key} className="bg-slate-50 border-b border-slate-200">
+                                                                        <td colSpan={8} className="px-4 py-4">
+                                                                            <div className="space-y-3 w-full">
+                                                                                <GuidanceDetailPanel
+                                                                                    guidance={guidance}
+                                                                                    metrics={metrics}
+                                                                                    avgMetrics={avgMetrics}
+                                                                                    triggeredConditions={triggeredConditions}
+                                                                                    kpiType={campaign.kpiType}
+                                                                                    intermediateMetrics={campaign.metrics}
+                                                                                    intermediateAvgMetrics={campaign.avgMetrics}
+                                                                                    lastMetrics={campaign.lastMetrics}
+                                                                                    diagnosticDetails={diagnosticDetails}
+                                                                                    priority={campaign.priority}
+                                                                                    benchmarkROI={campaign.avgValue}
+                                                                                />
+                                                                            </div>
                                                                         </td>
+                                                                    </tr>
+                                                                );
+                                                            }
 
-                                                                        <td className="px-4 py-3 text-center">
-                                                                            {campaign.priority === 'P0' && (
-                                                                                <span className="text-red-600 font-bold text-sm">🔴 P0</span>
-                                                                            )}
-                                                                            {campaign.priority === 'P1' && (
-                                                                                <span className="text-amber-600 font-bold text-sm">🟡 P1</span>
-                                                                            )}
-                                                                            {!campaign.priority && (
-                                                                                <span className="text-gray-400 text-sm">-</span>
-                                                                            )}
-                                                                        </td>
+                                                            return (
+                                                                <tr key={key} ref={campaignVirtual.measureRef} data-virtual-key={key} className="border-b hover:bg-slate-50 transition-all">
+                                                                    <td className="px-4 py-3 font-medium text-slate-900 whitespace-normal break-all max-w-[300px]">
+                                                                        {campaign.campaignName}
+                                                                    </td>
+                                                                    <td className="px-4 py-3 text-slate-600">{campaign.businessLine}</td>
+                                                                    <td className="px-4 py-3">
+                                                                        <SpendDetailCell
+                                                                            spend={campaign.spend}
+                                                                            avgSpend={campaign.avgSpend}
+                                                                            lastSpend={campaign.lastSpend}
+                                                                        />
+                                                                    </td>
+                                                                    <td className="px-4 py-3">
+                                                                        <KPIBadgeWithTarget
+                                                                            kpiType={campaign.kpiType}
+                                                                            targetValue={campaign.targetValue}
+                                                                        />
+                                                                    </td>
+                                                                    <td className="px-4 py-3">
+                                                                        <KPIValueCell
+                                                                            actualValue={campaign.actualValue}
+                                                                            avgValue={campaign.avgValue}
+                                                                            lastValue={campaign.lastValue}
+                                                                            kpiType={campaign.kpiType}
+                                                                        />
+                                                                    </td>
 
-                                                                        <td className="px-4 py-3">
-                                                                            <button
-                                                                                onClick={() => toggleGuidance(blExpandedGuidance, setBlExpandedGuidance, campaign.id)}
-                                                                                className="flex items-center gap-1.5 px-2 py-1 rounded hover:bg-slate-100 transition-colors"
-                                                                            >
-                                                                                {isExpanded ? (
-                                                                                    <ChevronDown className="w-4 h-4 text-slate-500" />
-                                                                                ) : (
-                                                                                    <ChevronRight className="w-4 h-4 text-slate-500" />
-                                                                                )}
-                                                                            </button>
-                                                                        </td>
+                                                                    <td className="px-4 py-3 text-center">
+                                                                        {campaign.priority === 'P0' && (
+                                                                            <span className="text-red-600 font-bold text-sm">🔴 P0</span>
+                                                                        )}
+                                                                        {campaign.priority === 'P1' && (
+                                                                            <span className="text-amber-600 font-bold text-sm">🟡 P1</span>
+                                                                        )}
+                                                                        {!campaign.priority && (
+                                                                            <span className="text-gray-400 text-sm">-</span>
+                                                                        )}
+                                                                    </td>
 
-                                                                        <td className="px-4 py-3">
-                                                                            <button
-                                                                                onClick={() => handleBlRemove(campaign.id)}
-                                                                                className="p-2 hover:bg-red-50 text-slate-400 hover:text-red-600 rounded-lg transition-all"
-                                                                            >
-                                                                                <Trash2 className="w-4 h-4" />
-                                                                            </button>
-                                                                        </td>
-                                                                    </tr>
+                                                                    <td className="px-4 py-3">
+                                                                        <button
+                                                                            onClick={() => toggleGuidance(blExpandedGuidance, setBlExpandedGuidance, campaign.id)}
+                                                                            className="flex items-center gap-1.5 px-2 py-1 rounded hover:bg-slate-100 transition-colors"
+                                                                        >
+                                                                            {isExpanded ? (
+                                                                                <ChevronDown className="w-4 h-4 text-slate-500" />
+                                                                            ) : (
+                                                                                <ChevronRight className="w-4 h-4 text-slate-500" />
+                                                                            )}
+                                                                        </button>
+                                                                    </td>
 
-                                                                    {isExpanded && (
-                                                                        <tr className="bg-slate-50 border-b border-slate-200">
-                                                                            <td colSpan={8} className="px-4 py-4">
-                                                                                <div className="space-y-3 w-full">
-                                                                                    <GuidanceDetailPanel
-                                                                                        guidance={guidance}
-                                                                                        metrics={metrics}
-                                                                                        avgMetrics={avgMetrics}
-                                                                                        kpiType={campaign.kpiType}
-                                                                                        intermediateMetrics={campaign.metrics}
-                                                                                        intermediateAvgMetrics={campaign.avgMetrics}
-                                                                                        lastMetrics={campaign.lastMetrics}
-                                                                                        diagnosticDetails={diagnosticDetails}
-                                                                                        priority={campaign.priority}
-                                                                                        benchmarkROI={campaign.avgValue}
-                                                                                    />
-                                                                                </div>
-                                                                            </td>
-                                                                        </tr>
-                                                                    )}
-                                                                </React.Fragment>
+                                                                    <td className="px-4 py-3">
+                                                                        <button
+                                                                            onClick={() => handleBlRemove(campaign.id)}
+                                                                            className="p-2 hover:bg-red-50 text-slate-400 hover:text-red-600 rounded-lg transition-all"
+                                                                        >
+                                                                            <Trash2 className="w-4 h-4" />
+                                                                        </button>
+                                                                    </td>
+                                                                </tr>
                                                             );
                                                         })}
+                                                        <VirtualSpacerRow height={campaignVirtual.paddingBottom} colSpan={8} />
                                                     </tbody>
                                                 </table>
                                             </div>
@@ -1674,42 +1525,7 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
                                                 <tbody>
                                                     {sortedAdSets.map(adSet => {
                                                         const isExpanded = blExpandedGuidance.has(adSet.id);
-
-                                                        const metrics: CampaignMetrics = {
-                                                            spend: adSet.spend,
-                                                            roi: adSet.kpiType === 'ROI' ? adSet.actualValue : undefined,
-                                                            cpc: adSet.kpiType === 'CPC' ? adSet.actualValue : undefined,
-                                                            cpm: adSet.kpiType === 'CPM' ? adSet.actualValue : undefined,
-                                                            cvr: adSet.metrics?.cvr,
-                                                            aov: adSet.metrics?.aov,
-                                                            cpa: adSet.metrics?.cpa,
-                                                            cpatc: adSet.metrics?.cpatc,
-                                                            atc_rate: adSet.metrics?.atc_rate,
-                                                            ctr: adSet.metrics?.ctr,
-                                                            clicks: adSet.metrics?.clicks,
-                                                            impressions: adSet.metrics?.impressions,
-                                                            reach: adSet.metrics?.reach,
-                                                            frequency: adSet.metrics?.frequency,
-                                                        };
-
-                                                        const avgMetrics: CampaignMetrics = {
-                                                            spend: adSet.avgSpend,
-                                                            roi: adSet.kpiType === 'ROI' ? adSet.avgValue : undefined,
-                                                            cpc: adSet.kpiType === 'CPC' ? adSet.avgValue : undefined,
-                                                            cpm: adSet.kpiType === 'CPM' ? adSet.avgValue : undefined,
-                                                            cvr: adSet.avgMetrics?.cvr,
-                                                            aov: adSet.avgMetrics?.aov,
-                                                            cpa: adSet.avgMetrics?.cpa,
-                                                            cpatc: adSet.avgMetrics?.cpatc,
-                                                            atc_rate: adSet.avgMetrics?.atc_rate,
-                                                            ctr: adSet.avgMetrics?.ctr,
-                                                            clicks: adSet.avgMetrics?.clicks,
-                                                            impressions: adSet.avgMetrics?.impressions,
-                                                            reach: adSet.avgMetrics?.reach,
-                                                            frequency: adSet.avgMetrics?.frequency,
-                                                        };
-
-                                                        const guidance = getOptimizationGuidance('AdSet', adSet.kpiType, metrics, avgMetrics);
+                                                        const { guidance, metrics, avgMetrics, triggeredConditions } = guidanceStore.adSets.get(adSet.id)!;
 
                                                         return (
                                                             <React.Fragment key={adSet.id}>
@@ -1770,6 +1586,7 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
                                                                                     guidance={guidance}
                                                                                     metrics={metrics}
                                                                                     avgMetrics={avgMetrics}
+                                                                                    triggeredConditions={triggeredConditions}
                                                                                     kpiType={adSet.kpiType}
                                                                                     intermediateMetrics={adSet.metrics}
                                                                                     intermediateAvgMetrics={adSet.avgMetrics}
@@ -1888,142 +1705,119 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
                                                                     />
                                                                 </div>
                                                             </th>
-                                                            <th className="px-4 py-3 text-left text-xs font-black text-slate-700 uppercase">优先级</th>
+                                                            <th
+                                                                className="px-4 py-3 text-left text-xs font-black text-slate-700 uppercase cursor-pointer hover:bg-slate-100 transition-colors select-none"
+                                                                onClick={() => handleAdSort('priority')}
+                                                            >
+                                                                <div className="flex items-center gap-1">
+                                                                    优先级
+                                                                    <SortIcon
+                                                                        active={adSort.field === 'priority'}
+                                                                        direction={adSort.direction}
+                                                                    />
+                                                                </div>
+                                                            </th>
                                                             <th className="px-4 py-3 text-left text-xs font-black text-slate-700 uppercase w-24">调优指导</th>
                                                             <th className="px-4 py-3 text-left text-xs font-black text-slate-700 uppercase">操作</th>
                                                         </tr>
                                                     </thead>
-                                                    <tbody>
-                                                        {sortedAds.map((ad, adIndex) => {
+                                                    <tbody ref={adVirtual.containerRef}>
+                                                        <VirtualSpacerRow height={adVirtual.paddingTop} colSpan={10} />
+                                                        {adVirtual.rows.map(({ item: { item: ad, detail }, key }) => {
                                                             const isExpanded = blExpandedGuidance.has(ad.id);
+                                                            const { guidance, metrics, avgMetrics, triggeredConditions } = guidanceStore.ads.get(getAdGuidanceKey(ad))!;
 
-                                                            const metrics: CampaignMetrics = {
-                                                                spend: ad.spend,
-                                                                roi: ad.kpiType === 'ROI' ? ad.actualValue : undefined,
-                                                                cpc: ad.kpiType === 'CPC' ? ad.actualValue : undefined,
-                                                                cpm: ad.kpiType === 'CPM' ? ad.actualValue : undefined,
-                                                                cvr: ad.metrics?.cvr,
-                                                                aov: ad.metrics?.aov,
-                                                                cpa: ad.metrics?.cpa,
-                                                                cpatc: ad.metrics?.cpatc,
-                                                                atc_rate: ad.metrics?.atc_rate,
-                                                                ctr: ad.metrics?.ctr,
-                                                                clicks: ad.metrics?.clicks,
-                                                                impressions: ad.metrics?.impressions,
-                                                                reach: ad.metrics?.reach,
-                                                                frequency: ad.metrics?.frequency,
-                                                            };
-
-                                                            const avgMetrics: CampaignMetrics = {
-                                                                spend: ad.avgSpend,
-                                                                roi: ad.kpiType === 'ROI' ? ad.avgValue : undefined,
-                                                                cpc: ad.kpiType === 'CPC' ? ad.avgValue : undefined,
-                                                                cpm: ad.kpiType === 'CPM' ? ad.avgValue : undefined,
-                                                                cvr: ad.avgMetrics?.cvr,
-                                                                aov: ad.avgMetrics?.aov,
-                                                                cpa: ad.avgMetrics?.cpa,
-                                                                cpatc: ad.avgMetrics?.cpatc,
-                                                                atc_rate: ad.avgMetrics?.atc_rate,
-                                                                ctr: ad.avgMetrics?.ctr,
-                                                                clicks: ad.avgMetrics?.clicks,
-                                                                impressions: ad.avgMetrics?.impressions,
-                                                                reach: ad.avgMetrics?.reach,
-                                                                frequency: ad.avgMetrics?.frequency,
-                                                            };
-
-                                                            // 从诊断详情步骤3获取 Action 建议,如果有的话
-                                                            const diagAction = ad.diagnosticDetails?.[0]?.action;
-                                                            const guidance = diagAction || getOptimizationGuidance('Ad', ad.kpiType, metrics, avgMetrics);
+                                                            if (detail) {
+                                                                return (
+                                                                    <tr key={key} ref={adVirtual.measureRef} data-virtual-key={key} className="bg-slate-50 border-b border-slate-200">
+                                                                        <td colSpan={9} className="px-4 py-4">
+                                                                            <div className="space-y-3 w-full">
+                                                                                <GuidanceDetailPanel
+                                                                                    guidance={guidance}
+                                                                                    metrics={metrics}
+                                                                                    avgMetrics={avgMetrics}
+                                                                                    triggeredConditions={triggeredConditions}
+                                                                                    kpiType={ad.kpiType}
+                                                                                    intermediateMetrics={ad.metrics}
+                                                                                    intermediateAvgMetrics={ad.avgMetrics}
+                                                                                    lastMetrics={ad.lastMetrics}
+                                                                                    diagnosticDetails={ad.diagnosticDetails}
+                                                                                />
+                                                                            </div>
+                                                                        </td>
+                                                                    </tr>
+                                                                );
+                                                            }
 
                                                             return (
-                                                                <React.Fragment key={`${ad.campaignName}-${ad.adSetName}-${ad.adName}-${adIndex}`}>
-                                                                    <tr className="border-b hover:bg-slate-50 transition-all">
-                                                                        <td className="px-4 py-3 font-medium text-slate-900">{ad.adName}</td>
-                                                                        <td className="px-4 py-3 text-slate-600">{ad.adSetName}</td>
-                                                                        <td className="px-4 py-3 text-slate-600">{ad.campaignName}</td>
-                                                                        <td className="px-4 py-3 text-slate-600">{ad.businessLine}</td>
-                                                                        <td className="px-4 py-3">
-                                                                            <SpendDetailCell
-                                                                                spend={ad.spend}
-                                                                                avgSpend={ad.avgSpend}
-                                                                                lastSpend={ad.lastSpend}
-                                                                            />
-                                                                        </td>
-                                                                        <td className="px-4 py-3">
-                                                                            <KPIBadgeWithTarget
-                                                                                kpiType={ad.kpiType}
-                                                                                targetValue={ad.targetValue}
-                                                                            />
-                                                                        </td>
-                                                                        <td className="px-4 py-3">
-                                                                            <KPIValueCell
-                                                                                actualValue={ad.actualValue}
-                                                                                avgValue={ad.avgValue}
-                                                                                lastValue={ad.lastValue}
-                                                                                kpiType={ad.kpiType}
-                                                                            />
-                                                                        </td>
+                                                                <tr key={key} ref={adVirtual.measureRef} data-virtual-key={key} className="border-b hover:bg-slate-50 transition-all">
+                                                                    <td className="px-4 py-3 font-medium text-slate-900">{ad.adName}</td>
+                                                                    <td className="px-4 py-3 text-slate-600">{ad.adSetName}</td>
+                                                                    <td className="px-4 py-3 text-slate-600">{ad.campaignName}</td>
+                                                                    <td className="px-4 py-3 text-slate-600">{ad.businessLine}</td>
+                                                                    <td className="px-4 py-3">
+                                                                        <SpendDetailCell
+                                                                            spend={ad.spend}
+                                                                            avgSpend={ad.avgSpend}
+                                                                            lastSpend={ad.lastSpend}
+                                                                        />
+                                                                    </td>
+                                                                    <td className="px-4 py-3">
+                                                                        <KPIBadgeWithTarget
+                                                                            kpiType={ad.kpiType}
+                                                                            targetValue={ad.targetValue}
+                                                                        />
+                                                                    </td>
+                                                                    <td className="px-4 py-3">
+                                                                        <KPIValueCell
+                                                                            actualValue={ad.actualValue}
+                                                                            avgValue={ad.avgValue}
+                                                                            lastValue={ad.lastValue}
+                                                                            kpiType={ad.kpiType}
+                                                                        />
+                                                                    </td>
 
-                                                                        {/* 优先级列 */}
-                                                                        <td className="px-4 py-3">
-                                                                            {ad.diagnosticDetails?.[0]?.priority ? (
-                                                                                <span className={`inline-flex items-center px-2 py-1 rounded-full text-xs font-bold ${ad.diagnosticDetails[0].priority <= 2
-                                                                                    ? 'bg-red-100 text-red-700'
-                                                                                    : ad.diagnosticDetails[0].priority <= 4
-                                                                                        ? 'bg-yellow-100 text-yellow-700'
-                                                                                        : 'bg-green-100 text-green-700'
-                                                                                    }`}>
-                                                                                    P{ad.diagnosticDetails[0].priority}
-                                                                                </span>
+                                                                    {/* 优先级列 */}
+                                                                    <td className="px-4 py-3">
+                                                                        {ad.diagnosticDetails?.[0]?.priority ? (
+                                                                            <span className={`inline-flex items-center px-2 py-1 rounded-full text-xs font-bold ${ad.diagnosticDetails[0].priority <= 2
+                                                                                ? 'bg-red-100 text-red-700'
+                                                                                : ad.diagnosticDetails[0].priority <= 4
+                                                                                    ? 'bg-yellow-100 text-yellow-700'
+                                                                                    : 'bg-green-100 text-green-700'
+                                                                                }`}>
+                                                                                P{ad.diagnosticDetails[0].priority}
+                                                                            </span>
+                                                                        ) : (
+                                                                            <span className="text-slate-400 text-xs">-</span>
+                                                                        )}
+                                                                    </td>
+
+                                                                    <td className="px-4 py-3">
+                                                                        <button
+                                                                            onClick={() => toggleGuidance(blExpandedGuidance, setBlExpandedGuidance, ad.id)}
+                                                                            className="flex items-center gap-1.5 px-2 py-1 rounded hover:bg-slate-100 transition-colors"
+                                                                        >
+                                                                            {isExpanded ? (
+                                                                                <ChevronDown className="w-4 h-4 text-slate-500" />
                                                                             ) : (
-                                                                                <span className="text-slate-400 text-xs">-</span>
+                                                                                <ChevronRight className="w-4 h-4 text-slate-500" />
                                                                             )}
-                                                                        </td>
-
-                                                                        <td className="px-4 py-3">
-                                                                            <button
-                                                                                onClick={() => toggleGuidance(blExpandedGuidance, setBlExpandedGuidance, ad.id)}
-                                                                                className="flex items-center gap-1.5 px-2 py-1 rounded hover:bg-slate-100 transition-colors"
-                                                                            >
-                                                                                {isExpanded ? (
-                                                                                    <ChevronDown className="w-4 h-4 text-slate-500" />
-                                                                                ) : (
-                                                                                    <ChevronRight className="w-4 h-4 text-slate-500" />
-                                                                                )}
-                                                                            </button>
-                                                                        </td>
-
-                                                                        <td className="px-4 py-3">
-                                                                            <button
-                                                                                onClick={() => handleBlRemove(ad.id)}
-                                                                                className="p-2 hover:bg-red-50 text-slate-400 hover:text-red-600 rounded-lg transition-all"
-                                                                            >
-                                                                                <Trash2 className="w-4 h-4" />
-                                                                            </button>
-                                                                        </td>
-                                                                    </tr>
+                                                                        </button>
+                                                                    </td>
 
-                                                                    {isExpanded && (
-                                                                        <tr className="bg-slate-50 border-b border-slate-200">
-                                                                            <td colSpan={9} className="px-4 py-4">
-                                                                                <div className="space-y-3 w-full">
-                                                                                    <GuidanceDetailPanel
-                                                                                        guidance={guidance}
-                                                                                        metrics={metrics}
-                                                                                        avgMetrics={avgMetrics}
-                                                                                        kpiType={ad.kpiType}
-                                                                                        intermediateMetrics={ad.metrics}
-                                                                                        intermediateAvgMetrics={ad.avgMetrics}
-                                                                                        lastMetrics={ad.lastMetrics}
-                                                                                        diagnosticDetails={ad.diagnosticDetails}
-                                                                                    />
-                                                                                </div>
-                                                                            </td>
-                                                                        </tr>
-                                                                    )}
-                                                                </React.Fragment>
+                                                                    <td className="px-4 py-3">
+                                                                        <button
+                                                                            onClick={() => handleBlRemove(ad.id)}
+                                                                            className="p-2 hover:bg-red-50 text-slate-400 hover:text-red-600 rounded-lg transition-all"
+                                                                        >
+                                                                            <Trash2 className="w-4 h-4" />
+                                                                        </button>
+                                                                    </td>
+                                                                </tr>
                                                             );
                                                         })}
+                                                        <VirtualSpacerRow height={adVirtual.paddingBottom} colSpan={10} />
                                                     </tbody>
                                                 </table>
                                             </div>
@@ -2164,9 +1958,10 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
                                                     <th className="px-4 py-3 text-left text-xs font-black text-slate-700 uppercase">操作</th>
                                                 </tr>
                                             </thead>
-                                            <tbody>
-                                                {filteredNaResult.adSets.map(adSet => (
-                                                    <tr key={adSet.id} className="border-b hover:bg-slate-50 transition-all">
+                                            <tbody ref={naAdSetVirtual.containerRef}>
+                                                <VirtualSpacerRow height={naAdSetVirtual.paddingTop} colSpan={8} />
+                                                {naAdSetVirtual.rows.map(({ item: adSet, key }) => (
+                                                    <tr key={key} ref={naAdSetVirtual.measureRef} data-virtual-key={key} className="border-b hover:bg-slate-50 transition-all">
                                                         <td className="px-4 py-3 font-medium text-slate-900">{adSet.adSetName}</td>
                                                         <td className="px-4 py-3 text-slate-600">{adSet.campaignName}</td>
                                                         <td className="px-4 py-3 text-slate-600">{adSet.businessLine}</td>
@@ -2206,6 +2001,7 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
                                                         </td>
                                                     </tr>
                                                 ))}
+                                                <VirtualSpacerRow height={naAdSetVirtual.paddingBottom} colSpan={8} />
                                             </tbody>
                                         </table>
                                     </div>
@@ -2237,9 +2033,10 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
                                                     <th className="px-4 py-3 text-left text-xs font-black text-slate-700 uppercase">操作</th>
                                                 </tr>
                                             </thead>
-                                            <tbody>
-                                                {filteredNaResult.ads.map(ad => (
-                                                    <tr key={ad.id} className="border-b hover:bg-slate-50 transition-all">
+                                            <tbody ref={naAdVirtual.containerRef}>
+                                                <VirtualSpacerRow height={naAdVirtual.paddingTop} colSpan={9} />
+                                                {naAdVirtual.rows.map(({ item: ad, key }) => (
+                                                    <tr key={key} ref={naAdVirtual.measureRef} data-virtual-key={key} className="border-b hover:bg-slate-50 transition-all">
                                                         <td className="px-4 py-3 font-medium text-slate-900">{ad.adName}</td>
                                                         <td className="px-4 py-3 text-slate-600">{ad.adSetName}</td>
                                                         <td className="px-4 py-3 text-slate-600">{ad.campaignName}</td>
@@ -2280,6 +2077,7 @@ export const ActionItemsTab = forwardRef<ActionItemsTabRef, ActionItemsTabProps>
                                                         </td>
                                                     </tr>
                                                 ))}
+                                                <VirtualSpacerRow height={naAdVirtual.paddingBottom} colSpan={9} />
                                             </tbody>
                                         </table>
                                     </div>
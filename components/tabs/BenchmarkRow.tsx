@@ -9,6 +9,8 @@ interface BenchmarkRowProps {
     parentName?: string; // For AdSet/Ad, show which Campaign/AdSet they belong to
     indent?: boolean;
     indentMore?: boolean;
+    virtualKey?: string;                                // 窗口化渲染时的行键（两行共用）
+    rowRef?: (el: HTMLTableRowElement | null) => void;  // 窗口化渲染时测量行高
 }
 
 const levelConfig = {
@@ -50,7 +52,9 @@ export const BenchmarkRow: React.FC<BenchmarkRowProps> = ({
     level,
     parentName,
     indent,
-    indentMore
+    indentMore,
+    virtualKey,
+    rowRef
 }) => {
     const config = levelConfig[level];
     const paddingLeft = indentMore ? '6rem' : indent ? '3rem' : '1.5rem';
@@ -58,7 +62,12 @@ export const BenchmarkRow: React.FC<BenchmarkRowProps> = ({
     return (
         <>
             {/* Title Row - Same background as data row */}
-            <tr className={`${config.bgLight} ${level === 'Campaign' ? 'sticky top-0 z-10 border-b-4' : 'border-b-2'} ${config.borderColor}`}>
+            <tr
+                ref={rowRef}
+                data-virtual-key={virtualKey}
+                data-virtual-part="title"
+                className={`${config.bgLight} ${level === 'Campaign' ? 'sticky top-0 z-10 border-b-4' : 'border-b-2'} ${config.borderColor}`}
+            >
                 <td
                     colSpan={columns.length + 3}
                     className="px-6 py-3"
@@ -84,7 +93,12 @@ export const BenchmarkRow: React.FC<BenchmarkRowProps> = ({
             </tr>
 
             {/* Data Row - Always Visible */}
-            <tr className={`${config.bgLight} border-b-2 ${config.borderColor}`}>
+            <tr
+                ref={rowRef}
+                data-virtual-key={virtualKey}
+                data-virtual-part="data"
+                className={`${config.bgLight} border-b-2 ${config.borderColor}`}
+            >
                 <td
                     className={`px-6 py-2 text-xs font-bold ${config.textColor}`}
                     style={{ paddingLeft }}
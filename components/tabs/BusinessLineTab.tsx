@@ -1,10 +1,10 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useMemo, useRef } from 'react';
 import { RawAdRecord, AdConfiguration, TodoItem } from '../../types';
-import { matchesConfig } from '../../utils/dataUtils';
+import { queryRollup, rollupTotals } from '../../utils/rollupCube';
 import { ChevronDown, TrendingUp, DollarSign, Target } from 'lucide-react';
 import { calculateBenchmark } from '../../utils/benchmarkUtils';
 import { calculateDefaultThresholds, QuadrantThresholds, QuadrantType } from '../../utils/quadrantUtils';
-import { DrillDownTable } from './DrillDownTable';
+import { DrillDownTable, DrillDownTableRef } from './DrillDownTable';
 import { QuadrantChart } from './QuadrantChart';
 import { LevelToggle } from '../filters/LevelToggle';
 import { SearchInput } from '../filters/SearchInput';
@@ -39,21 +39,34 @@ export const BusinessLineTab: React.FC<BusinessLineTabProps> = ({
         return configs.find(c => c.id === selectedProjectId);
     }, [configs, selectedProjectId]);
 
-    // Filter data for selected project
-    const projectData = useMemo(() => {
-        if (!selectedProject) return [];
-        return data.filter(record => matchesConfig(record, selectedProject));
-    }, [data, selectedProject]);
+    // 业务线筛选不再复制记录：图表、表格按 selectedProject 的规则查询汇总立方体（utils/rollupCube.ts）
+    // Calculate project overview metrics
+    const projectOverview = useMemo(() => {
+        if (!selectedProject) {
+            return { campaignCount: 0, adSetCount: 0, adCount: 0, totalSpend: 0, totalRevenue: 0, avgROI: 0 };
+        }
+        // Unique campaigns / adsets / ads（按名称计数）
+        const campaignCount = queryRollup(data, { level: 'Campaign' }, selectedProject).length;
+        const adSetCount = queryRollup(data, { level: 'AdSet', nested: false }, selectedProject).length;
+        const adCount = queryRollup(data, { level: 'Ad', nested: false }, selectedProject).length;
+
+        // Totals from all records
+        const { spend: totalSpend, purchase_value: totalRevenue } = rollupTotals(data, selectedProject);
 
-    const projectComparisonData = useMemo(() => {
-        if (!selectedProject) return [];
-        return comparisonData.filter(record => matchesConfig(record, selectedProject));
-    }, [comparisonData, selectedProject]);
+        return {
+            campaignCount,
+            adSetCount,
+            adCount,
+            totalSpend,
+            totalRevenue,
+            avgROI: totalSpend > 0 ? totalRevenue / totalSpend : 0
+        };
+    }, [data, selectedProject]);
 
     // Calculate default thresholds when project changes
     // Use user-adjusted thresholds if available, otherwise calculate defaults
     useMemo(() => {
-        if (selectedProject && projectData.length > 0) {
+        if (selectedProject && projectOverview.campaignCount > 0) {
             // Check if user has adjusted thresholds for this project
             const userThresholds = userAdjustedThresholds?.get(selectedProject.id);
             if (userThresholds) {
@@ -61,54 +74,16 @@ export const BusinessLineTab: React.FC<BusinessLineTabProps> = ({
                 setThresholds(userThresholds);
             } else {
                 // Calculate and use default thresholds
-                const defaultThresholds = calculateDefaultThresholds(projectData, selectedProject);
+                const defaultThresholds = calculateDefaultThresholds(data, selectedProject);
                 setThresholds(defaultThresholds);
             }
         }
-    }, [selectedProject, projectData, userAdjustedThresholds]);
-
-    // Calculate project overview metrics
-    const projectOverview = useMemo(() => {
-        // Group by campaign to get unique campaigns
-        const campaignMap = new Map<string, RawAdRecord[]>();
-        projectData.forEach(record => {
-            const key = record.campaign_name;
-            if (!campaignMap.has(key)) campaignMap.set(key, []);
-            campaignMap.get(key)!.push(record);
-        });
-
-        // Calculate totals from all records
-        const totalSpend = projectData.reduce((sum, r) => sum + r.spend, 0);
-        const totalRevenue = projectData.reduce((sum, r) => sum + r.purchase_value, 0);
-
-        // Group by adset to get unique adsets
-        const adSetMap = new Map<string, boolean>();
-        projectData.forEach(r => adSetMap.set(r.adset_name, true));
-
-        // Group by ad to get unique ads
-        const adMap = new Map<string, boolean>();
-        projectData.forEach(r => adMap.set(r.ad_name, true));
-
-        return {
-            campaignCount: campaignMap.size,
-            adSetCount: adSetMap.size,
-            adCount: adMap.size,
-            totalSpend,
-            totalRevenue,
-            avgROI: totalSpend > 0 ? totalRevenue / totalSpend : 0
-        };
-    }, [projectData]);
+    }, [selectedProject, data, projectOverview, userAdjustedThresholds]);
 
-    // Handle campaign click from quadrant chart
+    // Handle campaign click from quadrant chart（表格窗口化渲染，行可能尚未挂载，由表格负责滚动和高亮）
+    const drillDownRef = useRef<DrillDownTableRef>(null);
     const handleCampaignClick = (campaignName: string) => {
-        const element = document.getElementById(`campaign-${campaignName}`);
-        if (element) {
-            element.scrollIntoView({ behavior: 'smooth', block: 'center' });
-            element.classList.add('highlight-row');
-            setTimeout(() => {
-                element.classList.remove('highlight-row');
-            }, 3000);
-        }
+        drillDownRef.current?.scrollToRow(`campaign-${campaignName}`);
     };
 
     if (configs.length === 0) {
@@ -238,7 +213,7 @@ export const BusinessLineTab: React.FC<BusinessLineTabProps> = ({
             {/* Quadrant Analysis */}
             {thresholds && (
                 <QuadrantChart
-                    data={projectData}
+                    data={data}
                     config={selectedProject}
                     thresholds={thresholds}
                     onThresholdsChange={(newThresholds) => {
@@ -273,8 +248,9 @@ export const BusinessLineTab: React.FC<BusinessLineTabProps> = ({
 
             {/* Data Table */}
             <DrillDownTable
-                data={projectData}
-                comparisonData={projectComparisonData}
+                ref={drillDownRef}
+                data={data}
+                comparisonData={comparisonData}
                 config={selectedProject}
                 thresholds={thresholds}
                 selectedQuadrant={selectedQuadrant}
@@ -1,28 +1,20 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useMemo, useCallback, forwardRef, useImperativeHandle, useEffect } from 'react';
 import { RawAdRecord, AdConfiguration, TodoItem } from '../../types';
-import { calculateBenchmark, calculateVsAvg, BenchmarkMetrics } from '../../utils/benchmarkUtils';
+import { calculateRollupBenchmark, calculateVsAvg, BenchmarkMetrics } from '../../utils/benchmarkUtils';
 import { getColumnsForKPI, ColumnConfig } from '../../utils/columnConfig';
 import { QuadrantType, QuadrantThresholds, classifyQuadrant } from '../../utils/quadrantUtils';
 import { getDelta } from '../../utils/dataUtils';
+import { queryRollup, RollupRow } from '../../utils/rollupCube';
+import { ColumnTotals } from '../../utils/columnarStore';
 import { BenchmarkRow } from './BenchmarkRow';
 import { QuadrantBadge } from './QuadrantBadge';
 import { TodoMarkButton } from './TodoMarkButton';
+import { VirtualSpacerRow } from '../VirtualSpacerRow';
+import { useVirtualRows } from '../../hooks/useVirtualRows';
 import { ChevronDown, ChevronRight, Copy, Check } from 'lucide-react';
-import {
-    calculateROI,
-    calculateCVR,
-    calculateAOV,
-    calculateCPA,
-    calculateCPATC,
-    calculateATCRate,
-    calculateCTR,
-    calculateCPC,
-    calculateCPM,
-    calculateFrequency
-} from '../../utils/benchmarkUtils';
 
 interface DrillDownTableProps {
-    data: RawAdRecord[];
+    data: RawAdRecord[];                // 日期范围内的数据（按 config 的规则筛选业务线）
     comparisonData: RawAdRecord[];
     config: AdConfiguration;
     thresholds: QuadrantThresholds | null;
@@ -50,7 +42,56 @@ interface CampaignMetrics {
     clicks: number;
 }
 
-export const DrillDownTable: React.FC<DrillDownTableProps> = ({
+// 暴露给父组件的方法
+export interface DrillDownTableRef {
+    scrollToRow: (rowId: string) => boolean;    // rowId 形如 campaign-<name>；行不存在时返回 false
+}
+
+type LevelName = 'Campaign' | 'AdSet' | 'Ad';
+
+// 展开后的表格行（窗口化渲染时逐行挂载）
+type DrillRow =
+    | { kind: 'benchmark'; key: string; level: LevelName; parentName: string; indent?: boolean; indentMore?: boolean }
+    | {
+        kind: 'entity';
+        key: string;
+        level: LevelName;
+        name: string;
+        metrics: CampaignMetrics;
+        prevMetrics: CampaignMetrics;
+        quadrant?: QuadrantType;
+        indent?: boolean;
+        indentMore?: boolean;
+        expandable?: boolean;
+    };
+
+const getRowKey = (row: DrillRow) => row.key;
+const estimateRowHeight = (row: DrillRow) => (row.kind === 'benchmark' ? 100 : 84);
+
+const rowIdOf = (level: LevelName, name: string) =>
+    level === 'Campaign' ? `campaign-${name}` : level === 'AdSet' ? `adset-${name}` : `ad-${name}`;
+
+const EMPTY_TOTALS: ColumnTotals = {
+    spend: 0, impressions: 0, link_clicks: 0, purchases: 0, purchase_value: 0,
+    adds_to_cart: 0, checkouts_initiated: 0, landing_page_views: 0, reach: 0
+};
+
+// 按 key 分组子层级的查询结果（保持查询结果的顺序）
+const groupByParent = (rows: RollupRow[]): Map<string, RollupRow[]> => {
+    const groups = new Map<string, RollupRow[]>();
+    rows.forEach(row => {
+        const group = groups.get(row.parentKey);
+        if (group) group.push(row);
+        else groups.set(row.parentKey, [row]);
+    });
+    return groups;
+};
+
+// 对比期按名称查找（与当前期的实体按名称对应）
+const totalsByName = (rows: RollupRow[], field: 'campaign_name' | 'adset_name' | 'ad_name'): Map<string, ColumnTotals> =>
+    new Map(rows.map(row => [row[field], row.totals]));
+
+export const DrillDownTable = forwardRef<DrillDownTableRef, DrillDownTableProps>(({
     data,
     comparisonData,
     config,
@@ -60,28 +101,31 @@ export const DrillDownTable: React.FC<DrillDownTableProps> = ({
     markedTodos,
     filterLevel = 'Campaign',
     searchText = ''
-}) => {
+}, ref) => {
     const [expandedCampaigns, setExpandedCampaigns] = useState<Set<string>>(new Set());
     const [expandedAdSets, setExpandedAdSets] = useState<Set<string>>(new Set());
+    const [highlightedRow, setHighlightedRow] = useState<string | null>(null);
 
     const columns = getColumnsForKPI(config.targetType);
 
-    // Benchmarks for each level
-    const campaignBenchmark = useMemo(() => calculateBenchmark(data, 'Campaign'), [data]);
-    const adSetBenchmark = useMemo(() => calculateBenchmark(data, 'AdSet'), [data]);
-    const adBenchmark = useMemo(() => calculateBenchmark(data, 'Ad'), [data]);
+    // Benchmarks for each level（汇总立方体查询，见 utils/rollupCube.ts）
+    const campaignBenchmark = useMemo(() => calculateRollupBenchmark(data, 'Campaign', config), [data, config]);
+    const adSetBenchmark = useMemo(() => calculateRollupBenchmark(data, 'AdSet', config), [data, config]);
+    const adBenchmark = useMemo(() => calculateRollupBenchmark(data, 'Ad', config), [data, config]);
 
-    // Data Processing: Campaign -> AdSet -> Ad
+    // Data Processing: Campaign -> AdSet -> Ad（各层级直接查询汇总立方体，不重新分组记录）
     const groupedData = useMemo(() => {
-        const campaignMap = new Map<string, RawAdRecord[]>();
-        data.forEach(r => {
-            const key = r.campaign_name;
-            if (!campaignMap.has(key)) campaignMap.set(key, []);
-            campaignMap.get(key)!.push(r);
-        });
+        // 对比期按名称汇总（与原先按名称分组对比期记录一致）
+        const prevByCampaign = totalsByName(queryRollup(comparisonData, { level: 'Campaign' }, config), 'campaign_name');
+        const prevByAdSet = totalsByName(queryRollup(comparisonData, { level: 'AdSet', nested: false }, config), 'adset_name');
+        const prevByAd = totalsByName(queryRollup(comparisonData, { level: 'Ad', nested: false }, config), 'ad_name');
 
-        return Array.from(campaignMap.entries()).map(([campName, campRecords]) => {
-            const campMetrics = aggregateMetrics(campRecords);
+        const adSetsByCampaign = groupByParent(queryRollup(data, { level: 'AdSet' }, config));
+        const adsByAdSet = groupByParent(queryRollup(data, { level: 'Ad' }, config));
+
+        return queryRollup(data, { level: 'Campaign' }, config).map(campaign => {
+            const campName = campaign.campaign_name;
+            const campMetrics = aggregateMetrics(campaign.totals);
 
             // Calculate quadrant for campaign
             let quadrant: QuadrantType = 'watch';
@@ -91,35 +135,19 @@ export const DrillDownTable: React.FC<DrillDownTableProps> = ({
                 quadrant = classifyQuadrant(campMetrics.spend, kpiValue, thresholds, config.targetType);
             }
 
-            // Group AdSets within Campaign
-            const adSetMap = new Map<string, RawAdRecord[]>();
-            campRecords.forEach(r => {
-                const key = r.adset_name;
-                if (!adSetMap.has(key)) adSetMap.set(key, []);
-                adSetMap.get(key)!.push(r);
-            });
-
-            const adSets = Array.from(adSetMap.entries()).map(([adSetName, adSetRecords]) => {
-                const adSetMetrics = aggregateMetrics(adSetRecords);
-
-                // Group Ads within AdSet
-                const adMap = new Map<string, RawAdRecord[]>();
-                adSetRecords.forEach(r => {
-                    const key = r.ad_name;
-                    if (!adMap.has(key)) adMap.set(key, []);
-                    adMap.get(key)!.push(r);
-                });
-
-                const ads = Array.from(adMap.entries()).map(([adName, adRecords]) => ({
-                    name: adName,
-                    metrics: aggregateMetrics(adRecords),
-                    prevMetrics: aggregateMetrics(comparisonData.filter(r => r.ad_name === adName))
+            // AdSets within Campaign
+            const adSets = (adSetsByCampaign.get(campaign.key) || []).map(adSet => {
+                // Ads within AdSet
+                const ads = (adsByAdSet.get(adSet.key) || []).map(ad => ({
+                    name: ad.ad_name,
+                    metrics: aggregateMetrics(ad.totals),
+                    prevMetrics: aggregateMetrics(prevByAd.get(ad.ad_name) || EMPTY_TOTALS)
                 }));
 
                 return {
-                    name: adSetName,
-                    metrics: adSetMetrics,
-                    prevMetrics: aggregateMetrics(comparisonData.filter(r => r.adset_name === adSetName)),
+                    name: adSet.adset_name,
+                    metrics: aggregateMetrics(adSet.totals),
+                    prevMetrics: aggregateMetrics(prevByAdSet.get(adSet.adset_name) || EMPTY_TOTALS),
                     ads
                 };
             });
@@ -127,7 +155,7 @@ export const DrillDownTable: React.FC<DrillDownTableProps> = ({
             return {
                 name: campName,
                 metrics: campMetrics,
-                prevMetrics: aggregateMetrics(comparisonData.filter(r => r.campaign_name === campName)),
+                prevMetrics: aggregateMetrics(prevByCampaign.get(campName) || EMPTY_TOTALS),
                 quadrant,
                 adSets
             };
@@ -158,6 +186,68 @@ export const DrillDownTable: React.FC<DrillDownTableProps> = ({
         }
     }, [groupedData, searchText, filterLevel]);
 
+    // 按当前层级、展开状态展开为逐行列表
+    const rows = useMemo(() => {
+        const list: DrillRow[] = [];
+        if (filterLevel === 'Campaign') {
+            filteredData.forEach(campaign => {
+                list.push({
+                    kind: 'entity', key: `c:${campaign.name}`, level: 'Campaign', name: campaign.name,
+                    metrics: campaign.metrics, prevMetrics: campaign.prevMetrics, quadrant: campaign.quadrant, expandable: true
+                });
+                if (!expandedCampaigns.has(campaign.name)) return;
+                list.push({ kind: 'benchmark', key: `c:${campaign.name}:benchmark`, level: 'AdSet', parentName: campaign.name, indent: true });
+                campaign.adSets.forEach(adSet => {
+                    const adSetKey = `c:${campaign.name}/s:${adSet.name}`;
+                    list.push({
+                        kind: 'entity', key: adSetKey, level: 'AdSet', name: adSet.name,
+                        metrics: adSet.metrics, prevMetrics: adSet.prevMetrics, indent: true, expandable: true
+                    });
+                    if (!expandedAdSets.has(adSet.name)) return;
+                    list.push({ kind: 'benchmark', key: `${adSetKey}:benchmark`, level: 'Ad', parentName: adSet.name, indentMore: true });
+                    adSet.ads.forEach(ad => list.push({
+                        kind: 'entity', key: `${adSetKey}/a:${ad.name}`, level: 'Ad', name: ad.name,
+                        metrics: ad.metrics, prevMetrics: ad.prevMetrics, indentMore: true
+                    }));
+                });
+            });
+        } else if (filterLevel === 'AdSet') {
+            filteredData.forEach(campaign => campaign.adSets.forEach(adSet => list.push({
+                kind: 'entity', key: `${campaign.name}-${adSet.name}`, level: 'AdSet', name: adSet.name,
+                metrics: adSet.metrics, prevMetrics: adSet.prevMetrics
+            })));
+        } else {
+            filteredData.forEach(campaign => campaign.adSets.forEach(adSet => adSet.ads.forEach(ad => list.push({
+                kind: 'entity', key: `${campaign.name}-${adSet.name}-${ad.name}`, level: 'Ad', name: ad.name,
+                metrics: ad.metrics, prevMetrics: ad.prevMetrics
+            }))));
+        }
+        return list;
+    }, [filteredData, filterLevel, expandedCampaigns, expandedAdSets]);
+
+    const virtual = useVirtualRows({ items: rows, getKey: getRowKey, estimateHeight: estimateRowHeight });
+
+    const levelBenchmark = (level: LevelName) =>
+        level === 'Campaign' ? campaignBenchmark : level === 'AdSet' ? adSetBenchmark : adBenchmark;
+
+    // 行可能尚未挂载：先滚动到位置，挂载后再高亮
+    useImperativeHandle(ref, () => ({
+        scrollToRow: (rowId: string) => {
+            const row = rows.find(r => r.kind === 'entity' && rowIdOf(r.level, r.name) === rowId);
+            if (!row || !virtual.scrollToKey(row.key)) return false;
+            setHighlightedRow(rowId);
+            return true;
+        }
+    }), [rows, virtual.scrollToKey]);
+
+    useEffect(() => {
+        if (!highlightedRow) return;
+        const timer = setTimeout(() => setHighlightedRow(null), 3000);
+        return () => clearTimeout(timer);
+    }, [highlightedRow]);
+
+    const colSpan = columns.length + 3;
+
     return (
         <div className="bg-white rounded-2xl shadow-sm border border-slate-200 overflow-hidden">
             <div className="overflow-x-auto">
@@ -176,142 +266,56 @@ export const DrillDownTable: React.FC<DrillDownTableProps> = ({
                     </thead>
                     <tbody>
                         {/* Benchmark Row */}
-                        {filterLevel === 'Campaign' && (
+                        <BenchmarkRow
+                            benchmark={levelBenchmark(filterLevel)}
+                            columns={columns}
+                            level={filterLevel}
+                        />
+                    </tbody>
+                    <tbody ref={virtual.containerRef}>
+                        <VirtualSpacerRow height={virtual.paddingTop} colSpan={colSpan} />
+                        {virtual.rows.map(({ item: row, key }) => row.kind === 'benchmark' ? (
                             <BenchmarkRow
-                                benchmark={campaignBenchmark}
+                                key={key}
+                                benchmark={levelBenchmark(row.level)}
                                 columns={columns}
-                                level="Campaign"
+                                level={row.level}
+                                parentName={row.parentName}
+                                indent={row.indent}
+                                indentMore={row.indentMore}
+                                virtualKey={key}
+                                rowRef={virtual.measureRef}
                             />
-                        )}
-                        {filterLevel === 'AdSet' && (
-                            <BenchmarkRow
-                                benchmark={adSetBenchmark}
+                        ) : (
+                            <DataRowGroup
+                                key={key}
+                                virtualKey={key}
+                                rowRef={virtual.measureRef}
+                                highlighted={highlightedRow === rowIdOf(row.level, row.name)}
+                                name={row.name}
+                                level={row.level}
+                                indent={row.indent}
+                                indentMore={row.indentMore}
+                                metrics={row.metrics}
+                                prevMetrics={row.prevMetrics}
+                                benchmark={levelBenchmark(row.level)}
                                 columns={columns}
-                                level="AdSet"
+                                isExpanded={row.expandable ? (row.level === 'Campaign' ? expandedCampaigns : expandedAdSets).has(row.name) : undefined}
+                                onToggle={row.expandable
+                                    ? (row.level === 'Campaign'
+                                        ? () => toggleSet(expandedCampaigns, setExpandedCampaigns, row.name)
+                                        : () => toggleSet(expandedAdSets, setExpandedAdSets, row.name))
+                                    : undefined}
+                                quadrant={row.quadrant}
+                                isMarked={markedTodos.has(rowIdOf(row.level, row.name))}
+                                onTodoToggle={() => onTodoToggle(createTodo(config, row.level, row.name, row.metrics, row.prevMetrics, row.quadrant))}
                             />
-                        )}
-                        {filterLevel === 'Ad' && (
-                            <BenchmarkRow
-                                benchmark={adBenchmark}
-                                columns={columns}
-                                level="Ad"
-                            />
-                        )}
-
-                        {/* Campaign Level View */}
-                        {filterLevel === 'Campaign' && filteredData.map(campaign => (
-                            <React.Fragment key={campaign.name}>
-                                <DataRowGroup
-                                    name={campaign.name}
-                                    level="Campaign"
-                                    metrics={campaign.metrics}
-                                    prevMetrics={campaign.prevMetrics}
-                                    benchmark={campaignBenchmark}
-                                    columns={columns}
-                                    isExpanded={expandedCampaigns.has(campaign.name)}
-                                    onToggle={() => toggleSet(expandedCampaigns, setExpandedCampaigns, campaign.name)}
-                                    quadrant={campaign.quadrant}
-                                    isMarked={markedTodos.has(`campaign-${campaign.name}`)}
-                                    onTodoToggle={() => onTodoToggle(createTodo(config, 'Campaign', campaign.name, campaign.metrics, campaign.prevMetrics, campaign.quadrant))}
-                                />
-
-                                {expandedCampaigns.has(campaign.name) && (
-                                    <>
-                                        <BenchmarkRow
-                                            benchmark={adSetBenchmark}
-                                            columns={columns}
-                                            level="AdSet"
-                                            parentName={campaign.name}
-                                            indent
-                                        />
-
-                                        {campaign.adSets.map(adSet => (
-                                            <React.Fragment key={adSet.name}>
-                                                <DataRowGroup
-                                                    name={adSet.name}
-                                                    level="AdSet"
-                                                    indent
-                                                    metrics={adSet.metrics}
-                                                    prevMetrics={adSet.prevMetrics}
-                                                    benchmark={adSetBenchmark}
-                                                    columns={columns}
-                                                    isExpanded={expandedAdSets.has(adSet.name)}
-                                                    onToggle={() => toggleSet(expandedAdSets, setExpandedAdSets, adSet.name)}
-                                                    isMarked={markedTodos.has(`adset-${adSet.name}`)}
-                                                    onTodoToggle={() => onTodoToggle(createTodo(config, 'AdSet', adSet.name, adSet.metrics, adSet.prevMetrics))}
-                                                />
-
-                                                {expandedAdSets.has(adSet.name) && (
-                                                    <>
-                                                        <BenchmarkRow
-                                                            benchmark={adBenchmark}
-                                                            columns={columns}
-                                                            level="Ad"
-                                                            parentName={adSet.name}
-                                                            indentMore
-                                                        />
-                                                        {adSet.ads.map(ad => (
-                                                            <DataRowGroup
-                                                                key={ad.name}
-                                                                name={ad.name}
-                                                                level="Ad"
-                                                                indentMore
-                                                                metrics={ad.metrics}
-                                                                prevMetrics={ad.prevMetrics}
-                                                                benchmark={adBenchmark}
-                                                                columns={columns}
-                                                                isMarked={markedTodos.has(`ad-${ad.name}`)}
-                                                                onTodoToggle={() => onTodoToggle(createTodo(config, 'Ad', ad.name, ad.metrics, ad.prevMetrics))}
-                                                            />
-                                                        ))}
-                                                    </>
-                                                )}
-                                            </React.Fragment>
-                                        ))}
-                                    </>
-                                )}
-                            </React.Fragment>
                         ))}
-
-                        {/* AdSet Level View - Flat list of all AdSets */}
-                        {filterLevel === 'AdSet' && filteredData.flatMap(campaign =>
-                            campaign.adSets.map(adSet => (
-                                <DataRowGroup
-                                    key={`${campaign.name}-${adSet.name}`}
-                                    name={adSet.name}
-                                    level="AdSet"
-                                    metrics={adSet.metrics}
-                                    prevMetrics={adSet.prevMetrics}
-                                    benchmark={adSetBenchmark}
-                                    columns={columns}
-                                    isMarked={markedTodos.has(`adset-${adSet.name}`)}
-                                    onTodoToggle={() => onTodoToggle(createTodo(config, 'AdSet', adSet.name, adSet.metrics, adSet.prevMetrics))}
-                                />
-                            ))
-                        )}
-
-                        {/* Ad Level View - Flat list of all Ads */}
-                        {filterLevel === 'Ad' && filteredData.flatMap(campaign =>
-                            campaign.adSets.flatMap(adSet =>
-                                adSet.ads.map(ad => (
-                                    <DataRowGroup
-                                        key={`${campaign.name}-${adSet.name}-${ad.name}`}
-                                        name={ad.name}
-                                        level="Ad"
-                                        metrics={ad.metrics}
-                                        prevMetrics={ad.prevMetrics}
-                                        benchmark={adBenchmark}
-                                        columns={columns}
-                                        isMarked={markedTodos.has(`ad-${ad.name}`)}
-                                        onTodoToggle={() => onTodoToggle(createTodo(config, 'Ad', ad.name, ad.metrics, ad.prevMetrics))}
-                                    />
-                                ))
-                            )
-                        )}
+                        <VirtualSpacerRow height={virtual.paddingBottom} colSpan={colSpan} />
 
                         {filteredData.length === 0 && (
                             <tr>
-                                <td colSpan={columns.length + 3} className="px-4 py-12 text-center text-slate-500">
+                                <td colSpan={colSpan} className="px-4 py-12 text-center text-slate-500">
                                     {searchText ? `No ${filterLevel.toLowerCase()}s found matching "${searchText}".` : `No ${filterLevel.toLowerCase()}s found for the selected quadrant.`}
                                 </td>
                             </tr>
@@ -321,11 +325,14 @@ export const DrillDownTable: React.FC<DrillDownTableProps> = ({
             </div>
         </div>
     );
-};
+});
 
 // --- Helper Components & Functions ---
 
 interface DataRowGroupProps {
+    virtualKey?: string;
+    rowRef?: (el: HTMLTableRowElement | null) => void;
+    highlighted?: boolean;
     name: string;
     level: 'Campaign' | 'AdSet' | 'Ad';
     indent?: boolean;
@@ -403,14 +410,16 @@ const EntityNameCell: React.FC<{
 };
 
 const DataRowGroup: React.FC<DataRowGroupProps> = ({
-    name, level, indent, indentMore, metrics, prevMetrics, benchmark, columns, isExpanded, onToggle, quadrant, isMarked, onTodoToggle
+    virtualKey, rowRef, highlighted, name, level, indent, indentMore, metrics, prevMetrics, benchmark, columns, isExpanded, onToggle, quadrant, isMarked, onTodoToggle
 }) => {
-    const rowId = level === 'Campaign' ? `campaign-${name}` : level === 'AdSet' ? `adset-${name}` : `ad-${name}`;
+    const rowId = rowIdOf(level, name);
 
     return (
         <tr
             id={rowId}
-            className={`border-b hover:bg-slate-50 transition-all ${indent ? 'bg-slate-50/20' : ''} ${indentMore ? 'bg-slate-50/40' : ''}`}
+            ref={rowRef}
+            data-virtual-key={virtualKey}
+            className={`border-b hover:bg-slate-50 transition-all ${indent ? 'bg-slate-50/20' : ''} ${indentMore ? 'bg-slate-50/40' : ''} ${highlighted ? 'highlight-row' : ''}`}
         >
             {/* Name Column */}
             <td className="px-4 py-3">
@@ -489,14 +498,16 @@ const DataRowGroup: React.FC<DataRowGroupProps> = ({
     );
 };
 
-const aggregateMetrics = (records: RawAdRecord[]): CampaignMetrics => {
-    const totalSpend = records.reduce((sum, r) => sum + r.spend, 0);
-    const totalImpressions = records.reduce((sum, r) => sum + r.impressions, 0);
-    const totalClicks = records.reduce((sum, r) => sum + r.link_clicks, 0);
-    const totalPurchases = records.reduce((sum, r) => sum + r.purchases, 0);
-    const totalRevenue = records.reduce((sum, r) => sum + r.purchase_value, 0);
-    const totalATC = records.reduce((sum, r) => sum + r.adds_to_cart, 0);
-    const totalReach = records.reduce((sum, r) => sum + (r.reach || 0), 0);
+const aggregateMetrics = (totals: ColumnTotals): CampaignMetrics => {
+    const {
+        spend: totalSpend,
+        impressions: totalImpressions,
+        link_clicks: totalClicks,
+        purchases: totalPurchases,
+        purchase_value: totalRevenue,
+        adds_to_cart: totalATC,
+        reach: totalReach
+    } = totals;
 
     return {
         spend: totalSpend,
@@ -70,10 +70,11 @@ export const GuidanceDetailPanel: React.FC<{
     diagnosticDetails?: DiagnosticDetail[];  // 修改：支持多个诊断详情
     priority?: 'P0' | 'P1' | null;  // 新增：优先级
     benchmarkROI?: number;  // 新增：Benchmark ROI
-}> = ({ guidance, metrics, avgMetrics, kpiType, intermediateMetrics, intermediateAvgMetrics, lastMetrics, diagnosticDetails, priority, benchmarkROI }) => {
+    triggeredConditions?: string[];  // 预计算的触发条件（未传入时现场计算）
+}> = ({ guidance, metrics, avgMetrics, kpiType, intermediateMetrics, intermediateAvgMetrics, lastMetrics, diagnosticDetails, priority, benchmarkROI, triggeredConditions }) => {
     const [showDiagnosticFlow, setShowDiagnosticFlow] = useState(false);
     const [activeScenarioIndex, setActiveScenarioIndex] = useState(0);
-    const conditions = getTriggeredConditions(metrics as CampaignMetrics, avgMetrics as CampaignMetrics, kpiType);
+    const conditions = triggeredConditions ?? getTriggeredConditions(metrics as CampaignMetrics, avgMetrics as CampaignMetrics, kpiType);
 
     // 定义要显示的关键指标（根据KPI类型，按转化漏斗顺序）
     const keyMetrics = kpiType === 'ROI'
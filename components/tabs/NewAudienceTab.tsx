@@ -1,6 +1,7 @@
 import React, { useState, useMemo } from 'react';
 import { RawAdRecord } from '../../types';
 import { filterNewAudience } from '../../utils/newAudienceUtils';
+import { debugLog } from '../../utils/instrumentation';
 import { KPIType } from '../../utils/newAudienceColumnConfig';
 import { SummaryCards } from '../new-audience/SummaryCards';
 import { NewAudienceTable } from '../new-audience/NewAudienceTable';
@@ -35,11 +36,8 @@ export const NewAudienceTab: React.FC<NewAudienceTabProps> = ({
     // Filter new audience ad sets based on selected KPI
     const newAdSets = useMemo(() => {
         try {
-            console.log('NewAudienceTab - data length:', data.length);
-            console.log('NewAudienceTab - endDate:', endDate);
-            console.log('NewAudienceTab - selectedKPI:', selectedKPI);
             const result = filterNewAudience(data, endDate, configs, selectedKPI);
-            console.log('NewAudienceTab - filtered ad sets:', result.length);
+            debugLog('NewAudienceTab', 'data length:', data.length, 'endDate:', endDate, 'selectedKPI:', selectedKPI, 'filtered ad sets:', result.length);
             return result;
         } catch (error) {
             console.error('Error filtering new audience:', error);
@@ -56,7 +54,6 @@ export const NewAudienceTab: React.FC<NewAudienceTabProps> = ({
                         levels={['ROI', 'CPC', 'CPM']}
                         selected={selectedKPI}
                         onChange={(kpi) => {
-                            console.log('KPI changed to:', kpi);
                             setSelectedKPI(kpi as KPIType);
                         }}
                     />
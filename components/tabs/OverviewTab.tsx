@@ -1,7 +1,8 @@
 import React, { useMemo } from 'react';
 import { TrendingUp, TrendingDown, Minus, DollarSign, Target, Clock, Activity, Settings } from 'lucide-react';
 import { RawAdRecord, AggregatedMetrics, AdConfiguration, CampaignLayer, LayerConfiguration } from '../../types';
-import { calculateMetrics, classifyCampaign, formatCurrency, formatPercent, formatNumber, getDelta, calculateTotalBudget } from '../../utils/dataUtils';
+import { calculateTotalsMetrics, classifyCampaign, formatCurrency, formatPercent, formatNumber, getDelta, calculateTotalBudget } from '../../utils/dataUtils';
+import { rollupTotals, sumRollupGroups } from '../../utils/rollupCube';
 
 interface OverviewTabProps {
     data: RawAdRecord[];
@@ -71,8 +72,9 @@ const MetricCard: React.FC<{
 };
 
 export const OverviewTab: React.FC<OverviewTabProps> = ({ data, comparisonData, configs, startDate, endDate, layerConfig, onConfigureLayersClick }) => {
-    const overallMetrics = useMemo(() => calculateMetrics(data), [data]);
-    const prevMetrics = useMemo(() => calculateMetrics(comparisonData), [comparisonData]);
+    // 统计读取加载时构建的汇总立方体（utils/rollupCube.ts），只累加日期范围内的 实体 × 天 单元格
+    const overallMetrics = useMemo(() => calculateTotalsMetrics(rollupTotals(data)), [data]);
+    const prevMetrics = useMemo(() => calculateTotalsMetrics(rollupTotals(comparisonData)), [comparisonData]);
 
     // 使用智能预算计算
     const { targetGMV, totalBudget, targetAcos, targetRoi, budgetBreakdown, activeConfigsCount } = useMemo(() => {
@@ -125,19 +127,17 @@ export const OverviewTab: React.FC<OverviewTabProps> = ({ data, comparisonData,
     };
 
     const layerAnalysis = useMemo(() => {
-        const layers = {
-            [CampaignLayer.AWARENESS]: { current: [] as RawAdRecord[], prev: [] as RawAdRecord[] },
-            [CampaignLayer.TRAFFIC]: { current: [] as RawAdRecord[], prev: [] as RawAdRecord[] },
-            [CampaignLayer.CONVERSION]: { current: [] as RawAdRecord[], prev: [] as RawAdRecord[] }
-        };
-
-        data.forEach(r => layers[classifyCampaign(r, layerConfig)].current.push(r));
-        comparisonData.forEach(r => layers[classifyCampaign(r, layerConfig)].prev.push(r));
+        // 层级按名称组合分类一次，再按实体分组求和
+        const layers = [CampaignLayer.AWARENESS, CampaignLayer.TRAFFIC, CampaignLayer.CONVERSION];
+        const layerOf = (names: Pick<RawAdRecord, 'campaign_name' | 'adset_name' | 'ad_name'>) =>
+            layers.indexOf(classifyCampaign(names as RawAdRecord, layerConfig));
+        const current = sumRollupGroups(data, layerOf, layers.length);
+        const prev = sumRollupGroups(comparisonData, layerOf, layers.length);
 
-        return Object.entries(layers).map(([layer, sets]) => ({
+        return layers.map((layer, i) => ({
             layer,
-            metrics: calculateMetrics(sets.current),
-            prevMetrics: calculateMetrics(sets.prev)
+            metrics: calculateTotalsMetrics(current[i]),
+            prevMetrics: calculateTotalsMetrics(prev[i])
         }));
     }, [data, comparisonData, layerConfig]);
 
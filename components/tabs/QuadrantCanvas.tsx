@@ -0,0 +1,442 @@
+import React, { useCallback, useEffect, useLayoutEffect, useMemo, useRef, useState } from 'react';
+import { QuadrantThresholds, QuadrantType, getQuadrantColor, getQuadrantInfo } from '../../utils/quadrantUtils';
+import { ScatterDomain, buildScatterIndex, countInRect, findNearest, binPoints, forEachInRect } from '../../utils/scatterIndex';
+import { formatCurrency } from '../../utils/dataUtils';
+
+// 大数据量的象限散点图（Canvas）
+//
+// 视口内点数不超过 POINT_LIMIT 时逐点绘制（大小随花费变化，与 Recharts 版本一致）；
+// 超过时按像素网格分箱绘制密度，每格取点数最多的象限着色，透明度随点数变化。
+// 滚轮缩放、拖动平移、点击密度格放大，逐步显示单个点；双击恢复全貌。
+// 命中测试走网格索引（utils/scatterIndex.ts），不遍历所有点。
+
+export interface QuadrantPoint {
+    name: string;
+    spend: number;
+    kpiValue: number;
+    quadrant: QuadrantType;
+}
+
+interface QuadrantCanvasProps {
+    points: QuadrantPoint[];
+    thresholds: QuadrantThresholds;
+    targetType: 'ROI' | 'CPC' | 'CPM';
+    onCampaignClick?: (campaignName: string) => void;
+}
+
+const QUADRANTS: QuadrantType[] = ['excellent', 'potential', 'watch', 'problem'];
+const MARGIN = { top: 30, right: 80, bottom: 30, left: 56 };
+const POINT_LIMIT = 3000;       // 视口内超过该点数时改为密度分箱
+const BIN_SIZE = 6;             // 密度格边长（像素）
+const HIT_RADIUS = 10;          // 命中半径（像素）
+const MIN_ZOOM_SPAN = 1e-3;     // 最大放大倍数的倒数
+const BIN_ZOOM = 4;             // 点击密度格时的放大倍数
+
+// 点面积范围（与 Recharts ZAxis range={[50, 300]} 一致）
+const MIN_AREA = 50;
+const MAX_AREA = 300;
+
+// 刻度：1 / 2 / 5 × 10^n
+const niceTicks = (min: number, max: number, count: number): number[] => {
+    const span = max - min;
+    if (!(span > 0)) return [min];
+    const raw = span / count;
+    const magnitude = Math.pow(10, Math.floor(Math.log10(raw)));
+    const step = [1, 2, 5, 10].map(m => m * magnitude).find(s => s >= raw) || raw;
+    const ticks: number[] = [];
+    for (let v = Math.ceil(min / step) * step; v <= max + step * 1e-9; v += step) {
+        ticks.push(Math.round(v / step) * step);
+    }
+    return ticks;
+};
+
+const formatTick = (value: number): string => {
+    const rounded = Math.abs(value) >= 100 ? Math.round(value) : Number(value.toPrecision(3));
+    return rounded.toLocaleString();
+};
+
+type Hover =
+    | { type: 'point'; index: number; x: number; y: number }
+    | { type: 'bin'; counts: number[]; total: number; rect: ScatterDomain; x: number; y: number };
+
+export const QuadrantCanvas: React.FC<QuadrantCanvasProps> = ({ points, thresholds, targetType, onCampaignClick }) => {
+    const containerRef = useRef<HTMLDivElement>(null);
+    const canvasRef = useRef<HTMLCanvasElement>(null);
+    const [size, setSize] = useState({ width: 0, height: 0 });
+
+    useLayoutEffect(() => {
+        const el = containerRef.current;
+        if (!el) return;
+        const measure = () => setSize({ width: el.clientWidth, height: el.clientHeight });
+        measure();
+        if (typeof ResizeObserver === 'undefined') return;
+        const observer = new ResizeObserver(measure);
+        observer.observe(el);
+        return () => observer.disconnect();
+    }, []);
+
+    // 全量数据范围与索引（数据或阈值变化时重建）
+    const { index, fullDomain, minSpend, maxSpend } = useMemo(() => {
+        const n = points.length;
+        const xs = new Float64Array(n);
+        const ys = new Float64Array(n);
+        const categories = new Uint8Array(n);
+        let maxX = 0;
+        let maxY = 0;
+        let minX = Infinity;
+        for (let i = 0; i < n; i++) {
+            const p = points[i];
+            xs[i] = p.spend;
+            ys[i] = p.kpiValue;
+            categories[i] = QUADRANTS.indexOf(p.quadrant);
+            if (p.spend > maxX) maxX = p.spend;
+            if (p.spend < minX) minX = p.spend;
+            if (p.kpiValue > maxY) maxY = p.kpiValue;
+        }
+        // 纵轴与 Recharts 版本一致：留 20% 余量并包含目标线
+        const yMax = Math.ceil(Math.max(maxY, thresholds.kpiThreshold) * 1.2 * 10) / 10 || 1;
+        const xMax = Math.max(maxX, thresholds.spendThreshold) * 1.05 || 1;
+        const domain: ScatterDomain = { xMin: 0, xMax, yMin: 0, yMax };
+        return {
+            index: buildScatterIndex(xs, ys, categories, domain),
+            fullDomain: domain,
+            minSpend: n > 0 ? minX : 0,
+            maxSpend: maxX
+        };
+    }, [points, thresholds.kpiThreshold, thresholds.spendThreshold]);
+
+    // 数据范围变化时恢复全貌（只调整阈值、范围不变时保留当前缩放）
+    const [view, setView] = useState<ScatterDomain>(fullDomain);
+    useEffect(() => setView(fullDomain), [fullDomain.xMax, fullDomain.yMax]);   // eslint-disable-line react-hooks/exhaustive-deps
+
+    const [hover, setHover] = useState<Hover | null>(null);
+    const plotWidth = Math.max(1, size.width - MARGIN.left - MARGIN.right);
+    const plotHeight = Math.max(1, size.height - MARGIN.top - MARGIN.bottom);
+
+    // 坐标换算
+    const toScreenX = useCallback((x: number) => MARGIN.left + ((x - view.xMin) / (view.xMax - view.xMin)) * plotWidth, [view, plotWidth]);
+    const toScreenY = useCallback((y: number) => MARGIN.top + ((view.yMax - y) / (view.yMax - view.yMin)) * plotHeight, [view, plotHeight]);
+    const toDataX = useCallback((px: number) => view.xMin + ((px - MARGIN.left) / plotWidth) * (view.xMax - view.xMin), [view, plotWidth]);
+    const toDataY = useCallback((py: number) => view.yMax - ((py - MARGIN.top) / plotHeight) * (view.yMax - view.yMin), [view, plotHeight]);
+
+    const visibleCount = useMemo(() => countInRect(index, view), [index, view]);
+    const pointMode = visibleCount <= POINT_LIMIT;
+
+    const bins = useMemo(
+        () => (pointMode ? null : binPoints(index, view, Math.ceil(plotWidth / BIN_SIZE), Math.ceil(plotHeight / BIN_SIZE), QUADRANTS.length)),
+        [pointMode, index, view, plotWidth, plotHeight]
+    );
+
+    const radiusOf = useCallback((spend: number) => {
+        const t = maxSpend > minSpend ? (spend - minSpend) / (maxSpend - minSpend) : 0;
+        return Math.sqrt((MIN_AREA + t * (MAX_AREA - MIN_AREA)) / Math.PI);
+    }, [minSpend, maxSpend]);
+
+    // 绘制
+    useEffect(() => {
+        const canvas = canvasRef.current;
+        if (!canvas || size.width === 0 || size.height === 0) return;
+        const dpr = window.devicePixelRatio || 1;
+        canvas.width = Math.round(size.width * dpr);
+        canvas.height = Math.round(size.height * dpr);
+        const ctx = canvas.getContext('2d');
+        if (!ctx) return;
+        ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+        ctx.clearRect(0, 0, size.width, size.height);
+
+        // 网格与刻度
+        const xTicks = niceTicks(view.xMin, view.xMax, 6);
+        const yTicks = niceTicks(view.yMin, view.yMax, 5);
+        ctx.strokeStyle = '#f1f5f9';
+        ctx.lineWidth = 1;
+        ctx.setLineDash([3, 3]);
+        ctx.fillStyle = '#64748b';
+        ctx.font = '11px sans-serif';
+        ctx.textAlign = 'center';
+        ctx.textBaseline = 'top';
+        xTicks.forEach(v => {
+            const x = toScreenX(v);
+            ctx.beginPath();
+            ctx.moveTo(x, MARGIN.top);
+            ctx.lineTo(x, MARGIN.top + plotHeight);
+            ctx.stroke();
+            ctx.fillText(`$${formatTick(v)}`, x, MARGIN.top + plotHeight + 6);
+        });
+        ctx.textAlign = 'right';
+        ctx.textBaseline = 'middle';
+        yTicks.forEach(v => {
+            const y = toScreenY(v);
+            ctx.beginPath();
+            ctx.moveTo(MARGIN.left, y);
+            ctx.lineTo(MARGIN.left + plotWidth, y);
+            ctx.stroke();
+            ctx.fillText(`${formatTick(v)}${targetType === 'ROI' ? 'x' : ''}`, MARGIN.left - 6, y);
+        });
+        ctx.setLineDash([]);
+        ctx.strokeStyle = '#64748b';
+        ctx.beginPath();
+        ctx.moveTo(MARGIN.left, MARGIN.top);
+        ctx.lineTo(MARGIN.left, MARGIN.top + plotHeight);
+        ctx.lineTo(MARGIN.left + plotWidth, MARGIN.top + plotHeight);
+        ctx.stroke();
+
+        ctx.save();
+        ctx.beginPath();
+        ctx.rect(MARGIN.left, MARGIN.top, plotWidth, plotHeight);
+        ctx.clip();
+
+        if (bins) {
+            // 密度格：点数最多的象限着色，透明度按对数点数
+            const logMax = Math.log1p(bins.maxCount);
+            for (let cell = 0; cell < bins.counts.length; cell++) {
+                const count = bins.counts[cell];
+                if (count === 0) continue;
+                let dominant = 0;
+                for (let q = 1; q < QUADRANTS.length; q++) {
+                    if (bins.categoryCounts[cell * QUADRANTS.length + q] > bins.categoryCounts[cell * QUADRANTS.length + dominant]) dominant = q;
+                }
+                ctx.globalAlpha = 0.25 + 0.75 * (Math.log1p(count) / logMax);
+                ctx.fillStyle = getQuadrantColor(QUADRANTS[dominant]);
+                const c = cell % bins.cols;
+                const r = (cell - c) / bins.cols;
+                ctx.fillRect(MARGIN.left + c * BIN_SIZE, MARGIN.top + r * BIN_SIZE, BIN_SIZE - 1, BIN_SIZE - 1);
+            }
+            ctx.globalAlpha = 1;
+        } else {
+            // 逐点绘制（大的先画，避免遮住小点）
+            const visible: number[] = [];
+            forEachInRect(index, view, i => { visible.push(i); });
+            visible.sort((a, b) => index.xs[b] - index.xs[a]);
+            ctx.strokeStyle = '#fff';
+            ctx.lineWidth = 2;
+            visible.forEach(i => {
+                ctx.beginPath();
+                ctx.arc(toScreenX(index.xs[i]), toScreenY(index.ys[i]), radiusOf(index.xs[i]), 0, Math.PI * 2);
+                ctx.fillStyle = getQuadrantColor(QUADRANTS[index.categories[i]]);
+                ctx.fill();
+                ctx.stroke();
+            });
+        }
+
+        // 悬停高亮
+        if (hover?.type === 'point') {
+            ctx.beginPath();
+            ctx.arc(toScreenX(index.xs[hover.index]), toScreenY(index.ys[hover.index]), radiusOf(index.xs[hover.index]) + 3, 0, Math.PI * 2);
+            ctx.strokeStyle = '#1e293b';
+            ctx.lineWidth = 2;
+            ctx.stroke();
+        } else if (hover?.type === 'bin') {
+            ctx.strokeStyle = '#1e293b';
+            ctx.lineWidth = 1.5;
+            ctx.strokeRect(
+                toScreenX(hover.rect.xMin),
+                toScreenY(hover.rect.yMax),
+                toScreenX(hover.rect.xMax) - toScreenX(hover.rect.xMin),
+                toScreenY(hover.rect.yMin) - toScreenY(hover.rect.yMax)
+            );
+        }
+        ctx.restore();
+
+        // 阈值线
+        ctx.strokeStyle = '#475569';
+        ctx.lineWidth = 2;
+        ctx.setLineDash([5, 5]);
+        ctx.fillStyle = '#1e293b';
+        ctx.font = 'bold 12px sans-serif';
+        const sx = toScreenX(thresholds.spendThreshold);
+        if (sx >= MARGIN.left && sx <= MARGIN.left + plotWidth) {
+            ctx.beginPath();
+            ctx.moveTo(sx, MARGIN.top);
+            ctx.lineTo(sx, MARGIN.top + plotHeight);
+            ctx.stroke();
+            ctx.textAlign = 'center';
+            ctx.textBaseline = 'bottom';
+            ctx.fillText('Avg Spend', sx, MARGIN.top - 6);
+        }
+        const ky = toScreenY(thresholds.kpiThreshold);
+        if (ky >= MARGIN.top && ky <= MARGIN.top + plotHeight) {
+            ctx.beginPath();
+            ctx.moveTo(MARGIN.left, ky);
+            ctx.lineTo(MARGIN.left + plotWidth, ky);
+            ctx.stroke();
+            ctx.textAlign = 'left';
+            ctx.textBaseline = 'middle';
+            ctx.fillText(`Target ${targetType}`, MARGIN.left + plotWidth + 6, ky);
+        }
+        ctx.setLineDash([]);
+    }, [size, view, index, bins, hover, thresholds, targetType, plotWidth, plotHeight, toScreenX, toScreenY, radiusOf]);
+
+    // 缩放：以光标为中心，不超出全量范围
+    const zoomAt = useCallback((px: number, py: number, factor: number) => {
+        setView(prev => {
+            const cx = prev.xMin + ((px - MARGIN.left) / plotWidth) * (prev.xMax - prev.xMin);
+            const cy = prev.yMax - ((py - MARGIN.top) / plotHeight) * (prev.yMax - prev.yMin);
+            const fullW = fullDomain.xMax - fullDomain.xMin;
+            const fullH = fullDomain.yMax - fullDomain.yMin;
+            const w = Math.min(fullW, Math.max(fullW * MIN_ZOOM_SPAN, (prev.xMax - prev.xMin) * factor));
+            const h = Math.min(fullH, Math.max(fullH * MIN_ZOOM_SPAN, (prev.yMax - prev.yMin) * factor));
+            const xMin = Math.min(Math.max(fullDomain.xMin, cx - (cx - prev.xMin) * (w / (prev.xMax - prev.xMin))), fullDomain.xMax - w);
+            const yMin = Math.min(Math.max(fullDomain.yMin, cy - (cy - prev.yMin) * (h / (prev.yMax - prev.yMin))), fullDomain.yMax - h);
+            return { xMin, xMax: xMin + w, yMin, yMax: yMin + h };
+        });
+    }, [fullDomain, plotWidth, plotHeight]);
+
+    // wheel 需要非被动监听才能阻止页面滚动
+    useEffect(() => {
+        const canvas = canvasRef.current;
+        if (!canvas) return;
+        const onWheel = (e: WheelEvent) => {
+            e.preventDefault();
+            const rect = canvas.getBoundingClientRect();
+            zoomAt(e.clientX - rect.left, e.clientY - rect.top, Math.pow(1.2, e.deltaY / 100));
+        };
+        canvas.addEventListener('wheel', onWheel, { passive: false });
+        return () => canvas.removeEventListener('wheel', onWheel);
+    }, [zoomAt]);
+
+    const dragRef = useRef<{ x: number; y: number; view: ScatterDomain; moved: boolean } | null>(null);
+
+    const locate = (e: React.MouseEvent<HTMLCanvasElement>) => {
+        const rect = e.currentTarget.getBoundingClientRect();
+        return { px: e.clientX - rect.left, py: e.clientY - rect.top };
+    };
+
+    const hitTest = (px: number, py: number): Hover | null => {
+        if (px < MARGIN.left || px > MARGIN.left + plotWidth || py < MARGIN.top || py > MARGIN.top + plotHeight) return null;
+        const x = toDataX(px);
+        const y = toDataY(py);
+        if (pointMode) {
+            const radiusX = (HIT_RADIUS / plotWidth) * (view.xMax - view.xMin);
+            const radiusY = (HIT_RADIUS / plotHeight) * (view.yMax - view.yMin);
+            const i = findNearest(index, x, y, radiusX, radiusY);
+            return i >= 0 ? { type: 'point', index: i, x: px, y: py } : null;
+        }
+        // 悬停所在密度格
+        const c = Math.floor((px - MARGIN.left) / BIN_SIZE);
+        const r = Math.floor((py - MARGIN.top) / BIN_SIZE);
+        const cellW = (BIN_SIZE / plotWidth) * (view.xMax - view.xMin);
+        const cellH = (BIN_SIZE / plotHeight) * (view.yMax - view.yMin);
+        const rect: ScatterDomain = {
+            xMin: view.xMin + c * cellW,
+            xMax: view.xMin + (c + 1) * cellW,
+            yMin: view.yMax - (r + 1) * cellH,
+            yMax: view.yMax - r * cellH
+        };
+        const counts = [0, 0, 0, 0];
+        forEachInRect(index, rect, i => { counts[index.categories[i]]++; });
+        const total = counts[0] + counts[1] + counts[2] + counts[3];
+        return total > 0 ? { type: 'bin', counts, total, rect, x: px, y: py } : null;
+    };
+
+    const handleMouseDown = (e: React.MouseEvent<HTMLCanvasElement>) => {
+        const { px, py } = locate(e);
+        dragRef.current = { x: px, y: py, view, moved: false };
+    };
+
+    const handleMouseMove = (e: React.MouseEvent<HTMLCanvasElement>) => {
+        const { px, py } = locate(e);
+        const drag = dragRef.current;
+        if (drag && (drag.moved || Math.abs(px - drag.x) + Math.abs(py - drag.y) > 3)) {
+            // 拖动平移
+            drag.moved = true;
+            const w = drag.view.xMax - drag.view.xMin;
+            const h = drag.view.yMax - drag.view.yMin;
+            const xMin = Math.min(Math.max(fullDomain.xMin, drag.view.xMin - ((px - drag.x) / plotWidth) * w), fullDomain.xMax - w);
+            const yMin = Math.min(Math.max(fullDomain.yMin, drag.view.yMin + ((py - drag.y) / plotHeight) * h), fullDomain.yMax - h);
+            setView({ xMin, xMax: xMin + w, yMin, yMax: yMin + h });
+            setHover(null);
+            return;
+        }
+        setHover(hitTest(px, py));
+    };
+
+    const handleMouseUp = (e: React.MouseEvent<HTMLCanvasElement>) => {
+        const drag = dragRef.current;
+        dragRef.current = null;
+        if (drag?.moved) return;
+        const { px, py } = locate(e);
+        const hit = hitTest(px, py);
+        if (hit?.type === 'point') {
+            onCampaignClick?.(points[hit.index].name);
+        } else if (hit?.type === 'bin') {
+            zoomAt(px, py, 1 / BIN_ZOOM);
+        }
+    };
+
+    const isZoomed = view.xMin !== fullDomain.xMin || view.xMax !== fullDomain.xMax
+        || view.yMin !== fullDomain.yMin || view.yMax !== fullDomain.yMax;
+
+    const hoveredPoint = hover?.type === 'point' ? points[hover.index] : null;
+    const hoveredInfo = hoveredPoint ? getQuadrantInfo(hoveredPoint.quadrant) : null;
+
+    return (
+        <div ref={containerRef} className="relative w-full h-full select-none">
+            <canvas
+                ref={canvasRef}
+                style={{ width: size.width, height: size.height, cursor: hover ? 'pointer' : 'crosshair' }}
+                onMouseDown={handleMouseDown}
+                onMouseMove={handleMouseMove}
+                onMouseUp={handleMouseUp}
+                onMouseLeave={() => { dragRef.current = null; setHover(null); }}
+                onDoubleClick={() => setView(fullDomain)}
+            />
+
+            {/* 视口信息 */}
+            <div className="absolute top-1 left-14 flex items-center gap-2 text-[10px] font-bold text-slate-500">
+                <span>
+                    {visibleCount.toLocaleString()} / {points.length.toLocaleString()} Campaigns
+                    {pointMode ? '' : ' · 密度视图，滚轮或点击放大查看单个点'}
+                </span>
+                {isZoomed && (
+                    <button
+                        onClick={() => setView(fullDomain)}
+                        className="px-1.5 py-0.5 rounded border border-slate-200 bg-white text-indigo-600 hover:bg-indigo-50"
+                    >
+                        重置缩放
+                    </button>
+                )}
+            </div>
+
+            {hoveredPoint && hoveredInfo && (
+                <div
+                    className="absolute pointer-events-none bg-white p-4 border border-slate-200 shadow-xl rounded-xl z-10"
+                    style={{ left: hover!.x + 12, top: hover!.y + 12 }}
+                >
+                    <p className="font-black text-slate-900 mb-2">{hoveredPoint.name}</p>
+                    <div className="space-y-1 text-sm">
+                        <p className="text-slate-600">Spend: <span className="font-bold text-slate-900">{formatCurrency(hoveredPoint.spend)}</span></p>
+                        <p className="text-slate-600">{targetType}: <span className="font-bold text-slate-900">{hoveredPoint.kpiValue.toFixed(2)}{targetType === 'ROI' ? 'x' : ''}</span></p>
+                        <div className={`mt-2 inline-flex items-center gap-1 px-2 py-0.5 rounded-full text-xs font-bold border ${hoveredInfo.color}`}>
+                            <span>{hoveredInfo.icon}</span>
+                            <span>{hoveredInfo.label}</span>
+                        </div>
+                    </div>
+                </div>
+            )}
+
+            {hover?.type === 'bin' && (
+                <div
+                    className="absolute pointer-events-none bg-white p-3 border border-slate-200 shadow-xl rounded-xl z-10"
+                    style={{ left: hover.x + 12, top: hover.y + 12 }}
+                >
+                    <p className="font-black text-slate-900 mb-1">{hover.total.toLocaleString()} 个 Campaign</p>
+                    <p className="text-xs text-slate-500 mb-2">
+                        Spend {formatCurrency(hover.rect.xMin)} - {formatCurrency(hover.rect.xMax)}
+                    </p>
+                    <div className="space-y-0.5 text-xs">
+                        {QUADRANTS.map((q, i) => hover.counts[i] > 0 && (
+                            <div key={q} className="flex items-center justify-between gap-3">
+                                <span className="flex items-center gap-1">
+                                    <span className="w-2 h-2 rounded-full" style={{ background: getQuadrantColor(q) }}></span>
+                                    {getQuadrantInfo(q).label}
+                                </span>
+                                <span className="font-bold text-slate-900">{hover.counts[i].toLocaleString()}</span>
+                            </div>
+                        ))}
+                    </div>
+                    <p className="text-[10px] text-slate-400 mt-2">点击放大</p>
+                </div>
+            )}
+        </div>
+    );
+};
@@ -1,11 +1,13 @@
 import React, { useMemo } from 'react';
 import { ScatterChart, Scatter, XAxis, YAxis, ZAxis, CartesianGrid, Tooltip, ResponsiveContainer, ReferenceLine, Cell, Label } from 'recharts';
 import { RawAdRecord, AdConfiguration } from '../../types';
-import { QuadrantThresholds, QuadrantType, classifyQuadrant, getQuadrantInfo } from '../../utils/quadrantUtils';
+import { QuadrantThresholds, QuadrantType, classifyQuadrant, getQuadrantInfo, getQuadrantColor } from '../../utils/quadrantUtils';
 import { formatCurrency } from '../../utils/dataUtils';
+import { queryRollup } from '../../utils/rollupCube';
+import { QuadrantCanvas } from './QuadrantCanvas';
 
 interface QuadrantChartProps {
-    data: RawAdRecord[];
+    data: RawAdRecord[];            // 日期范围内的数据（按 config 的规则筛选业务线）
     config: AdConfiguration;
     thresholds: QuadrantThresholds;
     onThresholdsChange: (newThresholds: QuadrantThresholds) => void;
@@ -14,6 +16,9 @@ interface QuadrantChartProps {
     onCampaignClick?: (campaignName: string) => void;
 }
 
+// 超过该点数时改用 Canvas 散点图（密度分箱 + 网格索引，见 QuadrantCanvas）
+const CANVAS_POINT_THRESHOLD = 2000;
+
 export const QuadrantChart: React.FC<QuadrantChartProps> = ({
     data,
     config,
@@ -23,20 +28,10 @@ export const QuadrantChart: React.FC<QuadrantChartProps> = ({
     selectedQuadrant,
     onCampaignClick
 }) => {
-    // Process campaign data for scatter plot
+    // Process campaign data for scatter plot（汇总立方体按 Campaign 查询）
     const chartData = useMemo(() => {
-        const campaignMap = new Map<string, RawAdRecord[]>();
-        data.forEach(record => {
-            const key = record.campaign_name;
-            if (!campaignMap.has(key)) campaignMap.set(key, []);
-            campaignMap.get(key)!.push(record);
-        });
-
-        return Array.from(campaignMap.entries()).map(([name, records]) => {
-            const spend = records.reduce((sum, r) => sum + r.spend, 0);
-            const revenue = records.reduce((sum, r) => sum + r.purchase_value, 0);
-            const clicks = records.reduce((sum, r) => sum + r.link_clicks, 0);
-            const impressions = records.reduce((sum, r) => sum + r.impressions, 0);
+        return queryRollup(data, { level: 'Campaign' }, config).map(({ campaign_name: name, totals }) => {
+            const { spend, purchase_value: revenue, link_clicks: clicks, impressions } = totals;
 
             let kpiValue = 0;
             if (config.targetType === 'ROI') kpiValue = spend > 0 ? revenue / spend : 0;
@@ -54,16 +49,6 @@ export const QuadrantChart: React.FC<QuadrantChartProps> = ({
         });
     }, [data, config, thresholds]);
 
-    const getQuadrantColor = (type: QuadrantType) => {
-        switch (type) {
-            case 'excellent': return '#10b981'; // Green
-            case 'potential': return '#3b82f6'; // Blue
-            case 'watch': return '#f59e0b';     // Yellow
-            case 'problem': return '#ef4444';    // Red
-            default: return '#94a3b8';
-        }
-    };
-
     const quadrantSummary = useMemo(() => {
         const counts = {
             excellent: 0,
@@ -77,6 +62,20 @@ export const QuadrantChart: React.FC<QuadrantChartProps> = ({
         return counts;
     }, [chartData]);
 
+    // 滑块范围（循环求最大值，点数很多时不能展开为参数）
+    const { maxSpend, maxKpi, totalSpend } = useMemo(() => {
+        let spendMax = -Infinity;
+        let kpiMax = 0;
+        let spendSum = 0;
+        chartData.forEach(item => {
+            if (item.spend > spendMax) spendMax = item.spend;
+            if (item.kpiValue > kpiMax) kpiMax = item.kpiValue;
+            spendSum += item.spend;
+        });
+        return { maxSpend: spendMax, maxKpi: kpiMax, totalSpend: spendSum };
+    }, [chartData]);
+    const kpiSliderMax = Math.max(config.targetType === 'ROI' ? maxKpi * 1.5 : maxKpi * 2, config.targetType === 'ROI' ? 10 : 1);
+
     const CustomTooltip = ({ active, payload }: any) => {
         if (active && payload && payload.length) {
             const item = payload[0].payload;
@@ -114,6 +113,14 @@ export const QuadrantChart: React.FC<QuadrantChartProps> = ({
 
                 {/* Chart Container - Fill remaining space */}
                 <div className="flex-1 w-full min-h-0">
+                    {chartData.length > CANVAS_POINT_THRESHOLD ? (
+                        <QuadrantCanvas
+                            points={chartData}
+                            thresholds={thresholds}
+                            targetType={config.targetType}
+                            onCampaignClick={onCampaignClick}
+                        />
+                    ) : (
                     <ResponsiveContainer width="100%" height="100%">
                         <ScatterChart margin={{ top: 30, right: 80, bottom: 20, left: 20 }}>
                             <CartesianGrid strokeDasharray="3 3" stroke="#f1f5f9" />
@@ -202,6 +209,7 @@ export const QuadrantChart: React.FC<QuadrantChartProps> = ({
                             </Scatter>
                         </ScatterChart>
                     </ResponsiveContainer>
+                    )}
                 </div>
             </div>
 
@@ -225,7 +233,7 @@ export const QuadrantChart: React.FC<QuadrantChartProps> = ({
                             <input
                                 type="range"
                                 min="0"
-                                max={Math.max(...chartData.map(d => d.spend)) * 1.2}
+                                max={maxSpend * 1.2}
                                 step="10"
                                 value={thresholds.spendThreshold}
                                 onChange={(e) => onThresholdsChange({ ...thresholds, spendThreshold: Number(e.target.value) })}
@@ -233,7 +241,7 @@ export const QuadrantChart: React.FC<QuadrantChartProps> = ({
                             />
                             <div className="flex justify-between text-[8px] text-slate-400 mt-0.5">
                                 <span>$0</span>
-                                <span>${Math.round(Math.max(...chartData.map(d => d.spend)) * 1.2).toLocaleString()}</span>
+                                <span>${Math.round(maxSpend * 1.2).toLocaleString()}</span>
                             </div>
                         </div>
 
@@ -252,14 +260,7 @@ export const QuadrantChart: React.FC<QuadrantChartProps> = ({
                             <input
                                 type="range"
                                 min="0"
-                                max={(() => {
-                                    const maxKpi = Math.max(...chartData.map(d => d.kpiValue), 0);
-                                    const calculatedMax = config.targetType === 'ROI'
-                                        ? maxKpi * 1.5
-                                        : maxKpi * 2;
-                                    // Ensure minimum max value
-                                    return Math.max(calculatedMax, config.targetType === 'ROI' ? 10 : 1);
-                                })()}
+                                max={kpiSliderMax}
                                 step={config.targetType === 'ROI' ? '0.1' : '0.01'}
                                 value={thresholds.kpiThreshold}
                                 onChange={(e) => onThresholdsChange({ ...thresholds, kpiThreshold: Number(e.target.value) })}
@@ -267,20 +268,14 @@ export const QuadrantChart: React.FC<QuadrantChartProps> = ({
                             />
                             <div className="flex justify-between text-[8px] text-slate-400 mt-0.5">
                                 <span>0</span>
-                                <span>{(() => {
-                                    const maxKpi = Math.max(...chartData.map(d => d.kpiValue), 0);
-                                    const calculatedMax = config.targetType === 'ROI'
-                                        ? maxKpi * 1.5
-                                        : maxKpi * 2;
-                                    return Math.max(calculatedMax, config.targetType === 'ROI' ? 10 : 1).toFixed(2);
-                                })()}</span>
+                                <span>{kpiSliderMax.toFixed(2)}</span>
                             </div>
                         </div>
 
                         {/* Reset Button */}
                         <button
                             onClick={() => onThresholdsChange({
-                                spendThreshold: chartData.reduce((sum, item) => sum + item.spend, 0) / (chartData.length || 1),
+                                spendThreshold: totalSpend / (chartData.length || 1),
                                 kpiThreshold: config.targetValue
                             })}
                             className="w-full py-1 text-[9px] font-black text-indigo-600 bg-indigo-50 hover:bg-indigo-100 rounded transition-colors border border-indigo-100"
@@ -2,7 +2,7 @@
 // 使用 React Context 在全局提供配置数据
 
 import React, { createContext, useContext, useState, useEffect, ReactNode, useCallback } from 'react';
-import { loadAppConfig, AppConfig, clearConfigCache, getDefaultConfig } from '../services/googleSheetConfigService';
+import { loadAppConfig, AppConfig, getDefaultConfig } from '../services/googleSheetConfigService';
 
 interface ConfigContextType {
     config: AppConfig | null;
@@ -23,7 +23,7 @@ export const ConfigProvider: React.FC<{ children: ReactNode }> = ({ children })
         setError(null);
 
         try {
-            clearConfigCache();
+            // 强制向服务器重新验证（条件请求，未变化的工作表沿用缓存）
             const newConfig = await loadAppConfig(true);
             setConfig(newConfig);
         } catch (err: any) {
@@ -37,7 +37,8 @@ export const ConfigProvider: React.FC<{ children: ReactNode }> = ({ children })
     }, []);
 
     useEffect(() => {
-        loadAppConfig()
+        // 有缓存时立即返回缓存，后台验证到变化时再更新
+        loadAppConfig(false, setConfig)
             .then(setConfig)
             .catch(err => {
                 console.error('Initial config load error:', err);
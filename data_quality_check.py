@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+导出数据质量检查（漏斗不变量）
+
+在 analyze_excel.py 的 Landing Page Views > Link Clicks 检查基础上扩展为一组规则，
+每个文件/工作表只做一次向量化扫描，返回每条规则的命中数和命中行号。
+工作簿中的多个工作表并行检查，可作为夜间导入前的数据闸门。
+
+用法:
+    python data_quality_check.py <导出文件路径> [--workers N] [--strict]
+
+--strict: 任一规则有命中时以退出码 2 结束
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ad_data_loader import ALL_ALIASES, load_ad_data, normalize_records
+from hierarchy_kernel import factorize_hierarchy
+from workbook_reader import read_sheet, sheet_names
+
+# 规则目录：(规则 ID, 说明)
+RULES = (
+    ('lpv_gt_clicks', 'Landing Page Views > Link Clicks'),
+    ('clicks_gt_impressions', 'Link Clicks > Impressions'),
+    ('checkouts_gt_atc', 'Checkouts Initiated > Adds to Cart'),
+    ('purchases_gt_checkouts', 'Purchases > Checkouts Initiated'),
+    ('reach_gt_impressions', 'Reach > Impressions'),
+    ('spend_without_impressions', 'Spend > 0 但 Impressions = 0'),
+    ('duplicate_keys', '重复的 (Day, Campaign, AdSet, Ad) 记录'),
+)
+
+RULE_DESCRIPTIONS = dict(RULES)
+
+
+def _duplicate_mask(df):
+    """同一 Ad（按 Campaign/AdSet/Ad 组合）同一天出现多行时全部标记"""
+    row_codes, _, _ = factorize_hierarchy(df)
+    days = df['date'].values.astype('datetime64[D]').astype(np.int64)
+    key = pd.Series(row_codes['ad'].astype(np.int64)).to_frame('ad')
+    key['day'] = days
+    return key.duplicated(keep=False).to_numpy()
+
+
+def evaluate_rules(df):
+    """对一个列式数据集执行全部规则，返回 {规则 ID: 布尔掩码}"""
+    spend = df['spend'].to_numpy()
+    impressions = df['impressions'].to_numpy()
+    clicks = df['link_clicks'].to_numpy()
+    lpv = df['landing_page_views'].to_numpy()
+    atc = df['adds_to_cart'].to_numpy()
+    checkouts = df['checkouts_initiated'].to_numpy()
+    purchases = df['purchases'].to_numpy()
+    reach = df['reach'].to_numpy()
+
+    return {
+        # 与 analyze_excel.py 一致：只在有点击时判断
+        'lpv_gt_clicks': (clicks > 0) & (lpv > clicks),
+        'clicks_gt_impressions': clicks > impressions,
+        'checkouts_gt_atc': checkouts > atc,
+        'purchases_gt_checkouts': purchases > checkouts,
+        # 没有 Reach 列时全部为 0，不会误报
+        'reach_gt_impressions': reach > impressions,
+        'spend_without_impressions': (spend > 0) & (impressions == 0),
+        'duplicate_keys': _duplicate_mask(df),
+    }
+
+
+def scan_dataframe(df):
+    """
+    扫描一个数据集
+
+    返回 {'rows': 总行数, 'rules': {规则 ID: {'description', 'count', 'rows'}}}
+    rows 为命中行在数据集中的位置（0 起）。
+    """
+    masks = evaluate_rules(df)
+    rules = {}
+    for rule_id, _ in RULES:
+        hits = np.flatnonzero(masks[rule_id])
+        rules[rule_id] = {
+            'description': RULE_DESCRIPTIONS[rule_id],
+            'count': int(len(hits)),
+            'rows': hits,
+        }
+    return {'rows': len(df), 'rules': rules}
+
+
+def _scan_sheet(path, sheet_name):
+    """进程池任务：读取并检查单个工作表"""
+    raw = read_sheet(path, sheet_name)
+    try:
+        df = normalize_records(raw[[c for c in raw.columns if c in ALL_ALIASES]])
+    except ValueError as e:
+        return sheet_name, {'rows': 0, 'rules': {}, 'error': str(e)}
+    return sheet_name, scan_dataframe(df)
+
+
+def scan_file(path, workers=None):
+    """
+    检查 CSV 或工作簿中的所有工作表
+
+    返回 {工作表名: 报告}；CSV 只有一个名为 'csv' 的条目。
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        return {'csv': scan_dataframe(load_ad_data(path))}
+
+    names = sheet_names(path)
+    if len(names) == 1:
+        return dict([_scan_sheet(path, names[0])])
+
+    reports = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_scan_sheet, path, name) for name in names]
+        for future in futures:
+            name, report = future.result()
+            reports[name] = report
+    return reports
+
+
+def print_report(reports, sample=5):
+    total_hits = 0
+    for sheet_name, report in reports.items():
+        print(f"\n## {sheet_name} ({report['rows']} rows)")
+        if 'error' in report:
+            print(f"  ❌ {report['error']}")
+            continue
+        for rule_id, result in report['rules'].items():
+            count = result['count']
+            total_hits += count
+            if count == 0:
+                print(f"  ✅ {result['description']}")
+            else:
+                preview = ', '.join(str(i) for i in result['rows'][:sample])
+                more = ' ...' if count > sample else ''
+                print(f"  ⚠️ {result['description']}: {count} rows (e.g. {preview}{more})")
+    return total_hits
+
+
+if __name__ == '__main__':
+    import time
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    file_path = sys.argv[1]
+    args = sys.argv[2:]
+    workers = int(args[args.index('--workers') + 1]) if '--workers' in args else None
+
+    try:
+        start = time.perf_counter()
+        reports = scan_file(file_path, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        hits = print_report(reports)
+        print(f'\n⏱️ Scanned {len(reports)} sheet(s) in {elapsed:.2f}s')
+
+        if hits > 0 and '--strict' in args:
+            sys.exit(2)
+    except Exception as e:
+        print(f'Error: {e}')
+        sys.exit(1)
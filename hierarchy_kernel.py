@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Campaign / AdSet / Ad 三级聚合内核（向量化、单次扫描）
+
+- 名称字段字典编码为整数，AdSet 按 (Campaign, AdSet)、Ad 按 (Campaign, AdSet, Ad) 组合编码，
+  与 DrillDownTable / generateActionItems 的分组键一致
+- 只对原始行做一次分段求和（np.bincount），上层级由下层级的结果汇总得到
+- 派生指标公式与 utils/dataUtils.ts 的 calculateMetrics 一致（比率为小数格式）
+
+其他报表统一基于 aggregate_hierarchy 的结果构建，不再各自按名称分组。
+
+用法:
+    python hierarchy_kernel.py <导出文件路径> [--by-day]
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+# 需要求和的原始计数字段（frequency 为比率，由 impressions / reach 重新计算）
+COUNTER_FIELDS = (
+    'spend', 'impressions', 'link_clicks', 'purchases', 'purchase_value',
+    'adds_to_cart', 'checkouts_initiated', 'landing_page_views', 'reach',
+)
+
+LEVELS = ('campaign', 'adset', 'ad')
+
+
+def _safe_div(num, den, scale=1.0):
+    """分母为 0 时返回 0（对应 TS 中的 x > 0 ? a / x : 0）"""
+    out = np.zeros(np.broadcast(num, den).shape, dtype=np.float64)
+    np.divide(num * scale, den, out=out, where=den > 0)
+    return out
+
+
+def derive_metrics(sums):
+    """由计数总和推导全部比率指标，sums 为 {字段: ndarray}"""
+    spend = sums['spend']
+    impressions = sums['impressions']
+    clicks = sums['link_clicks']
+    purchases = sums['purchases']
+    value = sums['purchase_value']
+    atc = sums['adds_to_cart']
+    checkouts = sums['checkouts_initiated']
+    lpv = sums['landing_page_views']
+    reach = sums['reach']
+
+    return {
+        'roi': _safe_div(value, spend),
+        'cpa': _safe_div(spend, purchases),
+        'cpc': _safe_div(spend, clicks),
+        'ctr': _safe_div(clicks, impressions),
+        'cpm': _safe_div(spend, impressions, 1000.0),
+        'cpatc': _safe_div(spend, atc),
+        'atc_rate': _safe_div(atc, clicks),
+        'acos': _safe_div(spend, value, 100.0),
+        'cvr': _safe_div(purchases, clicks),
+        'aov': _safe_div(value, purchases),
+        'click_to_pv_rate': _safe_div(lpv, clicks),
+        'checkout_rate': _safe_div(checkouts, atc),
+        'purchase_rate': _safe_div(purchases, checkouts),
+        'frequency': _safe_div(impressions, reach),
+    }
+
+
+def _name_codes(col):
+    """名称列 -> (整数编码, 名称表)；已是 category 时直接复用编码"""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return col.cat.codes.to_numpy(dtype=np.int64), col.cat.categories
+    codes, uniques = pd.factorize(col)
+    return codes.astype(np.int64), pd.Index(uniques)
+
+
+def factorize_hierarchy(df):
+    """
+    为每行生成三个层级的实体编码
+
+    返回:
+        row_codes: {'campaign': ndarray, 'adset': ndarray, 'ad': ndarray}，每行所属实体
+        entities:  各层级实体的名称编码及父级编码
+        names:     {'campaign_name': Index, 'adset_name': Index, 'ad_name': Index}
+    """
+    c_names_codes, c_names = _name_codes(df['campaign_name'])
+    s_names_codes, s_names = _name_codes(df['adset_name'])
+    a_names_codes, a_names = _name_codes(df['ad_name'])
+
+    campaign_codes, campaign_uniques = pd.factorize(c_names_codes)
+
+    adset_key = campaign_codes.astype(np.int64) * max(len(s_names), 1) + s_names_codes
+    adset_codes, adset_uniques = pd.factorize(adset_key)
+
+    ad_key = adset_codes.astype(np.int64) * max(len(a_names), 1) + a_names_codes
+    ad_codes, ad_uniques = pd.factorize(ad_key)
+
+    adset_parent = adset_uniques // max(len(s_names), 1)
+    ad_parent = ad_uniques // max(len(a_names), 1)
+
+    entities = {
+        'campaign': {
+            'campaign_name': campaign_uniques,
+        },
+        'adset': {
+            'parent': adset_parent,
+            'campaign_name': campaign_uniques[adset_parent],
+            'adset_name': adset_uniques % max(len(s_names), 1),
+        },
+        'ad': {
+            'parent': ad_parent,
+            'campaign_name': campaign_uniques[adset_parent[ad_parent]],
+            'adset_name': (adset_uniques % max(len(s_names), 1))[ad_parent],
+            'ad_name': ad_uniques % max(len(a_names), 1),
+        },
+    }
+    row_codes = {'campaign': campaign_codes, 'adset': adset_codes, 'ad': ad_codes}
+    names = {'campaign_name': c_names, 'adset_name': s_names, 'ad_name': a_names}
+    return row_codes, entities, names
+
+
+def counter_values(df):
+    """各计数字段的 float64 列（缺失的列按 0）"""
+    return {
+        field: (df[field].to_numpy(dtype=np.float64) if field in df.columns
+                else np.zeros(len(df), dtype=np.float64))
+        for field in COUNTER_FIELDS
+    }
+
+
+def segment_sums(codes, n, values):
+    """按编码分段求和：{字段: ndarray(n)}"""
+    return {
+        field: np.bincount(codes, weights=column, minlength=n)
+        for field, column in values.items()
+    }
+
+
+def _rollup(sums, parent, n_parent):
+    """把下层级的总和汇总到父层级（只扫描实体，不扫描原始行）"""
+    return segment_sums(parent, n_parent, sums)
+
+
+def _level_frame(entity, names, sums):
+    columns = {}
+    for field in ('campaign_name', 'adset_name', 'ad_name'):
+        if field in entity:
+            columns[field] = pd.Categorical.from_codes(entity[field], categories=names[field])
+    columns.update(sums)
+    columns.update(derive_metrics(sums))
+    return pd.DataFrame(columns)
+
+
+def aggregate_hierarchy(df, by_day=False):
+    """
+    一次扫描计算三个层级的计数总和与派生指标
+
+    df 为 ad_data_loader.load_ad_data 的结果（或包含相同列的 DataFrame）。
+    by_day=True 时额外返回 Ad × 日期 粒度的结果，三个层级由其汇总得到。
+
+    返回 {'campaign': DataFrame, 'adset': DataFrame, 'ad': DataFrame,
+          'ad_day': DataFrame | None, 'row_codes': {...}, 'entities': {...}}
+    （row_codes / entities 与 factorize_hierarchy 相同，各层级 DataFrame 的行顺序即实体编码）
+    """
+    row_codes, entities, names = factorize_hierarchy(df)
+    n_campaigns = len(entities['campaign']['campaign_name'])
+    n_adsets = len(entities['adset']['parent'])
+    n_ads = len(entities['ad']['parent'])
+
+    values = counter_values(df)
+
+    ad_day = None
+    if by_day:
+        dates = df['date'].values.astype('datetime64[D]')
+        valid = ~np.isnat(dates)
+        days = dates.astype(np.int64)
+        first_day = int(days[valid].min()) if valid.any() else 0
+        # 最后一个槽位留给无效日期，保证层级总和不丢行
+        n_slots = int(days[valid].max()) - first_day + 2 if valid.any() else 1
+        day_idx = np.where(valid, days - first_day, n_slots - 1)
+
+        cell_key = row_codes['ad'].astype(np.int64) * n_slots + day_idx
+        cell_codes, cell_uniques = pd.factorize(cell_key)
+        cell_sums = segment_sums(cell_codes, len(cell_uniques), values)
+
+        cell_ad = cell_uniques // n_slots
+        cell_day = cell_uniques % n_slots
+        cell_dates = np.where(
+            cell_day == n_slots - 1,
+            np.datetime64('NaT', 'D'),
+            (first_day + cell_day).astype('datetime64[D]'),
+        )
+
+        ad_sums = _rollup(cell_sums, cell_ad, n_ads)
+
+        ad_entity = entities['ad']
+        ad_day_entity = {field: ad_entity[field][cell_ad]
+                         for field in ('campaign_name', 'adset_name', 'ad_name')}
+        ad_day = _level_frame(ad_day_entity, names, cell_sums)
+        ad_day.insert(3, 'date', cell_dates)
+        ad_day.insert(0, 'ad_code', cell_ad)
+    else:
+        ad_sums = segment_sums(row_codes['ad'], n_ads, values)
+
+    adset_sums = _rollup(ad_sums, entities['ad']['parent'], n_adsets)
+    campaign_sums = _rollup(adset_sums, entities['adset']['parent'], n_campaigns)
+
+    campaign_entity = {'campaign_name': entities['campaign']['campaign_name']}
+    return {
+        'campaign': _level_frame(campaign_entity, names, campaign_sums),
+        'adset': _level_frame(entities['adset'], names, adset_sums),
+        'ad': _level_frame(entities['ad'], names, ad_sums),
+        'ad_day': ad_day,
+        'row_codes': row_codes,
+        'entities': entities,
+    }
+
+
+def total_metrics(df):
+    """整体汇总（对应对全部记录调用一次 calculateMetrics）"""
+    sums = {
+        field: np.array([float(df[field].to_numpy(dtype=np.float64).sum())]) if field in df.columns
+        else np.zeros(1)
+        for field in COUNTER_FIELDS
+    }
+    metrics = derive_metrics(sums)
+    return {k: float(v[0]) for k, v in {**sums, **metrics}.items()}
+
+
+if __name__ == '__main__':
+    import time
+
+    from ad_data_loader import load_ad_data
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    try:
+        data = load_ad_data(sys.argv[1])
+        start = time.perf_counter()
+        result = aggregate_hierarchy(data, by_day='--by-day' in sys.argv[2:])
+        elapsed = time.perf_counter() - start
+
+        print(f'✅ Aggregated {len(data)} rows in {elapsed * 1000:.1f} ms')
+        for level in LEVELS:
+            print(f'  {level}: {len(result[level])} entities')
+        if result['ad_day'] is not None:
+            print(f"  ad × day: {len(result['ad_day'])} cells")
+
+        top = result['campaign'].sort_values('spend', ascending=False).head(10)
+        print(top[['campaign_name', 'spend', 'purchase_value', 'roi', 'cpc', 'ctr', 'cpm']])
+    except Exception as e:
+        print(f'Error: {e}')
+        sys.exit(1)
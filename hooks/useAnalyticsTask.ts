@@ -0,0 +1,55 @@
+import { useEffect, useState } from 'react';
+import { RawAdRecord } from '../types';
+import { runAnalyticsTask, isAbortError } from '../utils/analyticsPool';
+import { AnalyticsTask, AnalyticsTaskInputs, AnalyticsTaskResult } from '../workers/analyticsTasks';
+
+export interface AnalyticsTaskState<T> {
+    result: T | null;                                   // 最近一次完成的结果（重新计算期间保留）
+    isRunning: boolean;
+    progress: { done: number; total: number } | null;
+}
+
+/**
+ * 在 Worker 池中计算派生数据：input / datasets 变化时取消上一次计算并重新提交
+ * @param task - 任务名
+ * @param input - 任务参数（需 useMemo 保持引用稳定），null 表示不计算
+ * @param datasets - 任务用到的记录数组
+ */
+export const useAnalyticsTask = <T extends AnalyticsTask>(
+    task: T,
+    input: AnalyticsTaskInputs[T] | null,
+    datasets: RawAdRecord[][] = []
+): AnalyticsTaskState<AnalyticsTaskResult<T>> => {
+    const [state, setState] = useState<AnalyticsTaskState<AnalyticsTaskResult<T>>>({
+        result: null,
+        isRunning: false,
+        progress: null
+    });
+
+    useEffect(() => {
+        if (!input) {
+            setState({ result: null, isRunning: false, progress: null });
+            return;
+        }
+
+        const controller = new AbortController();
+        setState(prev => ({ ...prev, isRunning: true, progress: null }));
+
+        runAnalyticsTask(task, input, {
+            datasets,
+            signal: controller.signal,
+            onProgress: (done, total) => setState(prev => ({ ...prev, progress: { done, total } }))
+        }).then(result => {
+            setState({ result, isRunning: false, progress: null });
+        }).catch(err => {
+            if (isAbortError(err)) return;
+            console.error(`❌ ${task} 计算失败:`, err);
+            setState({ result: null, isRunning: false, progress: null });
+        });
+
+        return () => controller.abort();
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [task, input, ...datasets]);
+
+    return state;
+};
@@ -0,0 +1,203 @@
+import { useCallback, useEffect, useLayoutEffect, useMemo, useRef, useState } from 'react';
+
+// 表格窗口化渲染：只挂载视口附近的行，上下用等高的占位行撑开
+//
+// - 行高可变（展开的诊断面板等）：已渲染的行用 ResizeObserver 测量，按行键记住高度，未测量过的行
+//   用估算高度；排序、筛选后同一行的高度仍然有效
+// - 以页面视口为准（表格随页面滚动），滚动事件在捕获阶段监听，内层滚动容器同样生效
+// - 一个逻辑行可以由多个 <tr> 组成（如基准行的标题 + 数值），各自带 data-virtual-part，高度相加
+// - 行数少于 minItems 时全部渲染，与原先的表格一致
+
+const DEFAULT_OVERSCAN = 800;   // 视口上下额外渲染的像素
+const DEFAULT_MIN_ITEMS = 100;
+
+export interface VirtualRowsOptions<T> {
+    items: T[];
+    getKey: (item: T) => string;                // 需保持引用稳定（模块级函数或 useCallback）
+    estimateHeight: (item: T) => number;        // 同上
+    overscan?: number;
+    minItems?: number;
+}
+
+export interface VirtualRow<T> {
+    item: T;
+    key: string;
+    index: number;
+}
+
+export interface VirtualRowsState<T> {
+    containerRef: (el: HTMLElement | null) => void;     // 挂在 tbody 上
+    measureRef: (el: HTMLElement | null) => void;       // 挂在每个渲染的 <tr> 上（需带 data-virtual-key）
+    rows: VirtualRow<T>[];
+    paddingTop: number;
+    paddingBottom: number;
+    scrollToKey: (key: string) => boolean;              // 滚动到指定行（行不在列表中时返回 false）
+}
+
+interface Range {
+    start: number;
+    end: number;        // 不含
+}
+
+// 第一个底边 > y 的行
+const findIndex = (offsets: Float64Array, count: number, y: number): number => {
+    let low = 0;
+    let high = count;
+    while (low < high) {
+        const mid = (low + high) >> 1;
+        if (offsets[mid + 1] > y) high = mid;
+        else low = mid + 1;
+    }
+    return low;
+};
+
+const viewportHeight = () => (typeof window === 'undefined' ? 1000 : window.innerHeight);
+
+/**
+ * 窗口化表格行
+ * @param options - items 行数据；getKey 行键；estimateHeight 未测量行的估算高度
+ */
+export const useVirtualRows = <T>(options: VirtualRowsOptions<T>): VirtualRowsState<T> => {
+    const { items, getKey, estimateHeight, overscan = DEFAULT_OVERSCAN, minItems = DEFAULT_MIN_ITEMS } = options;
+    const enabled = items.length >= minItems;
+
+    const containerElRef = useRef<HTMLElement | null>(null);
+    const heightsRef = useRef(new Map<string, number>());                   // 行键 -> 高度
+    const partsRef = useRef(new Map<string, Record<string, number>>());     // 行键 -> 各部分高度
+    const [measureVersion, setMeasureVersion] = useState(0);
+
+    // 各行键与累计偏移（offsets[i] 为第 i 行顶部）
+    const layout = useMemo(() => {
+        const keys = new Array<string>(items.length);
+        const offsets = new Float64Array(items.length + 1);
+        const heights = heightsRef.current;
+        for (let i = 0; i < items.length; i++) {
+            const key = getKey(items[i]);
+            keys[i] = key;
+            offsets[i + 1] = offsets[i] + (heights.get(key) ?? estimateHeight(items[i]));
+        }
+        return { keys, offsets };
+        // eslint-disable-next-line react-hooks/exhaustive-deps
+    }, [items, getKey, estimateHeight, measureVersion]);
+    const layoutRef = useRef(layout);
+    layoutRef.current = layout;
+
+    const computeRange = useCallback((): Range => {
+        const { offsets, keys } = layoutRef.current;
+        const count = keys.length;
+        const el = containerElRef.current;
+        const top = el ? -el.getBoundingClientRect().top : 0;
+        const start = findIndex(offsets, count, Math.max(0, top - overscan));
+        const end = Math.min(count, findIndex(offsets, count, top + viewportHeight() + overscan) + 1);
+        return { start, end: Math.max(start, end) };
+    }, [overscan]);
+
+    const [range, setRange] = useState<Range>(() => ({ start: 0, end: 0 }));
+
+    const update = useCallback(() => {
+        const next = computeRange();
+        setRange(prev => (prev.start === next.start && prev.end === next.end ? prev : next));
+    }, [computeRange]);
+
+    // 布局变化（数据、筛选、排序、测量结果）后重新计算范围
+    useLayoutEffect(() => {
+        if (enabled) update();
+    }, [enabled, layout, update]);
+
+    // 滚动 / 窗口大小变化：每帧最多计算一次
+    useEffect(() => {
+        if (!enabled || typeof window === 'undefined') return;
+        let frame = 0;
+        const onScroll = () => {
+            if (frame) return;
+            frame = requestAnimationFrame(() => {
+                frame = 0;
+                update();
+            });
+        };
+        window.addEventListener('scroll', onScroll, { capture: true, passive: true });
+        window.addEventListener('resize', onScroll);
+        return () => {
+            window.removeEventListener('scroll', onScroll, { capture: true });
+            window.removeEventListener('resize', onScroll);
+            if (frame) cancelAnimationFrame(frame);
+        };
+    }, [enabled, update]);
+
+    // 测量已渲染的行；离开 DOM 的行停止观察
+    const observerRef = useRef<ResizeObserver | null>(null);
+    useEffect(() => () => observerRef.current?.disconnect(), []);
+
+    const recordHeight = useCallback((el: HTMLElement): boolean => {
+        const key = el.dataset.virtualKey;
+        if (!key) return false;
+        const part = el.dataset.virtualPart || '';
+        const height = el.getBoundingClientRect().height;
+        let parts = partsRef.current.get(key);
+        if (!parts) {
+            parts = {};
+            partsRef.current.set(key, parts);
+        }
+        if (height <= 0 || Math.abs((parts[part] ?? -1) - height) < 0.5) return false;
+        parts[part] = height;
+        let total = 0;
+        for (const name in parts) total += parts[name];
+        heightsRef.current.set(key, total);
+        return true;
+    }, []);
+
+    const measureRef = useCallback((el: HTMLElement | null) => {
+        if (!el) return;
+        if (typeof ResizeObserver === 'undefined') {
+            if (recordHeight(el)) setMeasureVersion(v => v + 1);
+            return;
+        }
+        if (!observerRef.current) {
+            observerRef.current = new ResizeObserver(entries => {
+                let changed = false;
+                entries.forEach(entry => {
+                    const target = entry.target as HTMLElement;
+                    if (!target.isConnected) {
+                        observerRef.current?.unobserve(target);
+                        return;
+                    }
+                    if (recordHeight(target)) changed = true;
+                });
+                if (changed) setMeasureVersion(v => v + 1);
+            });
+        }
+        observerRef.current.observe(el);
+    }, [recordHeight]);
+
+    const containerRef = useCallback((el: HTMLElement | null) => {
+        containerElRef.current = el;
+    }, []);
+
+    const scrollToKey = useCallback((key: string): boolean => {
+        const { keys, offsets } = layoutRef.current;
+        const index = keys.indexOf(key);
+        const el = containerElRef.current;
+        if (index < 0 || !el) return false;
+        const rowHeight = offsets[index + 1] - offsets[index];
+        const top = window.scrollY + el.getBoundingClientRect().top + offsets[index] - (viewportHeight() - rowHeight) / 2;
+        window.scrollTo({ top: Math.max(0, top), behavior: 'smooth' });
+        return true;
+    }, []);
+
+    const start = enabled ? range.start : 0;
+    const end = enabled ? Math.min(range.end, items.length) : items.length;
+    const rows = useMemo(() => {
+        const visible: VirtualRow<T>[] = [];
+        for (let i = start; i < end; i++) visible.push({ item: items[i], key: layout.keys[i], index: i });
+        return visible;
+    }, [items, layout, start, end]);
+
+    return {
+        containerRef,
+        measureRef,
+        rows,
+        paddingTop: enabled ? layout.offsets[start] : 0,
+        paddingBottom: enabled ? layout.offsets[items.length] - layout.offsets[end] : 0,
+        scrollToKey
+    };
+};
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+调优规则库（OPTIMIZATION_RULES）的 Python 版决策表
+
+规则直接读取 utils/optimizationRules.json（utils/optimizationRules.ts 导入同一份文件），不在 Python 中重复维护；
+编译方式与 TS 端 getOptimizationGuidance / getOptimizationGuidanceBatch 一致：
+- 按 (level, kpi) 筛选规则并按 priority 稳定排序
+- 每个实体的各指标偏差只计算一次（实体 × 指标 矩阵），ROI <= 0 且均值 > 0 时视为 -100%
+- 按优先级取第一条命中的规则，无命中时为「✅ 表现正常」
+
+用法:
+    python optimization_rules.py            # 打印各 (level, kpi) 的规则数量
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+RULES_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'utils', 'optimizationRules.json')
+
+NO_MATCH_GUIDANCE = '✅ 表现正常'
+
+_RULE_LEVELS = ('Campaign', 'AdSet', 'Ad')
+_RULE_KPIS = ('ROI', 'CPC', 'CPM')
+_RULE_OPERATORS = ('>', '<', '>=', '<=', '==')
+
+
+def _validate_rules(rules, path):
+    """检查规则结构（与 TS 中 OptimizationRule 一致），不符合时直接报错"""
+    if not isinstance(rules, list) or not rules:
+        raise ValueError(f'{path}: expected a non-empty list of rules')
+    seen = set()
+    for i, rule in enumerate(rules):
+        where = f'{path}: rule #{i} ({rule.get("id") if isinstance(rule, dict) else rule!r})'
+        if not isinstance(rule, dict):
+            raise ValueError(f'{where}: expected an object')
+        missing = {'id', 'kpi', 'level', 'scenario', 'priority', 'conditions', 'guidance'} - rule.keys()
+        if missing:
+            raise ValueError(f'{where}: missing fields {sorted(missing)}')
+        if rule['id'] in seen:
+            raise ValueError(f'{where}: duplicate id')
+        seen.add(rule['id'])
+        if rule['level'] not in _RULE_LEVELS or rule['kpi'] not in _RULE_KPIS:
+            raise ValueError(f'{where}: unknown level/kpi {rule["level"]!r}/{rule["kpi"]!r}')
+        if not isinstance(rule['priority'], (int, float)) or not isinstance(rule['guidance'], str):
+            raise ValueError(f'{where}: priority must be a number and guidance a string')
+        if not isinstance(rule['conditions'], list) or not rule['conditions']:
+            raise ValueError(f'{where}: conditions must be a non-empty list')
+        for cond in rule['conditions']:
+            if (not isinstance(cond, dict) or not isinstance(cond.get('metric'), str)
+                    or cond.get('operator') not in _RULE_OPERATORS
+                    or not isinstance(cond.get('threshold'), (int, float))):
+                raise ValueError(f'{where}: invalid condition {cond!r}')
+    return rules
+
+
+def load_rules(path=RULES_SOURCE):
+    """读取 optimizationRules.json 中的规则（与 TS 端共用同一份数据）"""
+    with open(path, encoding='utf-8') as f:
+        return _validate_rules(json.load(f), path)
+
+
+_OPERATORS = {
+    '>': np.greater,
+    '<': np.less,
+    '>=': np.greater_equal,
+    '<=': np.less_equal,
+}
+
+
+def _or_zero(values, n):
+    """缺失值（None / NaN）按 0 处理"""
+    arr = np.broadcast_to(np.asarray(values, dtype=np.float64), (n,))
+    return np.where(np.isnan(arr), 0.0, arr)
+
+
+class DecisionTable:
+    """单个 (level, kpi) 的规则表"""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.metrics = []
+        for rule in rules:
+            for cond in rule['conditions']:
+                if cond['metric'] not in self.metrics:
+                    self.metrics.append(cond['metric'])
+
+    def deviations(self, metrics, benchmarks):
+        """
+        计算 实体 × 指标 的偏差矩阵
+
+        metrics / benchmarks 为 {指标: ndarray}，缺失的指标按 0 处理（对应 TS 中的 `|| 0`）
+        """
+        n = len(next(iter(metrics.values()))) if metrics else 0
+        out = np.zeros((n, len(self.metrics)), dtype=np.float64)
+        for m, metric in enumerate(self.metrics):
+            actual = _or_zero(metrics.get(metric, np.zeros(n)), n)
+            bench = _or_zero(benchmarks.get(metric, 0.0), n)
+            dev = np.zeros(n, dtype=np.float64)
+            np.divide((actual - bench) * 100.0, bench, out=dev, where=bench != 0)
+            if metric == 'roi':
+                # ROI为0或负数时，视为-100%偏差
+                dev = np.where((actual <= 0) & (bench > 0), -100.0, dev)
+            out[:, m] = dev
+        return out
+
+    def first_match(self, deviations):
+        """返回每个实体第一条命中规则的下标（无命中为 -1）"""
+        n = deviations.shape[0]
+        matched = np.full(n, -1, dtype=np.int32)
+        pending = np.ones(n, dtype=bool)
+
+        for r, rule in enumerate(self.rules):
+            if not pending.any():
+                break
+            hit = pending.copy()
+            for cond in rule['conditions']:
+                column = deviations[:, self.metrics.index(cond['metric'])]
+                op = cond['operator']
+                if op == '==':
+                    hit &= np.abs(column - cond['threshold']) < 0.1
+                elif op in _OPERATORS:
+                    hit &= _OPERATORS[op](column, cond['threshold'])
+                else:
+                    hit[:] = False
+            matched[hit] = r
+            pending &= ~hit
+        return matched
+
+    def guidance(self, metrics, benchmarks):
+        matched = self.first_match(self.deviations(metrics, benchmarks))
+        texts = np.array([rule['guidance'] for rule in self.rules] + [NO_MATCH_GUIDANCE], dtype=object)
+        return texts[matched]
+
+
+_TABLES = {}
+_RULES = None
+
+
+def get_decision_table(level, kpi):
+    global _RULES
+    key = (level, kpi)
+    if key not in _TABLES:
+        if _RULES is None:
+            _RULES = load_rules()
+        rules = [r for r in _RULES if r['level'] == level and r['kpi'] == kpi]
+        rules.sort(key=lambda r: r['priority'])
+        _TABLES[key] = DecisionTable(rules)
+    return _TABLES[key]
+
+
+def guidance_batch(level, kpi, metrics, benchmarks):
+    """批量计算调优建议，返回与实体顺序一致的字符串数组"""
+    return get_decision_table(level, kpi).guidance(metrics, benchmarks)
+
+
+if __name__ == '__main__':
+    try:
+        rules = load_rules()
+        print(f'✅ Loaded {len(rules)} rules from {RULES_SOURCE}')
+        for level in ('Campaign', 'AdSet', 'Ad'):
+            for kpi in ('ROI', 'CPC', 'CPM'):
+                table = get_decision_table(level, kpi)
+                print(f'  {level:<8} {kpi}: {len(table.rules)} rules, {len(table.metrics)} metrics')
+    except Exception as e:
+        print(f'Error: {e}')
+        sys.exit(1)
@@ -0,0 +1,395 @@
+// 分阶段性能基准测试
+//
+// 对一个导出文件（通常由 synthetic_dataset.py 生成）按 App 的处理顺序逐阶段计时：
+// 解析 -> 按天分区 -> 汇总立方体 -> 日期筛选 -> 层级分类 -> calculateLayerBenchmarks -> 业务线阈值 -> generateActionItems
+// -> diagnoseAllScenarios -> getOptimizationGuidance -> aggregateAndDiagnoseAds
+// 结果写入 JSON 文件，可与上一个版本的结果对比（--baseline），超出容差时以非 0 退出码结束。
+//
+// 用法:
+//   npm run bench -- <导出文件.csv> [--runs N] [--window 天数] [--configs 业务线配置.json]
+//                    [--out 结果.json] [--baseline 旧结果.json] [--tolerance 0.2] [--verbose]
+//
+// 默认屏蔽各阶段内部的 console 输出（--verbose 保留），计时只包含计算本身。
+
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import Papa from 'papaparse';
+import { RawAdRecord, AdConfiguration, DEFAULT_LAYER_CONFIG } from '../types';
+import { processRawData } from '../utils/recordParser';
+import { filterByDateRange, classifyCampaign, getDatePartition } from '../utils/dataUtils';
+import { calculateLayerBenchmarks } from '../utils/benchmarkService';
+import { calculateBenchmarks } from '../utils/benchmarkCalculator';
+import { calculateDefaultThresholds, QuadrantThresholds } from '../utils/quadrantUtils';
+import { getMembershipIndex } from '../utils/ruleEngine';
+import { getRollupCube } from '../utils/rollupCube';
+import { generateActionItems, ActionItemsResult, ActionCampaign, ActionAdSet, ActionAd } from '../utils/actionItemsUtils';
+import { diagnoseAllScenarios, CampaignContext } from '../utils/campaignDiagnostics';
+import { getOptimizationGuidance, CampaignMetrics } from '../utils/optimizationRules';
+import { aggregateAndDiagnoseAds } from '../utils/aiSummaryUtils';
+import { getInstrumentationReport, StageStats } from '../utils/instrumentation';
+
+// 结果文件格式版本：字段变化时递增
+const RESULT_VERSION = 1;
+
+// 默认业务线配置（按样本 Campaign 命名规则覆盖三种 KPI）
+const DEFAULT_BENCH_CONFIGS: AdConfiguration[] = [
+    {
+        id: 'bench-all-products', name: 'All Products', level: 'Campaign', budget: 50000,
+        targetType: 'ROI', targetValue: 2,
+        rules: [{ field: 'campaign_name', operator: 'contains', value: 'All_Products' }]
+    },
+    {
+        id: 'bench-cv', name: 'Conversion', level: 'Campaign', budget: 100000,
+        targetType: 'ROI', targetValue: 1.5,
+        rules: [{ field: 'campaign_name', operator: 'contains', value: '-CV-' }]
+    },
+    {
+        id: 'bench-brand', name: 'Brand', level: 'Campaign', budget: 20000,
+        targetType: 'ROI', targetValue: 1,
+        rules: [{ field: 'campaign_name', operator: 'contains', value: 'Brand' }]
+    },
+    {
+        id: 'bench-tr', name: 'Traffic', level: 'Campaign', budget: 30000,
+        targetType: 'CPC', targetValue: 0.8,
+        rules: [{ field: 'campaign_name', operator: 'contains', value: '-TR-' }]
+    },
+    {
+        id: 'bench-aw', name: 'Awareness', level: 'Campaign', budget: 10000,
+        targetType: 'CPM', targetValue: 10,
+        rules: [{ field: 'campaign_name', operator: 'contains', value: '-AW-' }],
+        rulesLogic: 'OR'
+    }
+];
+
+interface StageResult {
+    name: string;
+    ms: number;          // 多次运行的中位数
+    samples: number[];   // 每次运行的耗时
+    items: number;       // 该阶段输出的记录 / 实体数量（最后一次运行）
+}
+
+interface BenchmarkResult {
+    version: number;
+    timestamp: string;
+    environment: { node: string; platform: string; cpus: number };
+    dataset: { file: string; bytes: number; rows: number; start: string; end: string; windowDays: number };
+    runs: number;
+    stages: StageResult[];
+    totalMs: number;
+    peakHeapMB: number;
+    instrumentation: Record<string, StageStats>;   // 被测代码内部的计数与异常统计（所有运行累计）
+}
+
+const getOption = (args: string[], name: string): string | undefined => {
+    const index = args.indexOf(name);
+    return index >= 0 ? args[index + 1] : undefined;
+};
+
+const median = (values: number[]): number => {
+    const sorted = [...values].sort((a, b) => a - b);
+    const mid = Math.floor(sorted.length / 2);
+    return sorted.length % 2 ? sorted[mid] : (sorted[mid - 1] + sorted[mid]) / 2;
+};
+
+const formatDate = (ms: number): string => {
+    const date = new Date(ms);
+    const year = date.getFullYear();
+    const month = String(date.getMonth() + 1).padStart(2, '0');
+    const day = String(date.getDate()).padStart(2, '0');
+    return `${year}-${month}-${day}`;
+};
+
+// 流式解析 CSV：与 FileUpload 相同的 Papa.parse 配置，按块调用 processRawData
+const parseFile = (file: string): Promise<RawAdRecord[]> => new Promise((resolve, reject) => {
+    const records: RawAdRecord[] = [];
+    Papa.parse(fs.createReadStream(file) as any, {
+        header: true,
+        skipEmptyLines: true,
+        chunk: (results: Papa.ParseResult<any>) => {
+            if (results.data.length === 0) return;
+            const chunk = processRawData(results.data);
+            for (let i = 0; i < chunk.length; i++) records.push(chunk[i]);
+        },
+        complete: () => resolve(records),
+        error: (err: Error) => reject(err)
+    } as any);
+});
+
+// ActionItemsTab 中构造 CampaignMetrics 的方式（实际值或业务线平均值）
+const toGuidanceMetrics = (item: ActionCampaign | ActionAdSet | ActionAd, useAverage: boolean): CampaignMetrics => {
+    const source = useAverage ? item.avgMetrics : item.metrics;
+    const kpiValue = useAverage ? item.avgValue : item.actualValue;
+    return {
+        spend: useAverage ? item.avgSpend : item.spend,
+        roi: item.kpiType === 'ROI' ? kpiValue : undefined,
+        cpc: item.kpiType === 'CPC' ? kpiValue : undefined,
+        cpm: item.kpiType === 'CPM' ? kpiValue : undefined,
+        cvr: source?.cvr,
+        aov: source?.aov,
+        cpa: source?.cpa,
+        cpatc: source?.cpatc,
+        atc_rate: source?.atc_rate,
+        ctr: source?.ctr,
+        clicks: source?.clicks,
+        impressions: source?.impressions,
+        reach: source?.reach,
+        frequency: source?.frequency,
+    };
+};
+
+// ActionItemsTab 的 campaignBenchmarks + 每个 ROI Campaign 的 diagnoseAllScenarios
+const diagnoseCampaigns = (
+    result: ActionItemsResult,
+    data: RawAdRecord[],
+    configs: AdConfiguration[],
+    activeDays: number
+): number => {
+    if (result.campaigns.length === 0) return 0;
+
+    const benchmarks = calculateBenchmarks(result.campaigns.map(c => ({
+        metrics: {
+            spend: c.spend,
+            impressions: c.metrics?.impressions || 0,
+            link_clicks: c.metrics?.clicks || 0,
+            purchases: c.metrics?.purchases || 0,
+            purchase_value: c.metrics?.purchase_value || 0,
+            adds_to_cart: c.metrics?.adds_to_cart || 0,
+            checkouts_initiated: c.metrics?.checkouts_initiated || 0,
+            roi: 0,
+            cpa: c.metrics?.cpa || 0,
+            cpc: c.metrics?.cpc || 0,
+            ctr: c.metrics?.ctr || 0,
+            cpm: c.metrics?.cpm || 0,
+            cpatc: c.metrics?.cpatc || 0,
+            atc_rate: c.metrics?.atc_rate || 0,
+            acos: 0,
+            cvr: c.metrics?.cvr || 0,
+            aov: c.metrics?.aov || 0,
+            click_to_pv_rate: c.metrics?.click_to_pv_rate || 0,
+            checkout_rate: c.metrics?.checkout_rate || 0,
+            purchase_rate: c.metrics?.purchase_rate || 0,
+            frequency: c.metrics?.frequency || 0,
+        }
+    })));
+
+    // 每个 Campaign 的 AdSet 数量（与 ActionItemsTab 的 campaignDiagnosticsData 一致，一次扫描）
+    const adsetsByCampaign = new Map<string, Set<string>>();
+    data.forEach(r => {
+        let adsets = adsetsByCampaign.get(r.campaign_name);
+        if (!adsets) adsetsByCampaign.set(r.campaign_name, adsets = new Set());
+        adsets.add(r.adset_name);
+    });
+
+    let diagnosed = 0;
+    result.campaigns.forEach(campaign => {
+        if (campaign.kpiType !== 'ROI') return;
+        const config = configs.find(c => c.id === campaign.businessLineId);
+        const dailyBudget = (config?.budget || 0) / activeDays / result.campaigns.length;
+        const context: CampaignContext = {
+            adsetCount: adsetsByCampaign.get(campaign.campaignName)?.size || 0,
+            activeDays,
+            dailyBudget,
+            campaignBudget: dailyBudget * activeDays
+        };
+        const metrics = {
+            ...toGuidanceMetrics(campaign, false),
+            click_to_pv_rate: campaign.metrics?.click_to_pv_rate || 0,
+            checkout_rate: campaign.metrics?.checkout_rate || 0,
+            purchase_rate: campaign.metrics?.purchase_rate || 0,
+            frequency: campaign.metrics?.frequency || 0,
+        } as any;
+        diagnoseAllScenarios(metrics, benchmarks, context);
+        diagnosed++;
+    });
+    return diagnosed;
+};
+
+// 所有 AdSet / Ad 及非 ROI Campaign 的调优指导
+const guideAll = (result: ActionItemsResult): number => {
+    let count = 0;
+    result.campaigns.forEach(c => {
+        if (c.kpiType === 'ROI') return;
+        getOptimizationGuidance('Campaign', c.kpiType, toGuidanceMetrics(c, false), toGuidanceMetrics(c, true));
+        count++;
+    });
+    result.adSets.forEach(a => {
+        getOptimizationGuidance('AdSet', a.kpiType, toGuidanceMetrics(a, false), toGuidanceMetrics(a, true));
+        count++;
+    });
+    result.ads.forEach(a => {
+        getOptimizationGuidance('Ad', a.kpiType, toGuidanceMetrics(a, false), toGuidanceMetrics(a, true));
+        count++;
+    });
+    return count;
+};
+
+const runOnce = async (
+    file: string,
+    configs: AdConfiguration[],
+    windowDays: number,
+    record: (name: string, ms: number, items: number) => void
+): Promise<{ rows: number; start: string; end: string }> => {
+    const layerConfig = DEFAULT_LAYER_CONFIG;
+
+    const timed = <T>(name: string, fn: () => T, count: (value: T) => number): T => {
+        const start = performance.now();
+        const value = fn();
+        record(name, performance.now() - start, count(value));
+        return value;
+    };
+
+    let start = performance.now();
+    const data = await parseFile(file);
+    record('parse', performance.now() - start, data.length);
+
+    // 日期范围：数据最后 windowDays 天，开启对比模式（与 App 默认使用方式一致）
+    let maxMs = -Infinity;
+    data.forEach(r => {
+        const ms = new Date(r.date + 'T00:00:00').getTime();
+        if (ms > maxMs) maxMs = ms;
+    });
+    const endDate = formatDate(maxMs);
+    const startDate = formatDate(maxMs - (windowDays - 1) * 24 * 60 * 60 * 1000);
+
+    // 按天分区在数据加载后构建一次（App 中首次筛选时触发），单独计时
+    timed('datePartition', () => getDatePartition(data), p => p.records.length);
+    timed('rollupCube', () => getRollupCube(data), c => c.cellCount);
+
+    const { filteredData, comparisonData } = timed(
+        'dateFilter',
+        () => filterByDateRange(data, startDate, endDate, true),
+        r => r.filteredData.length
+    );
+
+    timed('layerClassification', () => filteredData.map(r => classifyCampaign(r, layerConfig)), r => r.length);
+
+    timed('calculateLayerBenchmarks', () => calculateLayerBenchmarks(filteredData, layerConfig), () => filteredData.length);
+
+    const thresholds = timed('businessLineThresholds', () => {
+        const map = new Map<string, QuadrantThresholds>();
+        const membership = getMembershipIndex(filteredData, configs);
+        configs.forEach((config, configIndex) => {
+            if (membership.rowIds[configIndex].length > 0) map.set(config.id, calculateDefaultThresholds(filteredData, config));
+        });
+        return map;
+    }, r => r.size);
+
+    const result = timed(
+        'generateActionItems',
+        () => generateActionItems(filteredData, configs, thresholds, layerConfig, comparisonData),
+        r => r.campaigns.length + r.adSets.length + r.ads.length
+    );
+
+    timed('diagnoseAllScenarios', () => diagnoseCampaigns(result, filteredData, configs, windowDays), n => n);
+
+    timed('getOptimizationGuidance', () => guideAll(result), n => n);
+
+    timed('aggregateAndDiagnoseAds', () => aggregateAndDiagnoseAds(result.ads), r => r.length);
+
+    return { rows: data.length, start: startDate, end: endDate };
+};
+
+const compareWithBaseline = (result: BenchmarkResult, baselineFile: string, tolerance: number): boolean => {
+    const baseline: BenchmarkResult = JSON.parse(fs.readFileSync(baselineFile, 'utf-8'));
+    const previous = new Map(baseline.stages.map(s => [s.name, s.ms]));
+    let regressed = false;
+
+    console.info(`\n📊 对比基线 ${baselineFile}（容差 ${(tolerance * 100).toFixed(0)}%）`);
+    result.stages.forEach(stage => {
+        const before = previous.get(stage.name);
+        if (before === undefined) {
+            console.info(`  ${stage.name}: 基线中无此阶段`);
+            return;
+        }
+        const ratio = before > 0 ? stage.ms / before : 1;
+        const slower = ratio > 1 + tolerance;
+        if (slower) regressed = true;
+        console.info(`  ${slower ? '❌' : '✅'} ${stage.name}: ${before.toFixed(1)}ms -> ${stage.ms.toFixed(1)}ms (x${ratio.toFixed(2)})`);
+    });
+    return !regressed;
+};
+
+const main = async () => {
+    const args = process.argv.slice(2);
+    const file = args[0];
+    if (!file || file.startsWith('--')) {
+        console.info('用法: npm run bench -- <导出文件.csv> [--runs N] [--window 天数] [--configs 配置.json] [--out 结果.json] [--baseline 旧结果.json] [--tolerance 0.2] [--verbose]');
+        process.exit(1);
+    }
+
+    const runs = Math.max(parseInt(getOption(args, '--runs') || '1', 10), 1);
+    const windowDays = Math.max(parseInt(getOption(args, '--window') || '30', 10), 1);
+    const configsFile = getOption(args, '--configs');
+    const configs: AdConfiguration[] = configsFile
+        ? JSON.parse(fs.readFileSync(configsFile, 'utf-8'))
+        : DEFAULT_BENCH_CONFIGS;
+    const outFile = getOption(args, '--out')
+        || path.join('bench-results', `${path.basename(file, path.extname(file))}.json`);
+
+    // 屏蔽被测代码内部的日志（console.info 用于本脚本的输出）
+    if (!args.includes('--verbose')) {
+        console.log = () => {};
+        console.warn = () => {};
+    }
+
+    const samples = new Map<string, { ms: number[]; items: number }>();
+    let dataset = { rows: 0, start: '', end: '' };
+    let peakHeap = 0;
+
+    for (let run = 0; run < runs; run++) {
+        dataset = await runOnce(file, configs, windowDays, (name, ms, items) => {
+            const entry = samples.get(name) || { ms: [], items: 0 };
+            entry.ms.push(ms);
+            entry.items = items;
+            samples.set(name, entry);
+            peakHeap = Math.max(peakHeap, process.memoryUsage().heapUsed);
+        });
+        console.info(`⏱️ run ${run + 1}/${runs} done`);
+    }
+
+    const stages: StageResult[] = Array.from(samples.entries()).map(([name, entry]) => ({
+        name,
+        ms: median(entry.ms),
+        samples: entry.ms,
+        items: entry.items
+    }));
+
+    const result: BenchmarkResult = {
+        version: RESULT_VERSION,
+        timestamp: new Date().toISOString(),
+        environment: { node: process.version, platform: `${process.platform}-${process.arch}`, cpus: os.cpus().length },
+        dataset: {
+            file: path.basename(file),
+            bytes: fs.statSync(file).size,
+            rows: dataset.rows,
+            start: dataset.start,
+            end: dataset.end,
+            windowDays
+        },
+        runs,
+        stages,
+        totalMs: stages.reduce((sum, s) => sum + s.ms, 0),
+        peakHeapMB: Math.round(peakHeap / 1024 / 1024),
+        instrumentation: getInstrumentationReport().stages
+    };
+
+    fs.mkdirSync(path.dirname(path.resolve(outFile)), { recursive: true });
+    fs.writeFileSync(outFile, JSON.stringify(result, null, 2));
+
+    console.info(`\n✅ ${result.dataset.file}: ${dataset.rows.toLocaleString()} rows, ${dataset.start} ~ ${dataset.end}`);
+    stages.forEach(s => console.info(`  ${s.name.padEnd(26)} ${s.ms.toFixed(1).padStart(10)} ms  (${s.items.toLocaleString()})`));
+    console.info(`  ${'total'.padEnd(26)} ${result.totalMs.toFixed(1).padStart(10)} ms  🧠 peak heap ${result.peakHeapMB} MB`);
+    console.info(`\n📄 ${outFile}`);
+
+    const baselineFile = getOption(args, '--baseline');
+    if (baselineFile) {
+        const tolerance = parseFloat(getOption(args, '--tolerance') || '0.2');
+        if (!compareWithBaseline(result, baselineFile, tolerance)) process.exit(2);
+    }
+};
+
+main().catch(err => {
+    console.error('Error:', err instanceof Error ? err.message : err);
+    process.exit(1);
+});
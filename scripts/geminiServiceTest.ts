@@ -0,0 +1,191 @@
+// Gemini 服务的本地测试
+//
+// 启动一个本地模拟模型服务（与 Gemini REST 接口相同的 streamGenerateContent?alt=sse 路径，按块延迟输出 SSE），
+// 用 setGeminiBaseUrl 指向它，检查：
+// - 流式响应：生成过程中回调部分结果，最终结果完整解析
+// - 响应缓存：相同数据再次请求不发请求
+// - 请求合并：相同数据的并发调用只发一个请求，后加入的调用也收到流式中间结果
+// - 并发限制：同时进行的请求不超过 2 个，其余排队
+// - force：跳过缓存，且不合并进行中的相同请求
+//
+// 用法:
+//   npm run test:gemini
+
+import http from 'http';
+import { AddressInfo } from 'net';
+import { DataSummary } from '../utils/aiSummaryUtils';
+import { getInstrumentationReport } from '../utils/instrumentation';
+import { AISummaryResult, clearGeminiCache, createGeminiService, getGeminiMetrics, setGeminiBaseUrl } from '../services/geminiService';
+
+const CHUNK_DELAY_MS = 10;
+const CHUNK_SIZE = 16;     // 每块字符数（结论文本会跨多块到达）
+
+// ============ 模拟模型服务 ============
+
+let requestCount = 0;
+let active = 0;
+let maxActive = 0;
+
+// 回答中带上 Prompt 里的 Campaign 总数，便于区分不同请求
+const answerFor = (prompt: string): string => {
+    const total = prompt.match(/Campaign总数: (\d+)/)?.[1] ?? '0';
+    return JSON.stringify({
+        conclusion: `系统扫描显示${total}条 Campaign 触发 ROI 预警`,
+        campaignProblems: {
+            p0: { description: '1条 (P0优先级)', campaigns: [`Campaign-${total}-A`] },
+            p1: { description: '0条 (P1优先级)', campaigns: [] },
+            p2: { description: '0条 (P2优先级)', campaigns: [] }
+        },
+        materialIssues: [{ category: '僵尸素材', percentage: '50%', suggestion: '关停', ads: ['Ad-1'] }]
+    });
+};
+
+const server = http.createServer((req, res) => {
+    if (req.method !== 'POST' || !/:streamGenerateContent/.test(req.url || '')) {
+        res.writeHead(404).end();
+        return;
+    }
+    let body = '';
+    req.on('data', chunk => { body += chunk; });
+    req.on('end', async () => {
+        requestCount++;
+        active++;
+        maxActive = Math.max(maxActive, active);
+        const prompt: string = JSON.parse(body).contents?.[0]?.parts?.[0]?.text ?? '';
+        const answer = `\`\`\`json\n${answerFor(prompt)}\n\`\`\``;
+        res.writeHead(200, { 'Content-Type': 'text/event-stream' });
+        for (let offset = 0; offset < answer.length; offset += CHUNK_SIZE) {
+            await sleep(CHUNK_DELAY_MS);
+            const event = { candidates: [{ index: 0, content: { role: 'model', parts: [{ text: answer.slice(offset, offset + CHUNK_SIZE) }] } }] };
+            res.write(`data: ${JSON.stringify(event)}\n\n`);
+        }
+        active--;
+        res.end();
+    });
+});
+
+// ============ 检查 ============
+
+let failures = 0;
+const check = (label: string, ok: boolean, detail?: unknown) => {
+    if (ok) {
+        console.info(`  ✅ ${label}`);
+    } else {
+        failures++;
+        console.error(`  ❌ ${label}`, detail ?? '');
+    }
+};
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+const waitFor = async (condition: () => boolean, timeoutMs = 2000) => {
+    const start = Date.now();
+    while (!condition() && Date.now() - start < timeoutMs) await sleep(5);
+    return condition();
+};
+
+// 排队次数（RequestLimiter 记在 gemini 阶段的 queued 计数）
+const queuedCount = (): number => getInstrumentationReport().stages['gemini']?.counters.queued || 0;
+
+const makeSummary = (totalCampaigns: number): DataSummary => ({
+    totalCampaigns,
+    totalSpend: totalCampaigns * 100,
+    p0Count: 1,
+    p1Count: 0,
+    p2Count: 0,
+    campaignsByPriority: { p0Campaigns: [`Campaign-${totalCampaigns}-A`], p1Campaigns: [], p2Campaigns: [] },
+    materialIssues: [],
+    problemCategories: [],
+    topActions: [],
+    diagnosticDetails: [
+        { campaignName: `Campaign-${totalCampaigns}-A`, priority: 'P0', scenario: 'ROI 低', diagnosis: 'CPC 高', action: '降预算', spend: 100 }
+    ]
+});
+
+const main = async () => {
+    await new Promise<void>(resolve => server.listen(0, '127.0.0.1', resolve));
+    const { port } = server.address() as AddressInfo;
+    setGeminiBaseUrl(`http://127.0.0.1:${port}`);
+    const service = createGeminiService('test-key');
+
+    try {
+        // 1. 流式响应
+        console.info('streaming');
+        const partials: AISummaryResult[] = [];
+        let settled = false;
+        const first = service.generateOptimizationSummary(makeSummary(10), { onPartial: partial => partials.push(partial) });
+        first.then(() => { settled = true; });
+        await waitFor(() => partials.length > 0 || settled);
+        check('partial results arrive before the response completes', !settled && partials.length > 0, partials.length);
+        const result = await first;
+        check('several partial updates while streaming', partials.length >= 3, partials.length);
+        check('partial conclusion grows toward the final text',
+            partials.some(p => p.conclusion !== '' && p.conclusion !== result.conclusion), partials.map(p => p.conclusion));
+        check('final response is parsed', result.conclusion === '系统扫描显示10条 Campaign 触发 ROI 预警' &&
+            result.campaignProblems.p0.campaigns[0] === 'Campaign-10-A' && result.materialIssues.length === 1, result);
+        check('one request sent', requestCount === 1, requestCount);
+
+        // 2. 响应缓存
+        console.info('cache');
+        const hitsBefore = getGeminiMetrics().cacheHits;
+        const cached = await service.generateOptimizationSummary(makeSummary(10));
+        check('same data is served from the cache', requestCount === 1 && cached.conclusion === result.conclusion, requestCount);
+        check('cache hit is counted', getGeminiMetrics().cacheHits === hitsBefore + 1);
+
+        // 3. 请求合并
+        console.info('coalescing');
+        requestCount = 0;
+        const lateStream: AISummaryResult[] = [];
+        let firstCallerPartials = 0;
+        const a = service.generateOptimizationSummary(makeSummary(20), { onPartial: () => { firstCallerPartials++; } });
+        await waitFor(() => firstCallerPartials >= 2);
+        const b = service.generateOptimizationSummary(makeSummary(20), { onPartial: partial => lateStream.push(partial) });
+        const [ra, rb] = await Promise.all([a, b]);
+        check('concurrent identical calls share one request', requestCount === 1, requestCount);
+        check('both callers get the same result', ra.conclusion === rb.conclusion && ra.conclusion.includes('20条'));
+        check('a caller joining mid-stream receives partial results', lateStream.length >= 2, lateStream.length);
+
+        // 4. 并发限制
+        console.info('concurrency limit');
+        requestCount = 0;
+        maxActive = 0;
+        const queuedBefore = queuedCount();
+        const batch = await Promise.all([31, 32, 33, 34, 35].map(n => service.generateOptimizationSummary(makeSummary(n))));
+        check('five distinct calls send five requests', requestCount === 5, requestCount);
+        check('at most two requests run at once', maxActive === 2, maxActive);
+        check('the other three were queued', queuedCount() - queuedBefore === 3);
+        check('queued calls still get their own answers', batch.every((r, i) => r.conclusion.includes(`${31 + i}条`)), batch.map(r => r.conclusion));
+
+        // 5. force
+        console.info('force');
+        requestCount = 0;
+        await service.generateOptimizationSummary(makeSummary(10), { force: true });
+        check('force bypasses a cached response', requestCount === 1, requestCount);
+        requestCount = 0;
+        const normal = service.generateOptimizationSummary(makeSummary(40));
+        await sleep(CHUNK_DELAY_MS);
+        const forced = service.generateOptimizationSummary(makeSummary(40), { force: true });
+        await Promise.all([normal, forced]);
+        check('force does not join an in-flight request', requestCount === 2, requestCount);
+        requestCount = 0;
+        await service.generateOptimizationSummary(makeSummary(40));
+        check('the forced response is cached for later calls', requestCount === 0, requestCount);
+
+        // 清空内存缓存后重新请求
+        clearGeminiCache();
+        requestCount = 0;
+        await service.generateOptimizationSummary(makeSummary(40));
+        check('clearGeminiCache drops cached responses', requestCount === 1, requestCount);
+    } finally {
+        server.close();
+        setGeminiBaseUrl(null);
+    }
+
+    if (failures > 0) {
+        console.error(`❌ ${failures} check(s) failed`);
+        process.exit(1);
+    }
+    const metrics = getGeminiMetrics();
+    console.info(`✅ all checks passed (requests ${metrics.requests}, hit rate ${(metrics.hitRate * 100).toFixed(0)}%)`);
+};
+
+main();
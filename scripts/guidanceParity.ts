@@ -0,0 +1,80 @@
+// ROI Campaign 调优指导的 TS / Python 一致性检查
+//
+// 以固定种子生成一组覆盖七个诊断场景的 Campaign（指标围绕基准值上下浮动，部分指标缺失），
+// 用 diagnoseAllScenarios + formatScenarioGuidance 生成调优指导文本，连同输入一起写入 JSON。
+// action_items.py --check-guidance <该文件> 用 Python 实现重新计算并逐条比对。
+//
+// 用法:
+//   npm run parity:guidance -- [--cases N] [--seed S] [--out guidance-parity.json]
+//   python action_items.py --check-guidance guidance-parity.json
+
+import fs from 'fs';
+import { CampaignBenchmarks } from '../utils/benchmarkCalculator';
+import { CampaignContext, diagnoseAllScenarios } from '../utils/campaignDiagnostics';
+import { formatScenarioGuidance } from '../utils/guidanceStore';
+
+const BENCHMARKS: CampaignBenchmarks = {
+    avgCpa: 40, avgCpatc: 8, avgCpc: 0.9, avgCvr: 2.5, avgCtr: 1.6, avgCpm: 14,
+    avgAtcRate: 9, avgCheckoutRate: 0.45, avgPurchaseRate: 0.6, avgClickToPvRate: 0.8,
+    avgRoi: 2.2, avgAov: 120, avgFrequency: 1.8
+};
+
+// 参与诊断的指标 -> 对应的基准值字段
+const METRIC_BENCHMARKS: Record<string, keyof CampaignBenchmarks> = {
+    roi: 'avgRoi', cpc: 'avgCpc', cvr: 'avgCvr', ctr: 'avgCtr', cpm: 'avgCpm', aov: 'avgAov',
+    cpatc: 'avgCpatc', atc_rate: 'avgAtcRate', checkout_rate: 'avgCheckoutRate',
+    purchase_rate: 'avgPurchaseRate', click_to_pv_rate: 'avgClickToPvRate', frequency: 'avgFrequency'
+};
+
+const getOption = (args: string[], name: string): string | undefined => {
+    const i = args.indexOf(name);
+    return i >= 0 ? args[i + 1] : undefined;
+};
+
+// mulberry32：结果可复现
+const createRandom = (seed: number) => () => {
+    seed = (seed + 0x6D2B79F5) | 0;
+    let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+    t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+};
+
+const generateCase = (random: () => number) => {
+    // 基准值的 0.3 ~ 1.7 倍，约 5% 缺失（对应 undefined）
+    const metrics: Record<string, number> = {
+        spend: Math.round(random() * 4000 * 100) / 100,
+        impressions: Math.round(random() * 3000)
+    };
+    for (const [metric, field] of Object.entries(METRIC_BENCHMARKS)) {
+        if (random() < 0.05) continue;
+        metrics[metric] = (BENCHMARKS[field] as number) * (0.3 + random() * 1.4);
+    }
+    const activeDays = 1 + Math.floor(random() * 30);
+    const dailyBudget = random() < 0.1 ? 0 : random() * 300;
+    const context: CampaignContext = {
+        adsetCount: Math.floor(random() * 12),
+        activeDays,
+        dailyBudget,
+        campaignBudget: dailyBudget * activeDays
+    };
+    return { metrics, context };
+};
+
+const main = () => {
+    const args = process.argv.slice(2);
+    const count = Math.max(parseInt(getOption(args, '--cases') || '2000', 10), 1);
+    const random = createRandom(parseInt(getOption(args, '--seed') || '1', 10));
+    const outFile = getOption(args, '--out') || 'guidance-parity.json';
+
+    const cases = Array.from({ length: count }, () => {
+        const { metrics, context } = generateCase(random);
+        const guidance = formatScenarioGuidance(diagnoseAllScenarios(metrics as any, BENCHMARKS, context));
+        return { metrics, context, guidance };
+    });
+
+    fs.writeFileSync(outFile, JSON.stringify({ benchmarks: BENCHMARKS, cases }, null, 2));
+    const matched = cases.filter(c => !c.guidance.startsWith('⚠️')).length;
+    console.info(`✅ ${count} cases (${matched} with scenarios) -> ${outFile}`);
+};
+
+main();
@@ -0,0 +1,209 @@
+// Google Sheet 配置服务的本地测试
+//
+// 启动一个本地 HTTP 替身（路径与 docs.google.com 的 CSV 导出一致），用 setSheetSourceBaseUrl 指向它，检查：
+// - 首次加载：三个工作表并行请求，带引号 / 转义引号 / 引号内换行 / CRLF 的 CSV 正确解析
+// - 缓存未过期：不发请求
+// - 缓存过期（stale-while-revalidate）：先返回缓存，后台发条件请求；304 时不回调，内容变化时回调新配置
+// - 服务器不返回 ETag 时按内容哈希判断是否变化
+// - csvParser：整段解析与任意位置分块的流式解析结果一致
+//
+// 用法:
+//   npm run test:sheet-config
+
+import http from 'http';
+import { AddressInfo } from 'net';
+import { parseCsvRows, parseCsvStream } from '../utils/csvParser';
+import { AppConfig, clearConfigCache, loadAppConfig, setSheetSourceBaseUrl } from '../services/googleSheetConfigService';
+
+const CONFIG_CSV = 'config_key,config_value\r\ndefault_date_days,14\r\ngemini_api_key,"key,with ""quotes"""\r\n';
+const BUSINESS_LINES_CSV = [
+    'name,analysis_level,budget,kpi_type,target_value,rule_field,rule_operator,rule_value',
+    '"All Products, US",Campaign,5000,ROI,2.5,Campaign Name,Contains,"US\r\nCA"',
+    '',
+    'Brand,AdSet,1200,CPM,12,Campaign Name,Contains,-AW-'
+].join('\r\n');
+const LAYERS_CSV = 'layer,rule_field,rule_operator,rule_value\nawareness,Campaign Name,Contains,-AW-\ntraffic,Campaign Name,Contains,-TR-';
+
+// ============ 本地替身 ============
+
+interface SheetState {
+    body: string;
+    etag: boolean;      // 是否返回 ETag（否则服务只能按内容哈希判断）
+    version: number;
+}
+
+const sheets: Record<string, SheetState> = {
+    config: { body: CONFIG_CSV, etag: false, version: 1 },
+    business_lines: { body: BUSINESS_LINES_CSV, etag: true, version: 1 },
+    funnel_thresholds: { body: LAYERS_CSV, etag: true, version: 1 }
+};
+
+interface RequestLog {
+    sheet: string;
+    conditional: boolean;
+    status: number;
+}
+const requests: RequestLog[] = [];
+
+const sheetOf = (url: URL): string => (url.searchParams.get('gid') === '0' ? 'config' : url.searchParams.get('sheet') || '');
+
+const server = http.createServer((req, res) => {
+    const url = new URL(req.url || '/', 'http://localhost');
+    const state = sheets[sheetOf(url)];
+    if (!state) {
+        res.writeHead(404).end();
+        return;
+    }
+    const etag = `"v${state.version}"`;
+    const conditional = req.headers['if-none-match'] !== undefined;
+    if (state.etag && req.headers['if-none-match'] === etag) {
+        requests.push({ sheet: sheetOf(url), conditional, status: 304 });
+        res.writeHead(304).end();
+        return;
+    }
+    requests.push({ sheet: sheetOf(url), conditional, status: 200 });
+    res.writeHead(200, { 'Content-Type': 'text/csv; charset=utf-8', ...(state.etag ? { ETag: etag } : {}) });
+    // 分几次写出，让响应体以多块到达
+    const bytes = Buffer.from(state.body, 'utf-8');
+    for (let offset = 0; offset < bytes.length; offset += 7) res.write(bytes.subarray(offset, offset + 7));
+    res.end();
+});
+
+// ============ 检查 ============
+
+let failures = 0;
+const check = (label: string, ok: boolean, detail?: unknown) => {
+    if (ok) {
+        console.info(`  ✅ ${label}`);
+    } else {
+        failures++;
+        console.error(`  ❌ ${label}`, detail ?? '');
+    }
+};
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+const waitFor = async (condition: () => boolean, timeoutMs = 2000) => {
+    const start = Date.now();
+    while (!condition() && Date.now() - start < timeoutMs) await sleep(10);
+    return condition();
+};
+
+// 让缓存过期：把时钟往后拨
+const realNow = Date.now;
+let clockOffset = 0;
+Date.now = () => realNow() + clockOffset;
+const expireCache = () => { clockOffset += 6 * 60 * 1000; };
+
+const checkCsvParser = async () => {
+    console.info('csvParser');
+    const text = 'a,b,c\r\n"x, y","say ""hi""","line1\r\nline2"\r\n\r\n,,\r\n"",last\r\nno,newline';
+    const expected = [
+        ['a', 'b', 'c'],
+        ['x, y', 'say "hi"', 'line1\r\nline2'],
+        ['', '', ''],
+        ['', 'last'],
+        ['no', 'newline']
+    ];
+    check('parseCsvRows: quotes, escaped quotes, CRLF inside quotes, blank lines', JSON.stringify(parseCsvRows(text)) === JSON.stringify(expected), parseCsvRows(text));
+    check('LF and CRLF line endings parse the same', JSON.stringify(parseCsvRows(text.replace(/\r\n/g, '\n'))) === JSON.stringify(parseCsvRows(text).map(row => row.map(v => v.replace(/\r\n/g, '\n')))));
+
+    // 在每个位置切成两块（覆盖 CR / LF 分开、"" 分开、多字节字符分开）
+    const bytes = new TextEncoder().encode(`${text}\r\n"中文,字段",é`);
+    const whole = JSON.stringify(parseCsvRows(new TextDecoder().decode(bytes)));
+    let mismatches = 0;
+    for (let cut = 1; cut < bytes.length; cut++) {
+        const stream = new ReadableStream<Uint8Array>({
+            start(controller) {
+                controller.enqueue(bytes.slice(0, cut));
+                controller.enqueue(bytes.slice(cut));
+                controller.close();
+            }
+        });
+        if (JSON.stringify(await parseCsvStream(stream)) !== whole) mismatches++;
+    }
+    check(`parseCsvStream matches parseCsvRows at all ${bytes.length - 1} split points`, mismatches === 0, `${mismatches} mismatches`);
+};
+
+const checkConfigService = async (baseUrl: string) => {
+    console.info('googleSheetConfigService');
+    setSheetSourceBaseUrl(baseUrl);
+    clearConfigCache();
+
+    // 1. 首次加载
+    const config = await loadAppConfig();
+    check('cold load requests every sheet once', requests.length === 3 && requests.every(r => !r.conditional), requests);
+    check('quoted config value with escaped quotes', config.system.geminiApiKey === 'key,with "quotes"', config.system);
+    check('default_date_days parsed', config.system.defaultDateDays === 14);
+    check('business lines: quoted comma, CRLF inside quotes, blank row skipped',
+        config.businessLines.length === 2 &&
+        config.businessLines[0].name === 'All Products, US' &&
+        config.businessLines[0].ruleValue === 'US\r\nCA' &&
+        config.businessLines[1].budget === 1200,
+        config.businessLines);
+    check('LF-only sheet parsed', config.adLayers.length === 2 && config.adLayers[1].ruleValue === '-TR-', config.adLayers);
+
+    // 2. 缓存未过期：不发请求
+    requests.length = 0;
+    let updates: AppConfig[] = [];
+    await loadAppConfig(false, c => updates.push(c));
+    await sleep(50);
+    check('fresh cache is served without requests', requests.length === 0, requests);
+
+    // 3. 过期 + 内容未变：先返回缓存，后台条件请求得到 304（无 ETag 的表按内容哈希判断）
+    expireCache();
+    const stale = await loadAppConfig(false, c => updates.push(c));
+    check('stale cache is returned immediately', stale.businessLines.length === 2);
+    await waitFor(() => requests.length === 3);
+    await sleep(50);
+    check('revalidation sends If-None-Match where an ETag was cached',
+        requests.filter(r => r.conditional).length === 2 && requests.filter(r => r.status === 304).length === 2, requests);
+    check('unchanged content (304 or same hash) does not trigger onUpdate', updates.length === 0, updates.length);
+
+    // 4. 过期 + 内容变化：回调新配置
+    sheets.business_lines.body += '\r\nNew Line,Ad,300,CPC,0.8,Campaign Name,Contains,-TR-';
+    sheets.business_lines.version++;
+    sheets.config.body = CONFIG_CSV.replace('14', '30');   // 无 ETag：靠内容哈希发现变化
+    requests.length = 0;
+    updates = [];
+    expireCache();
+    const beforeUpdate = await loadAppConfig(false, c => updates.push(c));
+    check('changed sheets still return the cached config first', beforeUpdate.businessLines.length === 2);
+    await waitFor(() => updates.length > 0);
+    check('background revalidation reports the new config once', updates.length === 1, updates.length);
+    check('updated business lines and content-hashed config sheet',
+        updates[0]?.businessLines.length === 3 && updates[0]?.system.defaultDateDays === 30, updates[0]);
+
+    // 5. 更新已写入缓存：下一次过期验证全部为 304 / 内容未变
+    requests.length = 0;
+    updates = [];
+    expireCache();
+    const revalidated = await loadAppConfig(false, c => updates.push(c));
+    await waitFor(() => requests.length === 3);
+    await sleep(50);
+    check('revalidated rows were cached', revalidated.businessLines.length === 3 && revalidated.system.defaultDateDays === 30);
+    check('no further updates after caching the change', updates.length === 0, updates.length);
+
+    // 6. 强制刷新：等待服务器结果
+    requests.length = 0;
+    const forced = await loadAppConfig(true);
+    check('forceRefresh waits for the server', requests.length === 3 && forced.businessLines.length === 3, requests);
+};
+
+const main = async () => {
+    await new Promise<void>(resolve => server.listen(0, '127.0.0.1', resolve));
+    const { port } = server.address() as AddressInfo;
+    try {
+        await checkCsvParser();
+        await checkConfigService(`http://127.0.0.1:${port}`);
+    } finally {
+        server.close();
+        Date.now = realNow;
+    }
+    if (failures > 0) {
+        console.error(`❌ ${failures} check(s) failed`);
+        process.exit(1);
+    }
+    console.info('✅ all checks passed');
+};
+
+main();
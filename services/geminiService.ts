@@ -1,8 +1,35 @@
 // Gemini API Service
 // 用于调用 Google Gemini API 生成 AI 智能诊断报告
+//
+// - 响应缓存：以请求内容（DataSummary 等）的规范化哈希为键，内存 + IndexedDB 两级，同一份数据
+//   重复打开 AI 面板不再重新请求；「重新生成」时跳过缓存
+// - 请求合并：相同内容的请求进行中时，后来的调用共用同一个请求（也能收到流式的中间结果）
+// - 并发限制：同时最多 MAX_CONCURRENT_REQUESTS 个请求，其余排队
+// - 流式响应：边生成边回调，面板逐步渲染
+// 命中率、耗时等统计记在 instrumentation 的 gemini 阶段，见 getGeminiMetrics。
 
 import { GoogleGenerativeAI } from '@google/generative-ai';
 import { DataSummary, DiagnosticDetail } from '../utils/aiSummaryUtils';
+import { fingerprint, loadArtifact, saveArtifact } from '../utils/persistentCache';
+import { addCount, getInstrumentationReport, startStage } from '../utils/instrumentation';
+import { estimateTokens, packDiagnostics } from '../utils/promptBudget';
+
+const MODEL_NAME = 'gemini-2.0-flash';
+const MAX_CONCURRENT_REQUESTS = 2;
+const MEMORY_CACHE_LIMIT = 32;
+const RESPONSE_TTL_MS = 24 * 60 * 60 * 1000;
+const DIAGNOSTICS_TOKEN_BUDGET = 6000;     // Prompt 中诊断详情部分的 token 预算
+
+// API 地址（测试时可指向本地模拟服务，见 setGeminiBaseUrl）
+let apiBaseUrl: string | undefined;
+
+/**
+ * 修改 Gemini API 地址（本地测试用）
+ * @param baseUrl - 例如 http://localhost:8788，路径与 Google 相同；传 null 恢复默认
+ */
+export function setGeminiBaseUrl(baseUrl: string | null): void {
+    apiBaseUrl = baseUrl ? baseUrl.replace(/\/$/, '') : undefined;
+}
 
 /**
  * AI 总结结果
@@ -31,6 +58,141 @@ export interface AISummaryResult {
     }[];
 }
 
+/**
+ * 生成选项
+ */
+export interface GenerateOptions {
+    force?: boolean;                                // 跳过缓存，重新请求
+    onPartial?: (partial: AISummaryResult) => void; // 流式生成过程中的部分结果
+}
+
+interface CachedResponse {
+    text: string;
+    fetchedAt: number;
+}
+
+interface PendingRequest {
+    promise: Promise<string>;
+    text: string;                                   // 目前已收到的文本
+    listeners: Set<(text: string) => void>;
+}
+
+// 并发限制：请求结束时直接把名额交给队首，避免新请求插队
+class RequestLimiter {
+    private active = 0;
+    private queue: Array<() => void> = [];
+
+    constructor(private readonly limit: number) {}
+
+    async run<T>(task: () => Promise<T>): Promise<T> {
+        if (this.active < this.limit) {
+            this.active++;
+        } else {
+            addCount('gemini', 'queued');
+            await new Promise<void>(resolve => this.queue.push(resolve));
+        }
+        try {
+            return await task();
+        } finally {
+            const next = this.queue.shift();
+            if (next) next();
+            else this.active--;
+        }
+    }
+}
+
+// 所有 Service 实例共享（组件每次调用都会新建实例）
+const memoryCache = new Map<string, CachedResponse>();
+const inFlight = new Map<string, PendingRequest>();
+const limiter = new RequestLimiter(MAX_CONCURRENT_REQUESTS);
+
+const readCache = async (key: string): Promise<string | undefined> => {
+    let entry = memoryCache.get(key);
+    if (!entry) {
+        entry = await loadArtifact<CachedResponse>(`gemini:${key}`);
+        if (entry) memoryCache.set(key, entry);
+    }
+    if (!entry || Date.now() - entry.fetchedAt > RESPONSE_TTL_MS) return undefined;
+    // LRU：移到末尾
+    memoryCache.delete(key);
+    memoryCache.set(key, entry);
+    return entry.text;
+};
+
+const writeCache = (key: string, text: string): void => {
+    const entry: CachedResponse = { text, fetchedAt: Date.now() };
+    memoryCache.delete(key);
+    memoryCache.set(key, entry);
+    while (memoryCache.size > MEMORY_CACHE_LIMIT) {
+        memoryCache.delete(memoryCache.keys().next().value!);
+    }
+    void saveArtifact(`gemini:${key}`, entry);
+};
+
+/** 清空内存中的响应缓存（IndexedDB 中的条目随 clearPersistentCache 清除） */
+export function clearGeminiCache(): void {
+    memoryCache.clear();
+}
+
+export interface GeminiMetrics {
+    requests: number;       // 实际发出的请求数
+    cacheHits: number;
+    cacheMisses: number;
+    coalesced: number;      // 合并到进行中请求的调用数
+    errors: number;
+    hitRate: number;        // 无需发出请求的调用占比（缓存命中 + 合并）
+    avgLatencyMs: number;   // 请求总耗时（不含排队）
+    avgFirstChunkMs: number;// 首个流式分块的耗时
+}
+
+/** Gemini 调用统计 */
+export function getGeminiMetrics(): GeminiMetrics {
+    const { stages } = getInstrumentationReport();
+    const counters = stages['gemini']?.counters || {};
+    const average = (stage: string) => {
+        const stats = stages[stage];
+        return stats && stats.calls > 0 ? stats.totalMs / stats.calls : 0;
+    };
+    const cacheHits = counters.cacheHits || 0;
+    const cacheMisses = counters.cacheMisses || 0;
+    const coalesced = counters.coalesced || 0;
+    const lookups = cacheHits + cacheMisses + coalesced;
+    return {
+        requests: counters.requests || 0,
+        cacheHits,
+        cacheMisses,
+        coalesced,
+        errors: counters.errors || 0,
+        hitRate: lookups > 0 ? (cacheHits + coalesced) / lookups : 0,
+        avgLatencyMs: average('gemini.request'),
+        avgFirstChunkMs: average('gemini.firstChunk')
+    };
+}
+
+// 去掉 markdown 代码块标记后解析 JSON
+const parseJsonText = (text: string): any => JSON.parse(
+    text.trim().replace(/```json\s*/gi, '').replace(/```\s*/g, '').trim()
+);
+
+const isJsonText = (text: string): boolean => {
+    try {
+        parseJsonText(text);
+        return true;
+    } catch {
+        return false;
+    }
+};
+
+// 解码可能被截断的 JSON 字符串内容（流式生成中途）
+const decodePartialString = (raw: string): string => {
+    const complete = raw.replace(/\\(u[0-9a-fA-F]{0,3})?$/, '');
+    try {
+        return JSON.parse(`"${complete}"`);
+    } catch {
+        return complete;
+    }
+};
+
 /**
  * Gemini API Service
  */
@@ -40,20 +202,26 @@ export class GeminiService {
 
     constructor(apiKey: string) {
         this.genAI = new GoogleGenerativeAI(apiKey);
-        this.model = this.genAI.getGenerativeModel({ model: 'gemini-2.0-flash' });
+        this.model = this.genAI.getGenerativeModel(
+            { model: MODEL_NAME },
+            apiBaseUrl ? { baseUrl: apiBaseUrl } : undefined
+        );
     }
 
     /**
      * 生成调优概览总结
+     * @param dataSummary - 数据摘要
+     * @param options - force 跳过缓存；onPartial 流式生成过程中的部分结果
      */
-    async generateOptimizationSummary(dataSummary: DataSummary): Promise<AISummaryResult> {
-        const prompt = this.buildPrompt(dataSummary);
-
+    async generateOptimizationSummary(dataSummary: DataSummary, options: GenerateOptions = {}): Promise<AISummaryResult> {
+        const { onPartial } = options;
         try {
-            const result = await this.model.generateContent(prompt);
-            const response = await result.response;
-            const text = response.text();
-
+            const text = await this.request(
+                `summary:${MODEL_NAME}:${fingerprint(dataSummary)}`,
+                () => this.buildPrompt(dataSummary),
+                options.force,
+                onPartial && (partial => onPartial(this.parsePartialResponse(partial, dataSummary)))
+            );
             return this.parseResponse(text, dataSummary);
         } catch (error) {
             console.error('Gemini API error:', error);
@@ -61,6 +229,84 @@ export class GeminiService {
         }
     }
 
+    /**
+     * 发送请求（缓存 → 合并进行中的相同请求 → 排队发送）
+     * @param key - 缓存键（请求内容的哈希）
+     * @param buildPrompt - 构建 Prompt（命中缓存或合并时不调用）
+     * @param force - 跳过缓存，且不合并进行中的相同请求（重新发起并替换）
+     * @param onText - 流式回调（参数为目前已收到的全部文本）
+     */
+    private request(
+        key: string,
+        buildPrompt: () => string,
+        force = false,
+        onText?: (text: string) => void
+    ): Promise<string> {
+        let pending = force ? undefined : inFlight.get(key);
+        if (pending) {
+            addCount('gemini', 'coalesced');
+        } else {
+            const entry: PendingRequest = { promise: Promise.resolve(''), text: '', listeners: new Set() };
+            entry.promise = (async () => {
+                const cached = force ? undefined : await readCache(key);
+                if (cached !== undefined) {
+                    addCount('gemini', 'cacheHits');
+                    return cached;
+                }
+                addCount('gemini', 'cacheMisses');
+                const text = await limiter.run(() => this.streamContent(buildPrompt(), partial => {
+                    entry.text = partial;
+                    entry.listeners.forEach(listener => listener(partial));
+                }));
+                // 无法解析的响应不缓存，下次重新请求
+                if (isJsonText(text)) writeCache(key, text);
+                return text;
+            })().finally(() => {
+                // 强制重新生成可能已替换该键，只删除自己的条目
+                if (inFlight.get(key) === entry) inFlight.delete(key);
+            });
+            inFlight.set(key, entry);
+            pending = entry;
+        }
+
+        if (!onText) return pending.promise;
+        const current = pending;
+        if (current.text) onText(current.text);
+        current.listeners.add(onText);
+        return current.promise.finally(() => current.listeners.delete(onText));
+    }
+
+    /**
+     * 流式请求模型
+     * @param prompt - Prompt
+     * @param onText - 每收到一块时回调（参数为目前已收到的全部文本）
+     */
+    private async streamContent(prompt: string, onText: (text: string) => void): Promise<string> {
+        addCount('gemini', 'requests');
+        addCount('gemini', 'promptTokens', estimateTokens(prompt));
+        const end = startStage('gemini.request');
+        const endFirstChunk = startStage('gemini.firstChunk');
+        try {
+            const result = await this.model.generateContentStream(prompt);
+            let text = '';
+            let first = true;
+            for await (const chunk of result.stream) {
+                if (first) {
+                    endFirstChunk();
+                    first = false;
+                }
+                text += chunk.text();
+                onText(text);
+            }
+            return text;
+        } catch (error) {
+            addCount('gemini', 'errors');
+            throw error;
+        } finally {
+            end();
+        }
+    }
+
     /**
      * 构建 Prompt
      */
@@ -99,16 +345,13 @@ ${p.examples.map((ex, i) => `${i + 1}. ${ex}`).join('\n')}
             ? summary.topActions.map((a, i) => `${i + 1}. [${a.priority}] ${a.action} (影响 ${a.count} 条Campaign)`).join('\n')
             : '- 暂无高频Action建议';
 
-        // 诊断详情
-        const diagDetailsText = summary.diagnosticDetails.length > 0
-            ? summary.diagnosticDetails.slice(0, 50).map((d, i) => `
-${i + 1}. Campaign: ${d.campaignName}
-   - 优先级: ${d.priority || '无'}
-   - 场景: ${d.scenario}
-   - 诊断: ${d.diagnosis}
-   - 建议: ${d.action}
-`).join('\n')
-            : '暂无详细诊断数据';
+        // 诊断详情（相同诊断合并，按优先级 / 花费排序后在 token 预算内放入）
+        let diagDetailsText = '暂无详细诊断数据';
+        if (summary.diagnosticDetails.length > 0) {
+            const packed = packDiagnostics(summary.diagnosticDetails, DIAGNOSTICS_TOKEN_BUDGET);
+            addCount('gemini', 'omittedDiagnostics', packed.omitted);
+            diagDetailsText = packed.text;
+        }
 
         return `你是Meta广告优化专家。请根据以下数据生成一份简洁的调优概览报告。
 
@@ -219,15 +462,7 @@ ${issue.adNames.slice(0, 10).map((name, j) => `  ${j + 1}. ${name}`).join('\n')}
      */
     private parseResponse(text: string, summary: DataSummary): AISummaryResult {
         try {
-            // 清理响应文本
-            let cleanText = text.trim();
-
-            // 移除可能的 markdown 代码块标记
-            cleanText = cleanText.replace(/```json\s*/gi, '');
-            cleanText = cleanText.replace(/```\s*/g, '');
-            cleanText = cleanText.trim();
-
-            const parsed = JSON.parse(cleanText);
+            const parsed = parseJsonText(text);
 
             return {
                 conclusion: parsed.conclusion || this.generateFallbackConclusion(summary),
@@ -256,6 +491,33 @@ ${issue.adNames.slice(0, 10).map((name, j) => `  ${j + 1}. ${name}`).join('\n')}
         }
     }
 
+    /**
+     * 解析流式生成中途的响应：取出已生成的结论（可能不完整）和已完整输出的 Campaign 列表
+     */
+    private parsePartialResponse(text: string, summary: DataSummary): AISummaryResult {
+        const conclusionMatch = text.match(/"conclusion"\s*:\s*"((?:[^"\\]|\\.)*)/);
+        const campaignsOf = (level: 'p0' | 'p1' | 'p2'): string[] => {
+            const match = text.match(new RegExp(`"${level}"\\s*:\\s*\\{[^{}]*?"campaigns"\\s*:\\s*(\\[[^\\]]*\\])`));
+            if (!match) return [];
+            try {
+                const campaigns = JSON.parse(match[1]);
+                return Array.isArray(campaigns) ? campaigns.map(String) : [];
+            } catch {
+                return [];
+            }
+        };
+
+        return {
+            conclusion: conclusionMatch ? decodePartialString(conclusionMatch[1]) : '',
+            campaignProblems: {
+                p0: { description: `${summary.p0Count}条 (P0优先级)`, campaigns: campaignsOf('p0') },
+                p1: { description: `${summary.p1Count}条 (P1优先级)`, campaigns: campaignsOf('p1') },
+                p2: { description: `${summary.p2Count}条 (P2优先级)`, campaigns: campaignsOf('p2') }
+            },
+            materialIssues: []
+        };
+    }
+
     /**
      * 生成降级结论
      */
@@ -391,9 +653,7 @@ ${campaignsData}
 请直接输出JSON，不要有任何其他文字。`;
 
         try {
-            const result = await this.model.generateContent(prompt);
-            const response = await result.response;
-            const text = response.text();
+            const text = await this.request(`campaigns:${MODEL_NAME}:${fingerprint(campaigns)}`, () => prompt);
 
             return this.parseCampaignSummaries(text, campaigns);
         } catch (error) {
@@ -411,13 +671,7 @@ ${campaignsData}
         campaigns: Array<{ id: string; diagnostics: DiagnosticDetail[] }>
     ): Map<string, { attribution: string; action: string }> {
         try {
-            // 清理响应文本
-            let cleanText = text.trim();
-            cleanText = cleanText.replace(/```json\s*/gi, '');
-            cleanText = cleanText.replace(/```\s*/g, '');
-            cleanText = cleanText.trim();
-
-            const parsed = JSON.parse(cleanText);
+            const parsed = parseJsonText(text);
             const summaries = new Map<string, { attribution: string; action: string }>();
 
             // 将解析结果转换为 Map
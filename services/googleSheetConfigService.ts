@@ -1,6 +1,10 @@
 // Google Sheet 配置服务
 // 从 Google Sheet 读取系统配置数据
 
+import { parseCsvRows, parseCsvStream, rowsToRecords } from '../utils/csvParser';
+import { debugLog } from '../utils/instrumentation';
+import { createStringHasher, hashString } from '../utils/hash';
+
 // Google Sheet ID
 const SHEET_ID = '1FJfjyY84ujCnQ_3VGbLAaKn6Klqv5RzfTe14_El-z2w';
 
@@ -11,6 +15,17 @@ const SHEET_GID_MAP: Record<string, number> = {
     // 其他工作表的 gid 未知，使用 gviz/tq 格式
 };
 
+// Google 端点地址（测试时可指向本地 HTTP 替身，见 setSheetSourceBaseUrl）
+let sheetBaseUrl = 'https://docs.google.com';
+
+/**
+ * 修改表格数据源地址（本地测试用）
+ * @param baseUrl - 例如 http://localhost:8787，路径与 Google 相同
+ */
+export function setSheetSourceBaseUrl(baseUrl: string): void {
+    sheetBaseUrl = baseUrl.replace(/\/$/, '');
+}
+
 // CSV 导出 URL 模板
 // 使用 export 格式（实时数据，无缓存）用于已知 gid 的工作表
 // 使用 gviz/tq 格式（可能有缓存延迟）用于未知 gid 的工作表
@@ -18,12 +33,10 @@ const getSheetCSVUrl = (sheetName: string) => {
     const gid = SHEET_GID_MAP[sheetName];
     if (gid !== undefined) {
         // 使用 export 格式（实时，无缓存）- 解决 API Key 缓存问题
-        console.log(`🔗 Using export URL for ${sheetName} (gid=${gid})`);
-        return `https://docs.google.com/spreadsheets/d/${SHEET_ID}/export?format=csv&gid=${gid}`;
+        return `${sheetBaseUrl}/spreadsheets/d/${SHEET_ID}/export?format=csv&gid=${gid}`;
     }
     // 使用 gviz/tq 格式
-    console.log(`🔗 Using gviz/tq URL for ${sheetName}`);
-    return `https://docs.google.com/spreadsheets/d/${SHEET_ID}/gviz/tq?tqx=out:csv&sheet=${encodeURIComponent(sheetName)}`;
+    return `${sheetBaseUrl}/spreadsheets/d/${SHEET_ID}/gviz/tq?tqx=out:csv&sheet=${encodeURIComponent(sheetName)}`;
 };
 
 // 配置类型定义
@@ -58,102 +71,158 @@ export interface AppConfig {
 }
 
 // 缓存配置
-const CACHE_KEY = 'google_sheet_config_cache';
-const CACHE_DURATION_MS = 5 * 60 * 1000; // 5分钟缓存
+// 每个工作表单独缓存（行数据 + ETag / Last-Modified），某个表变化时不影响其他表的缓存。
+// 缓存在 FRESH_DURATION_MS 内直接使用；过期后先返回缓存（stale-while-revalidate），
+// 同时在后台发条件请求重新验证，服务器返回 304 或内容未变时不更新。
+const CACHE_KEY_PREFIX = 'google_sheet_cache:';
+const LEGACY_CACHE_KEY = 'google_sheet_config_cache';
+const FRESH_DURATION_MS = 5 * 60 * 1000; // 5分钟内不重新验证
+
+const SHEET_NAMES = ['config', 'business_lines', 'funnel_thresholds'] as const;
+type SheetName = typeof SHEET_NAMES[number];
+
+interface SheetCacheEntry {
+    rows: Record<string, string>[];
+    etag: string | null;
+    lastModified: string | null;
+    contentHash: string;
+    fetchedAt: number;       // 最近一次验证的时间
+}
 
-/**
- * 解析 CSV 文本（处理引号内的逗号）
- */
-function parseCSV(csvText: string): Record<string, string>[] {
-    const lines = csvText.trim().split('\n');
-    if (lines.length < 2) return [];
-
-    // 解析单行 CSV（处理引号）
-    const parseLine = (line: string): string[] => {
-        const result: string[] = [];
-        let current = '';
-        let inQuotes = false;
-
-        for (let i = 0; i < line.length; i++) {
-            const char = line[i];
-
-            if (char === '"') {
-                if (inQuotes && line[i + 1] === '"') {
-                    current += '"';
-                    i++; // 跳过下一个引号
-                } else {
-                    inQuotes = !inQuotes;
-                }
-            } else if (char === ',' && !inQuotes) {
-                result.push(current.trim());
-                current = '';
-            } else {
-                current += char;
+// localStorage 不可用（Node 测试、隐私模式）时退回内存
+const memoryStorage = new Map<string, string>();
+const storage = {
+    get(key: string): string | null {
+        try {
+            if (typeof localStorage !== 'undefined') return localStorage.getItem(key);
+        } catch {
+            // 忽略
+        }
+        return memoryStorage.get(key) ?? null;
+    },
+    set(key: string, value: string): void {
+        try {
+            if (typeof localStorage !== 'undefined') {
+                localStorage.setItem(key, value);
+                return;
             }
+        } catch {
+            // 忽略
+        }
+        memoryStorage.set(key, value);
+    },
+    remove(key: string): void {
+        try {
+            if (typeof localStorage !== 'undefined') localStorage.removeItem(key);
+        } catch {
+            // 忽略
         }
+        memoryStorage.delete(key);
+    }
+};
 
-        result.push(current.trim());
-        return result;
-    };
+function readSheetCache(sheetName: SheetName): SheetCacheEntry | null {
+    const raw = storage.get(CACHE_KEY_PREFIX + sheetName);
+    if (!raw) return null;
+    try {
+        return JSON.parse(raw) as SheetCacheEntry;
+    } catch {
+        return null;
+    }
+}
 
-    const headers = parseLine(lines[0]);
+function writeSheetCache(sheetName: SheetName, entry: SheetCacheEntry): void {
+    storage.set(CACHE_KEY_PREFIX + sheetName, JSON.stringify(entry));
+}
 
-    return lines.slice(1).map(line => {
-        const values = parseLine(line);
-        const row: Record<string, string> = {};
-        headers.forEach((header, index) => {
-            row[header] = values[index] || '';
-        });
-        return row;
-    });
+interface SheetResult {
+    rows: Record<string, string>[];
+    changed: boolean;
 }
 
+// 同一工作表同时只有一个请求在进行
+const inflight = new Map<SheetName, Promise<SheetResult>>();
+
 /**
- * 获取 Google Sheet 数据
+ * 获取 Google Sheet 数据（条件请求：带上缓存的 ETag / Last-Modified，304 时沿用缓存）
  */
-async function fetchSheetData(sheetName: string): Promise<Record<string, string>[]> {
-    const url = getSheetCSVUrl(sheetName);
+function fetchSheetData(sheetName: SheetName): Promise<SheetResult> {
+    const existing = inflight.get(sheetName);
+    if (existing) return existing;
+
+    const request = (async (): Promise<SheetResult> => {
+        const url = getSheetCSVUrl(sheetName);
+        const cached = readSheetCache(sheetName);
+
+        // 只有服务器曾经返回（并暴露）校验头时才发送条件请求头
+        const headers: Record<string, string> = {};
+        if (cached?.etag) headers['If-None-Match'] = cached.etag;
+        if (cached?.lastModified) headers['If-Modified-Since'] = cached.lastModified;
+
+        try {
+            const response = await fetch(url, { headers, cache: 'no-cache' });
+
+            if (response.status === 304 && cached) {
+                writeSheetCache(sheetName, { ...cached, fetchedAt: Date.now() });
+                debugLog('googleSheetConfig', `[${sheetName}] 304 Not Modified`);
+                return { rows: cached.rows, changed: false };
+            }
+            if (!response.ok) {
+                throw new Error(`Failed to fetch sheet ${sheetName}: ${response.statusText}`);
+            }
 
-    try {
-        const response = await fetch(url);
-        if (!response.ok) {
-            throw new Error(`Failed to fetch sheet ${sheetName}: ${response.statusText}`);
+            // 流式解析响应体，边解码边计算内容哈希（服务器不提供 / 不暴露校验头时用内容判断是否变化）
+            let parsed: string[][];
+            let contentHash: string;
+            if (response.body) {
+                const hasher = createStringHasher();
+                parsed = await parseCsvStream(response.body, chunk => hasher.update(chunk));
+                contentHash = hasher.digest();
+            } else {
+                const text = await response.text();
+                parsed = parseCsvRows(text);
+                contentHash = hashString(text);
+            }
+
+            debugLog('googleSheetConfig', `[${sheetName}] ${parsed.length} CSV rows, hash ${contentHash}`);
+
+            const changed = !cached || cached.contentHash !== contentHash;
+            const rows = changed ? rowsToRecords(parsed) : cached!.rows;
+            writeSheetCache(sheetName, {
+                rows,
+                etag: response.headers.get('ETag'),
+                lastModified: response.headers.get('Last-Modified'),
+                contentHash,
+                fetchedAt: Date.now()
+            });
+            return { rows, changed };
+        } catch (error) {
+            console.error(`Error fetching sheet ${sheetName}:`, error);
+            throw error;
+        } finally {
+            inflight.delete(sheetName);
         }
-        const csvText = await response.text();
-
-        // 调试：输出原始 CSV 文本
-        console.log(`📄 [${sheetName}] Raw CSV from Google Sheet:`);
-        console.log('---RAW CSV START---');
-        console.log(csvText);
-        console.log('---RAW CSV END---');
-
-        return parseCSV(csvText);
-    } catch (error) {
-        console.error(`Error fetching sheet ${sheetName}:`, error);
-        throw error;
-    }
+    })();
+
+    inflight.set(sheetName, request);
+    return request;
 }
 
 /**
  * 加载系统配置
  */
-async function loadSystemConfig(): Promise<SystemConfig> {
-    const rows = await fetchSheetData('config');
-
-    console.log('📊 Raw config data:', rows);
+function buildSystemConfig(rows: Record<string, string>[]): SystemConfig {
+    debugLog('googleSheetConfig', 'Raw config data:', rows);
 
     const configMap = new Map<string, string>();
     rows.forEach(row => {
-        // 打印每一行的键和值，帮助调试
-        console.log('🔍 Config row keys:', Object.keys(row), 'values:', Object.values(row));
         if (row.config_key && row.config_value !== undefined) {
             configMap.set(row.config_key.trim(), String(row.config_value).trim());
-            console.log(`  ✅ Set config: ${row.config_key} = ${row.config_value}`);
         }
     });
 
     const geminiKey = configMap.get('gemini_api_key') || '';
-    console.log('🔑 Gemini API Key from config:', geminiKey ? `${geminiKey.substring(0, 10)}...` : '(empty)');
+    debugLog('googleSheetConfig', '🔑 Gemini API Key from config:', geminiKey ? `${geminiKey.substring(0, 10)}...` : '(empty)');
 
     return {
         defaultDateDays: parseInt(configMap.get('default_date_days') || '7', 10),
@@ -164,10 +233,8 @@ async function loadSystemConfig(): Promise<SystemConfig> {
 /**
  * 加载业务线配置
  */
-async function loadBusinessLines(): Promise<BusinessLineConfig[]> {
-    const rows = await fetchSheetData('business_lines');
-
-    console.log('📊 Raw business_lines data:', rows);
+function buildBusinessLines(rows: Record<string, string>[]): BusinessLineConfig[] {
+    debugLog('googleSheetConfig', 'Raw business_lines data:', rows);
 
     const configs = rows
         .filter(row => row.name) // 过滤空行
@@ -182,17 +249,15 @@ async function loadBusinessLines(): Promise<BusinessLineConfig[]> {
             ruleValue: row.rule_value || ''
         }));
 
-    console.log('✅ Parsed business lines:', configs);
+    debugLog('googleSheetConfig', 'Parsed business lines:', configs);
     return configs;
 }
 
 /**
  * 加载广告层级配置
  */
-async function loadAdLayers(): Promise<AdLayerConfig[]> {
-    // 尝试加载 funnel_thresholds 表（用户创建的表名）
-    const rows = await fetchSheetData('funnel_thresholds');
-
+function buildAdLayers(rows: Record<string, string>[]): AdLayerConfig[] {
+    // funnel_thresholds 表（用户创建的表名）
     return rows
         .filter(row => row.layer) // 过滤空行
         .map(row => ({
@@ -203,50 +268,67 @@ async function loadAdLayers(): Promise<AdLayerConfig[]> {
         }));
 }
 
+function buildAppConfig(rows: Record<SheetName, Record<string, string>[]>, loadedAt: number): AppConfig {
+    return {
+        system: buildSystemConfig(rows.config),
+        businessLines: buildBusinessLines(rows.business_lines),
+        adLayers: buildAdLayers(rows.funnel_thresholds),
+        loadedAt: new Date(loadedAt).toISOString()
+    };
+}
+
+// 并行请求所有工作表（单个表失败但有缓存时沿用缓存）
+async function fetchAllSheets(): Promise<{ config: AppConfig; changed: boolean }> {
+    const results = await Promise.all(SHEET_NAMES.map(async sheetName => {
+        try {
+            return await fetchSheetData(sheetName);
+        } catch (error) {
+            const cached = readSheetCache(sheetName);
+            if (cached) return { rows: cached.rows, changed: false };
+            throw error;
+        }
+    }));
+
+    const rows = {} as Record<SheetName, Record<string, string>[]>;
+    SHEET_NAMES.forEach((sheetName, i) => { rows[sheetName] = results[i].rows; });
+    return { config: buildAppConfig(rows, Date.now()), changed: results.some(result => result.changed) };
+}
+
 /**
- * 加载全部配置（带缓存）
+ * 加载全部配置（stale-while-revalidate）
+ * @param forceRefresh - 立即向服务器重新验证并等待结果
+ * @param onUpdate - 先返回了缓存、后台验证发现配置有变化时回调新配置
  */
-export async function loadAppConfig(forceRefresh = false): Promise<AppConfig> {
-    // 检查缓存
-    if (!forceRefresh) {
-        const cached = localStorage.getItem(CACHE_KEY);
-        if (cached) {
-            try {
-                const config = JSON.parse(cached) as AppConfig;
-                const loadedAt = new Date(config.loadedAt).getTime();
-                const now = Date.now();
-
-                if (now - loadedAt < CACHE_DURATION_MS) {
-                    console.log('📦 Using cached Google Sheet config');
-                    return config;
-                }
-            } catch (e) {
-                console.warn('Failed to parse cached config');
-            }
+export async function loadAppConfig(
+    forceRefresh = false,
+    onUpdate?: (config: AppConfig) => void
+): Promise<AppConfig> {
+    const cachedEntries = SHEET_NAMES.map(readSheetCache);
+
+    if (!forceRefresh && cachedEntries.every(entry => entry !== null)) {
+        const entries = cachedEntries as SheetCacheEntry[];
+        const rows = {} as Record<SheetName, Record<string, string>[]>;
+        SHEET_NAMES.forEach((sheetName, i) => { rows[sheetName] = entries[i].rows; });
+        const oldest = Math.min(...entries.map(entry => entry.fetchedAt));
+        const config = buildAppConfig(rows, oldest);
+
+        if (Date.now() - oldest >= FRESH_DURATION_MS) {
+            debugLog('googleSheetConfig', '📦 Using cached Google Sheet config, revalidating in background');
+            fetchAllSheets()
+                .then(result => {
+                    if (result.changed) {
+                        debugLog('googleSheetConfig', '🔄 Google Sheet config changed');
+                        onUpdate?.(result.config);
+                    }
+                })
+                .catch(error => console.warn('Background config revalidation failed:', error));
         }
+        return config;
     }
 
-    console.log('🔄 Loading config from Google Sheets...');
-
-    // 并行加载所有配置
-    const [system, businessLines, adLayers] = await Promise.all([
-        loadSystemConfig(),
-        loadBusinessLines(),
-        loadAdLayers()
-    ]);
-
-    const config: AppConfig = {
-        system,
-        businessLines,
-        adLayers,
-        loadedAt: new Date().toISOString()
-    };
-
-    // 保存到缓存
-    localStorage.setItem(CACHE_KEY, JSON.stringify(config));
-
-    console.log('✅ Config loaded:', config);
-
+    debugLog('googleSheetConfig', '🔄 Loading config from Google Sheets...');
+    const { config } = await fetchAllSheets();
+    debugLog('googleSheetConfig', '✅ Config loaded');
     return config;
 }
 
@@ -254,11 +336,9 @@ export async function loadAppConfig(forceRefresh = false): Promise<AppConfig> {
  * 清除配置缓存
  */
 export function clearConfigCache(): void {
-    console.log('🗑️ Clearing config cache...');
-    const before = localStorage.getItem(CACHE_KEY);
-    localStorage.removeItem(CACHE_KEY);
-    const after = localStorage.getItem(CACHE_KEY);
-    console.log('🗑️ Cache cleared successfully!', { had: !!before, now: !!after });
+    SHEET_NAMES.forEach(sheetName => storage.remove(CACHE_KEY_PREFIX + sheetName));
+    storage.remove(LEGACY_CACHE_KEY);
+    debugLog('googleSheetConfig', '🗑️ Config cache cleared');
 }
 
 /**
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+super metric 抓取模版 CSV 的分块流式读取
+
+- 按固定行数分块读取，内存占用与文件大小无关
+- 丢弃表格里二次计算的比率列（CPM、CTR、ROI、客单价 ...），
+  这些指标由 calculateMetrics 根据原始计数重新计算
+- 原始计数列走 pandas C 解析器的数值快速路径，#DIV/0! 等错误值直接按缺失处理
+- 每块输出与 ad_data_loader.normalize_records 相同的列式结构
+
+用法:
+    python super_metric_stream.py <CSV 路径> [每块行数]
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from ad_data_loader import (
+    ALL_ALIASES,
+    COLUMN_ALIASES,
+    NAME_FIELDS,
+    NUMERIC_FIELDS,
+    SPREADSHEET_ERRORS,
+    normalize_records,
+)
+
+DEFAULT_CHUNK_ROWS = 200_000
+
+# 模版中由表格公式计算出的派生列（以及报表元信息列），读取时直接跳过
+DERIVED_COLUMNS = {
+    'CPM (cost per 1,000 impressions)',
+    'CTR (link click-through rate)',
+    'CPC (cost per link click)',
+    'ROI',
+    '客单价 (USD)',
+    '转化率',
+    'ATC Rate',
+    'Cost per add to cart',
+    'Cost per landing page view',
+    'Cost per purchase',
+    'Reporting starts',
+    'Reporting ends',
+    'Currency',
+}
+
+RAW_COLUMNS = ALL_ALIASES - DERIVED_COLUMNS
+
+
+def iter_super_metric_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    逐块读取 CSV，产出 RawAdRecord 列式 DataFrame
+
+    只有名称列按字符串读取，其余原始计数列交给 C 解析器推断为 float64；
+    个别块中混入非数值时由 normalize_records 的 to_numeric 兜底。
+    """
+    name_dtypes = {alias: str for field in NAME_FIELDS for alias in COLUMN_ALIASES[field]}
+
+    reader = pd.read_csv(
+        path,
+        usecols=lambda c: c in RAW_COLUMNS,
+        dtype=name_dtypes,
+        na_values=SPREADSHEET_ERRORS,
+        chunksize=chunk_rows,
+        engine='c',
+    )
+    with reader:
+        for raw in reader:
+            chunk = normalize_records(raw, allow_empty=True)
+            if len(chunk) > 0:
+                yield chunk
+
+
+def stream_totals(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    流式汇总整个文件的原始计数
+
+    返回行数、日期范围和各计数字段总和，只保留常数大小的累加器。
+    """
+    totals = {field: 0.0 for field in NUMERIC_FIELDS if field != 'frequency'}
+    rows = 0
+    chunks = 0
+    min_date = None
+    max_date = None
+
+    for chunk in iter_super_metric_chunks(path, chunk_rows):
+        chunks += 1
+        rows += len(chunk)
+        for field in totals:
+            totals[field] += float(chunk[field].to_numpy().sum())
+
+        dates = chunk['date'].values.astype('datetime64[D]')
+        dates = dates[~np.isnat(dates)]
+        if len(dates) > 0:
+            lo, hi = dates.min(), dates.max()
+            min_date = lo if min_date is None or lo < min_date else min_date
+            max_date = hi if max_date is None or hi > max_date else max_date
+
+    return {
+        'rows': rows,
+        'chunks': chunks,
+        'start_date': str(min_date) if min_date is not None else None,
+        'end_date': str(max_date) if max_date is not None else None,
+        'totals': totals,
+    }
+
+
+def _peak_memory_mb():
+    try:
+        import resource
+    except ImportError:  # Windows 下没有 resource 模块
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 返回字节，Linux 返回 KB
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+if __name__ == '__main__':
+    import time
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    file_path = sys.argv[1]
+    chunk_rows = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_CHUNK_ROWS
+
+    try:
+        start = time.perf_counter()
+        summary = stream_totals(file_path, chunk_rows)
+        elapsed = time.perf_counter() - start
+
+        print(f"✅ {summary['rows']} rows in {summary['chunks']} chunks ({elapsed:.2f}s)")
+        print(f"📅 {summary['start_date']} ~ {summary['end_date']}")
+        for field, value in summary['totals'].items():
+            print(f'  {field}: {value:,.2f}')
+
+        peak = _peak_memory_mb()
+        if peak is not None:
+            print(f'🧠 Peak RSS: {peak:.1f} MB')
+    except Exception as e:
+        print(f'Error: {e}')
+        sys.exit(1)
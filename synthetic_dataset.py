@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+合成大体量导出数据（用于性能基准测试）
+
+以仓库自带的 super metric 模版 CSV 为样本，按其表结构和取值分布生成任意行数的数据集：
+- Campaign / AdSet / Ad 层级按样本整体复制：每个副本给 Campaign 和 AdSet 名称加后缀，
+  Ad 名称保持不变（同一素材在多个 Campaign 中复用），每个 Campaign 的 AdSet 数、
+  每个 AdSet 的 Ad 数与样本一致
+- 日期跨度随行数增长；每个 Ad 在一段连续日期内投放，投放天数占比取自样本中该 Ad 的出现天数
+- 每行的计数指标从样本中同一 Ad 的某一天抽样，再整体乘以对数正态扰动和周内波动，
+  漏斗各环节同比例缩放，比率指标由计数重新计算
+- 输出与样本相同的表头（含派生比率列，分母为 0 时写 #DIV/0!），按日期分块写入，内存占用恒定
+
+用法:
+    python synthetic_dataset.py [--rows 100000,1000000,10000000] [--days N] [--out 目录] [--seed N]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from ad_data_loader import load_ad_data
+from hierarchy_kernel import factorize_hierarchy
+
+SAMPLE_CSV = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    '1111Copy of Meta广告数据上传模版（super metric抓取） - Sheet1.csv',
+)
+
+DEFAULT_ROWS = (100_000, 1_000_000, 10_000_000)
+DEFAULT_OUT_DIR = 'bench_data'
+
+# 与样本 CSV 相同的表头顺序
+HEADER = [
+    'Campaign name', 'Ad set name', 'Ad name', 'day', 'Cost', 'Reach', 'Impressions', 'Frequency',
+    'Link clicks', 'Website purchases', 'Purchase conversion value', 'Website adds to cart',
+    'Landing page views', 'Video watches at 100%', 'Website checkouts initiated',
+    'CPM (cost per 1,000 impressions)', 'CTR (link click-through rate)', 'CPC (cost per link click)',
+    'ROI', '客单价 (USD)', '转化率', 'ATC Rate', 'Cost per add to cart', 'Cost per landing page view',
+    'Cost per purchase', 'Reporting starts', 'Reporting ends', 'Currency',
+]
+
+# 计数字段 -> 表头
+COUNTER_COLUMNS = {
+    'reach': 'Reach',
+    'impressions': 'Impressions',
+    'link_clicks': 'Link clicks',
+    'purchases': 'Website purchases',
+    'adds_to_cart': 'Website adds to cart',
+    'landing_page_views': 'Landing page views',
+    'checkouts_initiated': 'Website checkouts initiated',
+}
+
+# 每行扰动：对数正态标准差、周内波动幅度
+NOISE_SIGMA = 0.35
+WEEKLY_AMPLITUDE = 0.15
+
+
+def default_days(rows, sample_days):
+    """按行数选择日期跨度：10 万行约 2 个月，100 万行约半年，1000 万行一年"""
+    if rows <= 10_000:
+        return sample_days
+    if rows <= 100_000:
+        return 60
+    if rows <= 1_000_000:
+        return 180
+    return 365
+
+
+class SampleModel:
+    """从样本数据提取的层级结构和逐行取值"""
+
+    def __init__(self, df):
+        row_codes, entities, names = factorize_hierarchy(df)
+        ad_codes = row_codes['ad']
+        self.n_ads = len(entities['ad']['parent'])
+
+        # 按 Ad 排列的样本行（CSR：offsets[i]:offsets[i+1] 为第 i 个 Ad 的行）
+        order = np.argsort(ad_codes, kind='stable')
+        counts = np.bincount(ad_codes, minlength=self.n_ads)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.counts = counts
+
+        self.values = {field: df[field].to_numpy(dtype=np.float64)[order]
+                       for field in ('spend', 'purchase_value', *COUNTER_COLUMNS)}
+
+        dates = df['date'].values.astype('datetime64[D]')
+        valid = dates[~np.isnat(dates)]
+        self.first_day = valid.min()
+        self.last_day = valid.max()
+        self.days = int((self.last_day - self.first_day).astype(np.int64)) + 1
+        # 每个 Ad 的投放天数占比
+        self.activity = np.minimum(counts / self.days, 1.0)
+
+        ad = entities['ad']
+        self.campaign_names = np.asarray(names['campaign_name'], dtype=object)[ad['campaign_name']]
+        self.adset_names = np.asarray(names['adset_name'], dtype=object)[ad['adset_name']]
+        self.ad_names = np.asarray(names['ad_name'], dtype=object)[ad['ad_name']]
+        self.n_campaigns = len(entities['campaign']['campaign_name'])
+        self.n_adsets = len(entities['adset']['parent'])
+
+
+class SyntheticPlan:
+    """目标数据集的 Ad 列表：模板 Ad、副本编号和投放区间"""
+
+    def __init__(self, model, rows, days, rng):
+        self.model = model
+        self.days = days
+        self.end_day = model.last_day
+        self.start_day = model.last_day - np.timedelta64(days - 1, 'D')
+
+        # 每个副本的期望行数 = Σ 投放占比 × 天数
+        rows_per_replica = max(float(model.activity.sum()) * days, 1.0)
+        self.replicas = max(int(np.ceil(rows / rows_per_replica)), 1)
+
+        n = model.n_ads * self.replicas
+        self.template = np.tile(np.arange(model.n_ads), self.replicas)
+        self.replica = np.repeat(np.arange(self.replicas), model.n_ads)
+
+        # 连续投放区间：长度取自模板 Ad 的投放占比，起始日随机
+        duration = np.clip(np.rint(model.activity[self.template] * days), 1, days).astype(np.int64)
+        self.start = rng.integers(0, days - duration + 1)
+        self.stop = self.start + duration
+
+        # 总行数超出目标时，按比例随机停投一部分 Ad-日
+        self.keep_probability = min(rows / float(duration.sum()), 1.0)
+
+        suffix = np.char.add('-S', np.char.zfill(self.replica.astype(str), 4)).astype(object)
+        first = self.replica == 0
+        self.campaign_names = np.where(first, model.campaign_names[self.template],
+                                       model.campaign_names[self.template] + suffix)
+        self.adset_names = np.where(first, model.adset_names[self.template],
+                                    model.adset_names[self.template] + suffix)
+        self.ad_names = model.ad_names[self.template]
+        self.n_ads = n
+
+    def cardinalities(self):
+        return {
+            'campaigns': self.model.n_campaigns * self.replicas,
+            'adsets': self.model.n_adsets * self.replicas,
+            'ads': self.n_ads,
+            'days': self.days,
+        }
+
+
+def _ratio(num, den, scale=1.0):
+    out = np.full(len(num), '#DIV/0!', dtype=object)
+    valid = den > 0
+    out[valid] = np.round(num[valid] * scale / den[valid], 6)
+    return out
+
+
+def _counter_text(values):
+    """与样本一致：为 0 的转化计数留空"""
+    out = values.astype(np.int64).astype(str).astype(object)
+    out[values == 0] = ''
+    return out
+
+
+def day_frame(plan, day_index, rng):
+    """生成单日的数据块"""
+    model = plan.model
+    active = np.flatnonzero((plan.start <= day_index) & (day_index < plan.stop))
+    if plan.keep_probability < 1.0:
+        active = active[rng.random(len(active)) < plan.keep_probability]
+    if len(active) == 0:
+        return None
+
+    template = plan.template[active]
+    # 从模板 Ad 的样本行中随机抽取一天
+    picks = model.offsets[template] + rng.integers(0, model.counts[template])
+
+    weekday = (plan.start_day + np.timedelta64(day_index, 'D')).astype('datetime64[D]').astype(np.int64) % 7
+    scale = rng.lognormal(0.0, NOISE_SIGMA, len(active)) * (1 + WEEKLY_AMPLITUDE * np.sin(2 * np.pi * weekday / 7))
+
+    spend = np.round(model.values['spend'][picks] * scale, 2)
+    revenue = np.round(model.values['purchase_value'][picks] * scale, 2)
+    counters = {field: np.rint(model.values[field][picks] * scale) for field in COUNTER_COLUMNS}
+    # 缩放后保持 Reach <= Impressions
+    counters['reach'] = np.minimum(counters['reach'], counters['impressions'])
+
+    impressions = counters['impressions']
+    clicks = counters['link_clicks']
+    purchases = counters['purchases']
+    atc = counters['adds_to_cart']
+    lpv = counters['landing_page_views']
+    date_text = str(plan.start_day + np.timedelta64(day_index, 'D'))
+
+    columns = {
+        'Campaign name': plan.campaign_names[active],
+        'Ad set name': plan.adset_names[active],
+        'Ad name': plan.ad_names[active],
+        'day': np.full(len(active), date_text, dtype=object),
+        'Cost': spend,
+        'Reach': counters['reach'].astype(np.int64),
+        'Impressions': impressions.astype(np.int64),
+        'Frequency': _ratio(impressions, counters['reach']),
+        'Link clicks': _counter_text(clicks),
+        'Website purchases': _counter_text(purchases),
+        'Purchase conversion value': np.where(revenue > 0, revenue.astype(str), '').astype(object),
+        'Website adds to cart': _counter_text(atc),
+        'Landing page views': _counter_text(lpv),
+        'Video watches at 100%': '',
+        'Website checkouts initiated': _counter_text(counters['checkouts_initiated']),
+        'CPM (cost per 1,000 impressions)': _ratio(spend, impressions, 1000.0),
+        'CTR (link click-through rate)': _ratio(clicks, impressions),
+        'CPC (cost per link click)': _ratio(spend, clicks),
+        'ROI': _ratio(revenue, spend),
+        '客单价 (USD)': _ratio(revenue, purchases),
+        '转化率': _ratio(purchases, clicks),
+        'ATC Rate': _ratio(atc, clicks),
+        'Cost per add to cart': _ratio(spend, atc),
+        'Cost per landing page view': _ratio(spend, lpv),
+        'Cost per purchase': _ratio(spend, purchases),
+        'Reporting starts': '',
+        'Reporting ends': '',
+        'Currency': '',
+    }
+    return pd.DataFrame(columns, columns=HEADER)
+
+
+def generate(rows, out_path, days=None, seed=42, sample_path=SAMPLE_CSV):
+    """
+    生成约 rows 行的数据集并写入 out_path
+
+    返回 {'rows', 'campaigns', 'adsets', 'ads', 'days', 'start', 'end', 'path'}
+    """
+    rng = np.random.default_rng(seed)
+    model = SampleModel(load_ad_data(sample_path))
+    plan = SyntheticPlan(model, rows, days or default_days(rows, model.days), rng)
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    written = 0
+    with open(out_path, 'w', encoding='utf-8', newline='') as f:
+        f.write(','.join(f'"{h}"' if ',' in h else h for h in HEADER) + '\n')
+        for day_index in range(plan.days):
+            frame = day_frame(plan, day_index, rng)
+            if frame is None:
+                continue
+            frame.to_csv(f, header=False, index=False)
+            written += len(frame)
+
+    return {
+        'rows': written,
+        **plan.cardinalities(),
+        'start': str(plan.start_day),
+        'end': str(plan.end_day),
+        'path': out_path,
+    }
+
+
+def _row_label(rows):
+    if rows % 1_000_000 == 0:
+        return f'{rows // 1_000_000}m'
+    if rows % 1_000 == 0:
+        return f'{rows // 1_000}k'
+    return str(rows)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print(__doc__)
+        sys.exit(0)
+
+    sizes = ([int(float(v)) for v in args[args.index('--rows') + 1].split(',')]
+             if '--rows' in args else list(DEFAULT_ROWS))
+    days = int(args[args.index('--days') + 1]) if '--days' in args else None
+    out_dir = args[args.index('--out') + 1] if '--out' in args else DEFAULT_OUT_DIR
+    seed = int(args[args.index('--seed') + 1]) if '--seed' in args else 42
+
+    try:
+        for rows in sizes:
+            start = time.perf_counter()
+            info = generate(rows, os.path.join(out_dir, f'synthetic_{_row_label(rows)}.csv'), days, seed)
+            elapsed = time.perf_counter() - start
+            print(f"✅ {info['path']}: {info['rows']:,} rows, {info['campaigns']:,} campaigns, "
+                  f"{info['adsets']:,} adsets, {info['ads']:,} ads")
+            print(f"   📅 {info['start']} ~ {info['end']} ({info['days']} days) ⏱️ {elapsed:.1f}s")
+    except Exception as e:
+        print(f'Error: {e}')
+        sys.exit(1)
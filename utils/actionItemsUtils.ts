@@ -2,7 +2,9 @@ import { RawAdRecord, AdConfiguration } from '../types';
 import { QuadrantThresholds } from './quadrantUtils';
 import { calculateBenchmarkROI, calculatePriority } from './priorityUtils';
 import { diagnoseAd, convertToAdDiagnosticDetail, AdDiagnosticContext } from './adDiagnostics';
-import { calculateLayerBenchmarks, getBenchmarkForKPI } from './benchmarkService';
+import { calculateLayerBenchmarksFor, getBenchmarkForKPI } from './benchmarkService';
+import { getMembershipIndex } from './ruleEngine';
+import { recordAnomaly } from './instrumentation';
 import { LayerConfiguration } from '../types';
 
 // Action Item 类型定义
@@ -177,37 +179,15 @@ const calculateGapPercentage = (actual: number, target: number): number => {
     return ((actual - target) / target) * 100;
 };
 
-// 检查记录是否匹配配置规则
-const matchesConfig = (record: RawAdRecord, config: AdConfiguration): boolean => {
-    if (!config.rules || config.rules.length === 0) return false;
-
-    const rulesLogic = config.rulesLogic || 'AND';
-    const ruleResults = config.rules.map(rule => {
-        const recordValue = record[rule.field as keyof RawAdRecord];
-        if (typeof recordValue === 'string') {
-            if (rule.operator === 'contains') return recordValue.includes(rule.value);
-            if (rule.operator === 'equals') return recordValue === rule.value;
-            if (rule.operator === 'startsWith') return recordValue.startsWith(rule.value);
-        }
-        return false;
-    });
-
-    return rulesLogic === 'AND'
-        ? ruleResults.every(r => r)
-        : ruleResults.some(r => r);
-};
-
 // 辅助函数：计算对比周期的 Spend
+// comparisonRecords 为对比周期中已命中当前业务线的记录（来自成员索引，区分大小写的 'exact' 语义）
 const getComparisonSpend = (
-    comparisonData: RawAdRecord[] | undefined,
-    config: AdConfiguration,
+    comparisonRecords: RawAdRecord[] | undefined,
     filterFn: (r: RawAdRecord) => boolean
 ): number | undefined => {
-    if (!comparisonData || comparisonData.length === 0) return undefined;
+    if (!comparisonRecords || comparisonRecords.length === 0) return undefined;
 
-    const matchingRecords = comparisonData.filter(r =>
-        matchesConfig(r, config) && filterFn(r)
-    );
+    const matchingRecords = comparisonRecords.filter(filterFn);
 
     return matchingRecords.length > 0
         ? matchingRecords.reduce((sum, r) => sum + r.spend, 0)
@@ -216,16 +196,13 @@ const getComparisonSpend = (
 
 // 辅助函数：计算对比周期的 KPI 值
 const getComparisonKPI = (
-    comparisonData: RawAdRecord[] | undefined,
-    config: AdConfiguration,
+    comparisonRecords: RawAdRecord[] | undefined,
     filterFn: (r: RawAdRecord) => boolean,
     kpiType: 'ROI' | 'CPC' | 'CPM'
 ): number | undefined => {
-    if (!comparisonData || comparisonData.length === 0) return undefined;
+    if (!comparisonRecords || comparisonRecords.length === 0) return undefined;
 
-    const matchingRecords = comparisonData.filter(r =>
-        matchesConfig(r, config) && filterFn(r)
-    );
+    const matchingRecords = comparisonRecords.filter(filterFn);
 
     return matchingRecords.length > 0
         ? calculateKPI(matchingRecords, kpiType)
@@ -234,15 +211,12 @@ const getComparisonKPI = (
 
 // 辅助函数：计算对比周期的中间指标
 const getComparisonMetrics = (
-    comparisonData: RawAdRecord[] | undefined,
-    config: AdConfiguration,
+    comparisonRecords: RawAdRecord[] | undefined,
     filterFn: (r: RawAdRecord) => boolean
 ): IntermediateMetrics | undefined => {
-    if (!comparisonData || comparisonData.length === 0) return undefined;
+    if (!comparisonRecords || comparisonRecords.length === 0) return undefined;
 
-    const matchingRecords = comparisonData.filter(r =>
-        matchesConfig(r, config) && filterFn(r)
-    );
+    const matchingRecords = comparisonRecords.filter(filterFn);
 
     return matchingRecords.length > 0
         ? calculateMetrics(matchingRecords)
@@ -255,7 +229,8 @@ export const generateActionItems = (
     configs: AdConfiguration[],
     businessLineThresholds: Map<string, QuadrantThresholds>,
     layerConfig: LayerConfiguration,
-    comparisonData?: RawAdRecord[]
+    comparisonData?: RawAdRecord[],
+    onProgress?: (done: number, total: number) => void
 ): ActionItemsResult => {
     const campaigns: ActionCampaign[] = [];
     const adSets: ActionAdSet[] = [];
@@ -311,8 +286,15 @@ export const generateActionItems = (
         : undefined;
     // ============ 全局 Ad 平均值计算结束 ============
 
+    // 业务线成员索引：一次扫描得到每个业务线命中的记录
+    const membership = getMembershipIndex(data, configs, 'exact');
+    const comparisonMembership = comparisonData && comparisonData.length > 0
+        ? getMembershipIndex(comparisonData, configs, 'exact')
+        : null;
+
     // 遍历每个业务线配置
-    configs.forEach(config => {
+    configs.forEach((config, configIndex) => {
+        onProgress?.(configIndex, configs.length);
         const kpiType = config.targetType;
         const businessLine = config.name;
         const businessLineId = config.id;
@@ -320,7 +302,7 @@ export const generateActionItems = (
         // 获取该业务线的阈值（从 Business Line 页面传递过来的）
         const thresholds = businessLineThresholds.get(businessLineId);
         if (!thresholds) {
-            console.warn(`No thresholds found for business line: ${businessLine}`);
+            recordAnomaly('generateActionItems', 'No thresholds found for business line', businessLine);
             return;
         }
 
@@ -328,14 +310,15 @@ export const generateActionItems = (
         const avgSpend = thresholds.spendThreshold; // 使用调整后的 Spend 阈值
 
         // 筛选匹配该业务线的数据
-        const matchingData = data.filter(r => matchesConfig(r, config));
+        const matchingData = membership.records(configIndex);
         if (matchingData.length === 0) return;
+        const comparisonRecords = comparisonMembership?.records(configIndex);
 
         // 计算该业务线的平均 KPI (不再使用简单的 avgKPI，而是根据层级计算)
         // const avgKPI = calculateKPI(matchingData, kpiType);
 
-        // 计算 Layer Benchmarks (使用当前业务线的数据)
-        const layerBenchmarks = calculateLayerBenchmarks(matchingData, layerConfig);
+        // 计算 Layer Benchmarks (使用当前业务线的数据；日期切片时由按天统计合并，不重新扫描记录)
+        const layerBenchmarks = calculateLayerBenchmarksFor(data, configs, configIndex, 'exact', layerConfig);
 
         // 获取当前 KPI 类型的 Benchmark
         const benchmarkValue = getBenchmarkForKPI(kpiType, layerBenchmarks);
@@ -376,23 +359,20 @@ export const generateActionItems = (
 
             // 计算对比周期的 Spend
             const campaignLastSpend = getComparisonSpend(
-                comparisonData,
-                config,
+                comparisonRecords,
                 r => r.campaign_name === campaignName
             );
 
             // 计算对比周期的 KPI 值
             const campaignLastValue = getComparisonKPI(
-                comparisonData,
-                config,
+                comparisonRecords,
                 r => r.campaign_name === campaignName,
                 kpiType
             );
 
             // 计算对比周期的中间指标
             const campaignLastMetrics = getComparisonMetrics(
-                comparisonData,
-                config,
+                comparisonRecords,
                 r => r.campaign_name === campaignName
             );
 
@@ -454,23 +434,20 @@ export const generateActionItems = (
 
                     // 计算对比周期的 Spend
                     const adSetLastSpend = getComparisonSpend(
-                        comparisonData,
-                        config,
+                        comparisonRecords,
                         r => r.campaign_name === campaignName && r.adset_name === adSetName
                     );
 
                     // 计算对比周期的 KPI 值
                     const adSetLastValue = getComparisonKPI(
-                        comparisonData,
-                        config,
+                        comparisonRecords,
                         r => r.campaign_name === campaignName && r.adset_name === adSetName,
                         kpiType
                     );
 
                     // 计算对比周期的中间指标
                     const adSetLastMetrics = getComparisonMetrics(
-                        comparisonData,
-                        config,
+                        comparisonRecords,
                         r => r.campaign_name === campaignName && r.adset_name === adSetName
                     );
 
@@ -537,23 +514,20 @@ export const generateActionItems = (
 
             // 计算对比周期的 Spend
             const adLastSpend = getComparisonSpend(
-                comparisonData,
-                config,
+                comparisonRecords,
                 r => r.campaign_name === campaignName && r.adset_name === adSetName && r.ad_name === adName
             );
 
             // 计算对比周期的 KPI 值
             const adLastValue = getComparisonKPI(
-                comparisonData,
-                config,
+                comparisonRecords,
                 r => r.campaign_name === campaignName && r.adset_name === adSetName && r.ad_name === adName,
                 kpiType
             );
 
             // 计算对比周期的中间指标
             const adLastMetrics = getComparisonMetrics(
-                comparisonData,
-                config,
+                comparisonRecords,
                 r => r.campaign_name === campaignName && r.adset_name === adSetName && r.ad_name === adName
             );
 
@@ -692,6 +666,7 @@ export const generateActionItems = (
         return b.gapPercentage - a.gapPercentage;
     });
 
+    onProgress?.(configs.length, configs.length);
     return { campaigns, adSets, ads };
 };
 
@@ -796,8 +771,14 @@ export const generateNewAudienceActionItems = (
 
     const endDateObj = new Date(endDate);
 
+    // 业务线成员索引：一次扫描得到每个业务线命中的记录
+    const membership = getMembershipIndex(data, configs, 'exact');
+    const comparisonMembership = comparisonData && comparisonData.length > 0
+        ? getMembershipIndex(comparisonData, configs, 'exact')
+        : null;
+
     // 遍历每个业务线配置
-    configs.forEach(config => {
+    configs.forEach((config, configIndex) => {
         const kpiType = config.targetType;
         const businessLine = config.name;
         const businessLineId = config.id;
@@ -805,15 +786,16 @@ export const generateNewAudienceActionItems = (
         // 获取该业务线的阈值（从 Business Line 页面传递过来的）
         const thresholds = businessLineThresholds.get(businessLineId);
         if (!thresholds) {
-            console.warn(`No thresholds found for business line: ${businessLine}`);
+            recordAnomaly('generateNewAudienceActionItems', 'No thresholds found for business line', businessLine);
             return;
         }
 
         const targetValue = thresholds.kpiThreshold; // 使用调整后的 KPI 阈值
 
         // 筛选匹配该业务线的数据
-        const matchingData = data.filter(r => matchesConfig(r, config));
+        const matchingData = membership.records(configIndex);
         if (matchingData.length === 0) return;
+        const comparisonRecords = comparisonMembership?.records(configIndex);
 
         // 计算该业务线的平均 KPI
         const avgKPI = calculateKPI(matchingData, kpiType);
@@ -866,23 +848,20 @@ export const generateNewAudienceActionItems = (
 
             // 计算对比周期的 Spend
             const adSetLastSpend = getComparisonSpend(
-                comparisonData,
-                config,
+                comparisonRecords,
                 r => r.adset_name === adSetName
             );
 
             // 计算对比周期的 KPI 值
             const adSetLastValue = getComparisonKPI(
-                comparisonData,
-                config,
+                comparisonRecords,
                 r => r.adset_name === adSetName,
                 kpiType
             );
 
             // 计算对比周期的中间指标
             const adSetLastMetrics = getComparisonMetrics(
-                comparisonData,
-                config,
+                comparisonRecords,
                 r => r.adset_name === adSetName
             );
 
@@ -931,23 +910,20 @@ export const generateNewAudienceActionItems = (
 
                 // 计算对比周期的 Spend
                 const adLastSpend = getComparisonSpend(
-                    comparisonData,
-                    config,
+                    comparisonRecords,
                     r => r.adset_name === adSetName && r.ad_name === adName
                 );
 
                 // 计算对比周期的 KPI 值
                 const adLastValue = getComparisonKPI(
-                    comparisonData,
-                    config,
+                    comparisonRecords,
                     r => r.adset_name === adSetName && r.ad_name === adName,
                     kpiType
                 );
 
                 // 计算对比周期的中间指标
                 const adLastMetrics = getComparisonMetrics(
-                    comparisonData,
-                    config,
+                    comparisonRecords,
                     r => r.adset_name === adSetName && r.ad_name === adName
                 );
 
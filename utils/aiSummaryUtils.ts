@@ -13,6 +13,7 @@ export interface DiagnosticDetail {
     scenario: string;
     diagnosis: string;
     action: string;
+    spend?: number;     // 所属 Campaign 的花费（用于 Prompt 中排序）
 }
 
 /**
@@ -419,7 +420,8 @@ export function generateDataSummary(
                 priority: normalizePriority(campaign?.priority),
                 scenario: diag.scenario,
                 diagnosis: diag.diagnosis,
-                action: diag.action
+                action: diag.action,
+                spend: campaign?.spend || 0
             });
         });
     });
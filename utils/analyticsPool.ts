@@ -0,0 +1,286 @@
+import { RawAdRecord } from '../types';
+import { getDateRangeOrigin } from './dataUtils';
+import { getColumnarDataset, cloneColumnar, transferList, ColumnarDataset } from './columnarStore';
+import {
+    runTask,
+    AnalyticsTask,
+    AnalyticsTaskInputs,
+    AnalyticsTaskResult,
+    DatasetRange,
+    ProgressCallback,
+    WorkerRequest,
+    WorkerResponse
+} from '../workers/analyticsTasks';
+import { addCount, recordAnomaly, startStage } from './instrumentation';
+import { artifactKey, loadArtifact, saveArtifact, setContentKey } from './persistentCache';
+
+// 分析任务的 Worker 池
+//
+// - 记录数组以列式缓冲区（transferable）发给 Worker，每个 Worker 缓存最近用过的数据集，
+//   同一份数据只发送一次；任务优先分配给已经持有所需数据集的空闲 Worker
+// - 日期切片（dataUtils.sliceDateRangeOf）只发送源数据集与天序号范围，由 Worker 重新切片，
+//   切换日期范围不必重新传输，Worker 内按天预聚合的结果（如层级基准的日统计）也能继续复用
+// - 通过 AbortSignal 取消：排队中的任务直接移除，运行中的任务终止所在 Worker 并重建
+// - 不支持 Worker 的环境（如 Node 基准测试）回退到主线程执行
+// - 数据集来自上传文件（有内容键）时，结果按 数据集键 + 参数指纹 缓存在 IndexedDB 中
+
+const MAX_WORKERS = 4;
+const MAX_DATASETS_PER_WORKER = 4;
+
+interface Job {
+    id: number;
+    task: AnalyticsTask;
+    input: any;
+    datasets: RawAdRecord[][];
+    onProgress?: ProgressCallback;
+    signal?: AbortSignal;
+    resolve: (result: any) => void;
+    reject: (error: Error) => void;
+    endStage: () => number;
+}
+
+interface Slot {
+    worker: Worker;
+    job: Job | null;
+    datasetKeys: number[];   // 最近使用的在前
+}
+
+export interface RunOptions {
+    datasets?: RawAdRecord[][];
+    onProgress?: ProgressCallback;
+    signal?: AbortSignal;
+}
+
+const datasetKeys = new WeakMap<RawAdRecord[], number>();
+let nextDatasetKey = 1;
+let nextJobId = 1;
+
+const slots: Slot[] = [];
+const queue: Job[] = [];
+
+const createAbortError = (): Error => {
+    const error = new Error('分析任务已取消');
+    error.name = 'AbortError';
+    return error;
+};
+
+/** 是否为取消导致的错误 */
+export const isAbortError = (error: unknown): boolean =>
+    error instanceof Error && error.name === 'AbortError';
+
+const poolSize = (): number => {
+    const cores = typeof navigator !== 'undefined' && navigator.hardwareConcurrency ? navigator.hardwareConcurrency : 2;
+    return Math.max(1, Math.min(cores - 1, MAX_WORKERS));
+};
+
+const getDatasetKey = (data: RawAdRecord[]): number => {
+    let key = datasetKeys.get(data);
+    if (key === undefined) {
+        key = nextDatasetKey++;
+        datasetKeys.set(data, key);
+    }
+    return key;
+};
+
+// 任务实际发送的数据集：日期切片换成其源数据集 + 天序号范围
+const toTransfer = (data: RawAdRecord[]): { source: RawAdRecord[]; range: DatasetRange } => {
+    const origin = getDateRangeOrigin(data);
+    return origin
+        ? { source: origin.source, range: { startDay: origin.startDay, endDay: origin.endDay } }
+        : { source: data, range: null };
+};
+
+// 每个数据集只转换一次（与界面共用 getColumnarDataset 的缓存），发送时转移一份副本
+const getEncoded = (data: RawAdRecord[]): ColumnarDataset => cloneColumnar(getColumnarDataset(data));
+
+const createSlot = (): Slot => {
+    const worker = new Worker(new URL('../workers/analyticsWorker.ts', import.meta.url), { type: 'module' });
+    const slot: Slot = { worker, job: null, datasetKeys: [] };
+    worker.onmessage = (event: MessageEvent<WorkerResponse>) => handleMessage(slot, event.data);
+    worker.onerror = (event) => {
+        event.preventDefault();
+        const job = slot.job;
+        replaceSlot(slot);
+        if (job) finishJob(job, () => job.reject(new Error(event.message || 'Worker 执行失败')));
+    };
+    return slot;
+};
+
+// 终止 Worker（取消运行中的任务 / Worker 崩溃）并换上新的
+const replaceSlot = (slot: Slot) => {
+    slot.worker.terminate();
+    const index = slots.indexOf(slot);
+    if (index >= 0) slots[index] = createSlot();
+};
+
+const finishJob = (job: Job, settle: () => void) => {
+    job.endStage();
+    settle();
+    dispatch();
+};
+
+const handleMessage = (slot: Slot, message: WorkerResponse) => {
+    const job = slot.job;
+    if (!job || job.id !== message.id) return;
+
+    if (message.kind === 'progress') {
+        job.onProgress?.(message.done, message.total);
+        return;
+    }
+
+    slot.job = null;
+    if (message.kind === 'result') {
+        finishJob(job, () => job.resolve(message.result));
+    } else {
+        recordAnomaly('analyticsPool', `${job.task} 执行失败`, message.message);
+        finishJob(job, () => job.reject(new Error(message.message)));
+    }
+};
+
+const post = (slot: Slot, message: WorkerRequest, transfer: ArrayBuffer[] = []) => {
+    slot.worker.postMessage(message, transfer);
+};
+
+const startJob = (slot: Slot, job: Job) => {
+    slot.job = job;
+    const transfers = job.datasets.map(toTransfer);
+    const keys = transfers.map(t => getDatasetKey(t.source));
+
+    transfers.forEach(({ source: data }, i) => {
+        const key = keys[i];
+        const position = slot.datasetKeys.indexOf(key);
+        if (position >= 0) {
+            slot.datasetKeys.splice(position, 1);
+        } else {
+            const records = getEncoded(data);
+            post(slot, { kind: 'dataset', key, records }, transferList(records));
+            addCount('analyticsPool', 'datasetTransfers');
+        }
+        slot.datasetKeys.unshift(key);
+    });
+
+    // 超出缓存上限时释放最久未用的数据集
+    while (slot.datasetKeys.length > Math.max(MAX_DATASETS_PER_WORKER, keys.length)) {
+        post(slot, { kind: 'drop', key: slot.datasetKeys.pop()! });
+    }
+
+    post(slot, {
+        kind: 'run',
+        id: job.id,
+        task: job.task,
+        input: job.input,
+        datasetKeys: keys,
+        datasetRanges: transfers.map(t => t.range)
+    });
+};
+
+const dispatch = () => {
+    while (queue.length > 0) {
+        const idle = slots.filter(slot => !slot.job);
+        if (idle.length === 0 && slots.length < poolSize()) {
+            const slot = createSlot();
+            slots.push(slot);
+            idle.push(slot);
+        }
+        if (idle.length === 0) return;
+
+        // 优先：已持有数据集的空闲 Worker
+        const job = queue.shift()!;
+        const keys = job.datasets.map(data => getDatasetKey(toTransfer(data).source));
+        const slot = idle.find(s => keys.every(key => s.datasetKeys.includes(key))) || idle[0];
+        startJob(slot, job);
+    }
+};
+
+const cancelJob = (job: Job) => {
+    const queued = queue.indexOf(job);
+    if (queued >= 0) {
+        queue.splice(queued, 1);
+        job.endStage();
+        job.reject(createAbortError());
+        return;
+    }
+    const slot = slots.find(s => s.job === job);
+    if (slot) {
+        slot.job = null;
+        replaceSlot(slot);
+        addCount('analyticsPool', 'cancelled');
+        finishJob(job, () => job.reject(createAbortError()));
+    }
+};
+
+const executeTask = <T extends AnalyticsTask>(
+    task: T,
+    input: AnalyticsTaskInputs[T],
+    options: RunOptions = {}
+): Promise<AnalyticsTaskResult<T>> => {
+    const { datasets = [], onProgress, signal } = options;
+    if (signal?.aborted) return Promise.reject(createAbortError());
+
+    // 回退：主线程执行（让出一次事件循环，便于先渲染加载状态）
+    if (typeof Worker === 'undefined') {
+        return new Promise((resolve, reject) => {
+            setTimeout(() => {
+                if (signal?.aborted) return reject(createAbortError());
+                const end = startStage(`task:${task}`);
+                try {
+                    resolve(runTask(task, input, datasets, (done, total) => onProgress?.(done, total)));
+                } catch (err) {
+                    reject(err instanceof Error ? err : new Error(String(err)));
+                } finally {
+                    end();
+                }
+            }, 0);
+        });
+    }
+
+    return new Promise((resolve, reject) => {
+        const job: Job = {
+            id: nextJobId++,
+            task,
+            input,
+            datasets,
+            onProgress,
+            signal,
+            resolve,
+            reject,
+            endStage: startStage(`task:${task}`)
+        };
+        signal?.addEventListener('abort', () => cancelJob(job), { once: true });
+        queue.push(job);
+        dispatch();
+    });
+};
+
+/**
+ * 在 Worker 池中执行分析任务；数据集来自上传文件时结果持久化缓存（见 persistentCache.ts）
+ * @param task - 任务名（见 workers/analyticsTasks.ts）
+ * @param input - 任务参数（结构化克隆）
+ * @param options - datasets 任务用到的记录数组、onProgress 进度回调、signal 取消信号
+ * @returns 任务结果
+ */
+export const runAnalyticsTask = async <T extends AnalyticsTask>(
+    task: T,
+    input: AnalyticsTaskInputs[T],
+    options: RunOptions = {}
+): Promise<AnalyticsTaskResult<T>> => {
+    const key = artifactKey(`task:${task}`, options.datasets || [], input);
+    if (key) {
+        const cached = await loadArtifact<AnalyticsTaskResult<T>>(key);
+        if (options.signal?.aborted) throw createAbortError();
+        if (cached !== undefined) {
+            registerResult(cached, key);
+            return cached;
+        }
+    }
+
+    const result = await executeTask(task, input, options);
+    if (key) saveArtifact(key, result);
+    registerResult(result, key);
+    return result;
+};
+
+// 结果以缓存键登记为内容键：作为后续任务的参数时按键计算指纹，不在主线程序列化整个结果
+const registerResult = (result: unknown, key: string | null) => {
+    if (result && typeof result === 'object') setContentKey(result, key);
+};
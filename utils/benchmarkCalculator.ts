@@ -1,4 +1,5 @@
 import { AggregatedMetrics } from '../types';
+import { QuantileSketch, QuantileSummary } from './quantileSketch';
 
 // Campaign Benchmark 基准值接口
 export interface CampaignBenchmarks {
@@ -15,10 +16,32 @@ export interface CampaignBenchmarks {
     avgRoi: number;
     avgAov: number;
     avgFrequency: number;
+    quantiles?: BenchmarkQuantiles;
 }
 
+// 各基准指标的分位数（样本为 Campaign 或 Campaign-天），不受少数大 Campaign 的影响
+export type BenchmarkQuantiles = Partial<Record<Exclude<keyof CampaignBenchmarks, 'quantiles'>, QuantileSummary>>;
+export type BenchmarkPercentile = Exclude<keyof QuantileSummary, 'count'>;
+
+// 基准指标 <- Campaign 指标字段
+const CAMPAIGN_METRIC_FIELDS: Array<[Exclude<keyof CampaignBenchmarks, 'quantiles'>, keyof AggregatedMetrics]> = [
+    ['avgCpa', 'cpa'],
+    ['avgCpatc', 'cpatc'],
+    ['avgCpc', 'cpc'],
+    ['avgCvr', 'cvr'],
+    ['avgCtr', 'ctr'],
+    ['avgCpm', 'cpm'],
+    ['avgAtcRate', 'atc_rate'],
+    ['avgCheckoutRate', 'checkout_rate'],
+    ['avgPurchaseRate', 'purchase_rate'],
+    ['avgClickToPvRate', 'click_to_pv_rate'],
+    ['avgRoi', 'roi'],
+    ['avgAov', 'aov'],
+    ['avgFrequency', 'frequency'],
+];
+
 /**
- * 计算所有Campaign的基准值（平均值）
+ * 计算所有Campaign的基准值（平均值 + 分位数）
  * @param campaigns - Campaign数组，每个包含metrics
  * @returns 基准值对象
  */
@@ -27,73 +50,42 @@ export const calculateBenchmarks = (
 ): CampaignBenchmarks => {
     const count = campaigns.length;
 
-    // 如果没有Campaign，返回全0
-    if (count === 0) {
-        return {
-            avgCpa: 0,
-            avgCpatc: 0,
-            avgCpc: 0,
-            avgCvr: 0,
-            avgCtr: 0,
-            avgCpm: 0,
-            avgAtcRate: 0,
-            avgCheckoutRate: 0,
-            avgPurchaseRate: 0,
-            avgClickToPvRate: 0,
-            avgRoi: 0,
-            avgAov: 0,
-            avgFrequency: 0,
-        };
-    }
-
-    // 计算各指标的总和
-    const sums = campaigns.reduce((acc, campaign) => {
+    // 一次遍历：各指标求和并加入分位数草图（缺失值按 0 计，与平均值口径一致）
+    const sums = new Float64Array(CAMPAIGN_METRIC_FIELDS.length);
+    const sketches = CAMPAIGN_METRIC_FIELDS.map(() => new QuantileSketch());
+    campaigns.forEach(campaign => {
         const m = campaign.metrics;
-        return {
-            cpa: acc.cpa + (m.cpa || 0),
-            cpatc: acc.cpatc + (m.cpatc || 0),
-            cpc: acc.cpc + (m.cpc || 0),
-            cvr: acc.cvr + (m.cvr || 0),
-            ctr: acc.ctr + (m.ctr || 0),
-            cpm: acc.cpm + (m.cpm || 0),
-            atcRate: acc.atcRate + (m.atc_rate || 0),
-            checkoutRate: acc.checkoutRate + (m.checkout_rate || 0),
-            purchaseRate: acc.purchaseRate + (m.purchase_rate || 0),
-            clickToPvRate: acc.clickToPvRate + (m.click_to_pv_rate || 0),
-            roi: acc.roi + (m.roi || 0),
-            aov: acc.aov + (m.aov || 0),
-            frequency: acc.frequency + (m.frequency || 0),
-        };
-    }, {
-        cpa: 0,
-        cpatc: 0,
-        cpc: 0,
-        cvr: 0,
-        ctr: 0,
-        cpm: 0,
-        atcRate: 0,
-        checkoutRate: 0,
-        purchaseRate: 0,
-        clickToPvRate: 0,
-        roi: 0,
-        aov: 0,
-        frequency: 0,
+        CAMPAIGN_METRIC_FIELDS.forEach(([, field], k) => {
+            const value = (m[field] as number) || 0;
+            sums[k] += value;
+            sketches[k].add(value);
+        });
+    });
+
+    // 计算平均值（没有Campaign时全为0）
+    const benchmarks = {} as CampaignBenchmarks;
+    const quantiles: BenchmarkQuantiles = {};
+    CAMPAIGN_METRIC_FIELDS.forEach(([key], k) => {
+        benchmarks[key] = count > 0 ? sums[k] / count : 0;
+        if (sketches[k].count > 0) quantiles[key] = sketches[k].summary();
     });
+    benchmarks.quantiles = quantiles;
+    return benchmarks;
+};
 
-    // 计算平均值
-    return {
-        avgCpa: sums.cpa / count,
-        avgCpatc: sums.cpatc / count,
-        avgCpc: sums.cpc / count,
-        avgCvr: sums.cvr / count,
-        avgCtr: sums.ctr / count,
-        avgCpm: sums.cpm / count,
-        avgAtcRate: sums.atcRate / count,
-        avgCheckoutRate: sums.checkoutRate / count,
-        avgPurchaseRate: sums.purchaseRate / count,
-        avgClickToPvRate: sums.clickToPvRate / count,
-        avgRoi: sums.roi / count,
-        avgAov: sums.aov / count,
-        avgFrequency: sums.frequency / count,
-    };
+/**
+ * 以分位数代替平均值的基准（用于不希望被极端 Campaign 拉偏的诊断），没有分位数的指标保留平均值
+ * @param benchmarks - calculateBenchmarks / calculateLayerBenchmarks 的结果
+ * @param percentile - 使用的分位数，默认中位数
+ */
+export const toPercentileBenchmarks = (
+    benchmarks: CampaignBenchmarks,
+    percentile: BenchmarkPercentile = 'p50'
+): CampaignBenchmarks => {
+    const result = { ...benchmarks };
+    CAMPAIGN_METRIC_FIELDS.forEach(([key]) => {
+        const summary = benchmarks.quantiles?.[key];
+        if (summary) result[key] = summary[percentile];
+    });
+    return result;
 };
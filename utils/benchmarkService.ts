@@ -1,5 +1,10 @@
-import { RawAdRecord, LayerConfiguration, CampaignLayer, LayerFilterRule, DEFAULT_LAYER_CONFIG } from '../types';
-import { CampaignBenchmarks } from './benchmarkCalculator';
+import { RawAdRecord, AdConfiguration, LayerConfiguration, CampaignLayer, DEFAULT_LAYER_CONFIG } from '../types';
+import { CampaignBenchmarks, BenchmarkPercentile, BenchmarkQuantiles, toPercentileBenchmarks } from './benchmarkCalculator';
+import { classifyLayer } from './ruleEngine';
+import { getDateRangeOrigin } from './dataUtils';
+import { CUBE_FIELDS, RollupCube, getRollupCube, getRollupMembers } from './rollupCube';
+import { QuantileSketch } from './quantileSketch';
+import { addCount, startStage } from './instrumentation';
 
 // Benchmark 结果接口
 export interface LayerBenchmarks {
@@ -10,151 +15,300 @@ export interface LayerBenchmarks {
     global: CampaignBenchmarks;
 }
 
-// 检查是否匹配规则
-const matchesRules = (campaignName: string, rules: LayerFilterRule[], logic: 'AND' | 'OR'): boolean => {
-    if (!rules || rules.length === 0) return false;
-
-    const results = rules.map(rule => {
-        // 目前仅支持 campaign_name 筛选
-        if (rule.field !== 'campaign_name') return false;
-
-        const value = campaignName;
-        const target = rule.value;
-
-        switch (rule.operator) {
-            case 'contains':
-                return value.includes(target);
-            case 'not_contains':
-                return !value.includes(target);
-            case 'equals':
-                return value === target;
-            default:
-                return false;
-        }
-    });
-
-    return logic === 'AND'
-        ? results.every(r => r)
-        : results.some(r => r);
-};
-
 // 获取 Campaign 所属层级
+// 依次检查 Awareness / Traffic / Conversion 规则（目前仅支持 campaign_name 筛选），
+// 默认 fallback 到 Conversion (与 LayerConfigModal 中的逻辑保持一致)
 export const getCampaignLayer = (campaignName: string, layerConfig: LayerConfiguration): CampaignLayer => {
-    // 1. 检查 Awareness 规则
-    if (matchesRules(campaignName, layerConfig.awareness.rules, layerConfig.awareness.logic)) {
-        return CampaignLayer.AWARENESS;
-    }
+    return classifyLayer({ campaign_name: campaignName } as RawAdRecord, layerConfig, 'campaignOnly');
+};
+
+// ============ 按天的层级统计 ============
+// 由汇总立方体（rollupCube）的 天 × 实体 单元格得到 天 × Campaign，再按 Campaign 所属层级累加到 天 × 层级，不再逐行扫描记录：
+// - 可加字段之和：加权平均基准（比率 = 和 / 和）可由任意几天的和直接算出，与逐行汇总一致
+// - 分位数草图：每个 Campaign-天 的比率指标，按天可合并，给出不受大 Campaign 影响的 P25/P50/P75/P90
+// 日统计按 立方体 × 层级配置 × 业务线 缓存；日期范围变化时只合并对应天（见 calculateLayerBenchmarksFor）
+
+const LAYER_SLOTS = [CampaignLayer.AWARENESS, CampaignLayer.TRAFFIC, CampaignLayer.CONVERSION];
+const GLOBAL_SLOT = LAYER_SLOTS.length;
+const SLOT_COUNT = LAYER_SLOTS.length + 1;
+
+// 可加字段
+const F_SPEND = 0;
+const F_IMPRESSIONS = 1;
+const F_CLICKS = 2;
+const F_REVENUE = 3;
+const F_PURCHASES = 4;
+const F_ATC = 5;
+const F_CHECKOUTS = 6;
+const F_REACH = 7;
+const F_LPV = 8;
+const F_CAMPAIGN_DAYS = 9;
+const FIELD_COUNT = 10;
+
+// 可加字段 <- 立方体字段
+const CUBE_SOURCES = (
+    ['spend', 'impressions', 'link_clicks', 'purchase_value', 'purchases', 'adds_to_cart', 'checkouts_initiated', 'reach', 'landing_page_views'] as const
+).map(field => CUBE_FIELDS.indexOf(field));
+const CUBE_FIELD_COUNT = CUBE_FIELDS.length;
+
+// 基准指标 = 分子 / 分母 × 倍数（分母为 0 时为 0，与原先的加权平均一致）
+const BENCHMARK_METRICS: Array<[keyof BenchmarkValues, number, number, number]> = [
+    ['avgCpa', F_SPEND, F_PURCHASES, 1],
+    ['avgCpatc', F_SPEND, F_ATC, 1],
+    ['avgCpc', F_SPEND, F_CLICKS, 1],
+    ['avgCvr', F_PURCHASES, F_CLICKS, 1],
+    ['avgCtr', F_CLICKS, F_IMPRESSIONS, 1],
+    ['avgCpm', F_SPEND, F_IMPRESSIONS, 1000],
+    ['avgAtcRate', F_ATC, F_CLICKS, 1],
+    ['avgCheckoutRate', F_CHECKOUTS, F_ATC, 1],
+    ['avgPurchaseRate', F_PURCHASES, F_CHECKOUTS, 1],
+    ['avgClickToPvRate', F_LPV, F_CLICKS, 1],
+    ['avgRoi', F_REVENUE, F_SPEND, 1],
+    ['avgAov', F_REVENUE, F_PURCHASES, 1],
+    ['avgFrequency', F_IMPRESSIONS, F_REACH, 1]
+];
+const METRIC_COUNT = BENCHMARK_METRICS.length;
+
+type BenchmarkValues = Omit<CampaignBenchmarks, 'quantiles'>;
+type MemberSemantics = 'config' | 'exact';
 
-    // 2. 检查 Traffic 规则
-    if (matchesRules(campaignName, layerConfig.traffic.rules, layerConfig.traffic.logic)) {
-        return CampaignLayer.TRAFFIC;
+interface LayerDayStats {
+    sums: Float64Array;                 // SLOT_COUNT × FIELD_COUNT
+    sketches: QuantileSketch[];         // SLOT_COUNT × METRIC_COUNT
+}
+
+export interface DailyLayerStats {
+    firstDay: number;
+    days: (LayerDayStats | null)[];     // 第 firstDay + k 天的统计（没有数据为 null），最后一项为日期无法解析的记录
+    merged: Map<string, LayerBenchmarks>;   // 已合并的日期范围
+}
+
+// 立方体 -> 层级配置 -> 业务线配置（不筛选业务线时为 ALL_ENTITIES）-> 匹配语义
+const dailyStatsCache = new WeakMap<
+    RollupCube,
+    WeakMap<LayerConfiguration, WeakMap<object, Partial<Record<MemberSemantics, DailyLayerStats>>>>
+>();
+const ALL_ENTITIES = {};
+const MAX_MERGED_RANGES = 8;
+
+const newDayStats = (): LayerDayStats => ({
+    sums: new Float64Array(SLOT_COUNT * FIELD_COUNT),
+    sketches: Array.from({ length: SLOT_COUNT * METRIC_COUNT }, () => new QuantileSketch())
+});
+
+const buildDailyLayerStats = (cube: RollupCube, members: Uint8Array | null, layerConfig: LayerConfiguration): DailyLayerStats => {
+    const { entities, cellCount, cellEntity, cellSums, dayStarts, numDays } = cube;
+
+    // 1. 实体 -> Campaign 序号，Campaign -> 层级（层级按 Campaign Name 判定，每个名称只判定一次）
+    const entityCampaign = new Int32Array(entities.count).fill(-1);
+    const campaignIds = new Map<number, number>();
+    const campaignSlots: number[] = [];
+    for (let e = 0; e < entities.count; e++) {
+        if (members && !members[e]) continue;
+        let id = campaignIds.get(entities.campaign[e]);
+        if (id === undefined) {
+            id = campaignSlots.length;
+            campaignIds.set(entities.campaign[e], id);
+            campaignSlots.push(LAYER_SLOTS.indexOf(getCampaignLayer(entities.names(e).campaign_name, layerConfig)));
+        }
+        entityCampaign[e] = id;
     }
 
-    // 3. 检查 Conversion 规则
-    if (matchesRules(campaignName, layerConfig.conversion.rules, layerConfig.conversion.logic)) {
-        return CampaignLayer.CONVERSION;
+    // 2. 逐天把单元格合并为 天 × Campaign，再累加到 天 × 层级
+    const campaignCount = campaignSlots.length;
+    const campaignSums = new Float64Array(campaignCount * FIELD_COUNT);
+    const lastSeen = new Int32Array(campaignCount).fill(-1);
+    const touched = new Int32Array(campaignCount);
+    const days: (LayerDayStats | null)[] = new Array(numDays + 1).fill(null);
+    for (let slot = 0; slot <= numDays; slot++) {
+        const to = slot < numDays ? dayStarts[slot + 1] : cellCount;
+        let touchedCount = 0;
+        for (let c = dayStarts[slot]; c < to; c++) {
+            const id = entityCampaign[cellEntity[c]];
+            if (id < 0) continue;
+            const base = id * FIELD_COUNT;
+            if (lastSeen[id] !== slot) {
+                lastSeen[id] = slot;
+                touched[touchedCount++] = id;
+                campaignSums.fill(0, base, base + FIELD_COUNT);
+                campaignSums[base + F_CAMPAIGN_DAYS] = 1;
+            }
+            const source = c * CUBE_FIELD_COUNT;
+            for (let f = 0; f < CUBE_SOURCES.length; f++) campaignSums[base + f] += cellSums[source + CUBE_SOURCES[f]];
+        }
+        if (touchedCount === 0) continue;
+
+        const stats = newDayStats();
+        for (let k = 0; k < touchedCount; k++) {
+            const id = touched[k];
+            const base = id * FIELD_COUNT;
+            for (const target of [campaignSlots[id], GLOBAL_SLOT]) {
+                const targetBase = target * FIELD_COUNT;
+                for (let f = 0; f < FIELD_COUNT; f++) stats.sums[targetBase + f] += campaignSums[base + f];
+                BENCHMARK_METRICS.forEach(([, numerator, denominator, scale], m) => {
+                    if (campaignSums[base + denominator] > 0) {
+                        stats.sketches[target * METRIC_COUNT + m].add((campaignSums[base + numerator] / campaignSums[base + denominator]) * scale);
+                    }
+                });
+            }
+        }
+        days[slot] = stats;
     }
 
-    // 4. 默认 fallback 到 Conversion (与 LayerConfigModal 中的逻辑保持一致)
-    return CampaignLayer.CONVERSION;
+    return { firstDay: cube.firstDay, days, merged: new Map() };
 };
 
-// 计算各层级的 Benchmarks
-export const calculateLayerBenchmarks = (allData: RawAdRecord[], layerConfig: LayerConfiguration = DEFAULT_LAYER_CONFIG): LayerBenchmarks => {
-    // 1. 初始化容器
-    const layerData = {
-        [CampaignLayer.AWARENESS]: [] as RawAdRecord[],
-        [CampaignLayer.TRAFFIC]: [] as RawAdRecord[],
-        [CampaignLayer.CONVERSION]: [] as RawAdRecord[]
-    };
+/**
+ * 记录数组的按天层级统计（由该数组的汇总立方体得到，按 立方体 × 层级配置 × 业务线 缓存，同一版本只构建一次）
+ * @param records - 记录数组（源数据集，日期切片请用其 getDateRangeOrigin().source）
+ * @param layerConfig - 层级配置
+ * @param config - 只统计命中该业务线规则的实体
+ * @param semantics - 业务线匹配语义
+ */
+export const getDailyLayerStats = (
+    records: RawAdRecord[],
+    layerConfig: LayerConfiguration,
+    config?: AdConfiguration,
+    semantics: MemberSemantics = 'config'
+): DailyLayerStats => {
+    const cube = getRollupCube(records);
+    let byLayerConfig = dailyStatsCache.get(cube);
+    if (!byLayerConfig) {
+        byLayerConfig = new WeakMap();
+        dailyStatsCache.set(cube, byLayerConfig);
+    }
+    let byConfig = byLayerConfig.get(layerConfig);
+    if (!byConfig) {
+        byConfig = new WeakMap();
+        byLayerConfig.set(layerConfig, byConfig);
+    }
+    let entry = byConfig.get(config || ALL_ENTITIES);
+    if (!entry) {
+        entry = {};
+        byConfig.set(config || ALL_ENTITIES, entry);
+    }
+    let stats = entry[semantics];
+    if (!stats) {
+        const end = startStage('buildDailyLayerStats');
+        stats = buildDailyLayerStats(cube, config ? getRollupMembers(cube, config, semantics) : null, layerConfig);
+        end();
+        addCount('buildDailyLayerStats', 'cells', cube.cellCount);
+        entry[semantics] = stats;
+    }
+    return stats;
+};
 
-    // 2. 数据分类
-    // 按 Campaign Name 分组，避免重复计算
-    const campaignMap = new Map<string, RawAdRecord[]>();
-    allData.forEach(r => {
-        if (!campaignMap.has(r.campaign_name)) {
-            campaignMap.set(r.campaign_name, []);
-        }
-        campaignMap.get(r.campaign_name)!.push(r);
+const toBenchmarks = (sums: Float64Array, sketches: QuantileSketch[], slot: number): CampaignBenchmarks => {
+    const base = slot * FIELD_COUNT;
+    const values = {} as BenchmarkValues;
+    const quantiles: BenchmarkQuantiles = {};
+    BENCHMARK_METRICS.forEach(([key, numerator, denominator, scale], m) => {
+        const den = sums[base + denominator];
+        values[key] = den > 0 ? (sums[base + numerator] / den) * scale : 0;
+        const sketch = sketches[slot * METRIC_COUNT + m];
+        if (sketch.count > 0) quantiles[key] = sketch.summary();
     });
+    return { ...values, quantiles };
+};
 
-    campaignMap.forEach((records, campaignName) => {
-        const layer = getCampaignLayer(campaignName, layerConfig);
-        layerData[layer].push(...records);
-    });
+/**
+ * 合并日统计为层级基准（加权平均 + 分位数）
+ * @param stats - getDailyLayerStats 的结果
+ * @param startDay - 起始天序号（省略时合并所有天，包括日期无法解析的记录）
+ * @param endDay - 结束天序号（包含）
+ */
+export const mergeDailyLayerStats = (stats: DailyLayerStats, startDay?: number, endDay?: number): LayerBenchmarks => {
+    const allDays = startDay === undefined || endDay === undefined;
+    const key = allDays ? 'all' : `${startDay}-${endDay}`;
+    const cached = stats.merged.get(key);
+    if (cached) return cached;
 
-    // 3. 辅助计算函数 (加权平均)
-    const calcBenchmarks = (data: RawAdRecord[]): CampaignBenchmarks => {
-        const spend = data.reduce((sum, r) => sum + r.spend, 0);
-        const impressions = data.reduce((sum, r) => sum + r.impressions, 0);
-        const clicks = data.reduce((sum, r) => sum + r.link_clicks, 0);
-        const revenue = data.reduce((sum, r) => sum + r.purchase_value, 0);
-        const purchases = data.reduce((sum, r) => sum + r.purchases, 0);
-        const atc = data.reduce((sum, r) => sum + r.adds_to_cart, 0);
-        const checkouts = data.reduce((sum, r) => sum + r.checkouts_initiated, 0);
-        const reach = data.reduce((sum, r) => sum + (r.reach || 0), 0);
-        const landingPageViews = data.reduce((sum, r) => sum + (r.landing_page_views || 0), 0);
-        const totalFrequency = data.reduce((sum, r) => sum + (r.frequency || 0), 0); // Note: Frequency average needs care, simple average of sums might be wrong if we want weighted. But frequency is usually ratio. Weighted Frequency = Total Impressions / Total Reach.
-
-        // Weighted Average Calculation
-        const avgRoi = spend > 0 ? revenue / spend : 0;
-        const avgCpc = clicks > 0 ? spend / clicks : 0;
-        const avgCpm = impressions > 0 ? (spend / impressions) * 1000 : 0;
-        const avgCtr = impressions > 0 ? clicks / impressions : 0;
-        const avgCvr = clicks > 0 ? purchases / clicks : 0;
-        const avgCpa = purchases > 0 ? spend / purchases : 0;
-        const avgCpatc = atc > 0 ? spend / atc : 0;
-        const avgAtcRate = clicks > 0 ? atc / clicks : 0;
-        const avgCheckoutRate = atc > 0 ? checkouts / atc : 0;
-        const avgPurchaseRate = checkouts > 0 ? purchases / checkouts : 0;
-        const avgClickToPvRate = clicks > 0 ? landingPageViews / clicks : 0;
-        const avgAov = purchases > 0 ? revenue / purchases : 0;
-        // Weighted frequency
-        const avgFrequency = reach > 0 ? impressions / reach : 0;
-
-        // ACOS is inverse of ROI (Spend / Revenue) or 0 if Revenue 0
-        const avgAcos = revenue > 0 ? spend / revenue : 0;
-
-        return {
-            avgCpa,
-            avgCpatc,
-            avgCpc,
-            avgCvr,
-            avgCtr,
-            avgCpm,
-            avgAtcRate,
-            avgCheckoutRate,
-            avgPurchaseRate,
-            avgClickToPvRate,
-            avgRoi,
-            avgAov,
-            avgFrequency
-        };
-    };
+    // 日期范围对应的天（NaN 时为空）
+    const validDays = stats.days.length - 1;
+    const from = allDays ? 0 : Math.max(startDay! - stats.firstDay, 0);
+    const to = allDays ? stats.days.length : Math.min(endDay! - stats.firstDay + 1, validDays);
 
-    // 4. 计算各层级 KPI
-    const awarenessBenchmarks = calcBenchmarks(layerData[CampaignLayer.AWARENESS]);
-    const trafficBenchmarks = calcBenchmarks(layerData[CampaignLayer.TRAFFIC]);
-    const conversionBenchmarks = calcBenchmarks(layerData[CampaignLayer.CONVERSION]);
-    const globalBenchmarks = calcBenchmarks(allData);
-
-    return {
-        awareness: {
-            ...awarenessBenchmarks,
-            hasData: layerData[CampaignLayer.AWARENESS].length > 0
-        },
-        traffic: {
-            ...trafficBenchmarks,
-            hasData: layerData[CampaignLayer.TRAFFIC].length > 0
-        },
-        conversion: {
-            ...conversionBenchmarks,
-            hasData: layerData[CampaignLayer.CONVERSION].length > 0
-        },
-        global: globalBenchmarks
+    const sums = new Float64Array(SLOT_COUNT * FIELD_COUNT);
+    const sketches = Array.from({ length: SLOT_COUNT * METRIC_COUNT }, () => new QuantileSketch());
+    for (let slot = from; slot < to; slot++) {
+        const day = stats.days[slot];
+        if (!day) continue;
+        for (let k = 0; k < sums.length; k++) sums[k] += day.sums[k];
+        for (let k = 0; k < sketches.length; k++) sketches[k].merge(day.sketches[k]);
+    }
+
+    const layerResult = (slot: number) => ({
+        ...toBenchmarks(sums, sketches, slot),
+        hasData: sums[slot * FIELD_COUNT + F_CAMPAIGN_DAYS] > 0
+    });
+    const result: LayerBenchmarks = {
+        awareness: layerResult(0),
+        traffic: layerResult(1),
+        conversion: layerResult(2),
+        global: toBenchmarks(sums, sketches, GLOBAL_SLOT)
     };
+
+    stats.merged.set(key, result);
+    if (stats.merged.size > MAX_MERGED_RANGES) stats.merged.delete(stats.merged.keys().next().value!);
+    return result;
+};
+
+// data 为日期切片时合并源数据集日统计中对应的天，否则合并 data 本身的全部天
+const layerBenchmarksOf = (
+    data: RawAdRecord[],
+    layerConfig: LayerConfiguration,
+    config?: AdConfiguration,
+    semantics: MemberSemantics = 'config'
+): LayerBenchmarks => {
+    const origin = getDateRangeOrigin(data);
+    if (origin) {
+        return mergeDailyLayerStats(getDailyLayerStats(origin.source, layerConfig, config, semantics), origin.startDay, origin.endDay);
+    }
+    return mergeDailyLayerStats(getDailyLayerStats(data, layerConfig, config, semantics));
 };
 
+// 计算各层级的 Benchmarks（加权平均 + 分位数）
+export const calculateLayerBenchmarks = (allData: RawAdRecord[], layerConfig: LayerConfiguration = DEFAULT_LAYER_CONFIG): LayerBenchmarks => {
+    return layerBenchmarksOf(allData, layerConfig);
+};
+
+/**
+ * 计算某个业务线的层级 Benchmarks
+ *
+ * data 是日期切片（dataUtils.sliceDateRangeOf）时，使用源数据集上该业务线的日统计，只合并所选日期范围内的天，
+ * 切换日期范围不再重新汇总；否则按 data 中该业务线的实体计算（同样按对象身份缓存）。
+ *
+ * @param data - 日期范围内的数据
+ * @param configs - 业务线配置列表
+ * @param configIndex - 业务线下标
+ * @param semantics - 业务线匹配语义（与调用方使用的成员索引一致）
+ * @param layerConfig - 层级配置
+ */
+export const calculateLayerBenchmarksFor = (
+    data: RawAdRecord[],
+    configs: AdConfiguration[],
+    configIndex: number,
+    semantics: MemberSemantics,
+    layerConfig: LayerConfiguration = DEFAULT_LAYER_CONFIG
+): LayerBenchmarks => {
+    return layerBenchmarksOf(data, layerConfig, configs[configIndex], semantics);
+};
+
+/**
+ * 以分位数代替平均值的层级基准（见 toPercentileBenchmarks），各层级的 hasData 不变
+ * @param benchmarks - calculateLayerBenchmarks / calculateLayerBenchmarksFor 的结果
+ * @param percentile - 使用的分位数，默认中位数
+ */
+export const toPercentileLayerBenchmarks = (
+    benchmarks: LayerBenchmarks,
+    percentile: BenchmarkPercentile = 'p50'
+): LayerBenchmarks => ({
+    awareness: { ...toPercentileBenchmarks(benchmarks.awareness, percentile), hasData: benchmarks.awareness.hasData },
+    traffic: { ...toPercentileBenchmarks(benchmarks.traffic, percentile), hasData: benchmarks.traffic.hasData },
+    conversion: { ...toPercentileBenchmarks(benchmarks.conversion, percentile), hasData: benchmarks.conversion.hasData },
+    global: toPercentileBenchmarks(benchmarks.global, percentile)
+});
+
 // 根据 KPI 类型获取 Benchmark (含 Fallback 逻辑)
 export const getBenchmarkForKPI = (
     kpiType: 'ROI' | 'CPC' | 'CPM',
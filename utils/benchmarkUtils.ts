@@ -1,4 +1,5 @@
-import { RawAdRecord } from '../types';
+import { RawAdRecord, AdConfiguration } from '../types';
+import { queryRollup, rollupTotals } from './rollupCube';
 
 // ============ Metric Calculation Helpers ============
 
@@ -143,6 +144,40 @@ export const calculateBenchmark = (
     };
 };
 
+/**
+ * 与 calculateBenchmark 相同的基准，由汇总立方体查询得到（不重新分组记录）
+ * @param data - 日期范围内的数据
+ * @param level - 实体层级（按本层名称合并同名实体，与 calculateBenchmark 一致）
+ * @param config - 只统计命中该业务线规则的实体
+ */
+export const calculateRollupBenchmark = (
+    data: RawAdRecord[],
+    level: 'Campaign' | 'AdSet' | 'Ad',
+    config?: AdConfiguration
+): BenchmarkMetrics => {
+    const entities = queryRollup(data, { level, nested: false }, config);
+    const t = rollupTotals(data, config);
+    return {
+        // Summable metrics: use layer-specific average
+        spend: average(entities.map(e => e.totals.spend)),
+        impressions: average(entities.map(e => e.totals.impressions)),
+        clicks: average(entities.map(e => e.totals.link_clicks)),
+        reach: average(entities.map(e => e.totals.reach)),
+
+        // Ratio metrics: use global aggregated data (same across all levels)
+        roi: t.spend > 0 ? t.purchase_value / t.spend : 0,
+        cvr: t.link_clicks > 0 ? t.purchases / t.link_clicks : 0,
+        aov: t.purchases > 0 ? t.purchase_value / t.purchases : 0,
+        cpa: t.purchases > 0 ? t.spend / t.purchases : 0,
+        cpatc: t.adds_to_cart > 0 ? t.spend / t.adds_to_cart : 0,
+        atc_rate: t.link_clicks > 0 ? t.adds_to_cart / t.link_clicks : 0,
+        ctr: t.impressions > 0 ? t.link_clicks / t.impressions : 0,
+        cpc: t.link_clicks > 0 ? t.spend / t.link_clicks : 0,
+        cpm: t.impressions > 0 ? (t.spend / t.impressions) * 1000 : 0,
+        frequency: t.reach > 0 ? t.impressions / t.reach : 0
+    };
+};
+
 export const calculateVsAvg = (current: number, benchmark: number): number => {
     if (benchmark === 0) return 0;
     return ((current - benchmark) / benchmark) * 100;
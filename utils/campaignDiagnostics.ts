@@ -1,5 +1,6 @@
 import { AggregatedMetrics } from '../types';
 import { CampaignBenchmarks } from './benchmarkCalculator';
+import { addCount, debugLog } from './instrumentation';
 
 // 趋势状态类型
 export type TrendStatus = 'improving' | 'declining' | 'stable';
@@ -714,8 +715,9 @@ export const convertToDetailedDiagnostic = (
         });
     }
 
-    // 调试日志：检查步骤数组
-    console.log("📊 Diagnostic Steps for", result.scenario, ":", steps.map(s => `Step ${s.stepNumber}: ${s.stepName}`).join(", "));
+    // 调试日志：检查步骤数组（默认关闭）
+    addCount('convertToDetailedDiagnostic', 'diagnostics');
+    debugLog('convertToDetailedDiagnostic', 'Diagnostic Steps for', result.scenario, ':', () => steps.map(s => `Step ${s.stepNumber}: ${s.stepName}`).join(', '));
 
 
     return {
@@ -1433,6 +1435,241 @@ export const diagnoseAllScenarios = (
     return results;
 };
 
+// ========== 批量诊断：场景位掩码 ==========
+
+/**
+ * 场景位（与 diagnoseAllScenarios 的检查顺序一致，低位优先）
+ */
+export const SCENARIO_BITS = {
+    HIGH_CPA: 1 << 0,           // CPA异常高
+    LOW_AOV: 1 << 1,            // AOV异常低
+    LOW_CVR: 1 << 2,            // CVR异常低
+    HIGH_CPC: 1 << 3,           // CPC异常高
+    HIGH_CPATC: 1 << 4,         // CPATC异常高
+    BUDGET_DILUTION: 1 << 5,    // 预算分散
+    DELIVERY_ISSUE: 1 << 6      // 花费困难
+} as const;
+
+// 位顺序对应的场景名称
+export const SCENARIO_NAMES = ['CPA异常高', 'AOV异常低', 'CVR异常低', 'CPC异常高', 'CPATC异常高', '预算分散', '花费困难'];
+
+// 位顺序对应的检查函数（用于按掩码展开完整的诊断结果）
+const SCENARIO_CHECKS: Array<(
+    metrics: AggregatedMetrics,
+    benchmarks: CampaignBenchmarks,
+    context?: CampaignContext
+) => DiagnosticResult | null> = [
+    checkHighCPA,
+    checkLowAOV,
+    checkLowCVR,
+    checkHighCPC,
+    checkHighCPATC,
+    (metrics, benchmarks, context) => context ? checkBudgetDilution(metrics, benchmarks, context) : null,
+    (metrics, benchmarks, context) => context ? checkDeliveryIssue(metrics, benchmarks, context) : null
+];
+
+/**
+ * 批量诊断的列式输入：每列长度等于 Campaign 数量，缺失值用 NaN 表示
+ * （与对象输入中字段为 undefined 的判定结果一致）
+ */
+export interface CampaignMetricColumns {
+    spend: Float64Array;
+    roi: Float64Array;
+    impressions: Float64Array;
+    cpc: Float64Array;
+    cvr: Float64Array;
+    aov: Float64Array;
+    ctr: Float64Array;
+    cpm: Float64Array;
+    cpatc: Float64Array;
+    atc_rate: Float64Array;
+    click_to_pv_rate: Float64Array;
+    checkout_rate: Float64Array;
+    purchase_rate: Float64Array;
+}
+
+/**
+ * 批量诊断的上下文列（场景5和6），不提供时等同于不传 context
+ */
+export interface CampaignContextColumns {
+    adsetCount: Float64Array;
+    activeDays: Float64Array;
+    dailyBudget: Float64Array;
+    campaignBudget: Float64Array;
+}
+
+export interface ScenarioBatchResult {
+    mask: Uint8Array;       // 每个 Campaign 命中的场景位（SCENARIO_BITS）
+    severity: Int8Array;    // 命中时的优先级（0=最高紧急, 1=重要, 2=一般），未命中为 -1
+}
+
+/**
+ * 基于ROI比值的优先级（所有场景共用）
+ */
+const roiSeverity = (roi: number, avgRoi: number): number => {
+    const roiRatio = avgRoi > 0 ? roi / avgRoi : 1;
+    return roiRatio < 0.5 ? 0 : roiRatio < 0.8 ? 1 : 2;
+};
+
+/**
+ * 单个 Campaign 的场景判定（只做数值比较，不生成诊断文本）
+ * 各条件与 checkXXX 函数逐一对应；前提条件写成「不满足 x < y」，与原函数对 undefined/NaN 的处理一致
+ */
+const scenarioMaskAt = (
+    m: CampaignMetricColumns,
+    b: CampaignBenchmarks,
+    i: number,
+    ctx?: CampaignContextColumns
+): number => {
+    let mask = 0;
+    const spend = m.spend[i];
+
+    // 场景1 / 1.5 / 2 的前提条件：Spend >= 1 × Avg CPA
+    if (!(spend < b.avgCpa)) {
+        if (m.cpc[i] > b.avgCpc * 1.1 || m.cvr[i] < b.avgCvr * 0.9) mask |= SCENARIO_BITS.HIGH_CPA;
+        if ((m.aov[i] || 0) < (b.avgAov || 0) * 0.6) mask |= SCENARIO_BITS.LOW_AOV;
+        if (m.click_to_pv_rate[i] < b.avgClickToPvRate * 0.9 ||
+            m.atc_rate[i] < b.avgAtcRate * 0.9 ||
+            m.checkout_rate[i] < b.avgCheckoutRate * 0.9 ||
+            m.purchase_rate[i] < b.avgPurchaseRate * 0.9) {
+            mask |= SCENARIO_BITS.LOW_CVR;
+        }
+    }
+
+    // 场景3：Impressions >= 1000
+    if (!(m.impressions[i] < 1000)) {
+        const ctr = m.ctr[i];
+        if (ctr < b.avgCtr * 0.9 || (m.cpm[i] > b.avgCpm * 1.1 && ctr >= b.avgCtr * 1.1)) {
+            mask |= SCENARIO_BITS.HIGH_CPC;
+        }
+    }
+
+    // 场景4：Spend >= 1 × Avg CPATC 且 CPATC > Avg × 110%
+    if (!(spend < b.avgCpatc) && !(m.cpatc[i] <= b.avgCpatc * 1.1) && m.atc_rate[i] < b.avgAtcRate * 0.9) {
+        mask |= SCENARIO_BITS.HIGH_CPATC;
+    }
+
+    if (ctx) {
+        // 场景5：预算分散
+        const adsetCount = ctx.adsetCount[i];
+        const campaignBudget = ctx.campaignBudget[i];
+        if (adsetCount && campaignBudget && spend !== 0 && !(adsetCount < 3) &&
+            campaignBudget / adsetCount < b.avgCpa) {
+            mask |= SCENARIO_BITS.BUDGET_DILUTION;
+        }
+
+        // 场景6：花费困难
+        const activeDays = ctx.activeDays[i];
+        const dailyBudget = ctx.dailyBudget[i];
+        if (activeDays && dailyBudget && !(activeDays <= 1) && spend / dailyBudget < 0.8) {
+            mask |= SCENARIO_BITS.DELIVERY_ISSUE;
+        }
+    }
+
+    return mask;
+};
+
+/**
+ * 批量诊断所有 Campaign，只返回场景位掩码和优先级
+ * @param metrics - 列式指标
+ * @param benchmarks - Benchmark 表（例如每个业务线 × 层级一项）
+ * @param benchmarkIndex - 每个 Campaign 使用的 Benchmark 下标，不提供时全部使用 benchmarks[0]
+ * @param context - 列式上下文（可选，用于场景5和6）
+ * @returns 与 diagnoseAllScenarios 一致的命中场景（以位掩码表示）
+ */
+export const diagnoseScenarioBatch = (
+    metrics: CampaignMetricColumns,
+    benchmarks: CampaignBenchmarks[],
+    benchmarkIndex?: Int32Array,
+    context?: CampaignContextColumns
+): ScenarioBatchResult => {
+    const n = metrics.spend.length;
+    const mask = new Uint8Array(n);
+    const severity = new Int8Array(n).fill(-1);
+
+    for (let i = 0; i < n; i++) {
+        const b = benchmarks[benchmarkIndex ? benchmarkIndex[i] : 0];
+        if (!b) continue;
+        const bits = scenarioMaskAt(metrics, b, i, context);
+        mask[i] = bits;
+        if (bits !== 0) severity[i] = roiSeverity(metrics.roi[i], b.avgRoi);
+    }
+
+    return { mask, severity };
+};
+
+/**
+ * 按场景掩码生成完整的诊断结果（仅在需要展示时调用，例如展开某一行）
+ * 结果与 diagnoseAllScenarios(metrics, benchmarks, context) 相同
+ */
+export const expandScenarioMask = (
+    mask: number,
+    metrics: AggregatedMetrics,
+    benchmarks: CampaignBenchmarks,
+    context?: CampaignContext
+): DiagnosticResult[] => {
+    const results: DiagnosticResult[] = [];
+    for (let bit = 0; bit < SCENARIO_CHECKS.length; bit++) {
+        if ((mask & (1 << bit)) === 0) continue;
+        const result = SCENARIO_CHECKS[bit](metrics, benchmarks, context);
+        if (result) results.push(result);
+    }
+    return results;
+};
+
+/**
+ * 把对象形式的指标/上下文转换为批量诊断的列式输入
+ * 字段为 undefined 时填 NaN（比较恒为 false），null 按 0 处理（与 JS 比较时的隐式转换一致）
+ */
+export const toMetricColumns = (
+    rows: Array<Partial<AggregatedMetrics>>
+): CampaignMetricColumns => {
+    const n = rows.length;
+    const column = (key: keyof CampaignMetricColumns) => {
+        const col = new Float64Array(n);
+        for (let i = 0; i < n; i++) {
+            const value = (rows[i] as any)[key];
+            col[i] = value === undefined ? NaN : value === null ? 0 : value;
+        }
+        return col;
+    };
+
+    return {
+        spend: column('spend'),
+        roi: column('roi'),
+        impressions: column('impressions'),
+        cpc: column('cpc'),
+        cvr: column('cvr'),
+        aov: column('aov'),
+        ctr: column('ctr'),
+        cpm: column('cpm'),
+        cpatc: column('cpatc'),
+        atc_rate: column('atc_rate'),
+        click_to_pv_rate: column('click_to_pv_rate'),
+        checkout_rate: column('checkout_rate'),
+        purchase_rate: column('purchase_rate')
+    };
+};
+
+export const toContextColumns = (contexts: CampaignContext[]): CampaignContextColumns => {
+    const n = contexts.length;
+    const column = (key: keyof CampaignContext) => {
+        const col = new Float64Array(n);
+        for (let i = 0; i < n; i++) {
+            const value = contexts[i][key];
+            col[i] = value === undefined ? NaN : value === null ? 0 : value;
+        }
+        return col;
+    };
+
+    return {
+        adsetCount: column('adsetCount'),
+        activeDays: column('activeDays'),
+        dailyBudget: column('dailyBudget'),
+        campaignBudget: column('campaignBudget')
+    };
+};
+
 // ========== V2 新增：趋势步骤创建函数 ==========
 
 /**
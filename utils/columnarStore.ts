@@ -0,0 +1,346 @@
+import { RawAdRecord } from '../types';
+import { toDayNumber } from './trendCalculator';
+import { addCount, startStage } from './instrumentation';
+
+// 列式数据集（struct-of-arrays）
+//
+// RawAdRecord[] 每行一个对象、每行重复保存系列 / 广告组 / 广告名称；列式存储中：
+// - 数值字段各占一个 Float64Array
+// - 日期与三个名称字段字典编码为 Int32Array（每个不同的字符串只保存一份）
+// - 另存一列整数天序号（toDayNumber），日期筛选不用再解析字符串
+// 汇总由 rollupCube 在实体索引（getEntityIndex）上直接读列完成，不生成逐行对象；
+// 需要对象数组的旧代码用 recordsFromColumnar 取得行视图数组（字段从列中读取，不复制数据），
+// 需要独立的普通对象时用 recordAt 还原（名称字符串与字典共享）。
+// 列缓冲区也是主线程与 Worker 之间传递数据的格式（transferList / cloneColumnar）。
+
+export const NUMERIC_FIELDS = [
+    'spend', 'impressions', 'link_clicks', 'purchases', 'purchase_value', 'adds_to_cart',
+    'checkouts_initiated', 'reach', 'landing_page_views', 'frequency', 'video_plays_3s'
+] as const;
+
+export const NAME_FIELDS = ['date', 'campaign_name', 'adset_name', 'ad_name'] as const;
+
+export type NumericField = typeof NUMERIC_FIELDS[number];
+export type NameField = typeof NAME_FIELDS[number];
+
+// 可选字段缺失时的占位值（区别于 NaN / 0，还原时为未定义）
+export const MISSING = -0x7ff0dead;
+// 日期无法解析时的天序号
+export const INVALID_DAY = -0x80000000;
+
+const LEVELS: Array<RawAdRecord['level']> = [undefined, 'Campaign', 'AdSet', 'Ad'];
+
+export interface ColumnarDataset {
+    length: number;
+    numeric: Record<NumericField, Float64Array>;
+    codes: Record<NameField, Int32Array>;
+    dictionaries: Record<NameField, string[]>;
+    day: Int32Array;        // 天序号，INVALID_DAY 表示日期无法解析
+    levels: Uint8Array;     // LEVELS 中的下标
+}
+
+/**
+ * 逐行追加构建列式数据集（容量按需翻倍），用于一次性转换和流式解析
+ */
+export class ColumnarBuilder {
+    private capacity: number;
+    private size = 0;
+    private numeric = {} as Record<NumericField, Float64Array>;
+    private codes = {} as Record<NameField, Int32Array>;
+    private dictionaries = {} as Record<NameField, string[]>;
+    private lookups = {} as Record<NameField, Map<string, number>>;
+    private dictionaryDays: number[] = [];
+    private day: Int32Array;
+    private levels: Uint8Array;
+
+    constructor(initialCapacity: number = 1024) {
+        this.capacity = Math.max(initialCapacity, 16);
+        NUMERIC_FIELDS.forEach(field => { this.numeric[field] = new Float64Array(this.capacity); });
+        NAME_FIELDS.forEach(field => {
+            this.codes[field] = new Int32Array(this.capacity);
+            this.dictionaries[field] = [];
+            this.lookups[field] = new Map();
+        });
+        this.day = new Int32Array(this.capacity);
+        this.levels = new Uint8Array(this.capacity);
+    }
+
+    get length(): number {
+        return this.size;
+    }
+
+    private grow() {
+        this.capacity *= 2;
+        const resize = <T extends Float64Array | Int32Array | Uint8Array>(array: T): T => {
+            const next = new (array.constructor as any)(this.capacity) as T;
+            next.set(array);
+            return next;
+        };
+        NUMERIC_FIELDS.forEach(field => { this.numeric[field] = resize(this.numeric[field]); });
+        NAME_FIELDS.forEach(field => { this.codes[field] = resize(this.codes[field]); });
+        this.day = resize(this.day);
+        this.levels = resize(this.levels);
+    }
+
+    private encode(field: NameField, value: string): number {
+        const lookup = this.lookups[field];
+        let code = lookup.get(value);
+        if (code === undefined) {
+            code = this.dictionaries[field].length;
+            this.dictionaries[field].push(value);
+            lookup.set(value, code);
+            if (field === 'date') {
+                const day = toDayNumber(value);
+                this.dictionaryDays.push(Number.isNaN(day) ? INVALID_DAY : day);
+            }
+        }
+        return code;
+    }
+
+    /** 追加一条记录 */
+    append(record: RawAdRecord): void {
+        if (this.size === this.capacity) this.grow();
+        const i = this.size++;
+        const row = record as any;
+
+        for (let f = 0; f < NUMERIC_FIELDS.length; f++) {
+            const value = row[NUMERIC_FIELDS[f]];
+            this.numeric[NUMERIC_FIELDS[f]][i] = value === undefined ? MISSING : value;
+        }
+        for (let f = 0; f < NAME_FIELDS.length; f++) {
+            this.codes[NAME_FIELDS[f]][i] = this.encode(NAME_FIELDS[f], row[NAME_FIELDS[f]]);
+        }
+        this.day[i] = this.dictionaryDays[this.codes.date[i]];
+        this.levels[i] = Math.max(LEVELS.indexOf(record.level), 0);
+    }
+
+    /** 生成数据集（列截断到实际行数，之后不应再追加） */
+    build(): ColumnarDataset {
+        const length = this.size;
+        const numeric = {} as Record<NumericField, Float64Array>;
+        NUMERIC_FIELDS.forEach(field => { numeric[field] = this.numeric[field].slice(0, length); });
+        const codes = {} as Record<NameField, Int32Array>;
+        NAME_FIELDS.forEach(field => { codes[field] = this.codes[field].slice(0, length); });
+        return {
+            length,
+            numeric,
+            codes,
+            dictionaries: this.dictionaries,
+            day: this.day.slice(0, length),
+            levels: this.levels.slice(0, length)
+        };
+    }
+}
+
+/**
+ * 把记录数组转换为列式数据集
+ * @param records - 原始记录
+ */
+export const toColumnar = (records: RawAdRecord[]): ColumnarDataset => {
+    const builder = new ColumnarBuilder(records.length);
+    for (let i = 0; i < records.length; i++) builder.append(records[i]);
+    return builder.build();
+};
+
+const columnarCache = new WeakMap<RawAdRecord[], ColumnarDataset>();
+
+/**
+ * 获取记录数组的列式数据集（按数组对象身份缓存，同一份数据只转换一次）
+ * @param records - 原始记录
+ */
+export const getColumnarDataset = (records: RawAdRecord[]): ColumnarDataset => {
+    let dataset = columnarCache.get(records);
+    if (!dataset) {
+        const end = startStage('toColumnar');
+        dataset = toColumnar(records);
+        end();
+        addCount('toColumnar', 'rows', records.length);
+        columnarCache.set(records, dataset);
+    }
+    return dataset;
+};
+
+/**
+ * 还原第 i 行为记录对象（字段与编码前一致，缺失的可选字段仍为未定义）
+ */
+export const recordAt = (dataset: ColumnarDataset, i: number): RawAdRecord => {
+    const { numeric, codes, dictionaries, levels } = dataset;
+    const record: any = {
+        date: dictionaries.date[codes.date[i]],
+        campaign_name: dictionaries.campaign_name[codes.campaign_name[i]],
+        adset_name: dictionaries.adset_name[codes.adset_name[i]],
+        ad_name: dictionaries.ad_name[codes.ad_name[i]],
+    };
+    for (let f = 0; f < NUMERIC_FIELDS.length; f++) {
+        const value = numeric[NUMERIC_FIELDS[f]][i];
+        if (value !== MISSING) record[NUMERIC_FIELDS[f]] = value;
+    }
+    const level = LEVELS[levels[i]];
+    if (level) record.level = level;
+    return record;
+};
+
+/**
+ * 列式数据集中一行的只读视图：字段在访问时从列中读取，本身只保存数据集引用和行号。
+ * 读取结果与 recordAt 还原的记录一致（缺失的可选字段为未定义），JSON 序列化时还原为普通对象。
+ *
+ * 限制：记录字段是原型上的访问器，自有属性只有 dataset / row，因此展开（{...record}）、
+ * Object.keys / Object.assign / structuredClone / postMessage 得到的都不是广告记录。
+ * 需要复制或跨线程传递时先用 recordAt 还原为普通对象（或直接传列式数据集）。
+ * 没有把字段定义为每个实例的自有访问器：10 万行时构造耗时约为现在的 20 倍。
+ */
+class ColumnarRow {
+    constructor(private readonly dataset: ColumnarDataset, private readonly row: number) {}
+
+    toJSON(): RawAdRecord {
+        return recordAt(this.dataset, this.row);
+    }
+}
+
+NAME_FIELDS.forEach(field => {
+    Object.defineProperty(ColumnarRow.prototype, field, {
+        enumerable: true,
+        get(this: { dataset: ColumnarDataset; row: number }) {
+            return this.dataset.dictionaries[field][this.dataset.codes[field][this.row]];
+        }
+    });
+});
+NUMERIC_FIELDS.forEach(field => {
+    Object.defineProperty(ColumnarRow.prototype, field, {
+        enumerable: true,
+        get(this: { dataset: ColumnarDataset; row: number }) {
+            const value = this.dataset.numeric[field][this.row];
+            return value === MISSING ? undefined : value;
+        }
+    });
+});
+Object.defineProperty(ColumnarRow.prototype, 'level', {
+    enumerable: true,
+    get(this: { dataset: ColumnarDataset; row: number }) {
+        return LEVELS[this.dataset.levels[this.row]];
+    }
+});
+
+/**
+ * 由列式数据集生成记录数组（如文件导入的结果），并登记为该数组的列式数据集，之后无需再转换
+ *
+ * 数组元素是行视图（ColumnarRow），数据只在列中保存一份；需要可修改的普通对象时用 recordAt。
+ * @param dataset - 列式数据集
+ */
+export const recordsFromColumnar = (dataset: ColumnarDataset): RawAdRecord[] => {
+    const records: RawAdRecord[] = new Array(dataset.length);
+    for (let i = 0; i < dataset.length; i++) records[i] = new ColumnarRow(dataset, i) as unknown as RawAdRecord;
+    columnarCache.set(records, dataset);
+    return records;
+};
+
+// ============ 遍历辅助 ============
+
+/** 可加字段之和（rollupCube 的单元格与查询结果） */
+export interface ColumnTotals {
+    spend: number;
+    impressions: number;
+    link_clicks: number;
+    purchases: number;
+    purchase_value: number;
+    adds_to_cart: number;
+    checkouts_initiated: number;
+    landing_page_views: number;
+    reach: number;
+}
+
+export interface EntityIndex {
+    /** 每行所属的实体（系列 + 广告组 + 广告 名称组合）下标 */
+    rowEntity: Int32Array;
+    /** 每个实体的名称编码 */
+    campaign: Int32Array;
+    adset: Int32Array;
+    ad: Int32Array;
+    /** 实体的名称（用于规则匹配、分类等按名称计算的逻辑） */
+    names: (entity: number) => Pick<RawAdRecord, 'campaign_name' | 'adset_name' | 'ad_name'>;
+    count: number;
+}
+
+const entityCache = new WeakMap<ColumnarDataset, EntityIndex>();
+
+const buildEntityIndex = (dataset: ColumnarDataset): EntityIndex => {
+    const { length, codes, dictionaries } = dataset;
+    const rowEntity = new Int32Array(length);
+    const lookup = new Map<string, number>();
+    const campaign: number[] = [];
+    const adset: number[] = [];
+    const ad: number[] = [];
+
+    for (let i = 0; i < length; i++) {
+        const c = codes.campaign_name[i];
+        const s = codes.adset_name[i];
+        const a = codes.ad_name[i];
+        const key = `${c}|${s}|${a}`;
+        let entity = lookup.get(key);
+        if (entity === undefined) {
+            entity = campaign.length;
+            lookup.set(key, entity);
+            campaign.push(c);
+            adset.push(s);
+            ad.push(a);
+        }
+        rowEntity[i] = entity;
+    }
+
+    const names = (entity: number) => ({
+        campaign_name: dictionaries.campaign_name[campaign[entity]],
+        adset_name: dictionaries.adset_name[adset[entity]],
+        ad_name: dictionaries.ad_name[ad[entity]]
+    });
+
+    return {
+        rowEntity,
+        campaign: Int32Array.from(campaign),
+        adset: Int32Array.from(adset),
+        ad: Int32Array.from(ad),
+        names,
+        count: campaign.length
+    };
+};
+
+/**
+ * 获取数据集的实体索引（按数据集缓存）：按名称计算的逻辑每个实体只算一次，再按行号展开
+ */
+export const getEntityIndex = (dataset: ColumnarDataset): EntityIndex => {
+    let index = entityCache.get(dataset);
+    if (!index) {
+        index = buildEntityIndex(dataset);
+        entityCache.set(dataset, index);
+    }
+    return index;
+};
+
+// ============ Worker 传递 ============
+
+/**
+ * 数据集中的全部 ArrayBuffer（postMessage 的 transfer 列表）
+ */
+export const transferList = (dataset: ColumnarDataset): ArrayBuffer[] => [
+    ...NUMERIC_FIELDS.map(field => dataset.numeric[field].buffer as ArrayBuffer),
+    ...NAME_FIELDS.map(field => dataset.codes[field].buffer as ArrayBuffer),
+    dataset.day.buffer as ArrayBuffer,
+    dataset.levels.buffer as ArrayBuffer
+];
+
+/**
+ * 复制一份数据集的列缓冲区（原缓冲区被转移后失效，发给多个 Worker 时每次转移一份副本）
+ */
+export const cloneColumnar = (dataset: ColumnarDataset): ColumnarDataset => {
+    const numeric = {} as Record<NumericField, Float64Array>;
+    NUMERIC_FIELDS.forEach(field => { numeric[field] = dataset.numeric[field].slice(); });
+    const codes = {} as Record<NameField, Int32Array>;
+    NAME_FIELDS.forEach(field => { codes[field] = dataset.codes[field].slice(); });
+    return {
+        length: dataset.length,
+        numeric,
+        codes,
+        dictionaries: dataset.dictionaries,
+        day: dataset.day.slice(),
+        levels: dataset.levels.slice()
+    };
+};
@@ -0,0 +1,135 @@
+// RFC 4180 CSV 解析（增量）
+//
+// 文本可以分块送入（网络流逐块解码），引号内的逗号、换行和转义引号（""）可跨块；
+// 支持 LF / CRLF 换行，完全空白的行跳过。
+
+export class CsvStreamParser {
+    private rows: string[][] = [];
+    private row: string[] = [];
+    private field = '';
+    private inQuotes = false;
+    private quotePending = false;   // 引号内遇到 "，需看下一个字符判断是转义还是结束
+    private fieldStarted = false;
+    private pendingCR = false;
+
+    /** 送入一块文本 */
+    push(chunk: string): void {
+        for (let i = 0; i < chunk.length; i++) {
+            const ch = chunk[i];
+
+            if (this.pendingCR) {
+                this.pendingCR = false;
+                if (ch === '\n') continue;
+            }
+
+            if (this.quotePending) {
+                this.quotePending = false;
+                if (ch === '"') {
+                    this.field += '"';
+                    continue;
+                }
+                this.inQuotes = false;
+            }
+
+            if (this.inQuotes) {
+                if (ch === '"') this.quotePending = true;
+                else this.field += ch;
+                continue;
+            }
+
+            if (ch === '"' && !this.fieldStarted) {
+                this.inQuotes = true;
+                this.fieldStarted = true;
+            } else if (ch === ',') {
+                this.endField();
+            } else if (ch === '\n' || ch === '\r') {
+                this.endRow();
+                if (ch === '\r') this.pendingCR = true;
+            } else {
+                this.field += ch;
+                this.fieldStarted = true;
+            }
+        }
+    }
+
+    private endField() {
+        this.row.push(this.field);
+        this.field = '';
+        this.fieldStarted = false;
+    }
+
+    private endRow() {
+        this.endField();
+        if (this.row.length > 1 || this.row[0] !== '') this.rows.push(this.row);
+        this.row = [];
+    }
+
+    /** 取出已完整解析的行 */
+    take(): string[][] {
+        const rows = this.rows;
+        this.rows = [];
+        return rows;
+    }
+
+    /** 结束输入，返回剩余的行（最后一行可以没有换行符） */
+    end(): string[][] {
+        this.quotePending = false;
+        this.inQuotes = false;
+        if (this.fieldStarted || this.field !== '' || this.row.length > 0) this.endRow();
+        return this.take();
+    }
+}
+
+/**
+ * 解析整段 CSV 文本为行数组
+ * @param text - CSV 文本
+ */
+export const parseCsvRows = (text: string): string[][] => {
+    const parser = new CsvStreamParser();
+    parser.push(text);
+    return parser.end();
+};
+
+/**
+ * 以流方式读取响应体并解析为行数组（不先拼接整段文本）
+ * @param body - fetch 响应体
+ * @param onText - 每段解码后的文本回调（可选，如用于增量哈希）
+ */
+export const parseCsvStream = async (
+    body: ReadableStream<Uint8Array>,
+    onText?: (chunk: string) => void
+): Promise<string[][]> => {
+    const parser = new CsvStreamParser();
+    const decoder = new TextDecoder();
+    const reader = body.getReader();
+    const rows: string[][] = [];
+    for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        const chunk = decoder.decode(value, { stream: true });
+        onText?.(chunk);
+        parser.push(chunk);
+        rows.push(...parser.take());
+    }
+    const tail = decoder.decode();
+    onText?.(tail);
+    parser.push(tail);
+    rows.push(...parser.end());
+    return rows;
+};
+
+/**
+ * 行数组转为以表头为键的对象（首行为表头，表头与值去除首尾空白，缺失的列为空字符串）
+ * @param rows - parseCsvRows / parseCsvStream 的结果
+ */
+export const rowsToRecords = (rows: string[][]): Record<string, string>[] => {
+    if (rows.length < 2) return [];
+    const headers = rows[0].map(header => header.trim());
+    return rows.slice(1).map(values => {
+        const record: Record<string, string> = {};
+        headers.forEach((header, index) => {
+            record[header] = (values[index] || '').trim();
+        });
+        return record;
+    });
+};
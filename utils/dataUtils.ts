@@ -1,4 +1,9 @@
 import { RawAdRecord, AggregatedMetrics, AdConfiguration, CampaignLayer } from '../types';
+import { getCompiledConfig, classifyLayer } from './ruleEngine';
+import { toDayNumber } from './trendCalculator';
+import { addCount, debugLog, recordAnomaly, startStage } from './instrumentation';
+import { ColumnTotals } from './columnarStore';
+import { deriveDatasetKey } from './persistentCache';
 
 // 计算聚合指标
 export const calculateMetrics = (records: RawAdRecord[]): AggregatedMetrics => {
@@ -22,14 +27,35 @@ export const calculateMetrics = (records: RawAdRecord[]): AggregatedMetrics => {
         landing_page_views: 0,
     });
 
-    const { spend, impressions, link_clicks, purchases, purchase_value, adds_to_cart, checkouts_initiated, landing_page_views } = totals;
-
     // 计算reach总和
     const totalReach = records.reduce((sum, r) => sum + (r.reach || 0), 0);
 
+    return deriveMetrics(totals, totalReach);
+};
+
+/**
+ * 由累计值计算聚合指标（如 rollupCube 的查询结果）
+ * @param totals - 各字段之和
+ */
+export const calculateTotalsMetrics = (totals: ColumnTotals): AggregatedMetrics => {
+    const { reach, ...rest } = totals;
+    return deriveMetrics(rest, reach);
+};
+
+// 由累计值计算比率指标（calculateMetrics / calculateTotalsMetrics 共用）
+const deriveMetrics = (totals: Omit<ColumnTotals, 'reach'>, totalReach: number): AggregatedMetrics => {
+    const { spend, impressions, link_clicks, purchases, purchase_value, adds_to_cart, checkouts_initiated, landing_page_views } = totals;
+
     // 计算频次（Frequency）- 总曝光数 ÷ 总触达人数
     const calculatedFrequency = totalReach > 0 ? impressions / totalReach : 0;
 
+    // 验证Click-to-PV数据（同类异常只告警一次，之后只计数）
+    if (link_clicks > 0 && landing_page_views > link_clicks) {
+        recordAnomaly('calculateMetrics', 'Click-to-PV异常', () =>
+            `LPV=${landing_page_views}, Clicks=${link_clicks}, Rate=${((landing_page_views / link_clicks) * 100).toFixed(2)}%`
+        );
+    }
+
     return {
         ...totals,
         roi: spend > 0 ? purchase_value / spend : 0,
@@ -44,8 +70,6 @@ export const calculateMetrics = (records: RawAdRecord[]): AggregatedMetrics => {
         aov: purchases > 0 ? purchase_value / purchases : 0,
         // 新增中间转化指标
         click_to_pv_rate: link_clicks > 0 ? landing_page_views / link_clicks : 0,
-        // 验证Click-to-PV数据
-        ...(link_clicks > 0 && landing_page_views > link_clicks && console.warn(`⚠️ Click-to-PV异常: LPV=${landing_page_views}, Clicks=${link_clicks}, Rate=${((landing_page_views / link_clicks) * 100).toFixed(2)}%`), {}),
         checkout_rate: adds_to_cart > 0 ? checkouts_initiated / adds_to_cart : 0,
         purchase_rate: checkouts_initiated > 0 ? purchases / checkouts_initiated : 0,
         frequency: calculatedFrequency,
@@ -53,75 +77,10 @@ export const calculateMetrics = (records: RawAdRecord[]): AggregatedMetrics => {
 };
 
 // 匹配配置规则（支持AND/OR逻辑）
+// 规则按配置对象编译一次（见 ruleEngine.ts），同名记录复用匹配结果
 export const matchesConfig = (record: RawAdRecord, config: AdConfiguration): boolean => {
     if (config.rules.length === 0) return true;
-
-    const logic = config.rulesLogic || 'AND';  // 默认AND逻辑（向后兼容）
-
-    const checkRule = (rule: import('../types').FilterRule) => {
-        const fieldValue = String(record[rule.field] || '').toLowerCase();
-        // Support comma-separated values (Option A)
-        const targetValues = rule.value.toLowerCase().split(',').map(v => v.trim()).filter(v => v !== '');
-
-        if (targetValues.length === 0) return true;
-
-        switch (rule.operator) {
-            case 'contains':
-                // OR Logic: Match if ANY target value is contained
-                return targetValues.some(val => fieldValue.includes(val));
-            case 'not_contains':
-                // AND Logic: Match if NONE of the target values are contained
-                return !targetValues.some(val => fieldValue.includes(val));
-            case 'equals':
-                // OR Logic: Match if properly equals ANY target value
-                return targetValues.some(val => fieldValue === val);
-            default: return true;
-        }
-    };
-
-    if (logic === 'AND') {
-        // AND逻辑：所有规则都必须匹配
-        return config.rules.every(checkRule);
-    } else {
-        // OR逻辑：任一规则匹配即可
-        return config.rules.some(checkRule);
-    }
-};
-
-// 匹配单个层级规则
-const matchesLayerRule = (record: RawAdRecord, rule: import('../types').LayerFilterRule): boolean => {
-    const fieldValue = String(record[rule.field] || '').toLowerCase();
-    // Support comma-separated values
-    const targetValues = rule.value.toLowerCase().split(',').map(v => v.trim()).filter(v => v !== '');
-
-    if (targetValues.length === 0) return false;
-
-    switch (rule.operator) {
-        case 'contains':
-            return targetValues.some(val => fieldValue.includes(val));
-        case 'not_contains':
-            return !targetValues.some(val => fieldValue.includes(val));
-        case 'equals':
-            return targetValues.some(val => fieldValue === val);
-        default: return false;
-    }
-};
-
-// 匹配层级规则组（支持AND/OR逻辑）
-const matchesLayerRules = (
-    record: RawAdRecord,
-    rules: import('../types').LayerFilterRule[],
-    logic: 'AND' | 'OR'
-): boolean => {
-    if (rules.length === 0) return false;
-
-    if (logic === 'AND') {
-        // AND逻辑：所有规则都必须匹配
-        return rules.every(rule => matchesLayerRule(record, rule));
-    } else {
-        // OR逻辑：任一规则匹配即可
-        return rules.some(rule => matchesLayerRule(record, rule));
-    }
+    return getCompiledConfig(config, 'config').matchRecord(record)[0] === 1;
 };
 
 // 分类广告系列
@@ -135,24 +94,8 @@ export const classifyCampaign = (record: RawAdRecord, config?: import('../types'
         return CampaignLayer.CONVERSION;
     }
 
-    // 使用配置进行分类
-    // 检查 Awareness
-    if (matchesLayerRules(record, config.awareness.rules, config.awareness.logic)) {
-        return CampaignLayer.AWARENESS;
-    }
-
-    // 检查 Traffic
-    if (matchesLayerRules(record, config.traffic.rules, config.traffic.logic)) {
-        return CampaignLayer.TRAFFIC;
-    }
-
-    // 检查 Conversion
-    if (matchesLayerRules(record, config.conversion.rules, config.conversion.logic)) {
-        return CampaignLayer.CONVERSION;
-    }
-
-    // 默认归类为 Conversion
-    return CampaignLayer.CONVERSION;
+    // 使用配置进行分类：依次检查 Awareness / Traffic / Conversion，默认归类为 Conversion
+    return classifyLayer(record, config, 'layer');
 };
 
 // 格式化货币
@@ -214,6 +157,203 @@ export const getOverlapPeriod = (
     return { start: overlapStart, end: overlapEnd, days };
 };
 
+export interface DatePartition {
+    /** 按天升序排列的记录（同一天内保持原顺序），日期无法解析的记录不在其中 */
+    records: RawAdRecord[];
+    /** dayStarts[k] = 第 firstDay + k 天的第一条记录在 records 中的下标，长度 numDays + 1 */
+    dayStarts: Int32Array;
+    firstDay: number;      // 最早的天序号（toDayNumber）
+    numDays: number;       // 覆盖的天数
+}
+
+const partitionCache = new WeakMap<RawAdRecord[], DatePartition>();
+
+const buildDatePartition = (data: RawAdRecord[]): DatePartition => {
+    const rowDay = new Float64Array(data.length);
+    let firstDay = Infinity;
+    let lastDay = -Infinity;
+    for (let i = 0; i < data.length; i++) {
+        const day = toDayNumber(data[i].date);
+        rowDay[i] = day;
+        if (day < firstDay) firstDay = day;
+        if (day > lastDay) lastDay = day;
+    }
+
+    if (firstDay > lastDay) {
+        return { records: [], dayStarts: new Int32Array(1), firstDay: 0, numDays: 0 };
+    }
+
+    // 按天计数排序（稳定，O(N)）
+    const numDays = lastDay - firstDay + 1;
+    const dayStarts = new Int32Array(numDays + 1);
+    for (let i = 0; i < data.length; i++) {
+        const day = rowDay[i];
+        if (!Number.isNaN(day)) dayStarts[day - firstDay + 1]++;
+    }
+    for (let k = 1; k <= numDays; k++) dayStarts[k] += dayStarts[k - 1];
+
+    const records: RawAdRecord[] = new Array(dayStarts[numDays]);
+    const fill = dayStarts.slice(0, numDays);
+    for (let i = 0; i < data.length; i++) {
+        const day = rowDay[i];
+        if (!Number.isNaN(day)) records[fill[day - firstDay]++] = data[i];
+    }
+
+    return { records, dayStarts, firstDay, numDays };
+};
+
+/**
+ * 获取数据集的按天分区（按数组对象身份缓存，数据加载后只构建一次）
+ * @param data - 原始记录
+ */
+export const getDatePartition = (data: RawAdRecord[]): DatePartition => {
+    let partition = partitionCache.get(data);
+    if (!partition) {
+        const end = startStage('buildDatePartition');
+        partition = buildDatePartition(data);
+        end();
+        addCount('buildDatePartition', 'rows', partition.records.length);
+        if (partition.records.length < data.length) {
+            recordAnomaly('buildDatePartition', '日期无法解析', `${data.length - partition.records.length} 条记录`);
+        }
+        partitionCache.set(data, partition);
+    }
+    return partition;
+};
+
+/**
+ * 取 [startDay, endDay]（天序号，包含两端）内的记录：两次下标查找 + 一次连续切片
+ * @param partition - getDatePartition 的结果
+ * @param startDay - 起始天序号
+ * @param endDay - 结束天序号
+ */
+export const sliceDateRange = (partition: DatePartition, startDay: number, endDay: number): RawAdRecord[] => {
+    const { records, dayStarts, firstDay, numDays } = partition;
+    const from = Math.max(startDay - firstDay, 0);
+    const to = Math.min(endDay - firstDay + 1, numDays);
+    if (Number.isNaN(from) || Number.isNaN(to) || from >= to) return [];
+    if (from === 0 && to === numDays) return records;
+    return records.slice(dayStarts[from], dayStarts[to]);
+};
+
+// ============ 日期切片的来源 ============
+// 切片 -> (源数据集, 天序号范围)。按天预聚合的结果（如 benchmarkService 的日统计）挂在源数据集上，
+// 任意日期范围只需合并对应天的结果；Worker 池据此只发送一次源数据集，在 Worker 内重新切片。
+
+export interface DateRangeOrigin {
+    source: RawAdRecord[];
+    startDay: number;
+    endDay: number;
+}
+
+const rangeOrigins = new WeakMap<RawAdRecord[], DateRangeOrigin>();
+const rangeSlices = new WeakMap<RawAdRecord[], Map<string, RawAdRecord[]>>();
+const MAX_CACHED_SLICES = 8;
+
+/**
+ * 日期切片的来源（不是由 sliceDateRangeOf 得到的数组返回 undefined）
+ * @param records - 记录数组
+ */
+export const getDateRangeOrigin = (records: RawAdRecord[]): DateRangeOrigin | undefined => rangeOrigins.get(records);
+
+/**
+ * 取源数据集 [startDay, endDay] 内的记录并登记来源；同一源、同一范围返回同一数组（保留最近几个范围）
+ * @param source - 源数据集
+ * @param startDay - 起始天序号
+ * @param endDay - 结束天序号
+ */
+export const sliceDateRangeOf = (source: RawAdRecord[], startDay: number, endDay: number): RawAdRecord[] => {
+    let slices = rangeSlices.get(source);
+    if (!slices) {
+        slices = new Map();
+        rangeSlices.set(source, slices);
+    }
+    const key = `${startDay}-${endDay}`;
+    let slice = slices.get(key);
+    if (slice) {
+        // 移到最近使用
+        slices.delete(key);
+        slices.set(key, slice);
+        return slice;
+    }
+    slice = sliceDateRange(getDatePartition(source), startDay, endDay);
+    if (slice.length > 0) rangeOrigins.set(slice, { source, startDay, endDay });
+    slices.set(key, slice);
+    if (slices.size > MAX_CACHED_SLICES) slices.delete(slices.keys().next().value!);
+    return slice;
+};
+
+type NameField = 'campaign_name' | 'adset_name' | 'ad_name';
+const nameGroupsCache = new WeakMap<RawAdRecord[], Partial<Record<NameField, Map<string, RawAdRecord[]>>>>();
+
+/**
+ * 按 Campaign / AdSet / Ad 名称分组记录（按数组对象身份缓存），代替逐个实体 filter 整个数组
+ * @param data - 原始记录
+ * @param field - 分组字段
+ */
+export const groupRecordsByName = (data: RawAdRecord[], field: NameField): Map<string, RawAdRecord[]> => {
+    let cached = nameGroupsCache.get(data);
+    if (!cached) {
+        cached = {};
+        nameGroupsCache.set(data, cached);
+    }
+    let groups = cached[field];
+    if (!groups) {
+        groups = new Map();
+        for (let i = 0; i < data.length; i++) {
+            const record = data[i];
+            const group = groups.get(record[field]);
+            if (group) group.push(record);
+            else groups.set(record[field], [record]);
+        }
+        cached[field] = groups;
+    }
+    return groups;
+};
+
+// 按日期范围筛选数据（App 的 filteredData / comparisonData）
+// 对比模式下同时返回紧邻所选区间之前、等长的对比周期数据
+// 数据按天分区一次（getDatePartition），之后每次调整日期范围只是两段连续切片
+export const filterByDateRange = (
+    data: RawAdRecord[],
+    startDate: string,
+    endDate: string,
+    compareMode: boolean
+): { filteredData: RawAdRecord[]; comparisonData: RawAdRecord[] } => {
+    debugLog('filterByDateRange', 'Total data:', data.length, 'Date range:', { startDate, endDate });
+
+    if (!startDate || !endDate) {
+        debugLog('filterByDateRange', 'No date range set, returning all data');
+        return { filteredData: data, comparisonData: [] };
+    }
+
+    getDatePartition(data);     // 首次调用时构建分区（单独计时）
+    const end = startStage('filterByDateRange');
+
+    const startDay = toDayNumber(startDate);
+    const endDay = toDayNumber(endDate);
+    const main = sliceDateRangeOf(data, startDay, endDay);
+    deriveDatasetKey(data, main, `${startDay}-${endDay}`);
+
+    addCount('filterByDateRange', 'filteredRows', main.length);
+    debugLog('filterByDateRange', 'Filtered result:', main.length, 'records', 'First filtered record:', main[0]);
+
+    if (compareMode) {
+        // 对比周期：紧邻所选区间之前、等长
+        const compEndDay = startDay - 1;
+        const compStartDay = compEndDay - (endDay - startDay);
+        const comp = sliceDateRangeOf(data, compStartDay, compEndDay);
+        deriveDatasetKey(data, comp, `${compStartDay}-${compEndDay}`);
+
+        addCount('filterByDateRange', 'comparisonRows', comp.length);
+        end();
+        return { filteredData: main, comparisonData: comp };
+    }
+
+    end();
+    return { filteredData: main, comparisonData: [] };
+};
+
 // 计算单个业务线在指定时间段内的应分配预算
 export const calculateConfigBudget = (
     config: AdConfiguration,
@@ -294,7 +434,8 @@ export const calculateTotalBudget = (
 // 添加数据验证函数
 export function validateClickToPvRate(landing_page_views: number, link_clicks: number): void {
     if (link_clicks > 0 && landing_page_views > link_clicks) {
-        console.warn(`⚠️ 数据异常: Landing Page Views (${landing_page_views}) > Link Clicks (${link_clicks})`);
-        console.warn(`   Click-to-PV Rate = ${((landing_page_views / link_clicks) * 100).toFixed(2)}%`);
+        recordAnomaly('validateClickToPvRate', 'Landing Page Views > Link Clicks', () =>
+            `LPV=${landing_page_views}, Clicks=${link_clicks}, Click-to-PV Rate = ${((landing_page_views / link_clicks) * 100).toFixed(2)}%`
+        );
     }
 }
@@ -0,0 +1,235 @@
+import { RawAdRecord, AdConfiguration, LayerConfiguration } from '../types';
+import { ActionItemsResult } from './actionItemsUtils';
+import { DiagnosticDetail } from './aiSummaryUtils';
+import { CampaignContext, diagnoseScenarioBatch, expandScenarioMask, toMetricColumns, toContextColumns } from './campaignDiagnostics';
+import { calculateBenchmarks, CampaignBenchmarks, toPercentileBenchmarks } from './benchmarkCalculator';
+import { diagnoseAd, AdDiagnosticContext } from './adDiagnostics';
+import { calculateLayerBenchmarksFor, getCampaignLayer, LayerBenchmarks, toPercentileLayerBenchmarks } from './benchmarkService';
+import { getMembershipIndex } from './ruleEngine';
+
+// ActionItemsTab 的 Campaign / Ad 诊断数据（用于 AI 诊断面板）
+// 纯函数，主线程与分析 Worker 共用
+// 诊断基准使用中位数（Campaign-天 / Ad 的分位数），不被少数大 Campaign、大素材拉偏；
+// Action Items 的优先级仍按加权平均（getBenchmarkForKPI）
+
+/**
+ * 预计算所有 ROI Campaign 的诊断数据
+ * @param result - 当前显示的 Action Items（已应用筛选）
+ * @param data - 日期范围内的原始数据
+ * @param configs - 业务线配置
+ * @param layerConfig - 层级配置
+ * @param dateRange - 所选日期范围
+ * @returns campaignId -> 诊断详情
+ */
+export const buildCampaignDiagnostics = (
+    result: ActionItemsResult | null,
+    data: RawAdRecord[],
+    configs: AdConfiguration[],
+    layerConfig: LayerConfiguration,
+    dateRange: { start: string; end: string }
+): Map<string, DiagnosticDetail[]> => {
+    if (!result) return new Map<string, DiagnosticDetail[]>();
+
+    const diagMap = new Map<string, DiagnosticDetail[]>();
+
+    // 1. 按业务线预计算 Benchmarks（中位数）
+    const benchmarksMap = new Map<string, LayerBenchmarks>();
+    // 业务线成员索引（按 data 对象身份缓存）
+    const membership = getMembershipIndex(data, configs);
+    configs.forEach((config, configIndex) => {
+        // 筛选属于该业务线的数据
+        // 注意：这里使用传入的原始 data，虽然它只经过了日期筛选，但我们需要为每个业务线计算其 Benchmark
+        // （data 为日期切片时由源数据集的按天统计合并得到）
+        if (membership.rowIds[configIndex].length > 0) {
+            benchmarksMap.set(config.id, toPercentileLayerBenchmarks(calculateLayerBenchmarksFor(data, configs, configIndex, 'config', layerConfig)));
+        }
+    });
+
+    // 2. 收集需要诊断的 Campaign（列式输入，批量判定场景）
+    const adsetCounts = new Map<string, number>();
+    result.adSets.forEach(a => adsetCounts.set(a.campaignName, (adsetCounts.get(a.campaignName) || 0) + 1));
+    const start = new Date(dateRange.start);
+    const end = new Date(dateRange.end);
+    const activeDays = Math.ceil(Math.abs(end.getTime() - start.getTime()) / (1000 * 60 * 60 * 24)) + 1;
+
+    const targets: typeof result.campaigns = [];
+    const metricRows: any[] = [];
+    const contexts: CampaignContext[] = [];
+    const benchmarkTable: CampaignBenchmarks[] = [];
+    const benchmarkSlots = new Map<CampaignBenchmarks, number>();
+    const benchmarkIds: number[] = [];
+
+    result.campaigns.forEach(campaign => {
+        // 获取该业务线的 Benchmarks
+        const layerBenchmarks = benchmarksMap.get(campaign.businessLineId);
+
+        if (campaign.kpiType !== 'ROI' || !layerBenchmarks) {
+            return;
+        }
+
+        // 获取 Campaign 所属层级
+        const layer = getCampaignLayer(campaign.campaignName, layerConfig);
+
+        // 获取对应的 CampaignBenchmarks
+        // 优先使用对应层级的数据，如果该层级无数据 (hasData=false)，则回退到 global
+        const layerKey = layer.toLowerCase() as keyof typeof layerBenchmarks;
+        const targetBenchmarks = layerBenchmarks[layerKey] && (layerBenchmarks[layerKey] as any).hasData
+            ? layerBenchmarks[layerKey]
+            : layerBenchmarks.global;
+
+        let slot = benchmarkSlots.get(targetBenchmarks);
+        if (slot === undefined) {
+            slot = benchmarkTable.length;
+            benchmarkTable.push(targetBenchmarks);
+            benchmarkSlots.set(targetBenchmarks, slot);
+        }
+
+        // 计算上下文
+        const adsetCount = adsetCounts.get(campaign.campaignName) || 1;
+        const config = configs.find(c => c.id === campaign.businessLineId);
+        const totalBudget = config?.budget || 0;
+        const dailyBudget = totalBudget / activeDays / Math.max(result.campaigns.length, 1);
+
+        targets.push(campaign);
+        benchmarkIds.push(slot);
+        contexts.push({
+            adsetCount,
+            activeDays,
+            dailyBudget,
+            campaignBudget: dailyBudget * activeDays
+        });
+        metricRows.push({
+            spend: campaign.spend,
+            roi: campaign.actualValue,
+            cvr: campaign.metrics?.cvr,
+            cpc: campaign.metrics?.cpc,
+            cpm: campaign.metrics?.cpm,
+            cpa: campaign.metrics?.cpa,
+            ctr: campaign.metrics?.ctr,
+            aov: campaign.metrics?.aov,
+            frequency: campaign.metrics?.frequency || 0,
+            click_to_pv_rate: campaign.metrics?.click_to_pv_rate || 0,
+            checkout_rate: campaign.metrics?.checkout_rate || 0,
+            purchase_rate: campaign.metrics?.purchase_rate || 0,
+        });
+    });
+
+    // 3. 一次判定所有 Campaign 的场景，只为命中的 Campaign 生成诊断文本
+    const { mask } = diagnoseScenarioBatch(
+        toMetricColumns(metricRows),
+        benchmarkTable,
+        Int32Array.from(benchmarkIds),
+        toContextColumns(contexts)
+    );
+
+    targets.forEach((campaign, i) => {
+        if (mask[i] === 0) return;
+
+        const diagResults = expandScenarioMask(mask[i], metricRows[i], benchmarkTable[benchmarkIds[i]], contexts[i]);
+        const details: DiagnosticDetail[] = diagResults.map(result => ({
+            campaignName: campaign.campaignName,
+            priority: campaign.priority || null,
+            scenario: result.scenario,
+            diagnosis: result.diagnosis,
+            action: result.action
+        }));
+
+        diagMap.set(campaign.id, details);
+    });
+
+    return diagMap;
+};
+
+/**
+ * 预计算所有 Ad 的诊断数据（用于 AI 诊断面板的素材问题分析）
+ * @param result - 当前显示的 Action Items（已应用筛选）
+ * @param dateRange - 所选日期范围
+ * @param configs - 业务线配置
+ * @returns adId -> 诊断详情
+ */
+export const buildAdDiagnostics = (
+    result: ActionItemsResult | null,
+    dateRange: { start: string; end: string },
+    configs: AdConfiguration[]
+): Map<string, DiagnosticDetail[]> => {
+    if (!result || result.ads.length === 0) return new Map<string, DiagnosticDetail[]>();
+
+    const diagMap = new Map<string, DiagnosticDetail[]>();
+
+    // 计算Ad层级的Benchmark（中位数）
+    const adsWithMetrics = result.ads.map(ad => ({
+        metrics: {
+            roi: ad.metrics?.roi || 0,
+            ctr: ad.metrics?.ctr || 0,
+            cvr: ad.metrics?.cvr || 0,
+            frequency: ad.metrics?.frequency || 0,
+        }
+    }));
+
+    const adBenchmarks = toPercentileBenchmarks(calculateBenchmarks(adsWithMetrics));
+    if (!adBenchmarks) return diagMap;
+
+    // 计算上线天数
+    const start = new Date(dateRange.start);
+    const end = new Date(dateRange.end);
+    const activeDays = Math.ceil(Math.abs(end.getTime() - start.getTime()) / (1000 * 60 * 60 * 24)) + 1;
+
+    // 每个 Campaign 的 AdSet 数、每个 AdSet 中 spend > 0 的 Ad 数（一次扫描）
+    const adsetCounts = new Map<string, number>();
+    result.adSets.forEach(a => adsetCounts.set(a.campaignName, (adsetCounts.get(a.campaignName) || 0) + 1));
+    const activeAdCounts = new Map<string, number>();
+    result.ads.forEach(a => {
+        if (a.spend > 0) activeAdCounts.set(a.adSetName, (activeAdCounts.get(a.adSetName) || 0) + 1);
+    });
+
+    result.ads.forEach(ad => {
+        // 计算AdSet预算（简化：使用Campaign预算除以AdSet数量）
+        const adsetCount = adsetCounts.get(ad.campaignName) || 1;
+        const config = configs.find(c => c.id === ad.businessLineId);
+        const totalBudget = config?.budget || 0;
+        const campaignBudget = totalBudget / Math.max(result.campaigns.length, 1);
+        const adsetBudget = campaignBudget / adsetCount;
+
+        // 计算活跃Ad数量（同一AdSet下spend > 0的Ad数量）
+        const activeAds = activeAdCounts.get(ad.adSetName) || 1;
+
+        // 判断是否为视频素材
+        const isVideo = ad.adName.toLowerCase().includes('video');
+
+        // 构建Ad诊断上下文
+        const context: AdDiagnosticContext = {
+            spend: ad.spend,
+            activeDays,
+            adsetBudget,
+            activeAds,
+            roi: ad.metrics?.roi || 0,
+            ctr: ad.metrics?.ctr || 0,
+            cvr: ad.metrics?.cvr || 0,
+            frequency: ad.metrics?.frequency || 0,
+            roiBenchmark: adBenchmarks.avgRoi,
+            ctrBenchmark: adBenchmarks.avgCtr,
+            cvrBenchmark: adBenchmarks.avgCvr,
+            frequencyBenchmark: adBenchmarks.avgFrequency || 2.0,
+            isVideo,
+            videoPlayRate3s: ad.metrics?.video_plays_3s ?
+                (ad.metrics.video_plays_3s / (ad.metrics.impressions || 1)) : undefined,
+            videoPlayRate3sBenchmark: 0.2  // 默认20%作为基准
+        };
+
+        // 执行Ad诊断
+        const diagResult = diagnoseAd(context);
+        if (diagResult) {
+            const detail: DiagnosticDetail = {
+                campaignName: ad.adName,  // 使用Ad名称
+                priority: diagResult.priority,
+                scenario: diagResult.scenario + (diagResult.subScenario ? ` (${diagResult.subScenario})` : ''),
+                diagnosis: diagResult.diagnosis,
+                action: diagResult.action
+            };
+
+            diagMap.set(ad.id, [detail]);
+        }
+    });
+
+    return diagMap;
+};
@@ -0,0 +1,214 @@
+import Papa from 'papaparse';
+import * as XLSX from 'xlsx';
+import { ColumnarBuilder, ColumnarDataset, transferList } from './columnarStore';
+import { HeaderMapping, mapRow, resolveHeaderMapping } from './recordParser';
+import { addCount, startStage } from './instrumentation';
+
+// 上传文件的流式导入
+//
+// 在 Worker 中按块解析文件：表头别名映射每个文件只解析一次，之后按列下标读取每行，
+// 记录直接追加进列式数据集（ColumnarBuilder），不再先生成整份行对象数组再映射一遍。
+// CSV 按 CHUNK_SIZE 分块读取，内存只保留当前块；Excel（zip 格式）无法分块读取，
+// 整个工作簿读入后按 SHEET_BATCH 行一批转换。每块 / 每批报告一次进度。
+
+const CHUNK_SIZE = 4 * 1024 * 1024;
+const SHEET_BATCH = 20000;
+
+export interface IngestProgress {
+    phase: 'reading' | 'parsing';
+    bytes: number;          // 已读取字节数（Excel 读取完成前为 0）
+    totalBytes: number;
+    rows: number;           // 已导入的有效记录数
+}
+
+export interface IngestStats {
+    rawRows: number;
+    skippedRows: number;
+    records: number;
+}
+
+// Worker 消息
+export type IngestRequest = { kind: 'ingest'; file: File };
+export type IngestResponse =
+    | { kind: 'progress'; progress: IngestProgress }
+    | { kind: 'done'; dataset: ColumnarDataset; stats: IngestStats }
+    | { kind: 'error'; message: string };
+
+const fileType = (name: string): 'csv' | 'excel' | null => {
+    const extension = name.split('.').pop()?.toLowerCase();
+    if (extension === 'csv') return 'csv';
+    if (extension === 'xlsx' || extension === 'xls') return 'excel';
+    return null;
+};
+
+/** 是否为支持导入的文件格式 */
+export const isSupportedFile = (name: string): boolean => fileType(name) !== null;
+
+// 逐行追加，统计有效 / 跳过的行
+const createSink = () => {
+    const builder = new ColumnarBuilder(64 * 1024);
+    const stats: IngestStats = { rawRows: 0, skippedRows: 0, records: 0 };
+    const append = (row: any[], mapping: HeaderMapping) => {
+        stats.rawRows++;
+        const record = mapRow(row, mapping);
+        if (record) {
+            builder.append(record);
+            stats.records++;
+        } else {
+            stats.skippedRows++;
+        }
+    };
+    return { builder, stats, append };
+};
+
+const parseCsv = (
+    file: File,
+    onProgress: (progress: IngestProgress) => void
+): Promise<{ dataset: ColumnarDataset; stats: IngestStats }> => new Promise((resolve, reject) => {
+    const { builder, stats, append } = createSink();
+    const totalBytes = file.size;
+    let mapping: HeaderMapping | null = null;
+    let chunks = 0;
+
+    Papa.parse<string[]>(file, {
+        header: false,
+        skipEmptyLines: true,
+        chunkSize: CHUNK_SIZE,
+        chunk: (results) => {
+            const rows = results.data;
+            let start = 0;
+            if (!mapping) {
+                if (rows.length === 0) return;
+                mapping = resolveHeaderMapping(rows[0].map(String));
+                start = 1;
+            }
+            for (let i = start; i < rows.length; i++) append(rows[i], mapping);
+            chunks++;
+            onProgress({ phase: 'parsing', bytes: Math.min(chunks * CHUNK_SIZE, totalBytes), totalBytes, rows: stats.records });
+        },
+        complete: () => resolve({ dataset: builder.build(), stats }),
+        error: (err) => reject(new Error(`CSV解析错误: ${err.message}`))
+    });
+});
+
+const parseExcel = async (
+    file: File,
+    onProgress: (progress: IngestProgress) => void
+): Promise<{ dataset: ColumnarDataset; stats: IngestStats }> => {
+    const totalBytes = file.size;
+    onProgress({ phase: 'reading', bytes: 0, totalBytes, rows: 0 });
+
+    const workbook = XLSX.read(new Uint8Array(await file.arrayBuffer()), { type: 'array' });
+    const firstSheet = workbook.Sheets[workbook.SheetNames[0]];
+    // 行数组（第一行为表头），与原先 sheet_to_json 对象模式读到的值相同，同样跳过空行
+    const rows = XLSX.utils.sheet_to_json<any[]>(firstSheet, { header: 1, blankrows: false });
+
+    const { builder, stats, append } = createSink();
+    if (rows.length > 0) {
+        const mapping = resolveHeaderMapping(Array.from(rows[0], cell => String(cell ?? '')));
+        for (let start = 1; start < rows.length; start += SHEET_BATCH) {
+            const end = Math.min(start + SHEET_BATCH, rows.length);
+            for (let i = start; i < end; i++) append(rows[i], mapping);
+            onProgress({ phase: 'parsing', bytes: Math.round(totalBytes * end / rows.length), totalBytes, rows: stats.records });
+        }
+    }
+    return { dataset: builder.build(), stats };
+};
+
+/**
+ * 解析上传文件为列式数据集（在 Worker 中调用，不支持 Worker 时也可在主线程调用）
+ * @param file - CSV / XLSX / XLS 文件
+ * @param onProgress - 进度回调
+ * @returns 数据集与行数统计（没有有效行时抛出错误）
+ */
+export const parseFileToColumnar = async (
+    file: File,
+    onProgress: (progress: IngestProgress) => void = () => {}
+): Promise<{ dataset: ColumnarDataset; stats: IngestStats }> => {
+    const type = fileType(file.name);
+    if (!type) throw new Error('不支持的文件格式，请上传 CSV 或 XLSX 文件');
+
+    const result = type === 'csv' ? await parseCsv(file, onProgress) : await parseExcel(file, onProgress);
+    if (result.stats.records === 0) {
+        throw new Error('数据处理失败: 未找到有效数据，请检查文件格式');
+    }
+    return result;
+};
+
+export interface IngestOptions {
+    onProgress?: (progress: IngestProgress) => void;
+    signal?: AbortSignal;
+}
+
+const recordStats = (stats: IngestStats) => {
+    addCount('ingestFile', 'rawRows', stats.rawRows);
+    addCount('ingestFile', 'skippedRows', stats.skippedRows);
+    addCount('ingestFile', 'records', stats.records);
+};
+
+/**
+ * 在独立 Worker 中导入上传文件（一个文件一个 Worker，完成后销毁）
+ * @param file - CSV / XLSX / XLS 文件
+ * @param options - onProgress 进度回调、signal 取消信号
+ * @returns 列式数据集
+ */
+export const ingestFile = (file: File, options: IngestOptions = {}): Promise<ColumnarDataset> => {
+    const { onProgress, signal } = options;
+    const end = startStage('ingestFile');
+
+    // 回退：主线程解析
+    if (typeof Worker === 'undefined') {
+        return parseFileToColumnar(file, onProgress).then(({ dataset, stats }) => {
+            recordStats(stats);
+            return dataset;
+        }).finally(end);
+    }
+
+    return new Promise<ColumnarDataset>((resolve, reject) => {
+        const worker = new Worker(new URL('../workers/ingestWorker.ts', import.meta.url), { type: 'module' });
+        const finish = (settle: () => void) => {
+            worker.terminate();
+            signal?.removeEventListener('abort', abort);
+            end();
+            settle();
+        };
+        const abort = () => {
+            const error = new Error('文件导入已取消');
+            error.name = 'AbortError';
+            finish(() => reject(error));
+        };
+        signal?.addEventListener('abort', abort, { once: true });
+
+        worker.onmessage = (event: MessageEvent<IngestResponse>) => {
+            const message = event.data;
+            if (message.kind === 'progress') {
+                onProgress?.(message.progress);
+            } else if (message.kind === 'done') {
+                recordStats(message.stats);
+                finish(() => resolve(message.dataset));
+            } else {
+                finish(() => reject(new Error(message.message)));
+            }
+        };
+        worker.onerror = (event) => {
+            event.preventDefault();
+            finish(() => reject(new Error(event.message || '文件解析失败')));
+        };
+
+        const request: IngestRequest = { kind: 'ingest', file };
+        worker.postMessage(request);
+    });
+};
+
+/** Worker 端：解析文件并把数据集的列缓冲区转移回主线程 */
+export const handleIngestRequest = async (
+    request: IngestRequest,
+    post: (message: IngestResponse, transfer?: ArrayBuffer[]) => void
+): Promise<void> => {
+    try {
+        const { dataset, stats } = await parseFileToColumnar(request.file, progress => post({ kind: 'progress', progress }));
+        post({ kind: 'done', dataset, stats }, transferList(dataset));
+    } catch (err) {
+        post({ kind: 'error', message: err instanceof Error ? err.message : String(err) });
+    }
+};
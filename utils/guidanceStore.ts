@@ -0,0 +1,259 @@
+import { RawAdRecord, AdConfiguration } from '../types';
+import { ActionItemsResult, ActionCampaign, ActionAdSet, ActionAd } from './actionItemsUtils';
+import { CampaignMetrics, getOptimizationGuidanceBatch, getPriorityLevel } from './optimizationRules';
+import { CampaignContext, DiagnosticResult, TrendInfo, diagnoseAllScenarios, calculateTrend } from './campaignDiagnostics';
+import { CampaignBenchmarks } from './benchmarkCalculator';
+import { queryRollup } from './rollupCube';
+
+// ActionItemsTab 的调优指导（按实体预计算）
+//
+// 调优建议、优先级、触发条件原先在表格每一行渲染时计算，展开 / 收起任意一行都会让所有行重新计算。
+// 这里在 (数据, 阈值, 配置) 变化时一次算出所有实体的结果，渲染与按优先级排序只做查表。
+// 规则引擎部分按 (层级, KPI) 分组走 getOptimizationGuidanceBatch，结果与逐个调用一致。
+
+export type GuidancePriority = 'P0' | 'P1' | 'P2' | 'OK';
+
+export interface GuidanceEntry {
+    guidance: string;
+    priority: GuidancePriority;         // 由调优建议文本得出（getPriorityLevel）
+    sortRank: number;                   // 与表格「优先级」列一致的排序值，越小越紧急
+    triggeredConditions: string[];
+    metrics: CampaignMetrics;
+    avgMetrics: CampaignMetrics;
+
+    // 仅 ROI Campaign（新诊断引擎），用于展开后生成详细步骤
+    context?: CampaignContext;
+    diagnosticMetrics?: any;
+    diagnosticResults?: DiagnosticResult[];
+    trendInfo?: TrendInfo;
+}
+
+export interface GuidanceStore {
+    campaigns: Map<string, GuidanceEntry>;      // campaign.id -> 指导
+    adSets: Map<string, GuidanceEntry>;         // adSet.id -> 指导
+    ads: Map<string, GuidanceEntry>;            // getAdGuidanceKey(ad) -> 指导
+}
+
+export interface GuidanceStoreInput {
+    result: ActionItemsResult | null;
+    data: RawAdRecord[];
+    configs: AdConfiguration[];
+    dateRange: { start: string; end: string };
+    campaignBenchmarks: CampaignBenchmarks | null;
+    campaignTrendROI: Map<string, { l3dROI: number; l7dROI: number }>;
+}
+
+type ActionEntity = ActionCampaign | ActionAdSet | ActionAd;
+
+const EMPTY_STORE: GuidanceStore = { campaigns: new Map(), adSets: new Map(), ads: new Map() };
+
+// 优先级排序值：P0 < P1 < P2 < 正常
+const LEVEL_RANK: Record<GuidancePriority, number> = { P0: 0, P1: 1, P2: 2, OK: 3 };
+
+/**
+ * Ad 的查表键（同名 Ad 可出现在不同 AdSet 下，id 相同）
+ * @param ad - Action Item 中的 Ad
+ */
+export const getAdGuidanceKey = (ad: { id: string; campaignName: string; adSetName: string }): string =>
+    `${ad.id}|${ad.campaignName}|${ad.adSetName}`;
+
+/**
+ * ROI Campaign 的调优指导文本：每个命中场景一行（action_items.py 的 scenario_guidance 输出相同格式）
+ * @param results - diagnoseAllScenarios 的结果
+ */
+export const formatScenarioGuidance = (results: DiagnosticResult[]): string =>
+    results.length > 0
+        ? results.map(r => {
+            const priorityEmoji = r.priority === 1 ? '🔴' : r.priority === 2 ? '🟡' : '🟢';
+            return `${priorityEmoji} ${r.scenario} - ${r.diagnosis}: ${r.action}`;
+        }).join('\n')
+        : '⚠️ 暂无匹配的 action';
+
+// 当前值 / 均值指标（表格与详情面板使用的结构）
+const toMetrics = (item: ActionEntity, withRawFields: boolean): CampaignMetrics => {
+    const metrics: CampaignMetrics = {
+        spend: item.spend,
+        roi: item.kpiType === 'ROI' ? item.actualValue : undefined,
+        cpc: item.kpiType === 'CPC' ? item.actualValue : undefined,
+        cpm: item.kpiType === 'CPM' ? item.actualValue : undefined,
+        cvr: item.metrics?.cvr,
+        aov: item.metrics?.aov,
+        cpa: item.metrics?.cpa,
+        cpatc: item.metrics?.cpatc,
+        atc_rate: item.metrics?.atc_rate,
+        ctr: item.metrics?.ctr,
+        clicks: item.metrics?.clicks,
+        impressions: item.metrics?.impressions,
+        reach: item.metrics?.reach,
+        frequency: item.metrics?.frequency,
+    };
+    if (withRawFields) {
+        // 原始数据字段用于诊断公式计算
+        Object.assign(metrics, {
+            link_clicks: item.metrics?.clicks || 0,
+            landing_page_views: item.metrics?.landing_page_views || 0,
+            purchases: item.metrics?.purchases || 0,
+            adds_to_cart: item.metrics?.adds_to_cart || 0,
+            checkouts_initiated: item.metrics?.checkouts_initiated || 0,
+            purchase_value: item.metrics?.purchase_value || 0,
+        });
+    }
+    return metrics;
+};
+
+const toAvgMetrics = (item: ActionEntity): CampaignMetrics => ({
+    spend: item.avgSpend,
+    roi: item.kpiType === 'ROI' ? item.avgValue : undefined,
+    cpc: item.kpiType === 'CPC' ? item.avgValue : undefined,
+    cpm: item.kpiType === 'CPM' ? item.avgValue : undefined,
+    cvr: item.avgMetrics?.cvr,
+    aov: item.avgMetrics?.aov,
+    cpa: item.avgMetrics?.cpa,
+    cpatc: item.avgMetrics?.cpatc,
+    atc_rate: item.avgMetrics?.atc_rate,
+    ctr: item.avgMetrics?.ctr,
+    clicks: item.avgMetrics?.clicks,
+    impressions: item.avgMetrics?.impressions,
+    reach: item.avgMetrics?.reach,
+    frequency: item.avgMetrics?.frequency,
+});
+
+// 同一层级内按 KPI 分组批量评估规则引擎，回填到各条目
+const applyRuleGuidance = (
+    level: 'Campaign' | 'AdSet' | 'Ad',
+    entries: GuidanceEntry[],
+    kpis: ('ROI' | 'CPC' | 'CPM')[],
+    needsRule: boolean[]
+) => {
+    const groups = new Map<'ROI' | 'CPC' | 'CPM', number[]>();
+    entries.forEach((_, i) => {
+        const group = groups.get(kpis[i]);
+        if (group) group.push(i);
+        else groups.set(kpis[i], [i]);
+    });
+
+    groups.forEach((indices, kpi) => {
+        const batch = getOptimizationGuidanceBatch(
+            level,
+            kpi,
+            indices.map(i => entries[i].metrics),
+            indices.map(i => entries[i].avgMetrics)
+        );
+        indices.forEach((i, j) => {
+            entries[i].triggeredConditions = batch.triggeredConditions[j];
+            if (needsRule[i]) entries[i].guidance = batch.guidance[j];
+        });
+    });
+
+    entries.forEach(entry => {
+        entry.priority = getPriorityLevel(entry.guidance);
+    });
+};
+
+const newEntry = (item: ActionEntity, withRawFields: boolean): GuidanceEntry => ({
+    guidance: '',
+    priority: 'OK',
+    sortRank: 0,
+    triggeredConditions: [],
+    metrics: toMetrics(item, withRawFields),
+    avgMetrics: toAvgMetrics(item),
+});
+
+/**
+ * 预计算所有 Campaign / AdSet / Ad 的调优指导
+ * @param input - 当前显示的 Action Items 及诊断所需的数据、配置、基准
+ * @returns 各层级 实体键 -> 指导
+ */
+export const buildGuidanceStore = (input: GuidanceStoreInput): GuidanceStore => {
+    const { result, data, configs, dateRange, campaignBenchmarks, campaignTrendROI } = input;
+    if (!result) return EMPTY_STORE;
+
+    // ==================== Campaign ====================
+    // ROI Campaign 使用新的诊断引擎，其余使用规则引擎
+    const start = new Date(dateRange.start);
+    const end = new Date(dateRange.end);
+    const activeDays = Math.ceil(Math.abs(end.getTime() - start.getTime()) / (1000 * 60 * 60 * 24)) + 1; // 包含起始日
+    // 每个 Campaign 下的 AdSet 数（汇总立方体按 Campaign + AdSet 查询）
+    const adsetCounts = new Map<string, number>();
+    queryRollup(data, { level: 'AdSet' }).forEach(row => {
+        adsetCounts.set(row.campaign_name, (adsetCounts.get(row.campaign_name) || 0) + 1);
+    });
+    const configById = new Map(configs.map(config => [config.id, config]));
+
+    const campaignEntries = result.campaigns.map(campaign => {
+        const entry = newEntry(campaign, true);
+        if (campaign.kpiType !== 'ROI' || !campaignBenchmarks) return entry;
+
+        // 上下文数据（用于场景5和6）
+        const totalBudget = configById.get(campaign.businessLineId)?.budget || 0;
+        const dailyBudget = totalBudget / activeDays / result.campaigns.length;
+        const context: CampaignContext = {
+            adsetCount: adsetCounts.get(campaign.campaignName) || 0,
+            activeDays,
+            dailyBudget,
+            campaignBudget: dailyBudget * activeDays
+        };
+
+        // 包含所有中间指标，获取所有匹配的诊断场景
+        const diagnosticMetrics = {
+            ...entry.metrics,
+            click_to_pv_rate: campaign.metrics?.click_to_pv_rate || 0,
+            checkout_rate: campaign.metrics?.checkout_rate || 0,
+            purchase_rate: campaign.metrics?.purchase_rate || 0,
+            frequency: campaign.metrics?.frequency || 0,
+        } as any;
+        const diagnosticResults = diagnoseAllScenarios(diagnosticMetrics, campaignBenchmarks, context);
+
+        entry.guidance = formatScenarioGuidance(diagnosticResults);
+
+        // 趋势信息（L3D / L7D）
+        const { l3dROI, l7dROI } = campaignTrendROI.get(campaign.campaignName) || { l3dROI: 0, l7dROI: 0 };
+        entry.trendInfo = calculateTrend(l3dROI, l7dROI, campaignBenchmarks.avgRoi || 0);
+        entry.context = context;
+        entry.diagnosticMetrics = diagnosticMetrics;
+        entry.diagnosticResults = diagnosticResults;
+        return entry;
+    });
+    applyRuleGuidance(
+        'Campaign',
+        campaignEntries,
+        result.campaigns.map(c => c.kpiType),
+        campaignEntries.map(entry => !entry.diagnosticResults)
+    );
+
+    // ==================== AdSet ====================
+    const adSetEntries = result.adSets.map(adSet => newEntry(adSet, false));
+    applyRuleGuidance('AdSet', adSetEntries, result.adSets.map(a => a.kpiType), adSetEntries.map(() => true));
+
+    // ==================== Ad ====================
+    // 有 Ad 诊断时使用诊断给出的 Action 建议
+    const adEntries = result.ads.map(ad => {
+        const entry = newEntry(ad, false);
+        entry.guidance = ad.diagnosticDetails?.[0]?.action || '';
+        return entry;
+    });
+    applyRuleGuidance('Ad', adEntries, result.ads.map(a => a.kpiType), adEntries.map(entry => !entry.guidance));
+
+    // 排序值与各表「优先级」列的显示一致
+    const campaigns = new Map<string, GuidanceEntry>();
+    result.campaigns.forEach((campaign, i) => {
+        const entry = campaignEntries[i];
+        entry.sortRank = campaign.priority === 'P0' ? 0 : campaign.priority === 'P1' ? 1 : 2 + LEVEL_RANK[entry.priority];
+        campaigns.set(campaign.id, entry);
+    });
+    const adSets = new Map<string, GuidanceEntry>();
+    result.adSets.forEach((adSet, i) => {
+        const entry = adSetEntries[i];
+        entry.sortRank = LEVEL_RANK[entry.priority];
+        adSets.set(adSet.id, entry);
+    });
+    const ads = new Map<string, GuidanceEntry>();
+    result.ads.forEach((ad, i) => {
+        const entry = adEntries[i];
+        const diagPriority = ad.diagnosticDetails?.[0]?.priority;
+        entry.sortRank = diagPriority ? diagPriority : 100 + LEVEL_RANK[entry.priority];
+        ads.set(getAdGuidanceKey(ad), entry);
+    });
+
+    return { campaigns, adSets, ads };
+};
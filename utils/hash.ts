@@ -0,0 +1,38 @@
+// 字符串哈希（cyrb53，53 位，非加密）
+//
+// 用于缓存键的参数指纹（persistentCache）和配置表内容比对（googleSheetConfigService）；
+// 不依赖任何存储模块，供各处共用。
+
+/**
+ * 增量字符串哈希（cyrb53）：分块 update 的结果与整串一次哈希相同
+ * @param seed - 种子
+ */
+export const createStringHasher = (seed: number = 0) => {
+    let h1 = 0xdeadbeef ^ seed;
+    let h2 = 0x41c6ce57 ^ seed;
+    return {
+        update(text: string): void {
+            for (let i = 0; i < text.length; i++) {
+                const ch = text.charCodeAt(i);
+                h1 = Math.imul(h1 ^ ch, 2654435761);
+                h2 = Math.imul(h2 ^ ch, 1597334677);
+            }
+        },
+        digest(): string {
+            const f1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+            const f2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(f1 ^ (f1 >>> 13), 3266489909);
+            return (4294967296 * (2097151 & f2) + (f1 >>> 0)).toString(36);
+        }
+    };
+};
+
+/**
+ * 53 位字符串哈希（cyrb53），用于参数指纹与内容比对
+ * @param text - 文本
+ * @param seed - 种子
+ */
+export const hashString = (text: string, seed: number = 0): string => {
+    const hasher = createStringHasher(seed);
+    hasher.update(text);
+    return hasher.digest();
+};
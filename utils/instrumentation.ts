@@ -0,0 +1,190 @@
+// 处理流水线的运行统计：阶段耗时、行 / 实体计数、数据异常计数
+//
+// 热路径（解析、日期筛选、指标计算、新人群筛选等）不再逐条打印日志，统一记到内存中的报表里，
+// 由调试面板（URL 参数 ?debug=1 时显示）展示或导出为 JSON。逐条调试日志默认关闭，可在调试面板中
+// 打开（记在 localStorage 中）；异常在每个阶段只告警一次，之后只计数。
+
+export interface AnomalyStats {
+    count: number;
+    sample: string;      // 第一次出现时的详情
+}
+
+export interface StageStats {
+    calls: number;
+    totalMs: number;
+    lastMs: number;
+    maxMs: number;
+    counters: Record<string, number>;
+    anomalies: Record<string, AnomalyStats>;
+}
+
+export interface InstrumentationReport {
+    startedAt: string;
+    generatedAt: string;
+    stages: Record<string, StageStats>;
+}
+
+const DEBUG_STORAGE_KEY = 'pipeline_debug_logging';
+
+let startedAt = new Date().toISOString();
+let stages: Record<string, StageStats> = {};
+let debugLogging: boolean | null = null;
+const listeners = new Set<() => void>();
+let notifyScheduled = false;
+
+const readDebugFlag = (): boolean => {
+    try {
+        return typeof localStorage !== 'undefined' && localStorage.getItem(DEBUG_STORAGE_KEY) === '1';
+    } catch {
+        return false;
+    }
+};
+
+/** 是否显示调试面板（URL 参数 ?debug=1） */
+export const isDebugPanelEnabled = (): boolean => {
+    if (typeof window === 'undefined') return false;
+    const param = new URLSearchParams(window.location.search).get('debug');
+    return param !== null && param !== '0';
+};
+
+/** 是否输出逐条调试日志（默认关闭） */
+export const isDebugLogging = (): boolean => {
+    if (debugLogging === null) debugLogging = readDebugFlag();
+    return debugLogging;
+};
+
+/** 打开 / 关闭逐条调试日志，并记住选择 */
+export const setDebugLogging = (enabled: boolean): void => {
+    debugLogging = enabled;
+    try {
+        if (typeof localStorage !== 'undefined') {
+            if (enabled) localStorage.setItem(DEBUG_STORAGE_KEY, '1');
+            else localStorage.removeItem(DEBUG_STORAGE_KEY);
+        }
+    } catch {
+        // 隐私模式等环境下 localStorage 不可用，只在本次会话生效
+    }
+    scheduleNotify();
+};
+
+// 多次更新合并为一次通知，避免调试面板在热路径中反复渲染
+const scheduleNotify = () => {
+    if (notifyScheduled || listeners.size === 0) return;
+    notifyScheduled = true;
+    queueMicrotask(() => {
+        notifyScheduled = false;
+        listeners.forEach(listener => listener());
+    });
+};
+
+const getStage = (stage: string): StageStats => {
+    let stats = stages[stage];
+    if (!stats) {
+        stats = { calls: 0, totalMs: 0, lastMs: 0, maxMs: 0, counters: {}, anomalies: {} };
+        stages[stage] = stats;
+    }
+    return stats;
+};
+
+/**
+ * 开始计时一个阶段
+ * @param stage - 阶段名
+ * @returns 结束计时的函数（返回本次耗时 ms）
+ */
+export const startStage = (stage: string): (() => number) => {
+    const start = performance.now();
+    return () => {
+        const ms = performance.now() - start;
+        const stats = getStage(stage);
+        stats.calls++;
+        stats.totalMs += ms;
+        stats.lastMs = ms;
+        if (ms > stats.maxMs) stats.maxMs = ms;
+        scheduleNotify();
+        return ms;
+    };
+};
+
+/**
+ * 计时执行一个同步阶段
+ * @param stage - 阶段名
+ * @param fn - 阶段函数
+ */
+export const timeStage = <T>(stage: string, fn: () => T): T => {
+    const end = startStage(stage);
+    try {
+        return fn();
+    } finally {
+        end();
+    }
+};
+
+/**
+ * 累加阶段计数（行数、实体数等）
+ * @param stage - 阶段名
+ * @param counter - 计数名
+ * @param amount - 增量
+ */
+export const addCount = (stage: string, counter: string, amount: number = 1): void => {
+    const counters = getStage(stage).counters;
+    counters[counter] = (counters[counter] || 0) + amount;
+    scheduleNotify();
+};
+
+/**
+ * 记录数据异常：每个阶段 × 异常类型只在第一次出现时告警，之后只计数
+ * @param stage - 阶段名
+ * @param kind - 异常类型
+ * @param detail - 异常详情（函数形式时只在第一次出现时求值）
+ */
+export const recordAnomaly = (stage: string, kind: string, detail?: string | (() => string)): void => {
+    const anomalies = getStage(stage).anomalies;
+    const existing = anomalies[kind];
+    if (existing) {
+        existing.count++;
+    } else {
+        const sample = typeof detail === 'function' ? detail() : (detail || '');
+        anomalies[kind] = { count: 1, sample };
+        console.warn(`⚠️ [${stage}] ${kind}${sample ? `: ${sample}` : ''}（后续同类异常只计数）`);
+    }
+    scheduleNotify();
+};
+
+/**
+ * 调试日志：只在打开调试日志时输出
+ * @param stage - 阶段名
+ * @param args - console.log 参数（可传函数延迟构造）
+ */
+export const debugLog = (stage: string, ...args: any[]): void => {
+    if (!isDebugLogging()) return;
+    console.log(`🔍 [${stage}]`, ...args.map(arg => (typeof arg === 'function' ? arg() : arg)));
+};
+
+/** 当前报表的快照 */
+export const getInstrumentationReport = (): InstrumentationReport => ({
+    startedAt,
+    generatedAt: new Date().toISOString(),
+    stages: JSON.parse(JSON.stringify(stages))
+});
+
+/** 报表 JSON（用于导出） */
+export const exportInstrumentationReport = (): string =>
+    JSON.stringify(getInstrumentationReport(), null, 2);
+
+/** 清空报表（例如重新上传数据时） */
+export const resetInstrumentation = (): void => {
+    stages = {};
+    startedAt = new Date().toISOString();
+    scheduleNotify();
+};
+
+/**
+ * 订阅报表变化（合并为微任务通知）
+ * @returns 取消订阅函数
+ */
+export const subscribeInstrumentation = (listener: () => void): (() => void) => {
+    listeners.add(listener);
+    return () => {
+        listeners.delete(listener);
+    };
+};
@@ -1,4 +1,6 @@
 import { RawAdRecord } from '../types';
+import { compileConfigs } from './ruleEngine';
+import { addCount, debugLog, startStage } from './instrumentation';
 
 export interface NewAudienceAdSet {
     id: string;
@@ -33,34 +35,21 @@ export const filterNewAudience = (
     configs: any[], // AdConfiguration[]
     kpiType: 'ROI' | 'CPC' | 'CPM'
 ): NewAudienceAdSet[] => {
+    const end = startStage('filterNewAudience');
+    addCount('filterNewAudience', 'inputRows', data.length);
+
     // Convert endDate to Date object if it's a string
     const endDateObj = typeof endDate === 'string' ? new Date(endDate) : endDate;
 
     // Filter configs by KPI type
     const matchingConfigs = configs.filter(config => config.targetType === kpiType);
-    console.log(`Filtering for KPI: ${kpiType}, Found ${matchingConfigs.length} matching configs`);
+    debugLog('filterNewAudience', `Filtering for KPI: ${kpiType}, Found ${matchingConfigs.length} matching configs`);
 
     // Helper function to check if a record matches any of the configs
+    // 所有配置编译为一个匹配器，每个名称组合只计算一次
+    const compiledConfigs = compileConfigs(matchingConfigs, 'exact');
     const matchesAnyConfig = (record: RawAdRecord): boolean => {
-        return matchingConfigs.some(config => {
-            // Check if record matches the config's rules
-            if (!config.rules || config.rules.length === 0) return false;
-
-            const rulesLogic = config.rulesLogic || 'AND';
-            const ruleResults = config.rules.map((rule: any) => {
-                const recordValue = record[rule.field as keyof RawAdRecord];
-                if (typeof recordValue === 'string') {
-                    if (rule.operator === 'contains') return recordValue.includes(rule.value);
-                    if (rule.operator === 'equals') return recordValue === rule.value;
-                    if (rule.operator === 'startsWith') return recordValue.startsWith(rule.value);
-                }
-                return false;
-            });
-
-            return rulesLogic === 'AND'
-                ? ruleResults.every(r => r)
-                : ruleResults.some(r => r);
-        });
+        return compiledConfigs.firstMatch(record) >= 0;
     };
 
     // Group by Ad Set
@@ -76,7 +65,7 @@ export const filterNewAudience = (
         }
     });
 
-    console.log(`After config filtering: ${adSetMap.size} ad sets`);
+    addCount('filterNewAudience', 'adSets', adSetMap.size);
 
     const newAdSets: NewAudienceAdSet[] = [];
 
@@ -156,8 +145,10 @@ export const filterNewAudience = (
         }
     });
 
-    console.log(`After < 7 days filtering: ${newAdSets.length} new ad sets`);
+    addCount('filterNewAudience', 'newAdSets', newAdSets.length);
 
     // Sort by duration (newest first)
-    return newAdSets.sort((a, b) => a.durationDays - b.durationDays);
+    const sorted = newAdSets.sort((a, b) => a.durationDays - b.durationDays);
+    end();
+    return sorted;
 };
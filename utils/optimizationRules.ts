@@ -1,6 +1,8 @@
 // 调优规则引擎
 // 基于广告调优规则指南.md中的123条组合规则
 
+import optimizationRulesData from './optimizationRules.json';
+
 // ==================== 类型定义 ====================
 
 export interface RuleCondition {
@@ -45,1394 +47,146 @@ export interface CampaignMetrics {
 
 // ==================== 规则库 ====================
 
-const OPTIMIZATION_RULES: OptimizationRule[] = [
-    // ========== 零值/极低值检测规则（最高优先级）==========
-    {
-        id: 'roi-campaign-zero-or-negative',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'single',
-        priority: 0, // 最高优先级
-        conditions: [
-            { metric: 'roi', operator: '<=', threshold: -90 } // ROI低于平均值90%以上
-        ],
-        guidance: '🚨 ROI极低或为零，立即进行预算调整或全面进行检查'
-    },
-    {
-        id: 'roi-adset-zero-or-negative',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'single',
-        priority: 0,
-        conditions: [
-            { metric: 'roi', operator: '<=', threshold: -90 }
-        ],
-        guidance: '🚨 ROI极低或为零，立即暂停此受众'
-    },
-    {
-        id: 'roi-ad-zero-or-negative',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'single',
-        priority: 0,
-        conditions: [
-            { metric: 'roi', operator: '<=', threshold: -90 }
-        ],
-        guidance: '🚨 ROI极低或为零，立即暂停此素材'
-    },
-
-    // ========== ROI - Campaign 规则 (24条) ==========
-    {
-        id: 'roi-campaign-combo-high-loss',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 1,
-        conditions: [
-            { metric: 'spend', operator: '>', threshold: 0 },
-            { metric: 'roi', operator: '<', threshold: -10 }
-        ],
-        guidance: '⚠️ 高亏损，立即暂停或大幅降预算'
-    },
-    {
-        id: 'roi-campaign-combo-triple-hit',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 1,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '⚠️ 三重打击：流量难、成本高、转化差，立即暂停'
-    },
-    {
-        id: 'roi-campaign-combo-high-spend-low-performance',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 1,
-        conditions: [
-            { metric: 'spend', operator: '>', threshold: 0 },
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '⚠️ 高消耗+高成本+低转化，最危险组合'
-    },
-    {
-        id: 'roi-campaign-combo-cart-abandon',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'atc_rate', operator: '>=', threshold: -5 },
-            { metric: 'cvr', operator: '<', threshold: -20 }
-        ],
-        guidance: '🛒 弃购严重，检查结账流程/运费/支付方式'
-    },
-    {
-        id: 'roi-campaign-combo-funnel-collapse',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'atc_rate', operator: '<', threshold: -15 },
-            { metric: 'cvr', operator: '<', threshold: -15 },
-            { metric: 'aov', operator: '<', threshold: -10 }
-        ],
-        guidance: '全漏斗崩溃，从选品到定价全面问题'
-    },
-    {
-        id: 'roi-campaign-combo-traffic-landing',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'atc_rate', operator: '<', threshold: -15 }
-        ],
-        guidance: '流量不精准且落地页差，全链路重构'
-    },
-    {
-        id: 'roi-campaign-combo-cost-mismatch',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'cpatc', operator: '>', threshold: 20 }
-        ],
-        guidance: '点击贵且加购难，受众完全不匹配'
-    },
-    {
-        id: 'roi-campaign-combo-roi-cpa',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'roi', operator: '<', threshold: -10 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '转化低且成本高，素材与受众双重问题'
-    },
-    {
-        id: 'roi-campaign-combo-ctr-cpc',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '素材质量差且竞争激烈，需重做'
-    },
-    {
-        id: 'roi-campaign-combo-cvr-cpa',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cvr', operator: '<', threshold: -15 },
-            { metric: 'cpa', operator: '>', threshold: 20 }
-        ],
-        guidance: '落地页转化极差，成本失控'
-    },
-    {
-        id: 'roi-campaign-combo-aov-cpa',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'aov', operator: '<', threshold: -10 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '客单价低且获客成本高，利润空间压缩'
-    },
-    {
-        id: 'roi-campaign-combo-atc-aov',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'atc_rate', operator: '<', threshold: -15 },
-            { metric: 'aov', operator: '<', threshold: -10 }
-        ],
-        guidance: '用户购买意愿弱且客单价低，产品吸引力不足'
-    },
-    {
-        id: 'roi-campaign-combo-cpatc-cvr',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cpatc', operator: '>', threshold: 20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '加购难且下单更难，全链路转化崩溃'
-    },
-    {
-        id: 'roi-campaign-combo-ctr-cvr',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '流量获取和转化双失败，选品或定位错误'
-    },
-    {
-        id: 'roi-campaign-combo-cpc-cvr',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '买量贵但转化差，ROI严重受损'
-    },
-    {
-        id: 'roi-campaign-combo-atc-cpa',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'atc_rate', operator: '<', threshold: -15 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '加购率低推高获客成本，需优化产品详情页'
-    },
-    {
-        id: 'roi-campaign-combo-spend-cpa',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'spend', operator: '>', threshold: 0 },
-            { metric: 'cpa', operator: '>', threshold: 20 }
-        ],
-        guidance: '高预算低效消耗，紧急降预算或暂停'
-    },
-    {
-        id: 'roi-campaign-combo-spend-cvr',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'spend', operator: '>', threshold: 0 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '烧钱但不转化，检查落地页或产品匹配度'
-    },
-    {
-        id: 'roi-campaign-combo-roi-ctr',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'roi', operator: '<', threshold: -10 },
-            { metric: 'ctr', operator: '<', threshold: -20 }
-        ],
-        guidance: 'ROI差且流量获取难，素材完全失败'
-    },
-    {
-        id: 'roi-campaign-combo-cost-chain',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'cpa', operator: '>', threshold: 15 },
-            { metric: 'cpatc', operator: '>', threshold: 20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '成本链条全面失控，需整体优化策略'
-    },
-    {
-        id: 'roi-campaign-combo-business-failure',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 1,
-        conditions: [
-            { metric: 'roi', operator: '<', threshold: -10 },
-            { metric: 'aov', operator: '<', threshold: -10 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '⚠️ 利润低、客单价低、转化率低，需全面优化产品和策略'
-    },
-    {
-        id: 'roi-campaign-combo-landing-issue',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'ctr', operator: '>=', threshold: -5 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 },
-            { metric: 'cvr', operator: '<', threshold: -20 }
-        ],
-        guidance: '流量可以但后链路崩溃，落地页严重问题'
-    },
-    {
-        id: 'roi-campaign-combo-audience-wrong',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'cpa', operator: '>', threshold: 15 },
-            { metric: 'cpatc', operator: '>', threshold: 20 }
-        ],
-        guidance: '全成本指标超标，受众定向完全错误'
-    },
-    {
-        id: 'roi-campaign-combo-cvr-aov',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cvr', operator: '<', threshold: -15 },
-            { metric: 'aov', operator: '<', threshold: -10 }
-        ],
-        guidance: '全面优化转化漏斗和产品定价'
-    },
-
-    // ========== ROI - AdSet 规则 (15条) ==========
-    {
-        id: 'roi-adset-combo-cvr-cpa',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cvr', operator: '<', threshold: -15 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '受众不精准，细分受众'
-    },
-    {
-        id: 'roi-adset-combo-atc-cpatc',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'atc_rate', operator: '<', threshold: -15 },
-            { metric: 'cpatc', operator: '>', threshold: 20 }
-        ],
-        guidance: '受众对产品无购买意向，更换受众'
-    },
-    {
-        id: 'roi-adset-combo-ctr-cpc',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '受众质量差且竞争激烈，重新定向'
-    },
-    {
-        id: 'roi-adset-combo-roi-cvr',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'roi', operator: '<', threshold: -10 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: 'ROI差且转化低，受众与产品不匹配'
-    },
-    {
-        id: 'roi-adset-combo-cpa-cpatc',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cpa', operator: '>', threshold: 15 },
-            { metric: 'cpatc', operator: '>', threshold: 20 }
-        ],
-        guidance: '成本双高，受众购买力不足或兴趣不符'
-    },
-    {
-        id: 'roi-adset-combo-ctr-cvr',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '受众对广告和产品都不感冒，需重新选择'
-    },
-    {
-        id: 'roi-adset-combo-atc-cvr',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'atc_rate', operator: '<', threshold: -15 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '加购和转化双低，受众决策意愿弱'
-    },
-    {
-        id: 'roi-adset-combo-cpc-cpa',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '流量成本和转化成本双超标'
-    },
-    {
-        id: 'roi-adset-combo-triple-issue',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'roi', operator: '<', threshold: -10 },
-            { metric: 'cpa', operator: '>', threshold: 15 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '三重问题：利润差、成本高、转化低'
-    },
-    {
-        id: 'roi-adset-combo-ctr-atc',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'atc_rate', operator: '<', threshold: -15 }
-        ],
-        guidance: '点击率和加购率双低，受众兴趣不足'
-    },
-    {
-        id: 'roi-adset-combo-cost-collapse',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'cpatc', operator: '>', threshold: 20 },
-            { metric: 'cvr', operator: '<', threshold: -15 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '全成本链条失控，受众完全错误'
-    },
-    {
-        id: 'roi-adset-combo-roi-cpc',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'roi', operator: '<', threshold: -10 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '买量贵导致ROI差，竞争过激'
-    },
-    {
-        id: 'roi-adset-combo-cvr-cpc',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cvr', operator: '<', threshold: -15 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '高价买来低质量流量'
-    },
-    {
-        id: 'roi-adset-combo-atc-cpa',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'atc_rate', operator: '<', threshold: -15 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '加购意愿低推高获客成本'
-    },
-    {
-        id: 'roi-adset-combo-full-failure',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cpa', operator: '>', threshold: 15 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '流量、成本、转化全面失败'
-    },
+// 规则数据保存在 optimizationRules.json，TS 与 Python（optimization_rules.py）读取同一份文件
+const OPTIMIZATION_RULES = optimizationRulesData as OptimizationRule[];
+
+// ==================== 决策表编译 ====================
+// 规则库按 (level, kpi) 编译为决策表：规则按优先级排好序，条件转为 (指标下标, 操作符, 阈值) 的定长数组。
+// 每个实体的各指标偏差只计算一次，所有规则共享。
+
+type RuleLevel = OptimizationRule['level'];
+type RuleKPI = OptimizationRule['kpi'];
+
+const OP_GT = 0;
+const OP_LT = 1;
+const OP_GTE = 2;
+const OP_LTE = 3;
+const OP_EQ = 4;
+
+const OPERATOR_CODES: Record<RuleCondition['operator'], number> = {
+    '>': OP_GT,
+    '<': OP_LT,
+    '>=': OP_GTE,
+    '<=': OP_LTE,
+    '==': OP_EQ
+};
+
+interface DecisionTable {
+    metrics: string[];          // 该表用到的指标
+    ruleStarts: Int32Array;     // 第 r 条规则的条件区间为 [ruleStarts[r], ruleStarts[r + 1])
+    condMetric: Int32Array;     // 条件对应的指标下标（metrics 中）
+    condOperator: Uint8Array;   // OP_* 操作符编码，未知操作符为 255（恒不成立）
+    condThreshold: Float64Array;
+    guidance: string[];         // 与规则顺序一致
+    ruleIds: string[];
+}
 
-    // ========== ROI - Ad 规则 (12条) ==========
-    {
-        id: 'roi-ad-combo-cvr-ctr',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cvr', operator: '<', threshold: -15 },
-            { metric: 'ctr', operator: '<', threshold: -20 }
-        ],
-        guidance: '素材与产品不匹配，重新策划'
-    },
-    {
-        id: 'roi-ad-combo-cpc-atc',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 }
-        ],
-        guidance: '素材吸引了错误的人群，重做素材'
-    },
-    {
-        id: 'roi-ad-combo-roi-ctr',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'roi', operator: '<', threshold: -10 },
-            { metric: 'ctr', operator: '<', threshold: -20 }
-        ],
-        guidance: 'ROI差且流量获取难，素材完全失败'
-    },
-    {
-        id: 'roi-ad-combo-triple-funnel',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '三层漏斗全崩，素材定位根本错误'
-    },
-    {
-        id: 'roi-ad-combo-atc-cvr',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'atc_rate', operator: '<', threshold: -20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '素材引流但不转化，与落地页脱节'
-    },
-    {
-        id: 'roi-ad-combo-cpc-cvr',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '素材吸引高价低质流量'
-    },
-    {
-        id: 'roi-ad-combo-roi-atc',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'roi', operator: '<', threshold: -10 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 }
-        ],
-        guidance: '素材无法激发购买欲望'
-    },
-    {
-        id: 'roi-ad-combo-ctr-cpc',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '素材弱吸引力遇高竞争'
-    },
-    {
-        id: 'roi-ad-combo-atc-cpa',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'atc_rate', operator: '<', threshold: -20 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '加购率低导致获客成本飙升'
-    },
-    {
-        id: 'roi-ad-combo-cvr-cpa',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cvr', operator: '<', threshold: -15 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '素材引来无效流量，转化成本失控'
-    },
-    {
-        id: 'roi-ad-combo-full-fail',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'roi', operator: '<', threshold: -10 },
-            { metric: 'cvr', operator: '<', threshold: -15 },
-            { metric: 'ctr', operator: '<', threshold: -20 }
-        ],
-        guidance: '全面失败，需更换素材方向'
-    },
-    {
-        id: 'roi-ad-combo-high-cost-chain',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '高价买量但转化链路全断'
-    },
+const NO_MATCH_GUIDANCE = '✅ 表现正常';
 
-    // ========== CPC - Campaign 规则 (14条) ==========
-    {
-        id: 'cpc-campaign-combo-worst',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 1,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cpm', operator: '>', threshold: 20 }
-        ],
-        guidance: '⚠️ 最差场景：素材差且流量贵，立即暂停重做'
-    },
-    {
-        id: 'cpc-campaign-combo-high-price',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'spend', operator: '>', threshold: 0 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '高价买量，需限制预算或降出价'
-    },
-    {
-        id: 'cpc-campaign-combo-invalid-impr',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'impressions', operator: '>', threshold: 20 },
-            { metric: 'clicks', operator: '<', threshold: -30 }
-        ],
-        guidance: '严重无效曝光，检查素材是否违规或跑偏'
-    },
-    {
-        id: 'cpc-campaign-combo-double-cost',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'cpm', operator: '>', threshold: 20 }
-        ],
-        guidance: '双成本超标，竞争过于激烈'
-    },
-    {
-        id: 'cpc-campaign-combo-ctr-spend',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'spend', operator: '>', threshold: 0 }
-        ],
-        guidance: '烧钱但流量质量差，降预算'
-    },
-    {
-        id: 'cpc-campaign-combo-cpm-spend',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cpm', operator: '>', threshold: 20 },
-            { metric: 'spend', operator: '>', threshold: 0 }
-        ],
-        guidance: '高价抢量导致预算快速消耗'
-    },
-    {
-        id: 'cpc-campaign-combo-clicks-spend',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'clicks', operator: '<', threshold: 0 },
-            { metric: 'spend', operator: '>', threshold: 0 }
-        ],
-        guidance: '花钱多但点击少，极低效率'
-    },
-    {
-        id: 'cpc-campaign-combo-triple-fail',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 1,
-        conditions: [
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'cpm', operator: '>', threshold: 20 }
-        ],
-        guidance: '⚠️ 三重失败：素材差+成本高+竞争激烈'
-    },
-    {
-        id: 'cpc-campaign-combo-impr-ctr',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'impressions', operator: '>', threshold: 0 },
-            { metric: 'ctr', operator: '<', threshold: -30 }
-        ],
-        guidance: '曝光浪费，素材完全无吸引力'
-    },
-    {
-        id: 'cpc-campaign-combo-cpc-clicks',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 3,
-        conditions: [
-            { metric: 'cpc', operator: '>', threshold: 25 },
-            { metric: 'clicks', operator: '<', threshold: -20 }
-        ],
-        guidance: '单价贵且点击量少，双重损失'
-    },
-    {
-        id: 'cpc-campaign-combo-cpm-ctr-clicks',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'cpm', operator: '>', threshold: 20 },
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'clicks', operator: '<', threshold: -15 }
-        ],
-        guidance: '高价购买无效曝光'
-    },
-    {
-        id: 'cpc-campaign-combo-spend-cpm-cpc',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'spend', operator: '>', threshold: 0 },
-            { metric: 'cpm', operator: '>', threshold: 20 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '预算在高竞争环境快速消耗'
-    },
-    {
-        id: 'cpc-campaign-combo-impr-clicks-ctr',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'impressions', operator: '>', threshold: 10 },
-            { metric: 'clicks', operator: '<', threshold: -20 },
-            { metric: 'ctr', operator: '<', threshold: -25 }
-        ],
-        guidance: '大量曝光无转化，素材失败'
-    },
-    {
-        id: 'cpc-campaign-combo-cpc-spend-ctr',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 2,
-        conditions: [
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'spend', operator: '>', threshold: 0 },
-            { metric: 'ctr', operator: '<', threshold: -20 }
-        ],
-        guidance: '高消耗低效率，需全面优化'
-    },
+const compileDecisionTable = (level: RuleLevel, kpi: RuleKPI): DecisionTable => {
+    // 与原实现一致：先筛选再按 priority 稳定排序
+    const rules = OPTIMIZATION_RULES
+        .filter(r => r.level === level && r.kpi === kpi)
+        .sort((a, b) => a.priority - b.priority);
 
-    // ========== KPI正常但中间指标异常的规则（新增）==========
-    // ROI正常场景
-    {
-        id: 'roi-campaign-normal-but-ctr-low',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'ctr', operator: '<', threshold: -20 }
-        ],
-        guidance: '💡 ROI达标但CTR偏低，优化素材可进一步提升效果'
-    },
-    {
-        id: 'roi-campaign-normal-but-cpc-high',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '💡 ROI达标但CPC偏高，降低出价或优化受众可降低成本'
-    },
-    {
-        id: 'roi-campaign-normal-but-cvr-low',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但CVR偏低，优化落地页可提升转化'
-    },
-    {
-        id: 'roi-campaign-normal-but-cpa-high',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '💡 ROI达标但CPA偏高，优化转化路径可降低获客成本'
-    },
-    {
-        id: 'roi-campaign-normal-but-atc-low',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 }
-        ],
-        guidance: '💡 ROI达标但加购率偏低，优化产品详情页可提升意向'
-    },
-    {
-        id: 'roi-campaign-normal-but-aov-low',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'aov', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但客单价偏低，尝试推荐高价商品或组合销售'
-    },
+    const metrics: string[] = [];
+    const metricIndex = new Map<string, number>();
+    const condCount = rules.reduce((sum, r) => sum + r.conditions.length, 0);
+
+    const ruleStarts = new Int32Array(rules.length + 1);
+    const condMetric = new Int32Array(condCount);
+    const condOperator = new Uint8Array(condCount);
+    const condThreshold = new Float64Array(condCount);
+
+    let c = 0;
+    rules.forEach((rule, r) => {
+        ruleStarts[r] = c;
+        rule.conditions.forEach(cond => {
+            let m = metricIndex.get(cond.metric);
+            if (m === undefined) {
+                m = metrics.length;
+                metrics.push(cond.metric);
+                metricIndex.set(cond.metric, m);
+            }
+            condMetric[c] = m;
+            condOperator[c] = OPERATOR_CODES[cond.operator] ?? 255;
+            condThreshold[c] = cond.threshold;
+            c++;
+        });
+    });
+    ruleStarts[rules.length] = c;
 
-    // AdSet层级 - KPI正常但中间指标异常
-    {
-        id: 'roi-adset-normal-but-ctr-low',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'ctr', operator: '<', threshold: -20 }
-        ],
-        guidance: '💡 ROI达标但CTR偏低，测试新受众或调整定向'
-    },
-    {
-        id: 'roi-adset-normal-but-cpc-high',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '💡 ROI达标但CPC偏高，扩大受众范围降低竞争'
-    },
-    {
-        id: 'roi-adset-normal-but-cvr-low',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但CVR偏低，细分受众提升精准度'
-    },
-    {
-        id: 'roi-adset-normal-but-atc-low',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 }
-        ],
-        guidance: '💡 ROI达标但加购率偏低，调整受众兴趣标签'
-    },
+    return { metrics, ruleStarts, condMetric, condOperator, condThreshold, guidance: rules.map(r => r.guidance), ruleIds: rules.map(r => r.id) };
+};
 
-    // Ad层级 - KPI正常但中间指标异常
-    {
-        id: 'roi-ad-normal-but-ctr-low',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'ctr', operator: '<', threshold: -20 }
-        ],
-        guidance: '💡 ROI达标但CTR偏低，优化素材创意可提升吸引力'
-    },
-    {
-        id: 'roi-ad-normal-but-cpc-high',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '💡 ROI达标但CPC偏高，测试不同素材风格降低成本'
-    },
-    {
-        id: 'roi-ad-normal-but-cvr-low',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但CVR偏低，确保素材与落地页一致性'
-    },
-    {
-        id: 'roi-ad-normal-but-atc-low',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 }
-        ],
-        guidance: '💡 ROI达标但加购率偏低，强化产品卖点展示'
-    },
+const decisionTables = new Map<string, DecisionTable>();
 
-    // CPC类型 - KPI正常但中间指标异常
-    {
-        id: 'cpc-campaign-normal-but-ctr-low',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'cpc', operator: '<=', threshold: 10 },
-            { metric: 'ctr', operator: '<', threshold: -20 }
-        ],
-        guidance: '💡 CPC达标但CTR偏低，优化素材可提升点击率'
-    },
-    {
-        id: 'cpc-campaign-normal-but-cpm-high',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'cpc', operator: '<=', threshold: 10 },
-            { metric: 'cpm', operator: '>', threshold: 20 }
-        ],
-        guidance: '💡 CPC达标但CPM偏高，调整出价策略或受众'
-    },
-    {
-        id: 'cpc-campaign-normal-but-clicks-low',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'cpc', operator: '<=', threshold: 10 },
-            { metric: 'clicks', operator: '<', threshold: -20 }
-        ],
-        guidance: '💡 CPC达标但点击量偏低，增加预算或扩大受众'
-    },
+const getDecisionTable = (level: RuleLevel, kpi: RuleKPI): DecisionTable => {
+    const key = `${level}|${kpi}`;
+    let table = decisionTables.get(key);
+    if (!table) {
+        table = compileDecisionTable(level, kpi);
+        decisionTables.set(key, table);
+    }
+    return table;
+};
 
-    // ========== P4多指标组合规则 - Campaign层级 ==========
-    {
-        id: 'roi-campaign-normal-but-ctr-cpc-bad',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '💡 ROI达标但素材弱且竞争激烈，优化素材并调整出价'
-    },
-    {
-        id: 'roi-campaign-normal-but-cvr-cpa-bad',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cvr', operator: '<', threshold: -15 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '💡 ROI达标但转化效率差，优化落地页并降低获客成本'
-    },
-    {
-        id: 'roi-campaign-normal-but-ctr-cvr-bad',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但全链路转化弱，优化素材和落地页'
-    },
-    {
-        id: 'roi-campaign-normal-but-atc-cvr-bad',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但购买意愿弱，优化产品详情页和结账流程'
-    },
-    {
-        id: 'roi-campaign-normal-but-cpc-cvr-bad',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但买量贵且转化差，降低出价并优化落地页'
-    },
-    {
-        id: 'roi-campaign-normal-but-aov-cvr-bad',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'aov', operator: '<', threshold: -15 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但客单价和转化双低，推荐高价商品并优化转化'
-    },
-    {
-        id: 'roi-campaign-normal-but-cpa-cpatc-bad',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cpa', operator: '>', threshold: 15 },
-            { metric: 'cpatc', operator: '>', threshold: 20 }
-        ],
-        guidance: '💡 ROI达标但成本链条偏高，优化转化路径降低成本'
-    },
-    {
-        id: 'roi-campaign-normal-but-ctr-atc-bad',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 }
-        ],
-        guidance: '💡 ROI达标但素材吸引力不足，重新设计素材突出卖点'
-    },
-    {
-        id: 'roi-campaign-normal-but-cpm-cpc-bad',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cpm', operator: '>', threshold: 20 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '💡 ROI达标但流量成本双高，调整出价策略或扩大受众'
-    },
-    {
-        id: 'roi-campaign-normal-but-clicks-ctr-bad',
-        kpi: 'ROI',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'clicks', operator: '<', threshold: -20 },
-            { metric: 'ctr', operator: '<', threshold: -20 }
-        ],
-        guidance: '💡 ROI达标但曝光转化效率低，优化素材提升点击率'
-    },
+/**
+ * 计算实际值相对均值的百分比偏差（规则匹配用）
+ * 缺失值按 0 处理；ROI 为 0 或负数且均值为正时视为 -100% 偏差
+ */
+const ruleDeviation = (metric: string, metrics: CampaignMetrics, benchmark: CampaignMetrics): number => {
+    const actualValue = (metrics as any)[metric] || 0;
+    const benchmarkValue = (benchmark as any)[metric] || 0;
 
-    // ========== P4多指标组合规则 - AdSet层级 ==========
-    {
-        id: 'roi-adset-normal-but-ctr-cvr-bad',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但受众不精准，细分受众提升转化'
-    },
-    {
-        id: 'roi-adset-normal-but-cpc-cpa-bad',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '💡 ROI达标但受众成本高，扩大受众范围降低竞争'
-    },
-    {
-        id: 'roi-adset-normal-but-atc-cvr-bad',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但受众购买意愿弱，调整受众兴趣标签'
-    },
-    {
-        id: 'roi-adset-normal-but-ctr-cpc-bad',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '💡 ROI达标但受众竞争激烈，测试新受众或调整定向'
-    },
-    {
-        id: 'roi-adset-normal-but-cvr-cpatc-bad',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cvr', operator: '<', threshold: -15 },
-            { metric: 'cpatc', operator: '>', threshold: 20 }
-        ],
-        guidance: '💡 ROI达标但受众转化成本高，优化受众精准度'
-    },
-    {
-        id: 'roi-adset-normal-but-cpa-cvr-bad',
-        kpi: 'ROI',
-        level: 'AdSet',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cpa', operator: '>', threshold: 15 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但受众质量差，更换受众或细分定向'
-    },
+    // 🆕 特殊处理：ROI为0或负数的情况
+    if (metric === 'roi' && actualValue <= 0 && benchmarkValue > 0) {
+        return -100;
+    }
 
-    // ========== P4多指标组合规则 - Ad层级 ==========
-    {
-        id: 'roi-ad-normal-but-ctr-cvr-bad',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但素材与产品不符，重新策划素材'
-    },
-    {
-        id: 'roi-ad-normal-but-cpc-cvr-bad',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cpc', operator: '>', threshold: 20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但素材吸引错误人群，调整素材定位'
-    },
-    {
-        id: 'roi-ad-normal-but-atc-cvr-bad',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但素材无法激发购买，强化产品卖点'
-    },
-    {
-        id: 'roi-ad-normal-but-ctr-cpc-bad',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cpc', operator: '>', threshold: 20 }
-        ],
-        guidance: '💡 ROI达标但素材弱且竞争激烈，测试新素材风格'
-    },
-    {
-        id: 'roi-ad-normal-but-cpa-cvr-bad',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'cpa', operator: '>', threshold: 15 },
-            { metric: 'cvr', operator: '<', threshold: -15 }
-        ],
-        guidance: '💡 ROI达标但素材引流质量差，优化素材与落地页一致性'
-    },
-    {
-        id: 'roi-ad-normal-but-atc-cpa-bad',
-        kpi: 'ROI',
-        level: 'Ad',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'roi', operator: '>=', threshold: -5 },
-            { metric: 'atc_rate', operator: '<', threshold: -20 },
-            { metric: 'cpa', operator: '>', threshold: 15 }
-        ],
-        guidance: '💡 ROI达标但素材加购转化差，优化素材展示产品价值'
-    },
+    return benchmarkValue !== 0
+        ? ((actualValue - benchmarkValue) / benchmarkValue) * 100
+        : 0;
+};
+
+const conditionHolds = (operator: number, vsAvgPercent: number, threshold: number): boolean => {
+    switch (operator) {
+        case OP_GT:
+            return vsAvgPercent > threshold;
+        case OP_LT:
+            return vsAvgPercent < threshold;
+        case OP_GTE:
+            return vsAvgPercent >= threshold;
+        case OP_LTE:
+            return vsAvgPercent <= threshold;
+        case OP_EQ:
+            return Math.abs(vsAvgPercent - threshold) < 0.1;
+        default:
+            return false;
+    }
+};
 
-    // ========== P4多指标组合规则 - CPC类型 ==========
-    {
-        id: 'cpc-campaign-normal-but-ctr-cpm-bad',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'cpc', operator: '<=', threshold: 10 },
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'cpm', operator: '>', threshold: 20 }
-        ],
-        guidance: '💡 CPC达标但曝光成本高且点击率低，优化素材提升CTR'
-    },
-    {
-        id: 'cpc-campaign-normal-but-clicks-impressions-bad',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'cpc', operator: '<=', threshold: 10 },
-            { metric: 'clicks', operator: '<', threshold: -20 },
-            { metric: 'impressions', operator: '>', threshold: 20 }
-        ],
-        guidance: '💡 CPC达标但曝光多点击少，素材吸引力不足'
-    },
-    {
-        id: 'cpc-campaign-normal-but-ctr-clicks-bad',
-        kpi: 'CPC',
-        level: 'Campaign',
-        scenario: 'combo',
-        priority: 4,
-        conditions: [
-            { metric: 'cpc', operator: '<=', threshold: 10 },
-            { metric: 'ctr', operator: '<', threshold: -20 },
-            { metric: 'clicks', operator: '<', threshold: -20 }
-        ],
-        guidance: '💡 CPC达标但整体流量获取效率低，增加预算并优化素材'
+/**
+ * 在决策表中查找第一条命中的规则
+ * @param deviations - 偏差数组，offset 起按 table.metrics 顺序排列
+ * @returns 规则下标，无匹配时返回 -1
+ */
+const firstMatchingRule = (table: DecisionTable, deviations: Float64Array, offset: number): number => {
+    const { ruleStarts, condMetric, condOperator, condThreshold } = table;
+    const ruleCount = ruleStarts.length - 1;
+
+    for (let r = 0; r < ruleCount; r++) {
+        let matched = true;
+        for (let c = ruleStarts[r]; c < ruleStarts[r + 1]; c++) {
+            if (!conditionHolds(condOperator[c], deviations[offset + condMetric[c]], condThreshold[c])) {
+                matched = false;
+                break;
+            }
+        }
+        if (matched) return r;
     }
-];
+    return -1;
+};
 
 // ==================== 核心函数 ====================
 
@@ -1445,75 +199,26 @@ export function getOptimizationGuidance(
     metrics: CampaignMetrics,
     benchmark: CampaignMetrics
 ): string {
-    // 筛选适用规则
-    const applicableRules = OPTIMIZATION_RULES
-        .filter(r => r.level === level && r.kpi === kpi)
-        .sort((a, b) => a.priority - b.priority);
+    const table = getDecisionTable(level, kpi);
+
+    const deviations = new Float64Array(table.metrics.length);
+    table.metrics.forEach((metric, m) => {
+        deviations[m] = ruleDeviation(metric, metrics, benchmark);
+    });
 
     // 按优先级匹配规则
-    for (const rule of applicableRules) {
-        if (matchesRule(rule, metrics, benchmark)) {
-            return rule.guidance;
-        }
-    }
+    const r = firstMatchingRule(table, deviations, 0);
 
     // 无匹配规则
-    return '✅ 表现正常';
+    return r >= 0 ? table.guidance[r] : NO_MATCH_GUIDANCE;
 }
 
-/**
- * 检查是否匹配规则
- */
-function matchesRule(
-    rule: OptimizationRule,
-    metrics: CampaignMetrics,
-    benchmark: CampaignMetrics
-): boolean {
-    return rule.conditions.every(cond => {
-        const actualValue = (metrics as any)[cond.metric] || 0;
-        const benchmarkValue = (benchmark as any)[cond.metric] || 0;
-
-        // 🆕 特殊处理：ROI为0或负数的情况
-        if (cond.metric === 'roi' && actualValue <= 0 && benchmarkValue > 0) {
-            // ROI为0或负数时，视为-100%偏差
-            const vsAvgPercent = -100;
-            switch (cond.operator) {
-                case '>':
-                    return vsAvgPercent > cond.threshold;
-                case '<':
-                    return vsAvgPercent < cond.threshold;
-                case '>=':
-                    return vsAvgPercent >= cond.threshold;
-                case '<=':
-                    return vsAvgPercent <= cond.threshold;
-                case '==':
-                    return Math.abs(vsAvgPercent - cond.threshold) < 0.1;
-                default:
-                    return false;
-            }
-        }
-
-        // 计算 vs Avg 百分比
-        const vsAvgPercent = benchmarkValue !== 0
-            ? ((actualValue - benchmarkValue) / benchmarkValue) * 100
-            : 0;
-
-        switch (cond.operator) {
-            case '>':
-                return vsAvgPercent > cond.threshold;
-            case '<':
-                return vsAvgPercent < cond.threshold;
-            case '>=':
-                return vsAvgPercent >= cond.threshold;
-            case '<=':
-                return vsAvgPercent <= cond.threshold;
-            case '==':
-                return Math.abs(vsAvgPercent - cond.threshold) < 0.1;
-            default:
-                return false;
-        }
-    });
-}
+// getTriggeredConditions 检查的关键指标
+const TRIGGER_METRICS: Record<RuleKPI, string[]> = {
+    ROI: ['spend', 'roi', 'cvr', 'cpa', 'atc_rate', 'ctr', 'cpc'],
+    CPC: ['spend', 'cpc', 'cpm', 'ctr', 'clicks'],
+    CPM: ['spend', 'cpm', 'reach', 'impressions', 'frequency']
+};
 
 /**
  * 获取触发的条件列表
@@ -1526,11 +231,7 @@ export function getTriggeredConditions(
     const conditions: string[] = [];
 
     // 检查关键指标
-    const keyMetrics = kpi === 'ROI'
-        ? ['spend', 'roi', 'cvr', 'cpa', 'atc_rate', 'ctr', 'cpc']
-        : kpi === 'CPC'
-            ? ['spend', 'cpc', 'cpm', 'ctr', 'clicks']
-            : ['spend', 'cpm', 'reach', 'impressions', 'frequency'];
+    const keyMetrics = TRIGGER_METRICS[kpi] || TRIGGER_METRICS.CPM;
 
     for (const metric of keyMetrics) {
         const actualValue = (metrics as any)[metric];
@@ -1551,6 +252,66 @@ export function getTriggeredConditions(
     return conditions;
 }
 
+// ==================== 批量评估 ====================
+
+export interface GuidanceBatchResult {
+    /** 每个实体的调优建议（无匹配时为「✅ 表现正常」） */
+    guidance: string[];
+    /** 每个实体命中的规则 ID，无匹配时为 null */
+    ruleIds: (string | null)[];
+    /** 每个实体触发的条件列表（与 getTriggeredConditions 一致） */
+    triggeredConditions: string[][];
+}
+
+/**
+ * 批量计算调优建议和触发条件
+ *
+ * 先把所有实体的指标偏差一次性算成 实体 × 指标 的矩阵，再在决策表上逐个实体查找，
+ * 结果与逐个调用 getOptimizationGuidance / getTriggeredConditions 完全一致。
+ *
+ * @param level - 层级
+ * @param kpi - KPI 类型
+ * @param metricsList - 实体指标列表
+ * @param benchmarks - 单个均值（所有实体共享）或与 metricsList 等长的均值列表
+ * @returns 与 metricsList 顺序一致的结果
+ */
+export function getOptimizationGuidanceBatch(
+    level: 'Campaign' | 'AdSet' | 'Ad',
+    kpi: 'ROI' | 'CPC' | 'CPM',
+    metricsList: CampaignMetrics[],
+    benchmarks: CampaignMetrics | CampaignMetrics[]
+): GuidanceBatchResult {
+    const table = getDecisionTable(level, kpi);
+    const n = metricsList.length;
+    const stride = table.metrics.length;
+    const benchmarkAt = Array.isArray(benchmarks)
+        ? (i: number) => benchmarks[i]
+        : () => benchmarks;
+
+    // 实体 × 指标 偏差矩阵（行优先）
+    const deviations = new Float64Array(n * stride);
+    for (let i = 0; i < n; i++) {
+        const metrics = metricsList[i];
+        const benchmark = benchmarkAt(i);
+        for (let m = 0; m < stride; m++) {
+            deviations[i * stride + m] = ruleDeviation(table.metrics[m], metrics, benchmark);
+        }
+    }
+
+    const guidance: string[] = new Array(n);
+    const ruleIds: (string | null)[] = new Array(n);
+    const triggeredConditions: string[][] = new Array(n);
+    for (let i = 0; i < n; i++) {
+        // 按优先级取第一条命中规则
+        const r = firstMatchingRule(table, deviations, i * stride);
+        guidance[i] = r >= 0 ? table.guidance[r] : NO_MATCH_GUIDANCE;
+        ruleIds[i] = r >= 0 ? table.ruleIds[r] : null;
+        triggeredConditions[i] = getTriggeredConditions(metricsList[i], benchmarkAt(i), kpi);
+    }
+
+    return { guidance, ruleIds, triggeredConditions };
+}
+
 /**
  * 获取优先级等级
  */
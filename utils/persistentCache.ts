@@ -0,0 +1,386 @@
+import { RawAdRecord } from '../types';
+import { ColumnarDataset } from './columnarStore';
+import { addCount, recordAnomaly } from './instrumentation';
+import { hashString } from './hash';
+
+// 本地持久化缓存（IndexedDB）
+//
+// - 解析后的列式数据集：以文件内容哈希为键，重新打开页面时恢复上次的数据，同一文件再次上传时跳过解析
+// - 派生结果（行动清单、诊断、层级基准等分析任务的结果）：以 数据集键 + 任务参数指纹（业务线配置、
+//   层级配置、阈值、日期范围等）为键
+// 所有条目共享一个容量上限，超出时按最近访问时间淘汰（LRU）。元数据与数据分开存放，淘汰时只读元数据。
+// 所有键都带 CACHE_VERSION 前缀；解析或分析结果的格式 / 算法变化时递增，旧版本的条目在打开数据库时清除。
+// 不支持 IndexedDB 的环境（隐私模式、Node 基准测试）下所有操作静默跳过。
+
+const DB_NAME = 'meta-ad-commender';
+const DB_VERSION = 1;
+const META_STORE = 'meta';
+const VALUE_STORE = 'values';
+const MAX_CACHE_BYTES = 256 * 1024 * 1024;
+// 缓存内容版本：任何生产方（文件解析、分析任务、AI 响应）的输出变化时递增
+const CACHE_VERSION = 1;
+const KEY_PREFIX = `v${CACHE_VERSION}:`;
+const LAST_SESSION_KEY = 'last_dataset';
+
+interface EntryMeta {
+    key: string;
+    size: number;           // 估算的字节数
+    lastAccess: number;
+}
+
+let dbPromise: Promise<IDBDatabase | null> | null = null;
+
+const openDatabase = (): Promise<IDBDatabase | null> => {
+    if (!dbPromise) {
+        dbPromise = new Promise(resolve => {
+            if (typeof indexedDB === 'undefined') {
+                resolve(null);
+                return;
+            }
+            try {
+                const request = indexedDB.open(DB_NAME, DB_VERSION);
+                request.onupgradeneeded = () => {
+                    const db = request.result;
+                    if (!db.objectStoreNames.contains(META_STORE)) db.createObjectStore(META_STORE, { keyPath: 'key' });
+                    if (!db.objectStoreNames.contains(VALUE_STORE)) db.createObjectStore(VALUE_STORE);
+                };
+                request.onsuccess = () => {
+                    purgeStaleEntries(request.result);
+                    resolve(request.result);
+                };
+                request.onerror = () => {
+                    recordAnomaly('persistentCache', 'IndexedDB 不可用', request.error?.message);
+                    resolve(null);
+                };
+            } catch (err) {
+                recordAnomaly('persistentCache', 'IndexedDB 不可用', err instanceof Error ? err.message : String(err));
+                resolve(null);
+            }
+        });
+    }
+    return dbPromise;
+};
+
+// 删除其他缓存版本写入的条目（只遍历元数据）
+const purgeStaleEntries = (db: IDBDatabase) => {
+    try {
+        const tx = db.transaction([META_STORE, VALUE_STORE], 'readwrite');
+        const request = tx.objectStore(META_STORE).getAllKeys();
+        request.onsuccess = () => {
+            (request.result as string[]).forEach(key => {
+                if (key.startsWith(KEY_PREFIX)) return;
+                tx.objectStore(META_STORE).delete(key);
+                tx.objectStore(VALUE_STORE).delete(key);
+                addCount('persistentCache', 'staleEvictions');
+            });
+        };
+    } catch (err) {
+        recordAnomaly('persistentCache', '清除旧版本失败', err instanceof Error ? err.message : String(err));
+    }
+};
+
+const requestToPromise = <T>(request: IDBRequest<T>): Promise<T> => new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+});
+
+const transactionDone = (tx: IDBTransaction): Promise<void> => new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = () => reject(tx.error);
+    tx.onabort = () => reject(tx.error);
+});
+
+const readEntry = async <T>(entryKey: string): Promise<T | undefined> => {
+    const db = await openDatabase();
+    if (!db) return undefined;
+    const key = KEY_PREFIX + entryKey;
+    try {
+        const tx = db.transaction([META_STORE, VALUE_STORE], 'readwrite');
+        const value = await requestToPromise(tx.objectStore(VALUE_STORE).get(key));
+        if (value === undefined) {
+            addCount('persistentCache', 'misses');
+            return undefined;
+        }
+        // 更新访问时间（LRU）
+        const meta = await requestToPromise(tx.objectStore(META_STORE).get(key)) as EntryMeta | undefined;
+        if (meta) tx.objectStore(META_STORE).put({ ...meta, lastAccess: Date.now() });
+        addCount('persistentCache', 'hits');
+        return value as T;
+    } catch (err) {
+        recordAnomaly('persistentCache', '读取失败', err instanceof Error ? err.message : String(err));
+        return undefined;
+    }
+};
+
+const writeEntry = async (entryKey: string, value: unknown, size: number): Promise<void> => {
+    const db = await openDatabase();
+    if (!db || size > MAX_CACHE_BYTES) return;
+    const key = KEY_PREFIX + entryKey;
+    try {
+        const tx = db.transaction([META_STORE, VALUE_STORE], 'readwrite');
+        const metaStore = tx.objectStore(META_STORE);
+        const entries = await requestToPromise(metaStore.getAll()) as EntryMeta[];
+
+        // 淘汰最久未访问的条目，直到放得下新条目
+        let total = size + entries.reduce((sum, entry) => sum + (entry.key === key ? 0 : entry.size), 0);
+        const oldestFirst = entries.filter(entry => entry.key !== key).sort((a, b) => a.lastAccess - b.lastAccess);
+        for (const entry of oldestFirst) {
+            if (total <= MAX_CACHE_BYTES) break;
+            metaStore.delete(entry.key);
+            tx.objectStore(VALUE_STORE).delete(entry.key);
+            total -= entry.size;
+            addCount('persistentCache', 'evictions');
+        }
+
+        metaStore.put({ key, size, lastAccess: Date.now() } as EntryMeta);
+        tx.objectStore(VALUE_STORE).put(value, key);
+        await transactionDone(tx);
+        addCount('persistentCache', 'writes');
+    } catch (err) {
+        // 配额不足等：缓存只是加速，失败时不影响分析
+        recordAnomaly('persistentCache', '写入失败', err instanceof Error ? err.message : String(err));
+    }
+};
+
+/** 清空缓存 */
+export const clearPersistentCache = async (): Promise<void> => {
+    const db = await openDatabase();
+    if (!db) return;
+    const tx = db.transaction([META_STORE, VALUE_STORE], 'readwrite');
+    tx.objectStore(META_STORE).clear();
+    tx.objectStore(VALUE_STORE).clear();
+    await transactionDone(tx);
+};
+
+// ============ 哈希 ============
+
+const HASH_SLICE = 16 * 1024 * 1024;
+
+/**
+ * 文件内容哈希（按 16MB 分片读取，不一次性读入整个文件）
+ * @param file - 上传的文件
+ * @returns 内容哈希（含文件大小）
+ */
+export const hashFile = async (file: Blob): Promise<string> => {
+    let h1 = 0x9e3779b9;
+    let h2 = 0x85ebca6b;
+    for (let offset = 0; offset < file.size; offset += HASH_SLICE) {
+        const buffer = await file.slice(offset, Math.min(offset + HASH_SLICE, file.size)).arrayBuffer();
+        const words = new Int32Array(buffer, 0, buffer.byteLength >> 2);
+        for (let i = 0; i < words.length; i++) {
+            h1 = Math.imul(h1 ^ words[i], 2654435761);
+            h2 = Math.imul(h2 ^ words[i], 1597334677);
+            h1 = (h1 << 13) | (h1 >>> 19);
+        }
+        const tail = new Uint8Array(buffer, words.length << 2);
+        for (let i = 0; i < tail.length; i++) {
+            h1 = Math.imul(h1 ^ tail[i], 2654435761);
+            h2 = Math.imul(h2 ^ tail[i], 1597334677);
+        }
+    }
+    h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+    h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+    return `${file.size.toString(36)}-${(h2 >>> 0).toString(36)}${(h1 >>> 0).toString(36)}`;
+};
+
+// Map / Set 按内容序列化，对象键排序，保证同样的参数得到同样的指纹。
+// 传入 keyed 时，登记过内容键的对象（见 setContentKey）只写出键，不展开内容。
+const stableStringify = (value: unknown, keyed?: { opaque: boolean }): string => JSON.stringify(value, (_key, val) => {
+    if (keyed && val && typeof val === 'object') {
+        const contentKey = contentKeys.get(val);
+        if (contentKey) return { __key: contentKey };
+        if (contentKey === null) {
+            keyed.opaque = true;
+            return null;
+        }
+    }
+    if (val instanceof Map) return { __map: Array.from(val.entries()) };
+    if (val instanceof Set) return { __set: Array.from(val) };
+    if (val && typeof val === 'object' && !Array.isArray(val)) {
+        const sorted: Record<string, unknown> = {};
+        Object.keys(val).sort().forEach(key => { sorted[key] = val[key]; });
+        return sorted;
+    }
+    return val;
+});
+
+const hashText = (text: string): string => `${hashString(text)}${hashString(text, 1)}`;
+
+/**
+ * 参数指纹（业务线配置、层级配置、阈值、日期范围等）
+ * @param value - 可 JSON 序列化的参数（支持 Map / Set）
+ */
+export const fingerprint = (value: unknown): string => hashText(stableStringify(value) ?? '');
+
+/**
+ * 分析任务参数的指纹：登记过内容键的对象（数据集、上一个任务的结果及其派生）按键计算，不序列化内容；
+ * 包含内容来源未知的结果时返回 null（不缓存）
+ * @param value - 任务参数
+ */
+const paramsFingerprint = (value: unknown): string | null => {
+    const keyed = { opaque: false };
+    const text = stableStringify(value, keyed) ?? '';
+    return keyed.opaque ? null : hashText(text);
+};
+
+// ============ 内容键 ============
+// 对象 -> 内容键，按对象身份登记：
+// - 记录数组：上传文件的哈希；日期切片为 文件哈希/日期范围
+// - 分析任务结果：结果的缓存键；由结果筛选出的对象为 结果键/筛选条件指纹
+// 值为 null 表示内容来源未知（由未登记的数据集计算而来）
+
+const contentKeys = new WeakMap<object, string | null>();
+
+/**
+ * 登记对象的内容键，并以「键.字段名」登记其对象类型的字段（如 ActionItemsResult 的 campaigns / ads）
+ * @param value - 不再修改的对象
+ * @param key - 内容键，null 表示来源未知
+ */
+export const setContentKey = (value: object, key: string | null): void => {
+    contentKeys.set(value, key);
+    Object.entries(value).forEach(([field, child]) => {
+        if (child && typeof child === 'object' && !contentKeys.has(child)) {
+            contentKeys.set(child, key === null ? null : `${key}.${field}`);
+        }
+    });
+};
+
+/**
+ * 由父对象派生子对象的内容键（如对任务结果的筛选），父对象没有登记时不登记
+ * @param parent - 父对象
+ * @param child - 由父对象按 suffix 确定性生成的子对象
+ * @param suffix - 派生方式
+ */
+export const deriveContentKey = (parent: object, child: object, suffix: string): void => {
+    const parentKey = contentKeys.get(parent);
+    if (parentKey === undefined || child === parent) return;
+    setContentKey(child, parentKey === null ? null : `${parentKey}/${suffix}`);
+};
+
+/** 登记记录数组的内容键 */
+export const setDatasetKey = (records: RawAdRecord[], key: string): void => {
+    contentKeys.set(records, key);
+};
+
+/**
+ * 记录数组的内容键：空数组固定为 'empty'，未登记（内容来源未知）时为 undefined
+ */
+export const getDatasetKey = (records: RawAdRecord[]): string | undefined =>
+    records.length === 0 ? 'empty' : contentKeys.get(records) ?? undefined;
+
+/**
+ * 由父数据集派生子数据集的键（如日期切片），父数据集没有键时不登记
+ * @param parent - 父记录数组
+ * @param child - 由父数组按 suffix 确定性生成的子数组
+ * @param suffix - 派生方式
+ */
+export const deriveDatasetKey = (parent: RawAdRecord[], child: RawAdRecord[], suffix: string): void => {
+    const parentKey = contentKeys.get(parent);
+    if (parentKey && child !== parent) contentKeys.set(child, `${parentKey}/${suffix}`);
+};
+
+// ============ 数据集 ============
+
+const datasetSize = (dataset: ColumnarDataset): number => {
+    let size = 0;
+    Object.values(dataset.numeric).forEach(column => { size += column.byteLength; });
+    Object.values(dataset.codes).forEach(column => { size += column.byteLength; });
+    Object.values(dataset.dictionaries).forEach(words => words.forEach(word => { size += word.length * 2 + 16; }));
+    return size + dataset.day.byteLength + dataset.levels.byteLength;
+};
+
+/**
+ * 读取缓存的数据集
+ * @param contentHash - hashFile 的结果
+ */
+export const loadDataset = (contentHash: string): Promise<ColumnarDataset | undefined> =>
+    readEntry<ColumnarDataset>(`dataset:${contentHash}`);
+
+/**
+ * 缓存数据集
+ * @param contentHash - hashFile 的结果
+ * @param dataset - 列式数据集
+ */
+export const saveDataset = (contentHash: string, dataset: ColumnarDataset): Promise<void> =>
+    writeEntry(`dataset:${contentHash}`, dataset, datasetSize(dataset));
+
+export interface LastSession {
+    contentHash: string;
+    fileName: string;
+}
+
+/** 记为最近一次打开的数据（重新打开页面时恢复） */
+export const setLastSession = (session: LastSession): void => {
+    try {
+        localStorage.setItem(LAST_SESSION_KEY, JSON.stringify(session));
+    } catch {
+        // localStorage 不可用时不恢复
+    }
+};
+
+/** 最近一次打开的数据（没有时为 null） */
+export const getLastSession = (): LastSession | null => {
+    try {
+        if (typeof localStorage === 'undefined') return null;
+        const raw = localStorage.getItem(LAST_SESSION_KEY);
+        return raw ? JSON.parse(raw) : null;
+    } catch {
+        return null;
+    }
+};
+
+/** 不再自动恢复（用户选择重新上传时） */
+export const clearLastSession = (): void => {
+    try {
+        localStorage.removeItem(LAST_SESSION_KEY);
+    } catch {
+        // 忽略
+    }
+};
+
+// ============ 派生结果 ============
+
+/**
+ * 派生结果的缓存键：所有数据集都有内容键、参数中没有来源未知的结果时才可缓存
+ * @param name - 结果名称（如分析任务名）
+ * @param datasets - 用到的记录数组
+ * @param params - 其余参数（其中登记过内容键的对象按键计算指纹）
+ */
+export const artifactKey = (name: string, datasets: RawAdRecord[][], params: unknown): string | null => {
+    const keys = datasets.map(getDatasetKey);
+    if (keys.some(key => key === undefined)) return null;
+    const paramsKey = paramsFingerprint(params);
+    return paramsKey === null ? null : `artifact:${name}:${keys.join(',')}:${paramsKey}`;
+};
+
+/** 读取缓存的派生结果 */
+export const loadArtifact = <T>(key: string): Promise<T | undefined> => readEntry<T>(key);
+
+const SIZE_SAMPLE = 32;
+
+// 估算结果的字节数：长数组 / Map / Set 只计算前 SIZE_SAMPLE 个元素，再按元素个数外推
+const estimateSize = (value: unknown): number => {
+    if (typeof value === 'string') return value.length * 2 + 16;
+    if (!value || typeof value !== 'object') return 8;
+    if (ArrayBuffer.isView(value)) return value.byteLength;
+    const sampled = (items: Iterable<unknown>, count: number): number => {
+        let size = 0;
+        let n = 0;
+        for (const item of items) {
+            if (n++ === SIZE_SAMPLE) break;
+            size += estimateSize(item);
+        }
+        return n === 0 ? 16 : Math.ceil(size / Math.min(n, SIZE_SAMPLE) * count) + 16;
+    };
+    if (Array.isArray(value)) return sampled(value, value.length);
+    if (value instanceof Map || value instanceof Set) return sampled(value, value.size);
+    let size = 16;
+    for (const [field, child] of Object.entries(value)) size += field.length * 2 + estimateSize(child);
+    return size;
+};
+
+/** 缓存派生结果（大小按抽样估算，不序列化整个结果） */
+export const saveArtifact = async (key: string, value: unknown): Promise<void> => {
+    if (!(await openDatabase())) return;
+    await writeEntry(key, value, estimateSize(value));
+};
@@ -0,0 +1,116 @@
+import { DiagnosticDetail } from './aiSummaryUtils';
+
+// Prompt 的 token 预算
+//
+// 诊断详情原先只取前 50 条：排在后面的高花费 / P0 Campaign 可能被截掉，前 50 条又可能大量重复。
+// 这里先把场景、诊断、建议完全相同的条目合并为一条（列出涉及的 Campaign），再按优先级、
+// 涉及花费排序，在 token 预算内尽量多放；放不下的条目只在末尾给出数量。
+
+// 粗略估算：中文（含全角符号）约 1 字 1 token，其余字符约 4 个 1 token
+const WIDE_CHAR = /[⺀-鿿가-힯豈-﫿＀-￯]/g;
+
+/**
+ * 估算文本的 token 数
+ * @param text - 文本
+ */
+export const estimateTokens = (text: string): number => {
+    const wide = text.match(WIDE_CHAR)?.length ?? 0;
+    return wide + Math.ceil((text.length - wide) / 4);
+};
+
+const PRIORITY_RANK: Record<string, number> = { P0: 0, P1: 1, P2: 2 };
+
+const priorityRank = (priority: DiagnosticDetail['priority']): number => {
+    if (typeof priority === 'number') return priority >= 0 && priority <= 2 ? priority : 3;
+    return priority ? PRIORITY_RANK[priority] ?? 3 : 3;
+};
+
+interface DiagnosticGroup {
+    campaignNames: string[];
+    count: number;
+    priority: DiagnosticDetail['priority'];
+    rank: number;
+    spend: number;
+    scenario: string;
+    diagnosis: string;
+    action: string;
+}
+
+export interface PackedDiagnostics {
+    text: string;
+    tokens: number;
+    included: number;       // 放入的诊断条数（合并前）
+    omitted: number;        // 因预算放不下的诊断条数（合并前）
+}
+
+// 同一条诊断涉及的 Campaign 太多时只列出前若干个
+const MAX_NAMES_PER_GROUP = 20;
+
+const formatNames = (names: string[]): string => names.length > MAX_NAMES_PER_GROUP
+    ? `${names.slice(0, MAX_NAMES_PER_GROUP).join('、')} 等 ${names.length} 个`
+    : names.join('、');
+
+const formatGroup = (group: DiagnosticGroup, index: number): string => `
+${index}. Campaign: ${formatNames(group.campaignNames)}
+   - 优先级: ${group.priority || '无'}
+   - 场景: ${group.scenario}
+   - 诊断: ${group.diagnosis}
+   - 建议: ${group.action}
+`;
+
+/**
+ * 在 token 预算内组织诊断详情
+ * @param details - 诊断详情（spend 为所属 Campaign 的花费）
+ * @param budgetTokens - 该部分可用的 token 数
+ * @returns 诊断详情文本与放入 / 省略的条数
+ */
+export const packDiagnostics = (details: DiagnosticDetail[], budgetTokens: number): PackedDiagnostics => {
+    const groups = new Map<string, DiagnosticGroup>();
+    details.forEach(detail => {
+        const key = `${detail.scenario}\u0000${detail.diagnosis}\u0000${detail.action}`;
+        const rank = priorityRank(detail.priority);
+        const group = groups.get(key);
+        if (!group) {
+            groups.set(key, {
+                campaignNames: [detail.campaignName],
+                count: 1,
+                priority: detail.priority,
+                rank,
+                spend: detail.spend || 0,
+                scenario: detail.scenario,
+                diagnosis: detail.diagnosis,
+                action: detail.action
+            });
+            return;
+        }
+        if (!group.campaignNames.includes(detail.campaignName)) group.campaignNames.push(detail.campaignName);
+        group.count++;
+        group.spend += detail.spend || 0;
+        if (rank < group.rank) {
+            group.rank = rank;
+            group.priority = detail.priority;
+        }
+    });
+
+    const ranked = Array.from(groups.values()).sort((a, b) => a.rank - b.rank || b.spend - a.spend);
+
+    // 按排序依次放入；某条放不下时跳过，继续尝试后面更短的条目
+    const parts: string[] = [];
+    let tokens = 0;
+    let included = 0;
+    let omitted = 0;
+    ranked.forEach(group => {
+        const text = formatGroup(group, parts.length + 1);
+        const cost = estimateTokens(text);
+        if (tokens + cost > budgetTokens) {
+            omitted += group.count;
+            return;
+        }
+        parts.push(text);
+        tokens += cost;
+        included += group.count;
+    });
+
+    if (omitted > 0) parts.push(`\n（另有 ${omitted} 条较低优先级 / 较低花费的诊断因篇幅省略）\n`);
+    return { text: parts.join('\n'), tokens, included, omitted };
+};
@@ -1,4 +1,5 @@
 import { RawAdRecord, AdConfiguration } from '../types';
+import { queryRollup } from './rollupCube';
 
 export type QuadrantType = 'excellent' | 'potential' | 'watch' | 'problem';
 
@@ -7,22 +8,13 @@ export interface QuadrantThresholds {
     kpiThreshold: number;
 }
 
+// data 可以是日期范围内的全部数据（按 config 的规则筛选业务线），也可以是已筛选的业务线数据
 export const calculateDefaultThresholds = (
     data: RawAdRecord[],
     config: AdConfiguration
 ): QuadrantThresholds => {
-    // Group by campaign to get unique campaigns
-    const campaignMap = new Map<string, RawAdRecord[]>();
-    data.forEach(record => {
-        const key = record.campaign_name;
-        if (!campaignMap.has(key)) campaignMap.set(key, []);
-        campaignMap.get(key)!.push(record);
-    });
-
-    // Calculate total spend for each campaign
-    const campaignSpends = Array.from(campaignMap.values()).map(records =>
-        records.reduce((sum, r) => sum + r.spend, 0)
-    );
+    // Total spend for each campaign（汇总立方体按 Campaign 查询）
+    const campaignSpends = queryRollup(data, { level: 'Campaign' }, config).map(row => row.totals.spend);
 
     // Calculate average spend across campaigns
     const avgSpend = campaignSpends.length > 0
@@ -91,3 +83,14 @@ export const getQuadrantInfo = (quadrant: QuadrantType) => {
 
     return quadrantMap[quadrant];
 };
+
+// 散点图中各象限的颜色
+export const getQuadrantColor = (type: QuadrantType): string => {
+    switch (type) {
+        case 'excellent': return '#10b981'; // Green
+        case 'potential': return '#3b82f6'; // Blue
+        case 'watch': return '#f59e0b';     // Yellow
+        case 'problem': return '#ef4444';    // Red
+        default: return '#94a3b8';
+    }
+};
@@ -0,0 +1,97 @@
+// 可合并的分位数草图（对数分桶，相对误差有界）
+//
+// 正值 x 落入第 ceil(log_γ(x)) 个桶，γ = (1 + α) / (1 - α)，桶内取代表值时相对误差不超过 α；
+// 0 与极小值单独计数。两个草图按桶相加即可合并，结果与对全部数据直接建草图完全一致，
+// 因此可以按天、按层级分别构建，任意日期范围只合并对应的草图，不必重新扫描记录。
+// 只接受非负值（基准指标均为比率 / 成本，不会为负）。
+
+const DEFAULT_ACCURACY = 0.01;
+const MIN_POSITIVE = 1e-9;
+
+export interface QuantileSummary {
+    p25: number;
+    p50: number;
+    p75: number;
+    p90: number;
+    count: number;
+}
+
+export class QuantileSketch {
+    readonly accuracy: number;
+    private readonly gamma: number;
+    private readonly logGamma: number;
+    private bins = new Map<number, number>();
+    private zeroCount = 0;
+    private total = 0;
+    private min = Infinity;
+    private max = -Infinity;
+
+    constructor(accuracy: number = DEFAULT_ACCURACY) {
+        this.accuracy = accuracy;
+        this.gamma = (1 + accuracy) / (1 - accuracy);
+        this.logGamma = Math.log(this.gamma);
+    }
+
+    /** 样本数 */
+    get count(): number {
+        return this.total;
+    }
+
+    /** 加入一个值（负值与非有限值忽略） */
+    add(value: number, weight: number = 1): void {
+        if (!(value >= 0) || !Number.isFinite(value) || weight <= 0) return;
+        if (value < MIN_POSITIVE) {
+            this.zeroCount += weight;
+        } else {
+            const bin = Math.ceil(Math.log(value) / this.logGamma);
+            this.bins.set(bin, (this.bins.get(bin) || 0) + weight);
+        }
+        this.total += weight;
+        if (value < this.min) this.min = value;
+        if (value > this.max) this.max = value;
+    }
+
+    /** 合并另一个草图（精度须相同） */
+    merge(other: QuantileSketch): void {
+        if (other.accuracy !== this.accuracy) throw new Error('QuantileSketch: 精度不同的草图不能合并');
+        other.bins.forEach((weight, bin) => {
+            this.bins.set(bin, (this.bins.get(bin) || 0) + weight);
+        });
+        this.zeroCount += other.zeroCount;
+        this.total += other.total;
+        if (other.min < this.min) this.min = other.min;
+        if (other.max > this.max) this.max = other.max;
+    }
+
+    /**
+     * 分位数（无样本时为 0）
+     * @param q - 0 ~ 1
+     */
+    quantile(q: number): number {
+        if (this.total === 0) return 0;
+        const rank = Math.min(Math.max(q, 0), 1) * (this.total - 1);
+        if (rank < this.zeroCount) return 0;
+        const keys = Array.from(this.bins.keys()).sort((a, b) => a - b);
+        let seen = this.zeroCount;
+        for (const bin of keys) {
+            seen += this.bins.get(bin)!;
+            if (seen > rank) {
+                // 桶 (γ^(i-1), γ^i] 的代表值
+                const value = (2 * Math.pow(this.gamma, bin)) / (this.gamma + 1);
+                return Math.min(Math.max(value, this.min), this.max);
+            }
+        }
+        return this.max;
+    }
+
+    /** 常用分位数 */
+    summary(): QuantileSummary {
+        return {
+            p25: this.quantile(0.25),
+            p50: this.quantile(0.5),
+            p75: this.quantile(0.75),
+            p90: this.quantile(0.9),
+            count: this.total
+        };
+    }
+}
@@ -0,0 +1,210 @@
+import { RawAdRecord } from '../types';
+import { addCount, debugLog, recordAnomaly, startStage } from './instrumentation';
+
+// 上传文件的行解析：表头别名映射 + 日期标准化（文件导入与基准测试脚本共用）
+
+/**
+ * 把 CSV / Excel 中的日期值统一为 YYYY-MM-DD
+ * @param dateValue - 字符串、Excel 日期序列号或 Date 对象
+ */
+export const normalizeDate = (dateValue: any): string => {
+    if (!dateValue) return '';
+
+    try {
+        // 如果是数字,可能是 Excel 日期序列号
+        if (typeof dateValue === 'number') {
+            // Excel 日期序列号: 从 1900-01-01 开始的天数
+            // 但 Excel 有个 bug: 1900 年被错误地当作闰年,所以需要调整
+            const excelEpoch = new Date(1899, 11, 30); // 1899-12-30
+            const date = new Date(excelEpoch.getTime() + dateValue * 24 * 60 * 60 * 1000);
+
+            const year = date.getFullYear();
+            const month = String(date.getMonth() + 1).padStart(2, '0');
+            const day = String(date.getDate()).padStart(2, '0');
+            return `${year}-${month}-${day}`;
+        }
+
+        // 如果是 Date 对象 (Excel datetime)
+        if (dateValue instanceof Date) {
+            const year = dateValue.getFullYear();
+            const month = String(dateValue.getMonth() + 1).padStart(2, '0');
+            const day = String(dateValue.getDate()).padStart(2, '0');
+            return `${year}-${month}-${day}`;
+        }
+
+        // 转为字符串处理
+        const str = String(dateValue).trim();
+
+        // 如果包含时间部分 (例如: "2026-01-14 00:00:00")
+        if (str.includes(' ')) {
+            const datePart = str.split(' ')[0];
+            // 尝试解析并标准化
+            const date = new Date(datePart);
+            if (!isNaN(date.getTime())) {
+                const year = date.getFullYear();
+                const month = String(date.getMonth() + 1).padStart(2, '0');
+                const day = String(date.getDate()).padStart(2, '0');
+                return `${year}-${month}-${day}`;
+            }
+            return datePart;
+        }
+
+        // 如果是斜杠格式 (例如: "2026/1/14")
+        if (str.includes('/')) {
+            const date = new Date(str);
+            if (!isNaN(date.getTime())) {
+                const year = date.getFullYear();
+                const month = String(date.getMonth() + 1).padStart(2, '0');
+                const day = String(date.getDate()).padStart(2, '0');
+                return `${year}-${month}-${day}`;
+            }
+        }
+
+        // 如果已经是标准格式或需要补零 (例如: "2026-1-14")
+        if (str.includes('-')) {
+            const date = new Date(str);
+            if (!isNaN(date.getTime())) {
+                const year = date.getFullYear();
+                const month = String(date.getMonth() + 1).padStart(2, '0');
+                const day = String(date.getDate()).padStart(2, '0');
+                return `${year}-${month}-${day}`;
+            }
+        }
+
+        return str;
+    } catch (err) {
+        recordAnomaly('processRawData', '日期无法解析', () => `${dateValue}: ${err instanceof Error ? err.message : err}`);
+        return String(dateValue);
+    }
+};
+
+// ============ 表头别名映射 ============
+// 各字段可接受的列名，按优先级排列（同一行中取第一个非空的列）
+
+const FIELD_ALIASES = {
+    // 日期: Day, day, date
+    date: ['Day', 'day', 'date'],
+    // 广告系列名: Campaign name, campaign_name
+    campaign_name: ['Campaign name', 'campaign_name'],
+    // 广告组名: Ad set name, adset_name
+    adset_name: ['Ad set name', 'adset_name'],
+    // 广告名: Ad name, ad_name
+    ad_name: ['Ad name', 'ad_name'],
+    // 花费: Amount spent (USD), Cost, spend
+    spend: ['Amount spent (USD)', 'Cost', 'spend'],
+    // 展示次数: Impressions, impressions
+    impressions: ['Impressions', 'impressions'],
+    // 链接点击: Link clicks, link_clicks
+    link_clicks: ['Link clicks', 'link_clicks'],
+    // 购买次数: Purchases, Website purchases, purchases
+    purchases: ['Purchases', 'Website purchases', 'purchases'],
+    // 购买金额: Purchases conversion value, Purchase conversion value, purchase_value
+    purchase_value: ['Purchases conversion value', 'Purchase conversion value', 'purchase_value'],
+    // 加购次数: Adds to cart, Website adds to cart, adds_to_cart
+    adds_to_cart: ['Adds to cart', 'Website adds to cart', 'adds_to_cart'],
+    // 开始结账: Checkouts initiated, Website checkouts initiated, checkouts_initiated
+    checkouts_initiated: ['Checkouts initiated', 'Website checkouts initiated', 'checkouts_initiated'],
+    // 落地页浏览: Website landing page views, Landing page views, landing_page_views
+    landing_page_views: ['Website landing page views', 'Landing page views', 'landing_page_views'],
+    // 频次: Frequency, frequency
+    frequency: ['Frequency', 'frequency'],
+    // 覆盖人数: Reach, reach
+    reach: ['Reach', 'reach'],
+};
+
+// 判断有效行的列：日期或系列名至少有一个非空
+const ROW_KEY_ALIASES = ['Day', 'day', 'Campaign name', 'campaign_name'];
+
+type MappedField = keyof typeof FIELD_ALIASES;
+
+/** 每个字段对应的列（行对象的键或行数组的下标），按别名优先级排列 */
+export type HeaderMapping = Record<MappedField | 'rowKeys', Array<string | number>>;
+
+/**
+ * 按文件表头解析一次别名映射，之后每行只读映射到的列
+ * @param headers - 表头行；省略时映射为全部别名（用于不知道表头的行对象）
+ */
+export const resolveHeaderMapping = (headers?: string[]): HeaderMapping => {
+    // 重名表头取第一列（与 Papa.parse 的 header 模式一致，后面的重名列会被改名）
+    const resolve = (aliases: string[]): Array<string | number> =>
+        headers ? aliases.map(alias => headers.indexOf(alias)).filter(index => index >= 0) : aliases;
+
+    const mapping = { rowKeys: resolve(ROW_KEY_ALIASES) } as HeaderMapping;
+    (Object.keys(FIELD_ALIASES) as MappedField[]).forEach(field => {
+        mapping[field] = resolve(FIELD_ALIASES[field]);
+    });
+    return mapping;
+};
+
+const firstValue = (row: any, keys: Array<string | number>): any => {
+    for (let k = 0; k < keys.length; k++) {
+        const value = row[keys[k]];
+        if (value) return value;
+    }
+    return undefined;
+};
+
+/**
+ * 按映射把一行（行对象或行数组）转换为 RawAdRecord，无效行返回 null
+ * @param row - Papa.parse / sheet_to_json 的行
+ * @param mapping - resolveHeaderMapping 的结果
+ */
+export const mapRow = (row: any, mapping: HeaderMapping): RawAdRecord | null => {
+    if (!firstValue(row, mapping.rowKeys)) return null;
+
+    return {
+        date: normalizeDate(firstValue(row, mapping.date) || ''),
+        campaign_name: String(firstValue(row, mapping.campaign_name) || 'Unknown'),
+        adset_name: String(firstValue(row, mapping.adset_name) || 'Unknown'),
+        ad_name: String(firstValue(row, mapping.ad_name) || 'Unknown'),
+        spend: parseFloat(firstValue(row, mapping.spend) || 0),
+        impressions: parseInt(firstValue(row, mapping.impressions) || 0),
+        link_clicks: parseInt(firstValue(row, mapping.link_clicks) || 0),
+        purchases: parseInt(firstValue(row, mapping.purchases) || 0),
+        purchase_value: parseFloat(firstValue(row, mapping.purchase_value) || 0),
+        adds_to_cart: parseInt(firstValue(row, mapping.adds_to_cart) || 0),
+        checkouts_initiated: parseInt(firstValue(row, mapping.checkouts_initiated) || 0),
+        landing_page_views: parseInt(firstValue(row, mapping.landing_page_views) || 0),
+        frequency: parseFloat(firstValue(row, mapping.frequency) || 0),
+        reach: parseInt(firstValue(row, mapping.reach) || 0),
+    };
+};
+
+const ALL_ALIASES = resolveHeaderMapping();
+
+/**
+ * 把 Papa.parse / sheet_to_json 的行对象映射为 RawAdRecord
+ * @param results - 以表头为键的原始行
+ * @returns 有效记录（没有有效行时抛出错误）
+ */
+export const processRawData = (results: any[]): RawAdRecord[] => {
+    const end = startStage('processRawData');
+    try {
+        addCount('processRawData', 'rawRows', results.length);
+        debugLog('processRawData', 'Raw data received:', results.length, 'rows', 'First row columns:', () => Object.keys(results[0] || {}));
+
+        // 支持多种列名格式: Day, day, Campaign name, campaign_name 等
+        const mappedData: RawAdRecord[] = [];
+        for (let i = 0; i < results.length; i++) {
+            const record = mapRow(results[i], ALL_ALIASES);
+            if (record) mappedData.push(record);
+        }
+        if (mappedData.length < results.length) {
+            addCount('processRawData', 'skippedRows', results.length - mappedData.length);
+        }
+
+        addCount('processRawData', 'records', mappedData.length);
+        debugLog('processRawData', 'Mapped data:', mappedData.length, 'rows', 'First mapped record:', mappedData[0]);
+
+        if (mappedData.length === 0) {
+            throw new Error('未找到有效数据，请检查文件格式');
+        }
+
+        return mappedData;
+    } catch (err) {
+        console.error('❌ processRawData error:', err);
+        throw new Error(`数据处理失败: ${err instanceof Error ? err.message : '未知错误'}`);
+    } finally {
+        end();
+    }
+};
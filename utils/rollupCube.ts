@@ -0,0 +1,406 @@
+import { RawAdRecord, AdConfiguration } from '../types';
+import { ColumnTotals, EntityIndex, ColumnarDataset, MISSING, INVALID_DAY, getColumnarDataset, getEntityIndex } from './columnarStore';
+import { getDateRangeOrigin } from './dataUtils';
+import { getCompiledConfig } from './ruleEngine';
+import { toDayNumber } from './trendCalculator';
+import { addCount, startStage } from './instrumentation';
+
+// 层级汇总立方体（实体 × 天）
+//
+// 加载数据时对源数据集构建一次：每个 (天, 实体) 一个单元格，保存可加字段之和（实体 = 系列 + 广告组 + 广告 名称组合）。
+// 各 Tab 不再各自把记录重新分组为 Campaign -> AdSet -> Ad，而是按 层级 × 日期范围 × 业务线 查询：
+// - 传入的数据是日期切片（dataUtils.sliceDateRangeOf）时查询源数据集的立方体，只累加范围内的单元格
+// - 其他数组（未选日期范围、对比期为空等）对该数组本身构建立方体（同样按对象身份缓存）
+// - 结果按首次出现的顺序排列，与原先遍历记录建 Map 的顺序一致；查询结果按 (数据, 业务线, 查询) 缓存，切换 Tab 直接复用
+
+export type RollupLevel = 'Campaign' | 'AdSet' | 'Ad';
+
+// 业务线匹配语义（同 ruleEngine.getMembershipIndex）
+type MemberSemantics = 'config' | 'exact';
+
+// 单元格保存的字段（缺失值、NaN 按 0 计，与 calculateMetrics 的 `|| 0` 一致）
+export const CUBE_FIELDS = [
+    'spend', 'impressions', 'link_clicks', 'purchases', 'purchase_value', 'adds_to_cart',
+    'checkouts_initiated', 'landing_page_views', 'reach'
+] as const;
+const FIELD_COUNT = CUBE_FIELDS.length;
+
+interface Grouping {
+    entityGroup: Int32Array;    // 实体 -> 组
+    groupEntity: Int32Array;    // 组 -> 代表实体（首个）
+    count: number;
+}
+
+export interface RollupCube {
+    dataset: ColumnarDataset;
+    entities: EntityIndex;
+    cellCount: number;
+    // 单元格按天升序，同一天内按首行出现的顺序；日期无法解析的单元格在最后（dayStarts[numDays] 之后）
+    cellEntity: Int32Array;
+    cellFirstRow: Int32Array;   // 单元格在源数据中的首行（未选日期范围时按它恢复原始顺序）
+    cellSums: Float64Array;     // cellCount × FIELD_COUNT
+    dayStarts: Int32Array;      // dayStarts[k] = 第 firstDay + k 天的第一个单元格，长度 numDays + 1
+    firstDay: number;
+    numDays: number;
+    groupings: Map<string, Grouping>;
+    members: Record<MemberSemantics, WeakMap<AdConfiguration, Uint8Array>>;
+}
+
+export interface RollupQuery {
+    level: RollupLevel;
+    nested?: boolean;           // 默认 true：AdSet / Ad 按所属上级区分；false：只按本层名称合并
+    days?: [number, number];    // 额外的天序号范围（包含两端），与数据本身的日期范围取交集
+}
+
+export interface RollupRow {
+    key: string;                // 查询内唯一
+    parentKey: string;          // 嵌套查询中上级行的 key（Campaign 层为空）
+    campaign_name: string;
+    adset_name: string;
+    ad_name: string;
+    totals: ColumnTotals;
+}
+
+const cubeCache = new WeakMap<RawAdRecord[], RollupCube>();
+const queryCache = new WeakMap<RawAdRecord[], WeakMap<object, Map<string, RollupRow[]>>>();
+const NO_CONFIG = {};
+
+const buildRollupCube = (records: RawAdRecord[]): RollupCube => {
+    const dataset = getColumnarDataset(records);
+    const entities = getEntityIndex(dataset);
+    const { length, day } = dataset;
+    const { rowEntity } = entities;
+
+    // 1. 行按天做计数排序（同一天内保持原顺序），日期无法解析的行放在最后
+    let firstDay = Infinity;
+    let lastDay = -Infinity;
+    for (let i = 0; i < length; i++) {
+        const d = day[i];
+        if (d === INVALID_DAY) continue;
+        if (d < firstDay) firstDay = d;
+        if (d > lastDay) lastDay = d;
+    }
+    const numDays = firstDay <= lastDay ? lastDay - firstDay + 1 : 0;
+    const rowStarts = new Int32Array(numDays + 2);
+    for (let i = 0; i < length; i++) {
+        rowStarts[(day[i] === INVALID_DAY ? numDays : day[i] - firstDay) + 1]++;
+    }
+    for (let k = 0; k <= numDays; k++) rowStarts[k + 1] += rowStarts[k];
+    const fill = rowStarts.slice(0, numDays + 1);
+    const order = new Int32Array(length);
+    for (let i = 0; i < length; i++) order[fill[day[i] === INVALID_DAY ? numDays : day[i] - firstDay]++] = i;
+
+    // 2. 每天为出现的实体分配单元格（lastSlot 记录实体最近一次所在的天）
+    const lastSlot = new Int32Array(entities.count).fill(-1);
+    const entityCell = new Int32Array(entities.count);
+    let cellCount = 0;
+    for (let slot = 0; slot <= numDays; slot++) {
+        for (let k = rowStarts[slot]; k < rowStarts[slot + 1]; k++) {
+            const e = rowEntity[order[k]];
+            if (lastSlot[e] !== slot) {
+                lastSlot[e] = slot;
+                cellCount++;
+            }
+        }
+    }
+
+    const dayStarts = new Int32Array(numDays + 1);
+    const cellEntity = new Int32Array(cellCount);
+    const cellFirstRow = new Int32Array(cellCount);
+    const cellSums = new Float64Array(cellCount * FIELD_COUNT);
+    const columns = CUBE_FIELDS.map(field => dataset.numeric[field]);
+    lastSlot.fill(-1);
+    let next = 0;
+    for (let slot = 0; slot <= numDays; slot++) {
+        dayStarts[slot] = next;     // slot = numDays 时为无效日期单元格的起点
+        for (let k = rowStarts[slot]; k < rowStarts[slot + 1]; k++) {
+            const row = order[k];
+            const e = rowEntity[row];
+            if (lastSlot[e] !== slot) {
+                lastSlot[e] = slot;
+                entityCell[e] = next;
+                cellEntity[next] = e;
+                cellFirstRow[next] = row;
+                next++;
+            }
+            const base = entityCell[e] * FIELD_COUNT;
+            for (let f = 0; f < FIELD_COUNT; f++) {
+                const value = columns[f][row];
+                if (value && value !== MISSING) cellSums[base + f] += value;
+            }
+        }
+    }
+
+    return {
+        dataset,
+        entities,
+        cellCount,
+        cellEntity,
+        cellFirstRow,
+        cellSums,
+        dayStarts,
+        firstDay: numDays > 0 ? firstDay : 0,
+        numDays,
+        groupings: new Map(),
+        members: { config: new WeakMap(), exact: new WeakMap() }
+    };
+};
+
+/**
+ * 获取记录数组的汇总立方体（按数组对象身份缓存，加载数据时预先构建）
+ * @param records - 源数据集
+ */
+export const getRollupCube = (records: RawAdRecord[]): RollupCube => {
+    let cube = cubeCache.get(records);
+    if (!cube) {
+        const end = startStage('buildRollupCube');
+        cube = buildRollupCube(records);
+        end();
+        addCount('buildRollupCube', 'rows', records.length);
+        addCount('buildRollupCube', 'cells', cube.cellCount);
+        cubeCache.set(records, cube);
+    }
+    return cube;
+};
+
+// 实体 -> 层级分组（按名称编码，每种分组方式每个立方体只算一次）
+const getGrouping = (cube: RollupCube, level: RollupLevel, nested: boolean): Grouping => {
+    const name = `${level}:${nested ? 'nested' : 'name'}`;
+    let grouping = cube.groupings.get(name);
+    if (grouping) return grouping;
+
+    const { campaign, adset, ad, count } = cube.entities;
+    const entityGroup = new Int32Array(count);
+    const groupEntity: number[] = [];
+    if (level === 'Ad' && nested) {
+        // 实体本身就是 系列 + 广告组 + 广告
+        for (let e = 0; e < count; e++) {
+            entityGroup[e] = e;
+            groupEntity.push(e);
+        }
+    } else {
+        const lookup = new Map<string | number, number>();
+        for (let e = 0; e < count; e++) {
+            const key = level === 'Campaign' ? campaign[e]
+                : level === 'AdSet' ? (nested ? `${campaign[e]}|${adset[e]}` : adset[e])
+                    : ad[e];
+            let group = lookup.get(key);
+            if (group === undefined) {
+                group = groupEntity.length;
+                lookup.set(key, group);
+                groupEntity.push(e);
+            }
+            entityGroup[e] = group;
+        }
+    }
+    grouping = { entityGroup, groupEntity: Int32Array.from(groupEntity), count: groupEntity.length };
+    cube.groupings.set(name, grouping);
+    return grouping;
+};
+
+/**
+ * 立方体各实体是否命中业务线规则（按 立方体 × 配置对象 × 语义 缓存）
+ * 用 ruleEngine 按配置对象缓存的编译结果（与 matchesConfig / getMembershipIndex 共用），每个实体只匹配一次
+ * @param cube - 汇总立方体
+ * @param config - 业务线配置
+ * @param semantics - 'config'（与 dataUtils.matchesConfig 一致）或 'exact'（与 generateActionItems 一致）
+ * @returns 实体 -> 0 / 1
+ */
+export const getRollupMembers = (
+    cube: RollupCube,
+    config: AdConfiguration,
+    semantics: MemberSemantics = 'config'
+): Uint8Array => {
+    let members = cube.members[semantics].get(config);
+    if (!members) {
+        const { names, count } = cube.entities;
+        const compiled = getCompiledConfig(config, semantics);
+        members = new Uint8Array(count);
+        for (let e = 0; e < count; e++) members[e] = compiled.matchRecord(names(e) as RawAdRecord)[0];
+        cube.members[semantics].set(config, members);
+    }
+    return members;
+};
+
+interface RollupView {
+    cube: RollupCube;
+    from: number;       // 单元格区间 [from, to)
+    to: number;
+    ranged: boolean;    // 是否按日期范围截取（否则为整个数组，按原始顺序输出）
+}
+
+const cellRangeOf = (cube: RollupCube, startDay: number, endDay: number): [number, number] => {
+    const from = Math.max(startDay - cube.firstDay, 0);
+    const to = Math.min(endDay - cube.firstDay + 1, cube.numDays);
+    if (Number.isNaN(from) || Number.isNaN(to) || from >= to) return [0, 0];
+    return [cube.dayStarts[from], cube.dayStarts[to]];
+};
+
+// 数据 -> 立方体 + 单元格区间
+const resolveView = (data: RawAdRecord[], days?: [number, number]): RollupView => {
+    const origin = getDateRangeOrigin(data);
+    if (origin) {
+        const cube = getRollupCube(origin.source);
+        const startDay = days ? Math.max(days[0], origin.startDay) : origin.startDay;
+        const endDay = days ? Math.min(days[1], origin.endDay) : origin.endDay;
+        const [from, to] = cellRangeOf(cube, startDay, endDay);
+        return { cube, from, to, ranged: true };
+    }
+    const cube = getRollupCube(data);
+    if (days) {
+        const [from, to] = cellRangeOf(cube, days[0], days[1]);
+        return { cube, from, to, ranged: true };
+    }
+    return { cube, from: 0, to: cube.cellCount, ranged: false };
+};
+
+const toTotals = (sums: Float64Array, base: number): ColumnTotals => {
+    const totals = {} as ColumnTotals;
+    for (let f = 0; f < FIELD_COUNT; f++) totals[CUBE_FIELDS[f]] = sums[base + f];
+    return totals;
+};
+
+const runQuery = (data: RawAdRecord[], query: RollupQuery, config?: AdConfiguration): RollupRow[] => {
+    const { level, nested = true, days } = query;
+    const { cube, from, to, ranged } = resolveView(data, days);
+    const { entityGroup, groupEntity, count } = getGrouping(cube, level, nested);
+    const members = config ? getRollupMembers(cube, config) : null;
+    const { cellEntity, cellFirstRow, cellSums } = cube;
+
+    // 按单元格累加到组，记录组首次出现的位置
+    const sums = new Float64Array(count * FIELD_COUNT);
+    const firstSeen = new Int32Array(count).fill(-1);
+    const seen: number[] = [];
+    for (let c = from; c < to; c++) {
+        const e = cellEntity[c];
+        if (members && !members[e]) continue;
+        const g = entityGroup[e];
+        if (firstSeen[g] < 0) {
+            firstSeen[g] = cellFirstRow[c];
+            seen.push(g);
+        } else if (!ranged && cellFirstRow[c] < firstSeen[g]) {
+            firstSeen[g] = cellFirstRow[c];
+        }
+        const source = c * FIELD_COUNT;
+        const target = g * FIELD_COUNT;
+        for (let f = 0; f < FIELD_COUNT; f++) sums[target + f] += cellSums[source + f];
+    }
+    // 整个数组：按组在原数组中的首行排序；日期切片中记录按天排列，遍历顺序即首次出现的顺序
+    if (!ranged) seen.sort((a, b) => firstSeen[a] - firstSeen[b]);
+    addCount('queryRollup', 'cells', to - from);
+
+    const { campaign, adset, ad } = cube.entities;
+    const keyOf = (e: number, lvl: RollupLevel): string =>
+        lvl === 'Campaign' ? `${campaign[e]}` : lvl === 'AdSet' ? `${campaign[e]}|${adset[e]}` : `${campaign[e]}|${adset[e]}|${ad[e]}`;
+    const codeKey = (e: number): string => `${level === 'AdSet' ? adset[e] : ad[e]}`;
+
+    return seen.map(g => {
+        const e = groupEntity[g];
+        const names = cube.entities.names(e);
+        return {
+            key: nested || level === 'Campaign' ? keyOf(e, level) : codeKey(e),
+            parentKey: !nested || level === 'Campaign' ? '' : keyOf(e, level === 'Ad' ? 'AdSet' : 'Campaign'),
+            campaign_name: names.campaign_name,
+            adset_name: names.adset_name,
+            ad_name: names.ad_name,
+            totals: toTotals(sums, g * FIELD_COUNT)
+        };
+    });
+};
+
+/**
+ * 按层级汇总（结果按 数据 × 业务线 × 查询 缓存，不要修改返回的数组）
+ * @param data - 日期范围内的数据（App 的 filteredData / comparisonData，或任意记录数组）
+ * @param query - level 层级；nested 是否按上级区分同名实体；days 额外的天序号范围
+ * @param config - 只统计命中该业务线规则的实体
+ * @returns 各实体的累计值，按首次出现的顺序
+ */
+export const queryRollup = (data: RawAdRecord[], query: RollupQuery, config?: AdConfiguration): RollupRow[] => {
+    let byConfig = queryCache.get(data);
+    if (!byConfig) {
+        byConfig = new WeakMap();
+        queryCache.set(data, byConfig);
+    }
+    let results = byConfig.get(config || NO_CONFIG);
+    if (!results) {
+        results = new Map();
+        byConfig.set(config || NO_CONFIG, results);
+    }
+    const key = `${query.level}:${query.nested !== false}:${query.days ? query.days.join('-') : ''}`;
+    let rows = results.get(key);
+    if (!rows) {
+        rows = runQuery(data, query, config);
+        results.set(key, rows);
+    }
+    return rows;
+};
+
+/**
+ * 按实体分组求和（如按层级），每个实体只调用一次 groupOfEntity
+ * @param data - 日期范围内的数据
+ * @param groupOfEntity - 实体名称 -> 组下标（小于 0 表示不属于任何组）
+ * @param groupCount - 组数
+ * @param config - 只统计命中该业务线规则的实体
+ */
+export const sumRollupGroups = (
+    data: RawAdRecord[],
+    groupOfEntity: (names: ReturnType<EntityIndex['names']>) => number,
+    groupCount: number,
+    config?: AdConfiguration
+): ColumnTotals[] => {
+    const { cube, from, to } = resolveView(data);
+    const { names, count } = cube.entities;
+    const members = config ? getRollupMembers(cube, config) : null;
+    const entityGroup = new Int32Array(count);
+    for (let e = 0; e < count; e++) entityGroup[e] = members && !members[e] ? -1 : groupOfEntity(names(e));
+
+    const sums = new Float64Array(groupCount * FIELD_COUNT);
+    const { cellEntity, cellSums } = cube;
+    for (let c = from; c < to; c++) {
+        const g = entityGroup[cellEntity[c]];
+        if (g < 0) continue;
+        const source = c * FIELD_COUNT;
+        const target = g * FIELD_COUNT;
+        for (let f = 0; f < FIELD_COUNT; f++) sums[target + f] += cellSums[source + f];
+    }
+    addCount('queryRollup', 'cells', to - from);
+    return Array.from({ length: groupCount }, (_, g) => toTotals(sums, g * FIELD_COUNT));
+};
+
+/**
+ * 总计（可按业务线筛选）
+ * @param data - 日期范围内的数据
+ * @param config - 只统计命中该业务线规则的实体
+ */
+export const rollupTotals = (data: RawAdRecord[], config?: AdConfiguration): ColumnTotals =>
+    sumRollupGroups(data, () => 0, 1, config)[0];
+
+const roiOf = (totals: ColumnTotals): number => (totals.spend > 0 ? totals.purchase_value / totals.spend : 0);
+
+/**
+ * 全部 Campaign 的 L3D 和 L7D ROI（截至 endDate 的最近 3 / 7 天，包含结束日期；窗口限于数据的日期范围内，无花费为 0）
+ * @param data - 日期范围内的数据
+ * @param endDate - 日期范围的结束日期
+ * @returns Campaign 名称 -> { l3dROI, l7dROI }
+ */
+export const rollupL3DL7DROI = (
+    data: RawAdRecord[],
+    endDate: string
+): Map<string, { l3dROI: number; l7dROI: number }> => {
+    const endDay = toDayNumber(endDate);
+    const windowROI = (days: number) => {
+        const result = new Map<string, number>();
+        if (Number.isNaN(endDay)) return result;
+        queryRollup(data, { level: 'Campaign', days: [endDay - days + 1, endDay] })
+            .forEach(row => result.set(row.campaign_name, roiOf(row.totals)));
+        return result;
+    };
+    const l3d = windowROI(3);   // 包含结束日期共 3 天
+    const l7d = windowROI(7);   // 包含结束日期共 7 天
+
+    const result = new Map<string, { l3dROI: number; l7dROI: number }>();
+    queryRollup(data, { level: 'Campaign' }).forEach(({ campaign_name: name }) => {
+        result.set(name, { l3dROI: l3d.get(name) || 0, l7dROI: l7d.get(name) || 0 });
+    });
+    return result;
+};
@@ -0,0 +1,491 @@
+import { RawAdRecord, AdConfiguration, LayerConfiguration, FilterRule, LayerFilterRule, CampaignLayer } from '../types';
+
+// ============ 规则编译器 ============
+// 把业务线 / 层级规则预编译为匹配器：
+// - contains / not_contains 的所有关键词合并成一个多模式自动机（Aho-Corasick），一次扫描名称得到全部命中
+// - equals 使用哈希表查找
+// - 每个不同的 Campaign/AdSet/Ad 名称只计算一次，记录按名称组合复用结果
+
+type RuleField = FilterRule['field'];
+type AnyRule = (FilterRule | LayerFilterRule) & { operator: string };
+
+/**
+ * 规则匹配语义（各调用方的历史行为不同，编译后逐一保持一致）
+ * - config:       dataUtils.matchesConfig —— 忽略大小写、逗号分隔多值；无规则或规则值为空视为命中
+ * - layer:        dataUtils.matchesLayerRule —— 忽略大小写、逗号分隔多值；无规则或规则值为空视为不命中
+ * - exact:        actionItemsUtils / newAudienceUtils —— 区分大小写、整串匹配、支持 startsWith，not_contains 视为不命中
+ * - campaignOnly: benchmarkService.matchesRules —— 区分大小写、整串匹配，只识别 campaign_name
+ */
+export type RuleSemantics = 'config' | 'layer' | 'exact' | 'campaignOnly';
+
+export interface RuleGroup {
+    rules: AnyRule[];
+    logic: 'AND' | 'OR';
+}
+
+// 多模式匹配索引：每个关键词对应一个 atom，match() 返回全部 atom 的命中情况
+class PatternIndex {
+    private gotoTable: Map<number, number>[] = [new Map()];
+    private fail: number[] = [0];
+    private output: number[][] = [[]];
+    private equalsMap = new Map<string, number[]>();
+    private prefixes: { pattern: string; atom: number }[] = [];
+    private atomKeys = new Map<string, number>();
+    private built = false;
+    atomCount = 0;
+
+    private newAtom(key: string): { atom: number; isNew: boolean } {
+        const existing = this.atomKeys.get(key);
+        if (existing !== undefined) return { atom: existing, isNew: false };
+        const atom = this.atomCount++;
+        this.atomKeys.set(key, atom);
+        return { atom, isNew: true };
+    }
+
+    addContains(pattern: string): number {
+        const { atom, isNew } = this.newAtom(`c:${pattern}`);
+        if (!isNew) return atom;
+
+        let node = 0;
+        for (let i = 0; i < pattern.length; i++) {
+            const ch = pattern.charCodeAt(i);
+            let next = this.gotoTable[node].get(ch);
+            if (next === undefined) {
+                next = this.gotoTable.length;
+                this.gotoTable.push(new Map());
+                this.fail.push(0);
+                this.output.push([]);
+                this.gotoTable[node].set(ch, next);
+            }
+            node = next;
+        }
+        this.output[node].push(atom);
+        this.built = false;
+        return atom;
+    }
+
+    addEquals(pattern: string): number {
+        const { atom, isNew } = this.newAtom(`e:${pattern}`);
+        if (isNew) {
+            const atoms = this.equalsMap.get(pattern) || [];
+            atoms.push(atom);
+            this.equalsMap.set(pattern, atoms);
+        }
+        return atom;
+    }
+
+    addStartsWith(pattern: string): number {
+        const { atom, isNew } = this.newAtom(`s:${pattern}`);
+        if (isNew) this.prefixes.push({ pattern, atom });
+        return atom;
+    }
+
+    // 按 BFS 计算失配指针，并把失配链上的输出合并到当前节点
+    private build(): void {
+        const queue: number[] = [];
+        this.gotoTable[0].forEach(child => {
+            this.fail[child] = 0;
+            queue.push(child);
+        });
+        for (let head = 0; head < queue.length; head++) {
+            const node = queue[head];
+            this.gotoTable[node].forEach((child, ch) => {
+                let f = this.fail[node];
+                while (f !== 0 && !this.gotoTable[f].has(ch)) f = this.fail[f];
+                const target = this.gotoTable[f].get(ch);
+                this.fail[child] = target !== undefined && target !== child ? target : 0;
+                this.output[child] = this.output[child].concat(this.output[this.fail[child]]);
+                queue.push(child);
+            });
+        }
+        this.built = true;
+    }
+
+    match(value: string): Uint8Array {
+        if (!this.built) this.build();
+        const hits = new Uint8Array(this.atomCount);
+
+        // 空关键词（仅在区分大小写的语义下可能出现）挂在根节点上
+        for (const atom of this.output[0]) hits[atom] = 1;
+
+        let node = 0;
+        for (let i = 0; i < value.length; i++) {
+            const ch = value.charCodeAt(i);
+            while (node !== 0 && !this.gotoTable[node].has(ch)) node = this.fail[node];
+            node = this.gotoTable[node].get(ch) ?? 0;
+            const out = this.output[node];
+            for (let k = 0; k < out.length; k++) hits[out[k]] = 1;
+        }
+
+        const equalAtoms = this.equalsMap.get(value);
+        if (equalAtoms) equalAtoms.forEach(atom => { hits[atom] = 1; });
+
+        for (const { pattern, atom } of this.prefixes) {
+            if (value.startsWith(pattern)) hits[atom] = 1;
+        }
+        return hits;
+    }
+}
+
+interface CompiledRule {
+    field: RuleField;
+    atoms: number[];
+    negate: boolean;            // not_contains：所有关键词都不命中才算命中
+    constant?: boolean;         // 与名称无关的固定结果
+}
+
+interface CompiledGroup {
+    rules: CompiledRule[];
+    logic: 'AND' | 'OR';
+    emptyResult: boolean;       // 无规则时的结果
+}
+
+const FIELDS: RuleField[] = ['campaign_name', 'adset_name', 'ad_name'];
+
+const isCaseInsensitive = (semantics: RuleSemantics) => semantics === 'config' || semantics === 'layer';
+
+// 规则值拆分为关键词
+const splitTargets = (rule: AnyRule, semantics: RuleSemantics): string[] => {
+    if (isCaseInsensitive(semantics)) {
+        return rule.value.toLowerCase().split(',').map(v => v.trim()).filter(v => v !== '');
+    }
+    return [rule.value];
+};
+
+const compileRule = (rule: AnyRule, semantics: RuleSemantics, indexes: Record<RuleField, PatternIndex>): CompiledRule => {
+    const field = rule.field;
+    const index = indexes[field];
+    const fallback = semantics === 'config'; // config 语义下未知操作符视为命中
+
+    if (!index || (semantics === 'campaignOnly' && field !== 'campaign_name')) {
+        return { field, atoms: [], negate: false, constant: false };
+    }
+
+    const targets = splitTargets(rule, semantics);
+    if (targets.length === 0) {
+        return { field, atoms: [], negate: false, constant: semantics === 'config' };
+    }
+
+    switch (rule.operator) {
+        case 'contains':
+            return { field, atoms: targets.map(t => index.addContains(t)), negate: false };
+        case 'not_contains':
+            if (semantics === 'exact') return { field, atoms: [], negate: false, constant: false };
+            return { field, atoms: targets.map(t => index.addContains(t)), negate: true };
+        case 'equals':
+            return { field, atoms: targets.map(t => index.addEquals(t)), negate: false };
+        case 'startsWith':
+            if (semantics === 'exact') return { field, atoms: targets.map(t => index.addStartsWith(t)), negate: false };
+            return { field, atoms: [], negate: false, constant: fallback };
+        default:
+            return { field, atoms: [], negate: false, constant: fallback };
+    }
+};
+
+export interface CompiledRuleSet {
+    groupCount: number;
+    /** 每个规则组是否命中（返回的数组按名称组合缓存共享，请勿修改） */
+    matchRecord: (record: RawAdRecord) => Uint8Array;
+    /** 第一个命中的规则组下标，都不命中返回 -1 */
+    firstMatch: (record: RawAdRecord) => number;
+    /** 命中的全部规则组下标（升序，按名称组合缓存共享，请勿修改） */
+    matchList: (record: RawAdRecord) => number[];
+}
+
+/**
+ * 编译一组规则组
+ * @param groups - 规则组列表（每组对应一个业务线或一个层级）
+ * @param semantics - 匹配语义
+ * @param emptyResult - 无规则的组的结果
+ */
+export const compileRuleGroups = (
+    groups: RuleGroup[],
+    semantics: RuleSemantics,
+    emptyResult: boolean
+): CompiledRuleSet => {
+    const indexes = {
+        campaign_name: new PatternIndex(),
+        adset_name: new PatternIndex(),
+        ad_name: new PatternIndex()
+    };
+
+    const compiled: CompiledGroup[] = groups.map(group => ({
+        rules: (group.rules || []).map(rule => compileRule(rule, semantics, indexes)),
+        logic: group.logic,
+        emptyResult
+    }));
+
+    // 只有规则实际引用到的字段参与缓存键
+    const usedFields = FIELDS.filter(field => compiled.some(g => g.rules.some(r => r.field === field && r.constant === undefined)));
+    const lowerCase = isCaseInsensitive(semantics);
+    // 区分大小写的语义下，字段不是字符串时规则一律不命中，所以常量规则引用的字段也要参与缓存键
+    const keyFields = lowerCase
+        ? usedFields
+        : FIELDS.filter(field => compiled.some(g => g.rules.some(r => r.field === field)));
+
+    // 单字段的命中缓存：名称 -> atom 命中向量
+    const fieldCache: Record<RuleField, Map<string, Uint8Array>> = {
+        campaign_name: new Map(),
+        adset_name: new Map(),
+        ad_name: new Map()
+    };
+    // 名称组合 -> 各组结果
+    const resultCache = new Map<string, Uint8Array>();
+    const firstMatchCache = new Map<Uint8Array, number>();
+    const matchListCache = new Map<Uint8Array, number[]>();
+
+    const readField = (record: RawAdRecord, field: RuleField): string | undefined => {
+        const raw = record[field];
+        if (lowerCase) return String(raw || '').toLowerCase();
+        return typeof raw === 'string' ? raw : undefined;
+    };
+
+    const fieldHits = (field: RuleField, value: string): Uint8Array => {
+        let hits = fieldCache[field].get(value);
+        if (!hits) {
+            hits = indexes[field].match(value);
+            fieldCache[field].set(value, hits);
+        }
+        return hits;
+    };
+
+    const evaluate = (values: Partial<Record<RuleField, string>>): Uint8Array => {
+        const hitsByField: Partial<Record<RuleField, Uint8Array>> = {};
+        usedFields.forEach(field => {
+            const value = values[field];
+            if (value !== undefined) hitsByField[field] = fieldHits(field, value);
+        });
+
+        const evalRule = (rule: CompiledRule): boolean => {
+            // 区分大小写的语义下，字段不是字符串时规则一律不命中
+            if (!lowerCase && values[rule.field] === undefined) return false;
+            if (rule.constant !== undefined) return rule.constant;
+            const hits = hitsByField[rule.field]!;
+            const any = rule.atoms.some(atom => hits[atom] === 1);
+            return rule.negate ? !any : any;
+        };
+
+        const result = new Uint8Array(compiled.length);
+        compiled.forEach((group, g) => {
+            if (group.rules.length === 0) {
+                result[g] = group.emptyResult ? 1 : 0;
+                return;
+            }
+            const matched = group.logic === 'AND'
+                ? group.rules.every(evalRule)
+                : group.rules.some(evalRule);
+            result[g] = matched ? 1 : 0;
+        });
+        return result;
+    };
+
+    const matchRecord = (record: RawAdRecord): Uint8Array => {
+        const values: Partial<Record<RuleField, string>> = {};
+        let key = '';
+        for (const field of keyFields) {
+            const value = readField(record, field);
+            values[field] = value;
+            key += (value === undefined ? '\u0000' : value) + '\u0001';
+        }
+
+        let result = resultCache.get(key);
+        if (!result) {
+            result = evaluate(values);
+            resultCache.set(key, result);
+        }
+        return result;
+    };
+
+    const firstMatch = (record: RawAdRecord): number => {
+        const result = matchRecord(record);
+        let index = firstMatchCache.get(result);
+        if (index === undefined) {
+            index = result.indexOf(1);
+            firstMatchCache.set(result, index);
+        }
+        return index;
+    };
+
+    const matchList = (record: RawAdRecord): number[] => {
+        const result = matchRecord(record);
+        let list = matchListCache.get(result);
+        if (!list) {
+            list = [];
+            for (let g = 0; g < result.length; g++) {
+                if (result[g] === 1) list.push(g);
+            }
+            matchListCache.set(result, list);
+        }
+        return list;
+    };
+
+    return { groupCount: compiled.length, matchRecord, firstMatch, matchList };
+};
+
+// ============ 按配置对象缓存的编译结果 ============
+// 配置在 React state 中是不可变对象（修改时整体替换），以对象身份作为缓存键
+
+const configCache: Record<'config' | 'exact', WeakMap<AdConfiguration, CompiledRuleSet>> = {
+    config: new WeakMap(),
+    exact: new WeakMap()
+};
+const layerCache: Record<'layer' | 'campaignOnly', WeakMap<LayerConfiguration, CompiledRuleSet>> = {
+    layer: new WeakMap(),
+    campaignOnly: new WeakMap()
+};
+
+const configGroup = (config: AdConfiguration): RuleGroup => ({
+    rules: config.rules || [],
+    logic: config.rulesLogic || 'AND'
+});
+
+/**
+ * 获取单个业务线配置的编译结果（按配置对象缓存）
+ * @param semantics - 'config'（dataUtils）或 'exact'（actionItemsUtils）
+ */
+export const getCompiledConfig = (config: AdConfiguration, semantics: 'config' | 'exact' = 'config'): CompiledRuleSet => {
+    let compiled = configCache[semantics].get(config);
+    if (!compiled) {
+        compiled = compileRuleGroups([configGroup(config)], semantics, semantics === 'config');
+        configCache[semantics].set(config, compiled);
+    }
+    return compiled;
+};
+
+/**
+ * 把多个业务线配置编译为一个匹配器，一次扫描得到每条记录命中的全部业务线
+ */
+export const compileConfigs = (configs: AdConfiguration[], semantics: 'config' | 'exact' = 'config'): CompiledRuleSet => {
+    return compileRuleGroups(configs.map(configGroup), semantics, semantics === 'config');
+};
+
+const LAYER_ORDER: CampaignLayer[] = [CampaignLayer.AWARENESS, CampaignLayer.TRAFFIC, CampaignLayer.CONVERSION];
+
+/**
+ * 获取层级配置的编译结果（分组顺序：Awareness, Traffic, Conversion）
+ * @param semantics - 'layer'（dataUtils.classifyCampaign）或 'campaignOnly'（benchmarkService.getCampaignLayer）
+ */
+export const getCompiledLayerConfig = (
+    layerConfig: LayerConfiguration,
+    semantics: 'layer' | 'campaignOnly' = 'layer'
+): CompiledRuleSet => {
+    let compiled = layerCache[semantics].get(layerConfig);
+    if (!compiled) {
+        compiled = compileRuleGroups(
+            [layerConfig.awareness, layerConfig.traffic, layerConfig.conversion],
+            semantics,
+            false
+        );
+        layerCache[semantics].set(layerConfig, compiled);
+    }
+    return compiled;
+};
+
+/**
+ * 按层级规则分类一条记录，都不命中时归为 Conversion
+ */
+export const classifyLayer = (
+    record: RawAdRecord,
+    layerConfig: LayerConfiguration,
+    semantics: 'layer' | 'campaignOnly' = 'layer'
+): CampaignLayer => {
+    const index = getCompiledLayerConfig(layerConfig, semantics).firstMatch(record);
+    return index >= 0 ? LAYER_ORDER[index] : CampaignLayer.CONVERSION;
+};
+
+// ============ 业务线 -> 记录 的倒排索引 ============
+// 一次扫描数据，得到每个业务线配置命中的行号（升序），替代按配置逐个 filter 全量数据
+
+export interface MembershipIndex {
+    /** 与 configs 顺序一致，每个配置命中的行号（升序） */
+    rowIds: Int32Array[];
+    /** 按配置下标取命中的记录（首次访问时生成并缓存） */
+    records: (configIndex: number) => RawAdRecord[];
+    /** 按配置 id 取命中的记录，未知 id 返回空数组 */
+    recordsById: (configId: string) => RawAdRecord[];
+}
+
+type MembershipSemantics = 'config' | 'exact';
+
+const membershipCache = new WeakMap<
+    RawAdRecord[],
+    WeakMap<AdConfiguration[], Partial<Record<MembershipSemantics, MembershipIndex>>>
+>();
+
+const buildMembershipIndex = (
+    data: RawAdRecord[],
+    configs: AdConfiguration[],
+    semantics: MembershipSemantics
+): MembershipIndex => {
+    const compiled = compileConfigs(configs, semantics);
+    const counts = new Int32Array(configs.length);
+    const rowMatches: number[][] = new Array(data.length);
+
+    for (let i = 0; i < data.length; i++) {
+        const list = compiled.matchList(data[i]);
+        rowMatches[i] = list;
+        for (let k = 0; k < list.length; k++) counts[list[k]]++;
+    }
+
+    const rowIds = Array.from(counts, count => new Int32Array(count));
+    const fill = new Int32Array(configs.length);
+    for (let i = 0; i < data.length; i++) {
+        const list = rowMatches[i];
+        for (let k = 0; k < list.length; k++) {
+            const g = list[k];
+            rowIds[g][fill[g]++] = i;
+        }
+    }
+
+    const recordCache: (RawAdRecord[] | undefined)[] = new Array(configs.length);
+    const records = (configIndex: number): RawAdRecord[] => {
+        let cached = recordCache[configIndex];
+        if (!cached) {
+            const ids = rowIds[configIndex];
+            cached = new Array(ids.length);
+            for (let k = 0; k < ids.length; k++) cached[k] = data[ids[k]];
+            recordCache[configIndex] = cached;
+        }
+        return cached;
+    };
+
+    const indexById = new Map<string, number>();
+    configs.forEach((config, i) => {
+        if (!indexById.has(config.id)) indexById.set(config.id, i);
+    });
+    const recordsById = (configId: string): RawAdRecord[] => {
+        const i = indexById.get(configId);
+        return i === undefined ? [] : records(i);
+    };
+
+    return { rowIds, records, recordsById };
+};
+
+/**
+ * 获取数据集 × 配置列表的成员索引（按两个数组的对象身份缓存，同一版本只构建一次）
+ * @param data - 记录数组
+ * @param configs - 业务线配置列表
+ * @param semantics - 'config'（与 dataUtils.matchesConfig 一致）或 'exact'（与 generateActionItems 一致）
+ */
+export const getMembershipIndex = (
+    data: RawAdRecord[],
+    configs: AdConfiguration[],
+    semantics: MembershipSemantics = 'config'
+): MembershipIndex => {
+    let byConfigs = membershipCache.get(data);
+    if (!byConfigs) {
+        byConfigs = new WeakMap();
+        membershipCache.set(data, byConfigs);
+    }
+    let entry = byConfigs.get(configs);
+    if (!entry) {
+        entry = {};
+        byConfigs.set(configs, entry);
+    }
+    let index = entry[semantics];
+    if (!index) {
+        index = buildMembershipIndex(data, configs, semantics);
+        entry[semantics] = index;
+    }
+    return index;
+};
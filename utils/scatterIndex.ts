@@ -0,0 +1,168 @@
+// 散点图的空间索引与密度分箱（QuadrantChart 大数据量模式）
+//
+// 点按数据坐标落入固定分辨率的均匀网格，网格以 CSR 形式存储（cellStart + 点序号），
+// 悬停 / 点击命中测试与视口内计数只访问与查询矩形相交的网格。
+// 密度分箱按当前视口和像素网格统计每格各象限的点数，绘制时取点数最多的象限着色。
+
+export interface ScatterDomain {
+    xMin: number;
+    xMax: number;
+    yMin: number;
+    yMax: number;
+}
+
+export interface ScatterIndex {
+    xs: Float64Array;
+    ys: Float64Array;
+    categories: Uint8Array;     // 每个点的类别（象限序号）
+    domain: ScatterDomain;
+    resolution: number;         // 每个方向的网格数
+    cellStart: Uint32Array;     // 第 c 格的点为 points[cellStart[c] .. cellStart[c + 1])
+    points: Uint32Array;
+}
+
+export interface DensityBins {
+    cols: number;
+    rows: number;
+    counts: Uint32Array;        // 每格总点数（行优先，第 0 行在视口顶部）
+    categoryCounts: Uint32Array;    // 每格各类别点数（cols × rows × categoryCount）
+    categoryCount: number;
+    maxCount: number;
+    total: number;              // 视口内点数
+}
+
+const DEFAULT_RESOLUTION = 128;
+
+const cellOf = (value: number, min: number, max: number, resolution: number): number => {
+    if (max <= min) return 0;
+    const c = Math.floor(((value - min) / (max - min)) * resolution);
+    return c < 0 ? 0 : c >= resolution ? resolution - 1 : c;
+};
+
+/**
+ * 构建散点的网格索引
+ * @param xs - 横坐标
+ * @param ys - 纵坐标
+ * @param categories - 类别（用于分箱着色）
+ * @param domain - 数据范围（超出范围的点归入边缘格）
+ * @param resolution - 每个方向的网格数
+ */
+export const buildScatterIndex = (
+    xs: Float64Array,
+    ys: Float64Array,
+    categories: Uint8Array,
+    domain: ScatterDomain,
+    resolution: number = DEFAULT_RESOLUTION
+): ScatterIndex => {
+    const n = xs.length;
+    const cellCount = resolution * resolution;
+    const cellStart = new Uint32Array(cellCount + 1);
+    const cellIds = new Uint32Array(n);
+
+    // 计数 -> 前缀和 -> 回填
+    for (let i = 0; i < n; i++) {
+        const c = cellOf(ys[i], domain.yMin, domain.yMax, resolution) * resolution
+            + cellOf(xs[i], domain.xMin, domain.xMax, resolution);
+        cellIds[i] = c;
+        cellStart[c + 1]++;
+    }
+    for (let c = 0; c < cellCount; c++) cellStart[c + 1] += cellStart[c];
+    const fill = cellStart.slice(0, cellCount);
+    const points = new Uint32Array(n);
+    for (let i = 0; i < n; i++) points[fill[cellIds[i]]++] = i;
+
+    return { xs, ys, categories, domain, resolution, cellStart, points };
+};
+
+/**
+ * 遍历矩形范围内的点
+ * @param index - 网格索引
+ * @param rect - 查询范围（数据坐标）
+ * @param visit - 对每个命中的点序号调用
+ */
+export const forEachInRect = (index: ScatterIndex, rect: ScatterDomain, visit: (i: number) => void): void => {
+    const { xs, ys, domain, resolution, cellStart, points } = index;
+    const c0 = cellOf(rect.xMin, domain.xMin, domain.xMax, resolution);
+    const c1 = cellOf(rect.xMax, domain.xMin, domain.xMax, resolution);
+    const r0 = cellOf(rect.yMin, domain.yMin, domain.yMax, resolution);
+    const r1 = cellOf(rect.yMax, domain.yMin, domain.yMax, resolution);
+    for (let r = r0; r <= r1; r++) {
+        for (let c = c0; c <= c1; c++) {
+            const cell = r * resolution + c;
+            for (let k = cellStart[cell]; k < cellStart[cell + 1]; k++) {
+                const i = points[k];
+                const x = xs[i];
+                const y = ys[i];
+                if (x >= rect.xMin && x <= rect.xMax && y >= rect.yMin && y <= rect.yMax) visit(i);
+            }
+        }
+    }
+};
+
+/**
+ * 矩形范围内的点数
+ * @param index - 网格索引
+ * @param rect - 查询范围（数据坐标）
+ */
+export const countInRect = (index: ScatterIndex, rect: ScatterDomain): number => {
+    let count = 0;
+    forEachInRect(index, rect, () => { count++; });
+    return count;
+};
+
+/**
+ * 查找离指定位置最近的点（按屏幕距离）
+ * @param index - 网格索引
+ * @param x - 数据坐标
+ * @param y - 数据坐标
+ * @param radiusX - 横向搜索半径（数据单位，对应屏幕上的命中半径）
+ * @param radiusY - 纵向搜索半径（数据单位）
+ * @returns 点序号，范围内无点时为 -1
+ */
+export const findNearest = (index: ScatterIndex, x: number, y: number, radiusX: number, radiusY: number): number => {
+    let best = -1;
+    let bestDistance = 1;   // 归一化距离，超出椭圆半径的不算命中
+    forEachInRect(index, { xMin: x - radiusX, xMax: x + radiusX, yMin: y - radiusY, yMax: y + radiusY }, i => {
+        const dx = (index.xs[i] - x) / radiusX;
+        const dy = (index.ys[i] - y) / radiusY;
+        const distance = dx * dx + dy * dy;
+        if (distance <= bestDistance) {
+            bestDistance = distance;
+            best = i;
+        }
+    });
+    return best;
+};
+
+/**
+ * 按视口和像素网格统计密度
+ * @param index - 网格索引
+ * @param view - 当前视口（数据坐标）
+ * @param cols - 横向格数
+ * @param rows - 纵向格数
+ * @param categoryCount - 类别数
+ */
+export const binPoints = (
+    index: ScatterIndex,
+    view: ScatterDomain,
+    cols: number,
+    rows: number,
+    categoryCount: number
+): DensityBins => {
+    const counts = new Uint32Array(cols * rows);
+    const categoryCounts = new Uint32Array(cols * rows * categoryCount);
+    const scaleX = cols / (view.xMax - view.xMin || 1);
+    const scaleY = rows / (view.yMax - view.yMin || 1);
+    let maxCount = 0;
+    let total = 0;
+    forEachInRect(index, view, i => {
+        const c = Math.min(cols - 1, Math.floor((index.xs[i] - view.xMin) * scaleX));
+        const r = Math.min(rows - 1, Math.floor((view.yMax - index.ys[i]) * scaleY));
+        const cell = r * cols + c;
+        const count = ++counts[cell];
+        if (count > maxCount) maxCount = count;
+        categoryCounts[cell * categoryCount + index.categories[i]]++;
+        total++;
+    });
+    return { cols, rows, counts, categoryCounts, categoryCount, maxCount, total };
+};
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+多工作表工作簿读取（只读流式 + 进程池）
+
+- 使用 openpyxl 只读模式逐行读取，不会一次性加载全部单元格
+- 每个工作表在独立进程中读取，多表工作簿并行解析
+- list_sheet_schemas 只读表头和少量样本行，用于快速发现表结构
+
+用法:
+    python workbook_reader.py <工作簿路径> [--workers N]
+"""
+
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+
+DEFAULT_SAMPLE_ROWS = 50
+
+
+def _open(path):
+    return load_workbook(path, read_only=True, data_only=True)
+
+
+def sheet_names(path):
+    """只读取工作簿目录，不解析任何工作表"""
+    wb = _open(path)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def iter_sheet_rows(path, sheet_name):
+    """逐行产出单个工作表的值元组（只读流式）"""
+    wb = _open(path)
+    try:
+        for row in wb[sheet_name].iter_rows(values_only=True):
+            yield row
+    finally:
+        wb.close()
+
+
+def _header_names(header):
+    # 与 pd.read_excel 一致：空表头命名为 Unnamed: i；重名表头改为 x.1、x.2 ...
+    # （先处理有名称的列，已存在的名称跳过）
+    names = [str(v) if v is not None else f'Unnamed: {i}' for i, v in enumerate(header)]
+    unnamed = [i for i, v in enumerate(header) if v is None]
+    counts = {}
+    for i in [i for i in range(len(names)) if header[i] is not None] + unnamed:
+        name = base = names[i]
+        count = counts.get(base, 0)
+        while count > 0:
+            counts[base] = count + 1
+            name = f'{base}.{count}'
+            count = count + 1 if name in names else counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+
+def _value_kind(value):
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, (datetime, date)):
+        return 'date'
+    return 'text'
+
+
+def _sheet_schema(path, sheet_name, sample_rows):
+    """进程池任务：读取表头和样本行，推断每列的取值类型"""
+    wb = _open(path)
+    try:
+        ws = wb[sheet_name]
+        rows = ws.iter_rows(values_only=True, max_row=sample_rows + 1)
+        header = next(rows, None)
+        if header is None:
+            return sheet_name, {'columns': [], 'types': {}, 'rows': 0}
+
+        columns = _header_names(header)
+        kinds = [set() for _ in columns]
+        for row in rows:
+            for i, value in enumerate(row[:len(columns)]):
+                if value is not None:
+                    kinds[i].add(_value_kind(value))
+
+        types = {
+            col: (next(iter(k)) if len(k) == 1 else 'mixed' if k else 'empty')
+            for col, k in zip(columns, kinds)
+        }
+        # max_row 取自工作表的 dimension 元数据，不需要扫描全部行
+        total_rows = max((ws.max_row or 1) - 1, 0)
+        return sheet_name, {'columns': columns, 'types': types, 'rows': total_rows}
+    finally:
+        wb.close()
+
+
+def _read_sheet(path, sheet_name):
+    """进程池任务：流式读取单个工作表为 DataFrame（首行为表头）"""
+    rows = iter_sheet_rows(path, sheet_name)
+    header = next(rows, None)
+    if header is None:
+        return sheet_name, pd.DataFrame()
+
+    data = list(rows)
+    # 与 pd.read_excel 一致：去掉末尾的空行
+    while data and all(v is None for v in data[-1]):
+        data.pop()
+    return sheet_name, pd.DataFrame(data, columns=_header_names(header))
+
+
+def _map_sheets(task, path, names, workers, *args):
+    """按工作表顺序返回结果；单表时不启动进程池"""
+    if len(names) <= 1 or workers == 1:
+        return dict(task(path, name, *args) for name in names)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(task, path, name, *args) for name in names]
+        return dict(f.result() for f in futures)
+
+
+def list_sheet_schemas(path, workers=None, sample_rows=DEFAULT_SAMPLE_ROWS):
+    """返回 {工作表名: {'columns', 'types', 'rows'}}，不读取全部单元格"""
+    return _map_sheets(_sheet_schema, path, sheet_names(path), workers, sample_rows)
+
+
+def read_sheet(path, sheet_name):
+    return _read_sheet(path, sheet_name)[1]
+
+
+def read_all_sheets(path, workers=None, names=None):
+    """并行读取全部（或指定）工作表，返回按工作簿顺序排列的 {工作表名: DataFrame}"""
+    return _map_sheets(_read_sheet, path, names or sheet_names(path), workers)
+
+
+if __name__ == '__main__':
+    import time
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    args = sys.argv[2:]
+    workers = int(args[args.index('--workers') + 1]) if '--workers' in args else None
+
+    try:
+        start = time.perf_counter()
+        schemas = list_sheet_schemas(sys.argv[1], workers=workers)
+        elapsed = time.perf_counter() - start
+
+        for name, schema in schemas.items():
+            print(f"\n## {name} (~{schema['rows']} rows)")
+            for col in schema['columns']:
+                print(f"  - {col}: {schema['types'][col]}")
+        print(f'\n⏱️ {len(schemas)} sheet(s) in {elapsed:.2f}s')
+    except Exception as e:
+        print(f'Error: {e}')
+        sys.exit(1)
@@ -0,0 +1,101 @@
+import { RawAdRecord, AdConfiguration, LayerConfiguration } from '../types';
+import { QuadrantThresholds } from '../utils/quadrantUtils';
+import {
+    generateActionItems,
+    generateNewAudienceActionItems,
+    ActionItemsResult,
+    ActionAd,
+    NewAudienceActionItemsResult
+} from '../utils/actionItemsUtils';
+import { buildCampaignDiagnostics, buildAdDiagnostics } from '../utils/diagnosticsData';
+import { aggregateAndDiagnoseAds } from '../utils/aiSummaryUtils';
+import { ColumnarDataset } from '../utils/columnarStore';
+
+// 分析 Worker 的任务表与消息格式（Worker 与主线程回退路径共用）
+
+export interface AnalyticsTaskInputs {
+    actionItems: {
+        configs: AdConfiguration[];
+        thresholds: Map<string, QuadrantThresholds>;
+        layerConfig: LayerConfiguration;
+        endDate: string;
+    };
+    campaignDiagnostics: {
+        result: ActionItemsResult | null;
+        configs: AdConfiguration[];
+        layerConfig: LayerConfiguration;
+        dateRange: { start: string; end: string };
+    };
+    adDiagnostics: {
+        result: ActionItemsResult | null;
+        configs: AdConfiguration[];
+        dateRange: { start: string; end: string };
+    };
+    aggregateAds: {
+        ads: ActionAd[];
+    };
+}
+
+export type AnalyticsTask = keyof AnalyticsTaskInputs;
+
+export type ProgressCallback = (done: number, total: number) => void;
+
+/**
+ * 任务函数：input 为可结构化克隆的参数，datasets 为按 datasetKeys 顺序还原的记录数组
+ */
+const TASKS = {
+    // Business Line + New Audience Action Items（datasets: [data, comparisonData]）
+    actionItems: (input: AnalyticsTaskInputs['actionItems'], [data, comparison]: RawAdRecord[][], progress: ProgressCallback) => {
+        const { configs, thresholds, layerConfig, endDate } = input;
+        const total = configs.length + 1;
+        const businessLine = generateActionItems(data, configs, thresholds, layerConfig, comparison, done => progress(done, total));
+        const newAudience: NewAudienceActionItemsResult = generateNewAudienceActionItems(data, configs, thresholds, endDate, comparison);
+        progress(total, total);
+        return { businessLine, newAudience };
+    },
+
+    // Campaign 诊断（datasets: [data]，包含按业务线的 calculateLayerBenchmarksFor）
+    campaignDiagnostics: (input: AnalyticsTaskInputs['campaignDiagnostics'], [data]: RawAdRecord[][]) =>
+        buildCampaignDiagnostics(input.result, data, input.configs, input.layerConfig, input.dateRange),
+
+    adDiagnostics: (input: AnalyticsTaskInputs['adDiagnostics']) =>
+        buildAdDiagnostics(input.result, input.dateRange, input.configs),
+
+    aggregateAds: (input: AnalyticsTaskInputs['aggregateAds']) =>
+        aggregateAndDiagnoseAds(input.ads),
+};
+
+export type AnalyticsTaskResult<T extends AnalyticsTask> = ReturnType<typeof TASKS[T]>;
+
+/**
+ * 执行一个分析任务
+ * @param task - 任务名
+ * @param input - 任务参数
+ * @param datasets - 任务用到的记录数组
+ * @param progress - 进度回调
+ */
+export const runTask = <T extends AnalyticsTask>(
+    task: T,
+    input: AnalyticsTaskInputs[T],
+    datasets: RawAdRecord[][],
+    progress: ProgressCallback
+): AnalyticsTaskResult<T> => {
+    const handler = TASKS[task] as (input: any, datasets: RawAdRecord[][], progress: ProgressCallback) => any;
+    if (!handler) throw new Error(`未知的分析任务: ${task}`);
+    return handler(input, datasets, progress);
+};
+
+// 日期切片在源数据集中的天序号范围（null 表示使用整个数据集）
+export type DatasetRange = { startDay: number; endDay: number } | null;
+
+// 主线程 -> Worker
+export type WorkerRequest =
+    | { kind: 'dataset'; key: number; records: ColumnarDataset }
+    | { kind: 'drop'; key: number }
+    | { kind: 'run'; id: number; task: AnalyticsTask; input: any; datasetKeys: number[]; datasetRanges: DatasetRange[] };
+
+// Worker -> 主线程
+export type WorkerResponse =
+    | { kind: 'progress'; id: number; done: number; total: number }
+    | { kind: 'result'; id: number; result: any }
+    | { kind: 'error'; id: number; message: string };
@@ -0,0 +1,42 @@
+import { RawAdRecord } from '../types';
+import { recordsFromColumnar } from '../utils/columnarStore';
+import { sliceDateRangeOf } from '../utils/dataUtils';
+import { runTask, WorkerRequest, WorkerResponse } from './analyticsTasks';
+
+// 分析 Worker：缓存主线程发来的数据集（列式缓冲区包装为行视图数组，不复制数据），按消息执行任务
+// 日期切片在 Worker 内由源数据集重新切出（同样登记来源，按天预聚合的结果可跨任务复用）
+
+const scope = self as unknown as {
+    onmessage: ((event: MessageEvent<WorkerRequest>) => void) | null;
+    postMessage: (message: WorkerResponse) => void;
+};
+
+const datasets = new Map<number, RawAdRecord[]>();
+
+scope.onmessage = (event) => {
+    const message = event.data;
+
+    if (message.kind === 'dataset') {
+        datasets.set(message.key, recordsFromColumnar(message.records));
+        return;
+    }
+    if (message.kind === 'drop') {
+        datasets.delete(message.key);
+        return;
+    }
+
+    const { id, task, input, datasetKeys, datasetRanges } = message;
+    try {
+        const data = datasetKeys.map((key, i) => {
+            const source = datasets.get(key) || [];
+            const range = datasetRanges[i];
+            return range ? sliceDateRangeOf(source, range.startDay, range.endDay) : source;
+        });
+        const result = runTask(task, input, data, (done, total) => {
+            scope.postMessage({ kind: 'progress', id, done, total });
+        });
+        scope.postMessage({ kind: 'result', id, result });
+    } catch (err) {
+        scope.postMessage({ kind: 'error', id, message: err instanceof Error ? err.message : String(err) });
+    }
+};
@@ -0,0 +1,12 @@
+import { handleIngestRequest, IngestRequest, IngestResponse } from '../utils/fileIngest';
+
+// 文件导入 Worker：流式解析上传文件，把列式数据集转移回主线程
+
+const scope = self as unknown as {
+    onmessage: ((event: MessageEvent<IngestRequest>) => void) | null;
+    postMessage: (message: IngestResponse, transfer?: ArrayBuffer[]) => void;
+};
+
+scope.onmessage = (event) => {
+    handleIngestRequest(event.data, (message, transfer = []) => scope.postMessage(message, transfer));
+};